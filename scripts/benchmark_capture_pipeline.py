@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+画面監視の1フレームあたりの処理を、直列ループ (execute_step) と CapturePipeline で比べる。
+キャプチャ・縮小・OCR・ウィンドウ情報の時間は fake で模擬し、書き込みは一時ディレクトリの JSONL に実際に行う。
+
+    uv run scripts/benchmark_capture_pipeline.py --frames 100 --ocr 0.08
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.logger.application.use_cases import ScreenMonitoringUseCase
+from src.logger.application.capture_pipeline import CapturePipeline
+from src.logger.domain.services import SimilarityChecker
+from src.logger.infrastructure.mac_os.fake_services import FakeScreenCapturer, FakeOcrService, FakeWindowInfoService
+from src.logger.infrastructure.persistence.jsonl_logger import JsonlLogger
+
+
+def build_use_case(logs_dir: str, args) -> ScreenMonitoringUseCase:
+    return ScreenMonitoringUseCase(
+        screen_service=FakeScreenCapturer(args.capture, args.resize, change_every=args.change_every),
+        ocr_service=FakeOcrService(args.ocr),
+        window_service=FakeWindowInfoService(args.window),
+        persistence_service=JsonlLogger(output_dir=logs_dir),
+        similarity_service=SimilarityChecker()
+    )
+
+
+def run_serial(args) -> dict:
+    with tempfile.TemporaryDirectory() as logs_dir:
+        use_case = build_use_case(logs_dir, args)
+        saved = 0
+        started = time.perf_counter()
+        for _ in range(args.frames):
+            if use_case.execute_step() is not None:
+                saved += 1
+        elapsed = time.perf_counter() - started
+    return {"frames": args.frames, "saved": saved, "seconds": elapsed}
+
+
+def run_pipeline(args) -> dict:
+    with tempfile.TemporaryDirectory() as logs_dir:
+        pipeline = CapturePipeline(
+            build_use_case(logs_dir, args),
+            interval=0.0,
+            queue_size=args.queue_size,
+            block_when_full=True,
+            max_frames=args.frames
+        )
+        pipeline.start()
+        pipeline.wait()
+        stats = pipeline.get_stats()
+    return {"frames": args.frames, "saved": stats["end_to_end"]["saved"], "seconds": stats["elapsed"], "stats": stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the serial monitoring loop with the staged capture pipeline")
+    parser.add_argument("--frames", type=int, default=100, help="Frames to capture")
+    parser.add_argument("--capture", type=float, default=0.02, help="Fake capture time (s)")
+    parser.add_argument("--resize", type=float, default=0.01, help="Fake resize time (s)")
+    parser.add_argument("--ocr", type=float, default=0.08, help="Fake OCR time (s)")
+    parser.add_argument("--window", type=float, default=0.01, help="Fake window lookup time (s)")
+    parser.add_argument("--change-every", type=int, default=1, help="The screen changes every N frames")
+    parser.add_argument("--queue-size", type=int, default=4, help="Pipeline queue size between stages")
+    args = parser.parse_args()
+
+    for name, run in (("serial", run_serial), ("pipeline", run_pipeline)):
+        r = run(args)
+        print(
+            f"{name:>8}  frames={r['frames']:>4}  saved={r['saved']:>4}  {r['seconds']:.2f}s  "
+            f"{r['frames'] / r['seconds']:.1f} frames/sec"
+        )
+        if "stats" in r:
+            for stage, s in r["stats"]["stages"].items():
+                print(
+                    f"          {stage:>8}: {s['throughput']:.1f}/s  utilization {s['utilization']:.0%}  "
+                    f"latency avg {s['latency_avg'] * 1000:.0f} ms"
+                )
+            e2e = r["stats"]["end_to_end"]
+            print(f"          capture -> persist latency avg {e2e['latency_avg'] * 1000:.0f} ms / max {e2e['latency_max'] * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Whisper のハルシネーション判定を、長い文字起こしで計測する。
+以前の実装 (n-gram ごとの text.count + 定型句を1つずつ `in` で探す) と HallucinationFilter を比べる。
+
+    uv run scripts/benchmark_hallucination_filter.py --lengths 1000 10000 100000 --extra-phrases 0 500
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.logger.infrastructure.ai.hallucination_filter import HallucinationFilter, load_phrases
+
+
+def legacy_is_hallucination(text, phrases):
+    """以前の WhisperAudioService._is_hallucination (定型句だけ引数にしたもの)"""
+    text = text.strip()
+    if not text:
+        return False
+    if len(text) > 10:
+        for n in range(2, 5):
+            if text.count(text[:n]) > 5:
+                return True
+        char_counts = {}
+        for char in text:
+            char_counts[char] = char_counts.get(char, 0) + 1
+        if max(char_counts.values()) / len(text) > 0.6:
+            return True
+    for phrase in phrases:
+        if phrase in text:
+            return True
+    return False
+
+
+def make_transcript(length: int, rng: random.Random) -> str:
+    """
+    定型句も繰り返しも含まない、普通の会話に近い文字列。
+    先頭は他に現れない文字列にして、以前の実装が先頭の n-gram の数え上げで打ち切らない (全ルールを通る) ようにする。
+    """
+    words = [
+        "今日は", "会議の", "資料を", "共有します", "次に", "予算の", "話です", "よろしいでしょうか",
+        "そうですね", "確認して", "おきます", "the", "deadline", "is", "next", "week", "、", "。"
+    ]
+    parts, size = ["【開始】"], 4
+    while size < length:
+        w = rng.choice(words)
+        parts.append(w)
+        size += len(w)
+    return "".join(parts)[:length]
+
+
+def make_extra_phrases(n: int, rng: random.Random):
+    alphabet = "アイウエオカキクケコサシスセソタチツテト"
+    return ["".join(rng.choice(alphabet) for _ in range(8)) for _ in range(n)]
+
+
+def timeit(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Whisper hallucination filter on long transcripts")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 10000, 100000], help="Transcript lengths (chars)")
+    parser.add_argument("--extra-phrases", type=int, nargs="+", default=[0, 500], help="Random phrases added to the bundled list")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    base_phrases = load_phrases()
+    for extra in args.extra_phrases:
+        phrases = base_phrases + make_extra_phrases(extra, rng)
+        hallucination_filter = HallucinationFilter(phrases)
+        for length in args.lengths:
+            text = make_transcript(length, rng)
+            legacy = timeit(lambda: legacy_is_hallucination(text, phrases), args.repeat)
+            new = timeit(lambda: hallucination_filter.check(text), args.repeat)
+            print(
+                f"phrases={len(phrases):>5}  chars={length:>7}  "
+                f"legacy {legacy * 1000:8.2f} ms  filter {new * 1000:8.2f} ms  "
+                f"(legacy={legacy_is_hallucination(text, phrases)}, filter={hallucination_filter.check(text)})"
+            )
+
+
+if __name__ == "__main__":
+    main()
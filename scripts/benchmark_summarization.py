@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+要約の追いつき (バックログ処理) のスループットを、FakeLlmProvider で計測する。
+実際のモデルは読み込まない。
+
+    uv run scripts/benchmark_summarization.py --entries 400 --chunk-size 10 --batch-sizes 1 4 8
+    uv run scripts/benchmark_summarization.py --compare-combined  # visual+audio を別々 / まとめて要約した場合の呼び出し回数
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from src.logger.application.log_ingestion import LogIngestionService
+from src.logger.application.summarization_use_case import LogSummarizationUseCase
+from src.logger.application.combined_summarization_use_case import CombinedSummarizationUseCase
+from src.logger.infrastructure.llm.fake_provider import FakeLlmProvider
+
+
+def write_backlog(logs_dir: str, n_entries: int):
+    start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    day_dir = os.path.join(logs_dir, start.strftime('%Y-%m-%d'))
+    os.makedirs(day_dir, exist_ok=True)
+    with open(os.path.join(day_dir, "activity.jsonl"), "w", encoding="utf-8") as f:
+        for i in range(n_entries):
+            ts = start + timedelta(seconds=2 * i)
+            entry = {
+                "timestamp": ts.isoformat(),
+                "screen": {"ocr_text": f"line {i} " * 20, "window_title": f"Window {i % 7}", "app_name": "Code"},
+                "audio": {"transcript": f"talking about item {i}" if i % 3 == 0 else ""},
+                "metadata": {"is_screen_change": True}
+            }
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def run(n_entries: int, chunk_size: int, batch_size: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as logs_dir:
+        write_backlog(logs_dir, n_entries)
+        llm = FakeLlmProvider(
+            call_overhead_seconds=args.call_overhead,
+            seconds_per_prompt=args.per_prompt,
+            batch_efficiency=args.batch_efficiency
+        )
+        summarizer = LogSummarizationUseCase(
+            llm, summary_type="visual", logs_root_dir=logs_dir, chunk_size=chunk_size, batch_size=batch_size
+        )
+        ingestor = LogIngestionService(logs_root_dir=logs_dir)
+        ingestor.add_consumer(summarizer)
+
+        started = time.perf_counter()
+        ingestor.run_once()
+        elapsed = time.perf_counter() - started
+        return {
+            "batch_size": batch_size,
+            "chunks": llm.prompts_processed,
+            "llm_calls": llm.calls,
+            "seconds": elapsed,
+            "chunks_per_sec": llm.prompts_processed / elapsed if elapsed > 0 else 0.0
+        }
+
+
+def run_combined_comparison(n_entries: int, chunk_size: int, args):
+    """
+    visual / audio を別々に要約する場合と、1回の呼び出しでまとめて要約する場合を比べる。
+    """
+    for combined in (False, True):
+        with tempfile.TemporaryDirectory() as logs_dir:
+            write_backlog(logs_dir, n_entries)
+            llm = FakeLlmProvider(call_overhead_seconds=args.call_overhead, seconds_per_prompt=args.per_prompt)
+            ingestor = LogIngestionService(logs_root_dir=logs_dir)
+            if combined:
+                ingestor.add_consumer(CombinedSummarizationUseCase(llm, logs_root_dir=logs_dir, chunk_size=chunk_size, batch_size=1))
+            else:
+                for summary_type in ("visual", "audio"):
+                    ingestor.add_consumer(LogSummarizationUseCase(
+                        llm, summary_type=summary_type, logs_root_dir=logs_dir, chunk_size=chunk_size, batch_size=1
+                    ))
+
+            started = time.perf_counter()
+            ingestor.run_once()
+            elapsed = time.perf_counter() - started
+            print(
+                f"{'combined' if combined else 'separate':>8}  prompts={llm.prompts_processed:>4}  "
+                f"llm_calls={llm.calls:>4}  {elapsed:.2f}s"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched summarization with a fake LLM")
+    parser.add_argument("--entries", type=int, default=200, help="Number of backlog entries")
+    parser.add_argument("--chunk-size", type=int, default=10, help="Entries per summary chunk")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8], help="Batch sizes to compare")
+    parser.add_argument("--call-overhead", type=float, default=0.05, help="Fake fixed cost per LLM call (s)")
+    parser.add_argument("--per-prompt", type=float, default=0.1, help="Fake cost per prompt (s)")
+    parser.add_argument("--batch-efficiency", type=float, default=0.5, help="Fake per-prompt cost multiplier in a batch")
+    parser.add_argument("--compare-combined", action="store_true", help="Compare separate vs combined visual+audio summarization")
+    args = parser.parse_args()
+
+    if args.compare_combined:
+        run_combined_comparison(args.entries, args.chunk_size, args)
+        return
+
+    for batch_size in args.batch_sizes:
+        r = run(args.entries, args.chunk_size, batch_size, args)
+        print(
+            f"batch_size={r['batch_size']:>3}  chunks={r['chunks']:>4}  llm_calls={r['llm_calls']:>4}  "
+            f"{r['seconds']:.2f}s  {r['chunks_per_sec']:.2f} chunks/sec"
+        )
+
+
+if __name__ == "__main__":
+    main()
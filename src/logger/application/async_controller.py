@@ -0,0 +1,196 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .controller import ActivityLoggerController
+from .async_use_cases import AsyncScreenMonitoringUseCase
+from .event_bus import AsyncBroadcast, AsyncSubscription, call_in_loop
+
+
+class AsyncActivityLoggerController(ActivityLoggerController):
+    """
+    ActivityLoggerController の asyncio 版。start() / stop() / summarize_now() を await し、
+    新しいエントリ・要約を async for で受け取る (entries() / summaries())。
+
+    - 監視ループはイベントループ上のタスク。各ステップは AsyncScreenMonitoringUseCase で、
+      キャプチャ・OCR・書き込みは executor で動き、step_timeout 秒を超えたら打ち切って次のステップへ進む
+    - 要約 (LogIngestionService の読み込みと LLM) は1スレッドの executor で1回分ずつ動かすタスク
+    - 録音・ロールアップ・ログ保持・モデルの手放しはスレッド版と同じくそれぞれのスレッドで動く
+    - コールバック (on_log_entry / on_status_change / on_error / on_summary) も、
+      別スレッドからの呼び出しはイベントループ上に移してから呼ぶ (GUI は自分のループ上で画面を更新できる)
+
+    引数は ActivityLoggerController と同じ (lazy_init の既定は True。初期化は start() の中で行う)。
+    """
+    def __init__(
+        self,
+        step_timeout: Optional[float] = None,
+        summary_poll_interval: float = 1.0,
+        stream_queue_size: int = 100,
+        **kwargs
+    ):
+        kwargs.setdefault("lazy_init", True)
+        super().__init__(**kwargs)
+        # 1ステップ (キャプチャ〜書き込み) の制限時間 (None なら無制限)
+        self.step_timeout = step_timeout
+        # 要約タスクが新しいエントリを待つ間隔 (この間隔でキャンセル・停止に応じる)
+        self.summary_poll_interval = summary_poll_interval
+        self.async_use_case: Optional[AsyncScreenMonitoringUseCase] = None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._summary_task: Optional[asyncio.Task] = None
+        # 要約は1つずつ (読み込み位置と状態ファイルを共有するため)
+        self._summary_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarization")
+        self._entry_stream = AsyncBroadcast(maxsize=stream_queue_size)
+        self._summary_stream = AsyncBroadcast(maxsize=stream_queue_size)
+        self.timed_out_summaries = 0
+
+    async def setup(self):
+        """
+        AI サービスの初期化は別スレッドで、OS サービスの初期化はイベントループのスレッドで行う。
+        """
+        self._bind_loop()
+        await asyncio.to_thread(self.setup_ai_services)
+        self.setup_os_services()
+        self.async_use_case = AsyncScreenMonitoringUseCase(self.use_case, step_timeout=self.step_timeout)
+
+    def _bind_loop(self):
+        self._loop = asyncio.get_running_loop()
+        self._entry_stream.bind(self._loop)
+        self._summary_stream.bind(self._loop)
+
+    def entries(self) -> AsyncSubscription:
+        """
+        保存された LogEntry を async for で受け取る。呼んだ時点から購読し、stop() で終わる。
+        """
+        return self._entry_stream.subscribe()
+
+    def summaries(self) -> AsyncSubscription:
+        """
+        生成された要約を (summary_type, summary_text) として async for で受け取る。stop() で終わる。
+        """
+        return self._summary_stream.subscribe()
+
+    # --- コールバックはイベントループ上で呼ぶ ---
+
+    def _call_in_loop(self, fn: Callable[..., Any], *args):
+        call_in_loop(self._loop, fn, *args)
+
+    def _handle_log_entry(self, entry):
+        self._entry_stream.publish(entry)
+        self._call_in_loop(super()._handle_log_entry, entry)
+
+    def _handle_summary(self, summary_type: str, summary_data: dict):
+        self._summary_stream.publish((summary_type, summary_data.get("summary", "")))
+        self._call_in_loop(super()._handle_summary, summary_type, summary_data)
+
+    def _notify_status(self, status: str):
+        self._call_in_loop(super()._notify_status, status)
+
+    def _notify_error(self, error: str):
+        self._call_in_loop(super()._notify_error, error)
+
+    # --- ライフサイクル ---
+
+    async def start(self):
+        if self.is_running:
+            return
+        if self.async_use_case is None:
+            await self.setup()
+        self._bind_loop()
+
+        self.should_stop = False
+        self.is_running = True
+        self._start_background_services(start_ingestor=False)
+
+        if self.log_ingestor:
+            self._summary_task = asyncio.create_task(self._summarization_loop())
+        if self.capture_pipeline:
+            self._start_pipeline()
+            return
+        self._monitor_task = asyncio.create_task(self._async_monitoring_loop())
+
+    async def stop(self):
+        """
+        監視・要約のタスクをキャンセルして終わるのを待ち、他のサービスを止め、entries() / summaries() を終わらせる。
+        """
+        self.should_stop = True
+        tasks = [t for t in (self._monitor_task, self._summary_task) if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._monitor_task = self._summary_task = None
+
+        if self.pipeline:
+            # キューに残っているフレームは保存してから止める
+            await asyncio.to_thread(self.pipeline.stop)
+            self.pipeline = None
+            self._notify_status("Stopped")
+            self.is_running = False
+        if self.log_ingestor:
+            # 実行中の要約が終わってから購読を外す (同じ executor に積む)
+            self._summary_executor.submit(self.log_ingestor.stop)
+        self._stop_background_services(stop_ingestor=False)
+        self._entry_stream.close()
+        self._summary_stream.close()
+
+    async def _async_monitoring_loop(self):
+        self._notify_status("Running")
+        loop = asyncio.get_running_loop()
+        carried = None # 書き込む前に打ち切ったステップの文字起こし (次のステップで使う)
+        try:
+            while not self.should_stop:
+                started = loop.time()
+                transcript, audio_span = carried or self._pop_transcript()
+                carried = None
+                try:
+                    entry = await self.async_use_case.execute_step(audio_transcript=transcript, audio_span=audio_span)
+                    if entry:
+                        self._handle_log_entry(entry)
+                except TimeoutError:
+                    if transcript:
+                        carried = (transcript, audio_span)
+                    self._notify_error(f"Monitoring step timed out after {self.async_use_case.step_timeout}s")
+                except Exception as e:
+                    self._notify_error(f"Error in monitoring loop: {e}")
+
+                await asyncio.sleep(max(0, self.interval - (loop.time() - started)))
+        finally:
+            self._notify_status("Stopped")
+            self.is_running = False
+
+    async def _run_summary(self, fn: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._summary_executor, fn, *args)
+
+    async def _summarization_loop(self):
+        # 起動時にファイルから追いつき、以後は監視ループが publish したエントリを受け取って要約する
+        await self._run_summary(self.log_ingestor.catch_up)
+        while not self.should_stop:
+            await self._run_summary(self.log_ingestor.poll, self.summary_poll_interval)
+            if not self.log_ingestor.is_subscribed:
+                await asyncio.sleep(self.summary_poll_interval)
+
+    async def summarize_now(self, timeout: Optional[float] = None) -> bool:
+        """
+        溜まっているログを今すぐ読んで要約する (要約タスクの合間に実行)。
+        timeout 秒を超えたら待つのをやめて False を返す (実行中の要約はそのまま続く)。
+        """
+        if not self.log_ingestor:
+            return False
+        try:
+            async with asyncio.timeout(timeout):
+                await self._run_summary(self.log_ingestor.run_once)
+            return True
+        except TimeoutError:
+            self.timed_out_summaries += 1
+            return False
+
+    def get_async_stats(self) -> dict:
+        """
+        打ち切った・キャンセルしたステップの数、待つのをやめた要約の数。
+        """
+        stats = {"timed_out_summaries": self.timed_out_summaries}
+        if self.async_use_case:
+            stats["timed_out_steps"] = self.async_use_case.timed_out_steps
+            stats["cancelled_steps"] = self.async_use_case.cancelled_steps
+        return stats
@@ -0,0 +1,129 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+from ..domain.entities import LogEntry
+from .use_cases import ScreenMonitoringUseCase
+from .metrics import hot_path_metrics
+
+
+class AsyncScreenMonitoringUseCase:
+    """
+    ScreenMonitoringUseCase.execute_step() の await できる版 (判定は execute_step() と同じ)。
+
+    - キャプチャ・縮小・OCR・ウィンドウ情報・書き込みはブロックするので executor で動かす。
+      既定は1スレッドの executor で、スレッド版の監視ループと同じく1つずつ順に実行する
+    - 処理の合間でキャンセルできる (キャプチャ後にキャンセルされれば OCR は走らない)。
+      executor で実行中の処理そのものは止められないので、終わるのを待たずに結果を捨てる
+    - 書き込みを始める前に step_timeout 秒を超えたステップは asyncio.TimeoutError (TimeoutError) で打ち切る。
+      打ち切ったステップは前回フレームの状態を更新しないので、次のステップで同じ変化をもう一度判定する
+    - 書き込みは一度始めたら制限時間やキャンセルに関わらず最後まで行い、前回フレームの状態も更新する
+      (半端なエントリを作らず、書いたエントリを次のステップでもう一度書かない)
+    - 所要時間と件数は execute_step() と同じ名前で hot_path_metrics に記録する (executor の待ち時間を含む)
+    """
+    def __init__(
+        self,
+        use_case: ScreenMonitoringUseCase,
+        executor: Optional[Executor] = None,
+        step_timeout: Optional[float] = None
+    ):
+        self.use_case = use_case
+        self._own_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix="monitoring")
+        self.step_timeout = step_timeout
+        # 打ち切り・キャンセルされたステップの数
+        self.timed_out_steps = 0
+        self.cancelled_steps = 0
+
+    async def _run(self, name: Optional[str], fn: Callable[..., Any], *args) -> Any:
+        if name is None:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        with hot_path_metrics.timer(name):
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    async def execute_step(
+        self,
+        audio_transcript: str = "",
+        audio_span: Optional[Tuple[datetime, datetime]] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[LogEntry]:
+        """
+        1ステップ実行する。変化があれば保存して LogEntry を返し、なければ None を返す。
+        timeout: このステップの制限時間 (None なら step_timeout)
+        """
+        timeout = timeout if timeout is not None else self.step_timeout
+        hot_path_metrics.increment("monitor.frames")
+        try:
+            with hot_path_metrics.timer("monitor.step"):
+                async with asyncio.timeout(timeout):
+                    prepared = await self._prepare(audio_transcript, audio_span)
+                if prepared is None:
+                    return None
+                entry, current_feature, text = prepared
+                # 書き込みは制限時間の外で行う (時間は save_entry() が記録する)
+                await asyncio.shield(self._save(entry, current_feature, text))
+                return entry
+        except TimeoutError:
+            self.timed_out_steps += 1
+            raise
+        except asyncio.CancelledError:
+            self.cancelled_steps += 1
+            raise
+
+    async def _prepare(
+        self,
+        audio_transcript: str,
+        audio_span: Optional[Tuple[datetime, datetime]]
+    ) -> Optional[Tuple[LogEntry, Any, str]]:
+        """
+        キャプチャからエントリの作成まで。保存するものがなければ None。
+        Returns: (entry, 縮小画像, OCR テキスト)
+        """
+        uc = self.use_case
+        metrics = hot_path_metrics
+        now = datetime.now()
+
+        # 1. Capture
+        image_ref = await self._run("monitor.capture", uc.screen.capture_screen)
+        if image_ref is None:
+            metrics.increment("monitor.capture_failed")
+            return None
+
+        # 2. Similarity Check (変化なし、音声もなし -> スキップ)
+        current_feature = await self._run("monitor.resize", uc.screen.resize_for_comparison, image_ref)
+        with metrics.timer("monitor.similarity"):
+            visual_similar, skip = uc.check_visual_change(current_feature, uc.last_img_feature, bool(audio_transcript))
+        if skip:
+            metrics.increment("monitor.frames_skipped")
+            return None
+
+        # 3. OCR
+        text = await self._run("monitor.ocr", uc.ocr.extract_text, image_ref)
+        metrics.increment("monitor.ocr_runs")
+        with metrics.timer("monitor.text_similarity"):
+            is_screen_change, log_text = uc.check_text_change(text, uc.last_ocr_text, visual_similar, bool(audio_transcript))
+        if log_text is None:
+            uc.last_img_feature = current_feature
+            uc.last_ocr_text = text
+            metrics.increment("monitor.frames_unchanged")
+            return None
+
+        window_info = await self._run("monitor.window", uc.window.get_active_window_title)
+
+        # 4. Entity作成
+        entry = uc.build_entry(now, log_text, window_info, is_screen_change, audio_transcript, audio_span)
+        return entry, current_feature, text
+
+    async def _save(self, entry: LogEntry, current_feature: Any, text: str):
+        """
+        5. Save & 6. Update State。shield して呼ぶので、呼び出し側がキャンセルされても最後まで進む。
+        """
+        await self._run(None, self.use_case.save_entry, entry)
+        self.use_case.last_img_feature = current_feature
+        self.use_case.last_ocr_text = text
+
+    def close(self):
+        """自前の executor を止める (実行中の処理は待たない)"""
+        if self._own_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
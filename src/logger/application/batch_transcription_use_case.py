@@ -0,0 +1,150 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+
+from ..domain.entities import LogEntry, ScreenData, TranscriptSegment
+from ..domain.interfaces import TranscriberInterface
+from ..infrastructure.ai.vad import FrameVad
+from ..infrastructure.ai.hallucination_filter import HallucinationFilter
+from .interfaces import AudioFileReaderInterface, PersistenceInterface
+
+sys_logger = logging.getLogger("system_summarizer")
+
+
+@dataclass
+class FileTranscriptionResult:
+    """1ファイル分の処理結果"""
+    path: str
+    recorded_at: datetime
+    duration_seconds: float = 0.0
+    voiced_seconds: float = 0.0 # VAD を通って文字起こしに送った秒数
+    chunks: int = 0
+    entries: int = 0 # activity.jsonl に書いたエントリ数
+    filtered: int = 0 # ハルシネーションとして捨てた数
+    error: Optional[str] = None
+    entry_dates: List[str] = field(default_factory=list) # 書き込んだ日 (YYYY-MM-DD)
+
+
+class BatchTranscriptionUseCase:
+    """
+    録音ファイルを、マイク入力と同じ流れ (VAD → 文字起こし → ハルシネーションフィルタ) で文字起こしし、
+    録音時刻のタイムスタンプ付きエントリとしてその日の activity.jsonl に書き込む。
+
+    - ファイルは chunk_seconds ずつ読み、全体をメモリに載せない
+    - VAD の発話区間ごとに1エントリ (timestamp は発話の開始時刻、metadata に audio_start / audio_end)
+    - 最大 max_concurrent_files 個のファイルを並行して処理する (読み込み・VAD・書き込みが文字起こしと重なる)。
+      文字起こしエンジンを同時に1つしか動かせない場合は、transcriber 側で排他すること
+    """
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        persistence: PersistenceInterface,
+        reader: AudioFileReaderInterface,
+        hallucination_filter: Optional[HallucinationFilter] = None,
+        sample_rate: int = 16000,
+        chunk_seconds: float = 30.0,
+        vad_threshold: float = 0.015,
+        max_concurrent_files: int = 2
+    ):
+        self.transcriber = transcriber
+        self.persistence = persistence
+        self.reader = reader
+        self.hallucination_filter = hallucination_filter or HallucinationFilter.from_file()
+        self.sample_rate = sample_rate
+        self.chunk_samples = int(chunk_seconds * sample_rate)
+        self.vad_threshold = vad_threshold
+        self.max_concurrent_files = max(1, max_concurrent_files)
+        # 書き込みとフィルタの集計はファイルをまたいで共有するので、ここだけ直列にする
+        self._write_lock = threading.Lock()
+
+        # コールバック (進捗表示用)
+        self.on_entry: Optional[Callable[[LogEntry], None]] = None
+        self.on_file_done: Optional[Callable[[FileTranscriptionResult], None]] = None
+
+    def run(self, jobs: List[Tuple[str, datetime]]) -> List[FileTranscriptionResult]:
+        """
+        jobs: (ファイルパス, 録音開始時刻) のリスト。結果は jobs と同じ順で返す。
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_files) as pool:
+            return list(pool.map(lambda job: self.transcribe_file(*job), jobs))
+
+    def transcribe_file(self, path: str, recorded_at: datetime) -> FileTranscriptionResult:
+        result = FileTranscriptionResult(path=path, recorded_at=recorded_at)
+        # 雑音レベルの推定はファイルごと
+        vad = FrameVad(sample_rate=self.sample_rate, min_energy=self.vad_threshold)
+        offset = 0 # ファイル先頭からのサンプル数
+        try:
+            for chunk in self.reader.read_chunks(path, self.chunk_samples):
+                result.chunks += 1
+                self._process_chunk(chunk, offset, vad, result)
+                offset += len(chunk)
+        except Exception as e:
+            result.error = str(e)
+            sys_logger.error(f"Failed to transcribe {path}: {e}")
+        result.duration_seconds = offset / self.sample_rate
+
+        if self.on_file_done:
+            self.on_file_done(result)
+        return result
+
+    def _process_chunk(self, chunk, offset: int, vad: FrameVad, result: FileTranscriptionResult):
+        regions = vad.detect(chunk)
+        if not regions:
+            return
+        gap_ms = 100.0
+        voiced = vad.voiced_audio(chunk, regions, gap_ms=gap_ms)
+        result.voiced_seconds += sum(end - start for start, end in regions) / self.sample_rate
+
+        segments = self.transcriber.transcribe(voiced, self.sample_rate)
+
+        # つなげた音声の中の時刻を、どの発話区間のものか振り分ける
+        gap = int(self.sample_rate * gap_ms / 1000) if len(regions) > 1 else 0
+        texts: List[List[TranscriptSegment]] = [[] for _ in regions]
+        bounds = []
+        position = 0
+        for start, end in regions:
+            bounds.append(position + (end - start) + gap)
+            position = bounds[-1]
+        for s in segments:
+            middle = (s.start + s.end) / 2 * self.sample_rate
+            index = next((i for i, bound in enumerate(bounds) if middle < bound), len(regions) - 1)
+            texts[index].append(s)
+
+        for (start, end), region_segments in zip(regions, texts):
+            text = "".join(s.text for s in region_segments).strip()
+            if text:
+                self._write_entry(text, offset + start, offset + end, result)
+
+    def _write_entry(self, text: str, start_sample: int, end_sample: int, result: FileTranscriptionResult):
+        audio_start = result.recorded_at + timedelta(seconds=start_sample / self.sample_rate)
+        audio_end = result.recorded_at + timedelta(seconds=end_sample / self.sample_rate)
+        with self._write_lock:
+            match = self.hallucination_filter.check(text)
+            if match is not None:
+                result.filtered += 1
+                sys_logger.info(f"Filtered transcript from {os.path.basename(result.path)} ({match.rule}): {text[:30]}")
+                return
+
+            entry = LogEntry(
+                timestamp=audio_start,
+                screen=ScreenData(timestamp=audio_start),
+                audio_transcript=text,
+                metadata={
+                    "is_screen_change": False,
+                    "source": "audio_file",
+                    "audio_file": os.path.basename(result.path),
+                    "audio_start": audio_start.isoformat(),
+                    "audio_end": audio_end.isoformat()
+                }
+            )
+            self.persistence.save(entry)
+            result.entries += 1
+            date_str = audio_start.strftime('%Y-%m-%d')
+            if date_str not in result.entry_dates:
+                result.entry_dates.append(date_str)
+        if self.on_entry:
+            self.on_entry(entry)
@@ -0,0 +1,303 @@
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..domain.entities import LogEntry
+from .use_cases import ScreenMonitoringUseCase
+from .metrics import hot_path_metrics
+
+# パイプラインを止める時に、上流から順に流して各ステージを終わらせる目印
+_STOP = object()
+
+# (文字起こし, その音声の (開始, 終了) 時刻)。文字起こしがなければ ("", None)
+AudioSource = Callable[[], Tuple[str, Optional[Tuple[datetime, datetime]]]]
+
+
+@dataclass
+class StageStats:
+    """ステージごとの処理件数と時間"""
+    processed: int = 0 # 処理したフレーム数
+    passed: int = 0 # 次のステージに渡した数
+    dropped: int = 0 # 次のキューが満杯で捨てた数 (キャプチャのみ)
+    errors: int = 0
+    busy_seconds: float = 0.0 # 処理にかかった時間の合計
+    latency_total: float = 0.0 # キューで待った時間 + 処理時間
+    latency_max: float = 0.0
+
+    def to_dict(self, elapsed: float, queue_depth: int) -> dict:
+        return {
+            "processed": self.processed,
+            "passed": self.passed,
+            "skipped": self.processed - self.passed - self.dropped - self.errors, # 変化なしで打ち切った数
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "throughput": self.processed / elapsed if elapsed > 0 else 0.0, # フレーム/秒
+            "utilization": self.busy_seconds / elapsed if elapsed > 0 else 0.0,
+            "latency_avg": self.latency_total / self.processed if self.processed else 0.0,
+            "latency_max": self.latency_max,
+            "queue_depth": queue_depth # このステージの入力キューに溜まっている数
+        }
+
+
+@dataclass
+class _Frame:
+    """ステージの間を流れる1フレーム分の途中結果"""
+    seq: int
+    now: datetime
+    captured_at: float # time.perf_counter()
+    image_ref: Any = None
+    visual_similar: bool = False
+    text: str = ""
+    entry: Optional[LogEntry] = None
+    enqueued_at: float = 0.0
+
+
+class CapturePipeline:
+    """
+    ScreenMonitoringUseCase.execute_step() の各処理を、別々のスレッドで動くステージに分けたもの。
+
+        capture → feature (縮小・画像の類似度) → ocr → enrich (テキストの類似度・ウィンドウ情報・文字起こし) → persist
+
+    - ステージの間は上限付きのキュー (queue_size) でつなぐ。あるフレームの OCR 中に次のフレームのキャプチャ・
+      縮小、前のフレームの書き込みが進むので、1フレームあたりの時間は全ステージの合計ではなく最も遅いステージで決まる
+    - キャプチャは interval 秒ごと。次のキューが満杯なら (下流が追いつかなければ) そのフレームを捨てて数える
+      (block_when_full=True なら空くまで待つ。ベンチマーク用)
+    - 各ステージは1スレッドなので、フレームの順序と「前回のフレーム」との比較は execute_step() と同じ
+    """
+    STAGES = ("capture", "feature", "ocr", "enrich", "persist")
+
+    def __init__(
+        self,
+        use_case: ScreenMonitoringUseCase,
+        interval: float = 2.0,
+        queue_size: int = 4,
+        audio_source: Optional[AudioSource] = None,
+        audio_pending: Optional[Callable[[], bool]] = None,
+        block_when_full: bool = False,
+        max_frames: Optional[int] = None
+    ):
+        """
+        Args:
+            audio_source: 溜まった文字起こしを取り出す (enrich ステージが呼ぶ)
+            audio_pending: 取り出されていない文字起こしがあるか。あれば画面が変わらなくても OCR へ進める
+            max_frames: この数だけキャプチャしたら止める (ベンチマーク用)
+        """
+        self.use_case = use_case
+        self.interval = interval
+        self.audio_source = audio_source
+        self.audio_pending = audio_pending
+        self.block_when_full = block_when_full
+        self.max_frames = max_frames
+
+        self.queues: Dict[str, "queue.Queue[Any]"] = {
+            name: queue.Queue(maxsize=queue_size) for name in self.STAGES[1:]
+        }
+        self.stats: Dict[str, StageStats] = {name: StageStats() for name in self.STAGES}
+        self._stats_lock = threading.Lock()
+        self.end_to_end_total = 0.0 # キャプチャから保存までの時間の合計
+        self.end_to_end_max = 0.0
+
+        # ステージごとの「前回のフレーム」(それぞれ1つのスレッドだけが更新する。失敗したステージは _last_feature を消す)
+        self._last_feature = None
+        self._last_text: Optional[str] = None
+
+        self.should_stop = False
+        self._threads: List[threading.Thread] = []
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._done = threading.Event()
+
+        # コールバック
+        self.on_log_entry: Optional[Callable[[LogEntry], None]] = None
+        self.on_error: Optional[Callable[[str], None]] = None
+
+    def start(self):
+        self.should_stop = False
+        self._done.clear()
+        self._started_at = time.perf_counter()
+        self._stopped_at = None
+        workers = [
+            ("feature", self._feature, "ocr"),
+            ("ocr", self._ocr, "enrich"),
+            ("enrich", self._enrich, "persist"),
+            ("persist", self._persist, None)
+        ]
+        self._threads = [threading.Thread(target=self._capture_loop, daemon=True)]
+        for name, fn, next_name in workers:
+            self._threads.append(threading.Thread(target=self._stage_loop, args=(name, fn, next_name), daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        キャプチャを止め、キューに残っているフレームを最後まで処理してから戻る。
+        """
+        self.should_stop = True
+        self.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        全ステージが終わるまで待つ (max_frames を指定した場合など)。
+        """
+        return self._done.wait(timeout)
+
+    def _capture_loop(self):
+        seq = 0
+        while not self.should_stop and (self.max_frames is None or seq < self.max_frames):
+            start_time = time.time()
+            started = time.perf_counter()
+            frame = _Frame(seq=seq, now=datetime.now(), captured_at=started)
+            seq += 1
+            try:
+                frame.image_ref = self.use_case.screen.capture_screen()
+                error = None
+            except Exception as e:
+                error = e
+            finished = time.perf_counter()
+            if error is not None or frame.image_ref is None:
+                self._record("capture", started, started, finished, passed=False, error=error)
+            elif self._put("feature", frame):
+                self._record("capture", started, started, finished, passed=True)
+            else:
+                self._record("capture", started, started, finished, passed=False, dropped=True)
+
+            elapsed = time.time() - start_time
+            time.sleep(max(0, self.interval - elapsed))
+        self._put("feature", _STOP, force=True)
+
+    def _stage_loop(self, name: str, fn: Callable[[_Frame], Optional[_Frame]], next_name: Optional[str]):
+        inbox = self.queues[name]
+        while True:
+            frame = inbox.get()
+            if frame is _STOP:
+                break
+            enqueued_at = frame.enqueued_at
+            started = time.perf_counter()
+            try:
+                result = fn(frame)
+                error = None
+            except Exception as e:
+                result, error = None, e
+                if name != "feature":
+                    # execute_step() と同じく、失敗したフレームを比較の基準にしない (次のフレームで判定し直す)
+                    self._last_feature = None
+            self._record(name, enqueued_at, started, time.perf_counter(), passed=result is not None, error=error)
+            if result is not None and next_name:
+                self._put(next_name, result, force=True)
+
+        if next_name:
+            self._put(next_name, _STOP, force=True)
+        else:
+            self._stopped_at = time.perf_counter()
+            self._done.set()
+
+    def _put(self, name: str, frame: Any, force: bool = False) -> bool:
+        """
+        次のステージのキューに入れる。force (ステージの間) なら空くまで待ち、
+        キャプチャからは block_when_full でなければ満杯の時に False を返す。
+        """
+        if frame is not _STOP:
+            frame.enqueued_at = time.perf_counter()
+        if force or self.block_when_full:
+            self.queues[name].put(frame)
+            return True
+        try:
+            self.queues[name].put_nowait(frame)
+            return True
+        except queue.Full:
+            return False
+
+    def _record(
+        self, name: str, enqueued_at: float, started: float, finished: float,
+        passed: bool, dropped: bool = False, error=None
+    ):
+        hot_path_metrics.observe(f"pipeline.{name}", finished - started)
+        with self._stats_lock:
+            stats = self.stats[name]
+            stats.processed += 1
+            stats.busy_seconds += finished - started
+            latency = finished - enqueued_at
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            if passed:
+                stats.passed += 1
+            elif dropped:
+                stats.dropped += 1
+            elif error is not None:
+                stats.errors += 1
+        if error is not None and self.on_error:
+            self.on_error(f"Error in pipeline stage {name}: {error}")
+
+    # --- ステージ (execute_step() の各処理と同じ判定) ---
+
+    def _feature(self, frame: _Frame) -> Optional[_Frame]:
+        feature = self.use_case.screen.resize_for_comparison(frame.image_ref)
+        has_audio = bool(self.audio_pending and self.audio_pending())
+        frame.visual_similar, skip = self.use_case.check_visual_change(feature, self._last_feature, has_audio)
+        if skip:
+            # 変化なし、音声もなし -> スキップ (比較の基準は最後に OCR へ進めたフレームのまま)
+            return None
+        # execute_step() はテキストの判定の後に基準を更新するが、ここでは次のフレームの比較が
+        # このフレームの OCR より先に来るので、OCR へ進めた時点で更新する (後のステージで失敗したら _stage_loop が消す)
+        self._last_feature = feature
+        return frame
+
+    def _ocr(self, frame: _Frame) -> Optional[_Frame]:
+        frame.text = self.use_case.ocr.extract_text(frame.image_ref)
+        frame.image_ref = None # 画像はここまで
+        return frame
+
+    def _enrich(self, frame: _Frame) -> Optional[_Frame]:
+        transcript, audio_span = self.audio_source() if self.audio_source else ("", None)
+        is_screen_change, log_text = self.use_case.check_text_change(
+            frame.text, self._last_text, frame.visual_similar, bool(transcript)
+        )
+        self._last_text = frame.text
+        if log_text is None:
+            return None
+
+        window_info = self.use_case.window.get_active_window_title()
+        frame.entry = self.use_case.build_entry(
+            frame.now,
+            log_text,
+            window_info,
+            is_screen_change,
+            transcript,
+            audio_span
+        )
+        return frame
+
+    def _persist(self, frame: _Frame) -> Optional[_Frame]:
+        self.use_case.save_entry(frame.entry)
+        latency = time.perf_counter() - frame.captured_at
+        with self._stats_lock:
+            self.end_to_end_total += latency
+            self.end_to_end_max = max(self.end_to_end_max, latency)
+        if self.on_log_entry:
+            self.on_log_entry(frame.entry)
+        return frame
+
+    def get_stats(self) -> dict:
+        """
+        ステージごとの処理件数・スループット (フレーム/秒)・稼働率・待ち時間込みの遅れ・キューの深さと、
+        キャプチャから保存までの遅れ。
+        """
+        if self._started_at is None:
+            return {}
+        elapsed = (self._stopped_at or time.perf_counter()) - self._started_at
+        with self._stats_lock:
+            stages = {
+                name: self.stats[name].to_dict(elapsed, self.queues[name].qsize() if name in self.queues else 0)
+                for name in self.STAGES
+            }
+            saved = self.stats["persist"].passed
+            end_to_end = {
+                "saved": saved,
+                "saved_per_sec": saved / elapsed if elapsed > 0 else 0.0,
+                "latency_avg": self.end_to_end_total / saved if saved else 0.0,
+                "latency_max": self.end_to_end_max
+            }
+        return {"elapsed": elapsed, "stages": stages, "end_to_end": end_to_end}
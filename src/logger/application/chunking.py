@@ -0,0 +1,108 @@
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# (entry, 行末のバイトオフセット)
+PendingEntry = Tuple[Dict[str, Any], int]
+
+CHUNK_POLICIES = ("count", "tokens")
+
+
+class ChunkPolicy(ABC):
+    """
+    要約待ちのエントリをどこでチャンクに区切るかを決める。
+    max_wait_seconds を指定すると、最初のエントリが溜まってからその秒数が経った時点で、
+    チャンクに満たなくても残りをまとめて要約させる (まばらな時間帯でも要約が遅れすぎないように)。
+    """
+    def __init__(self, max_wait_seconds: Optional[float] = None):
+        self.max_wait_seconds = max_wait_seconds
+
+    @abstractmethod
+    def split(
+        self,
+        pending: List[PendingEntry],
+        cost: Callable[[PendingEntry], int],
+        force: bool = False
+    ) -> Tuple[List[List[PendingEntry]], List[PendingEntry]]:
+        """
+        Args:
+            pending: 要約待ちのエントリ (古い順)
+            cost: エントリのトークン数を返す関数
+            force: True なら、区切りに満たない残りも最後のチャンクとして返す
+
+        Returns:
+            (確定したチャンクのリスト, まだ要約しない残り)
+        """
+        pass
+
+    def is_expired(self, waited_seconds: float) -> bool:
+        return self.max_wait_seconds is not None and waited_seconds >= self.max_wait_seconds
+
+    def describe(self) -> str:
+        return type(self).__name__
+
+
+class CountChunkPolicy(ChunkPolicy):
+    """
+    chunk_size 件ごとに区切る (従来の --summary-chunk-size)。
+    """
+    def __init__(self, chunk_size: int = 10, max_wait_seconds: Optional[float] = None):
+        super().__init__(max_wait_seconds)
+        self.chunk_size = max(1, chunk_size)
+
+    def split(self, pending, cost, force=False):
+        n_full = len(pending) // self.chunk_size
+        chunks = [pending[i * self.chunk_size:(i + 1) * self.chunk_size] for i in range(n_full)]
+        rest = pending[n_full * self.chunk_size:]
+        if force and rest:
+            chunks.append(rest)
+            rest = []
+        return chunks, rest
+
+    def describe(self) -> str:
+        return f"count(chunk_size={self.chunk_size})"
+
+
+class TokenBudgetChunkPolicy(ChunkPolicy):
+    """
+    ログ部分のトークン数が token_budget を超えないように区切る。
+    次のエントリを足すと予算を超える時点でチャンクを確定する。1件だけで予算を超えるエントリは単独のチャンクにする。
+    """
+    def __init__(self, token_budget: int = 1500, max_wait_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        super().__init__(max_wait_seconds)
+        self.token_budget = max(1, token_budget)
+        self.max_entries = max_entries
+
+    def split(self, pending, cost, force=False):
+        chunks: List[List[PendingEntry]] = []
+        current: List[PendingEntry] = []
+        used = 0
+        for item in pending:
+            tokens = cost(item)
+            full = self.max_entries is not None and len(current) >= self.max_entries
+            if current and (used + tokens > self.token_budget or full):
+                chunks.append(current)
+                current, used = [], 0
+            current.append(item)
+            used += tokens
+
+        # 最後のチャンクは、予算ちょうどに達していればそれ以上増やせないので確定する
+        if current and (force or used >= self.token_budget):
+            chunks.append(current)
+            current = []
+        return chunks, current
+
+    def describe(self) -> str:
+        return f"tokens(budget={self.token_budget})"
+
+
+def build_chunk_policy(
+    name: str = "count",
+    chunk_size: int = 10,
+    token_budget: int = 1500,
+    max_wait_seconds: Optional[float] = None
+) -> ChunkPolicy:
+    if name == "count":
+        return CountChunkPolicy(chunk_size, max_wait_seconds=max_wait_seconds)
+    if name == "tokens":
+        return TokenBudgetChunkPolicy(token_budget, max_wait_seconds=max_wait_seconds)
+    raise ValueError(f"Unknown chunk policy: {name} (expected one of {CHUNK_POLICIES})")
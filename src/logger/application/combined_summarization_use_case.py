@@ -0,0 +1,155 @@
+import os
+import json
+from typing import Dict, List, Any, Optional, Callable
+
+from ..domain.interfaces import LlmProvider
+from ..infrastructure.persistence.summary_cache import SummaryCache
+from .chunking import ChunkPolicy
+from .prompt_compaction import PromptCompactor
+from .summarization_use_case import LogSummarizationUseCase, FAILED_SUMMARY_TEXT, sys_logger
+
+SUMMARY_KINDS = ("visual", "audio")
+
+
+class CombinedSummarizationUseCase(LogSummarizationUseCase):
+    """
+    視覚 (画面変化) と音声 (文字起こし) を1回の LLM 呼び出しでまとめて要約する。
+
+    時間帯ごとに両方のログを載せた1つのプロンプトを作り、{"visual": ..., "audio": ...} の JSON で受け取る。
+    結果は別々に要約する場合と同じ visual_summary.jsonl / audio_summary.jsonl に書き分ける
+    (ログのない側は書かない)。visual / audio を別々に動かす場合の約半分の呼び出し回数で済む。
+    """
+    def __init__(
+        self,
+        llm_provider: LlmProvider,
+        logs_root_dir: str = "logs",
+        chunk_size: int = 5,
+        batch_size: int = 4,
+        chunk_policy: Optional[ChunkPolicy] = None,
+        summary_cache: Optional[SummaryCache] = None,
+        prompt_compactor: Optional[PromptCompactor] = None
+    ):
+        super().__init__(
+            llm_provider,
+            summary_type="visual_audio",
+            logs_root_dir=logs_root_dir,
+            chunk_size=chunk_size,
+            batch_size=batch_size,
+            chunk_policy=chunk_policy,
+            summary_cache=summary_cache,
+            prompt_compactor=prompt_compactor
+        )
+        if self.state and not os.path.exists(self.state_file):
+            self._mark_state_dirty() # 引き継いだ状態を次のスキャンで書き出す
+        self.on_summary_generated: Optional[Callable[[str, Dict[str, Any]], None]] = None # (種類 "visual" / "audio", 書き込んだ行)
+
+    def _load_state(self) -> Dict[str, Dict[str, int]]:
+        """
+        初めて使う場合は、visual / audio を別々に要約していた時の状態から始める
+        (両方が処理済みの位置まで読み飛ばし、要約し直さない)。
+        """
+        if os.path.exists(self.state_file):
+            return super()._load_state()
+        return self._state_from_separate_runs()
+
+    def _state_from_separate_runs(self) -> Dict[str, Dict[str, int]]:
+        states = []
+        for kind in SUMMARY_KINDS:
+            path = os.path.join(self.logs_root_dir, f"summarizer_state_{kind}.json")
+            try:
+                with open(path, 'r') as f:
+                    states.append(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                return {}
+
+        merged = {}
+        for date_str, visual in states[0].items():
+            audio = states[1].get(date_str)
+            if not isinstance(visual, dict) or not isinstance(audio, dict) or visual.get("inode") != audio.get("inode"):
+                continue
+            merged[date_str] = {
+                "offset": min(visual.get("offset", 0), audio.get("offset", 0)),
+                "inode": visual.get("inode"),
+                "size": min(visual.get("size", 0), audio.get("size", 0))
+            }
+            if visual.get("sealed") and audio.get("sealed"):
+                merged[date_str]["sealed"] = True
+        if merged:
+            sys_logger.info(f"Starting combined summarization from the visual/audio state ({len(merged)} days).")
+        return merged
+
+    @staticmethod
+    def _is_visual(entry: Dict[str, Any]) -> bool:
+        return entry.get("metadata", {}).get("is_screen_change", False)
+
+    @staticmethod
+    def _has_audio(entry: Dict[str, Any]) -> bool:
+        return bool(entry.get("audio", {}).get("transcript", "").strip())
+
+    def _is_entry_relevant(self, entry: Dict[str, Any]) -> bool:
+        return self._is_visual(entry) or self._has_audio(entry)
+
+    @staticmethod
+    def _visual_view(entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {**entry, "audio": {}}
+
+    @staticmethod
+    def _audio_view(entry: Dict[str, Any]) -> Dict[str, Any]:
+        # どのウィンドウで話していたかは残し、OCR は載せない
+        screen = entry.get("screen", {})
+        return {**entry, "screen": {"app_name": screen.get("app_name", "Unknown"), "window_title": screen.get("window_title", "")}}
+
+    def _format_entry(self, e: Dict[str, Any]) -> str:
+        # トークン予算の計算用 (プロンプトでは SCREEN / AUDIO に分けて載せる)
+        text = ""
+        if self._is_visual(e):
+            text += super()._format_entry(self._visual_view(e))
+        if self._has_audio(e):
+            text += super()._format_entry(self._audio_view(e))
+        return text
+
+    def _log_text(self, entries: List[Dict[str, Any]]) -> str:
+        visual = [self._visual_view(e) for e in entries if self._is_visual(e)]
+        audio = [self._audio_view(e) for e in entries if self._has_audio(e)]
+        text = "SCREEN:\n"
+        text += super()._log_text(visual) if visual else "(none)\n"
+        text += "\nAUDIO:\n"
+        text += super()._log_text(audio) if audio else "(none)\n"
+        return text
+
+    def _to_summary(self, response: Optional[Any], start_time: str, end_time: str) -> Optional[Dict[str, Any]]:
+        # 2つに書き分けられない応答 (JSON でない、キーがない) は失敗として再試行させる
+        if not isinstance(response, dict) or not any(kind in response for kind in SUMMARY_KINDS):
+            return None
+        sys_logger.info("Visual/audio summary generated.")
+        summary = {"timestamp_start": start_time, "timestamp_end": end_time}
+        for kind in SUMMARY_KINDS:
+            value = response.get(kind, "")
+            summary[kind] = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        return summary
+
+    def _failed_summary(self, start_time: str, end_time: str) -> Dict[str, Any]:
+        sys_logger.warning("Failed to generate visual/audio summary after retries.")
+        return {
+            "timestamp_start": start_time,
+            "timestamp_end": end_time,
+            "visual": FAILED_SUMMARY_TEXT,
+            "audio": FAILED_SUMMARY_TEXT
+        }
+
+    def _emit_summary(self, date_str: str, entries: List[Dict[str, Any]], summary: Dict[str, Any]):
+        """
+        ログのあった側だけ、それぞれの要約ファイルに書く。
+        """
+        present = {
+            "visual": any(self._is_visual(e) for e in entries),
+            "audio": any(self._has_audio(e) for e in entries)
+        }
+        for kind in SUMMARY_KINDS:
+            text = summary.get(kind, "").strip()
+            if not present[kind] or not text:
+                continue
+            row = {"timestamp_start": summary["timestamp_start"], "timestamp_end": summary["timestamp_end"], "summary": text}
+            self._append_summary(os.path.join(self.logs_root_dir, date_str, f"{kind}_summary.jsonl"), row)
+            if self.on_summary_generated:
+                self.on_summary_generated(kind, row)
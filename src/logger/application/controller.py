@@ -1,3 +1,4 @@
+import os
 import threading
 import time
 from datetime import datetime
@@ -7,11 +8,22 @@ from ..infrastructure.mac_os.screen import ScreenCapturer
 from ..infrastructure.mac_os.vision import OcrService
 from ..infrastructure.mac_os.accessibility import WindowInfoService
 from ..infrastructure.ai.whisper_service import WhisperAudioService
+from ..infrastructure.ai.utils import inference_arbiter
 from ..infrastructure.persistence.jsonl_logger import JsonlLogger
+from ..infrastructure.persistence.summary_cache import SummaryCache
 from ..domain.services import SimilarityChecker
 from .use_cases import ScreenMonitoringUseCase
 from ..infrastructure.llm.gemma_provider import GemmaLlmProvider
 from .summarization_use_case import LogSummarizationUseCase
+from .combined_summarization_use_case import CombinedSummarizationUseCase
+from .log_ingestion import LogIngestionService
+from .event_bus import EventBus
+from .retention_use_case import LogRetentionUseCase
+from .chunking import build_chunk_policy
+from .rollup_use_case import RollupSummarizationUseCase
+from .prompt_compaction import PromptCompactor
+from .capture_pipeline import CapturePipeline
+from .metrics import hot_path_metrics, MetricsDumper
 
 class ActivityLoggerController:
     """
@@ -27,6 +39,26 @@ class ActivityLoggerController:
         no_audio: bool = False,
         no_summarize: bool = False,
         summary_chunk_size: int = 10,
+        summary_policy: str = "count",
+        summary_token_budget: int = 1500,
+        summary_max_wait: Optional[float] = None,
+        summary_rollup: bool = False,
+        summary_combined: bool = False,
+        summary_cache_size: int = 50000,
+        prompt_compaction: bool = True,
+        inference_starvation_guard: Optional[float] = None,
+        llm_slice_tokens: Optional[int] = GemmaLlmProvider.SLICE_TOKENS,
+        model_idle_unload: Optional[float] = 600.0,
+        streaming_transcription: bool = False,
+        hallucination_phrases_file: Optional[str] = None,
+        audio_backpressure: str = "merge",
+        audio_max_lag: float = 30.0,
+        retention_days: Optional[int] = None,
+        static_policy: str = "keep",
+        disk_budget_mb: Optional[float] = None,
+        capture_pipeline: bool = False,
+        pipeline_queue_size: int = 4,
+        metrics_interval: Optional[float] = 60.0,
         lazy_init: bool = False
     ):
         self.interval = interval
@@ -35,9 +67,49 @@ class ActivityLoggerController:
         self.no_audio = no_audio
         self.no_summarize = no_summarize
         self.summary_chunk_size = summary_chunk_size
+        # 要約チャンクの区切り方 ("count": 件数 / "tokens": トークン予算) と、まばらな時間帯の最大待ち時間
+        self.summary_policy = summary_policy
+        self.summary_token_budget = summary_token_budget
+        self.summary_max_wait = summary_max_wait
+        # チャンク要約から1時間ごと・1日の要約を作るか
+        self.summary_rollup = summary_rollup
+        # 視覚・音声を1回の LLM 呼び出しでまとめて要約するか (出力ファイルは別々のときと同じ)
+        self.summary_combined = summary_combined
+        # 生成済み要約キャッシュの最大件数 (0 なら使わない)
+        self.summary_cache_size = summary_cache_size
+        # 要約プロンプトの圧縮 (同じウィンドウの連続エントリをまとめ、似た OCR を省く)
+        self.prompt_compaction = prompt_compaction
+        # 推論の調停: 優先度の低い処理 (要約) がこの秒数以上待たされたら先に通す (None なら共有の設定のまま)
+        self.inference_starvation_guard = inference_starvation_guard
+        inference_arbiter.configure(starvation_seconds=inference_starvation_guard)
+        # LLM の生成をこのトークン数ごとに区切り、待っている OCR / 文字起こしに順番を譲る (None なら区切らない)
+        self.llm_slice_tokens = llm_slice_tokens
+        # Gemma / Whisper は最初に使う時に読み込み、この秒数使わなければ手放す (None なら常駐)
+        self.model_idle_unload = model_idle_unload
+        # 音声を短い重なりウィンドウで文字起こしし、確定した部分から順に出す (低遅延)
+        self.streaming_transcription = streaming_transcription
+        # Whisper のハルシネーションとして捨てる定型句のファイル (None なら同梱のもの)
+        self.hallucination_phrases_file = hallucination_phrases_file
+        # 文字起こしが遅れ、未処理の音声が audio_max_lag 秒を超えた時の方針 ("drop_oldest" / "merge" / "skip_silent")
+        self.audio_backpressure = audio_backpressure
+        self.audio_max_lag = audio_max_lag
+        # ログ保持 (None ならコンパクションジョブを動かさない)
+        self.retention_days = retention_days
+        self.static_policy = static_policy
+        self.disk_budget_mb = disk_budget_mb
+        # 監視ループの代わりに、キャプチャ・縮小・OCR・付加情報・保存を別スレッドのステージで重ねて動かす
+        self.capture_pipeline = capture_pipeline
+        self.pipeline_queue_size = pipeline_queue_size
+        self.pipeline: Optional[CapturePipeline] = None
+        # 各処理の所要時間 (p50/p95/p99) と件数を、この秒数ごとに logs/metrics.jsonl へ書き出す (None なら書き出さない)
+        self.metrics_interval = metrics_interval
+        self.metrics_dumper: Optional[MetricsDumper] = None
         
         self.should_stop = False
         self.is_running = False
+
+        # 監視ループ -> 要約 へ LogEntry をメモリ経由で渡すチャネル
+        self.event_bus = EventBus()
         
         # コールバック (UI更新用)
         self.on_log_entry: Optional[Callable[[any], None]] = None
@@ -57,31 +129,87 @@ class ActivityLoggerController:
         if self.no_audio:
             self.audio_service = None
         else:
-            self.audio_service = WhisperAudioService()
+            self.audio_service = WhisperAudioService(
+                idle_unload_seconds=self.model_idle_unload,
+                streaming=self.streaming_transcription,
+                hallucination_phrases_file=self.hallucination_phrases_file,
+                backpressure_policy=self.audio_backpressure,
+                max_lag_seconds=self.audio_max_lag
+            )
 
+        self.llm = None
         self.visual_summarizer = None
         self.audio_summarizer = None
+        self.combined_summarizer = None
+        self.log_ingestor = None
+        self.rollup_summarizer = None
         
         if not self.no_summarize:
             try:
-                llm = GemmaLlmProvider()
-                self.visual_summarizer = LogSummarizationUseCase(
-                    llm_provider=llm,
-                    summary_type="visual",
-                    logs_root_dir=self.logs_dir
-                )
-                self.audio_summarizer = LogSummarizationUseCase(
-                    llm_provider=llm,
-                    summary_type="audio",
-                    logs_root_dir=self.logs_dir
-                )
-                
-                # Wire callbacks
-                self.visual_summarizer.on_summary_generated = lambda s: self._handle_summary("visual", s)
-                self.audio_summarizer.on_summary_generated = lambda s: self._handle_summary("audio", s)
+                llm = GemmaLlmProvider(slice_tokens=self.llm_slice_tokens, idle_unload_seconds=self.model_idle_unload)
+                self.llm = llm
+                summary_cache = None
+                if self.summary_cache_size > 0:
+                    summary_cache = SummaryCache(
+                        os.path.join(self.logs_dir, "summary_cache.sqlite3"), max_entries=self.summary_cache_size
+                    )
+                # activity.jsonl は1つの読み込み役が1回だけ読み、要約に配る
+                self.log_ingestor = LogIngestionService(logs_root_dir=self.logs_dir)
+
+                if self.summary_combined:
+                    self.combined_summarizer = CombinedSummarizationUseCase(
+                        llm_provider=llm,
+                        logs_root_dir=self.logs_dir,
+                        chunk_size=self.summary_chunk_size,
+                        chunk_policy=self._build_chunk_policy(),
+                        summary_cache=summary_cache,
+                        prompt_compactor=PromptCompactor() if self.prompt_compaction else None
+                    )
+                    self.combined_summarizer.on_summary_generated = self._handle_summary
+                    self.log_ingestor.add_consumer(self.combined_summarizer)
+                else:
+                    self.visual_summarizer = LogSummarizationUseCase(
+                        llm_provider=llm,
+                        summary_type="visual",
+                        logs_root_dir=self.logs_dir,
+                        chunk_size=self.summary_chunk_size,
+                        chunk_policy=self._build_chunk_policy(),
+                        summary_cache=summary_cache,
+                        prompt_compactor=PromptCompactor() if self.prompt_compaction else None
+                    )
+                    self.audio_summarizer = LogSummarizationUseCase(
+                        llm_provider=llm,
+                        summary_type="audio",
+                        logs_root_dir=self.logs_dir,
+                        chunk_size=self.summary_chunk_size,
+                        chunk_policy=self._build_chunk_policy(),
+                        summary_cache=summary_cache,
+                        prompt_compactor=PromptCompactor() if self.prompt_compaction else None
+                    )
+
+                    # Wire callbacks
+                    self.visual_summarizer.on_summary_generated = lambda s: self._handle_summary("visual", s)
+                    self.audio_summarizer.on_summary_generated = lambda s: self._handle_summary("audio", s)
+
+                    self.log_ingestor.add_consumer(self.visual_summarizer)
+                    self.log_ingestor.add_consumer(self.audio_summarizer)
+                # 起動時はファイルから追いつき、以後は監視ループが publish したエントリを直接受け取る
+                self.log_ingestor.attach_event_bus(self.event_bus)
+
+                if self.summary_rollup:
+                    self.rollup_summarizer = RollupSummarizationUseCase(llm_provider=llm, logs_root_dir=self.logs_dir)
+                    self.rollup_summarizer.on_rollup_generated = self._handle_summary
             except Exception as e:
                 self._notify_error(f"Failed to initialize summarization: {e}")
 
+    def _build_chunk_policy(self):
+        return build_chunk_policy(
+            self.summary_policy,
+            chunk_size=self.summary_chunk_size,
+            token_budget=self.summary_token_budget,
+            max_wait_seconds=self.summary_max_wait
+        )
+
     def setup_os_services(self):
         """
         ScreenCapturerやWindowInfoServiceなど、OS依存（メインスレッド推奨）の初期化処理。
@@ -97,13 +225,32 @@ class ActivityLoggerController:
             ocr_service=self.ocr_service,
             window_service=self.window_service,
             persistence_service=self.persistence_service,
-            similarity_service=self.similarity_service
+            similarity_service=self.similarity_service,
+            event_bus=self.event_bus
         )
 
+        self.retention_job = None
+        if self.retention_days is not None or self.disk_budget_mb is not None:
+            self.retention_job = LogRetentionUseCase(
+                logs_root_dir=self.logs_dir,
+                retention_days=self.retention_days if self.retention_days is not None else 7,
+                static_policy=self.static_policy,
+                disk_budget_mb=self.disk_budget_mb
+            )
+
+        if self.metrics_interval:
+            self.metrics_dumper = MetricsDumper(
+                hot_path_metrics, os.path.join(self.logs_dir, "metrics.jsonl"), interval=self.metrics_interval
+            )
+
     def _handle_summary(self, summary_type: str, summary_data: dict):
         if self.on_summary:
             self.on_summary(summary_type, summary_data.get("summary", ""))
 
+    def _handle_log_entry(self, entry):
+        if self.on_log_entry:
+            self.on_log_entry(entry)
+
     def _notify_status(self, status: str):
         if self.on_status_change:
             self.on_status_change(status)
@@ -112,19 +259,41 @@ class ActivityLoggerController:
         if self.on_error:
             self.on_error(error)
 
+    def _pop_transcript(self):
+        """
+        溜まった文字起こしと、その音声の (開始, 終了) 時刻。なければ ("", None)。
+        """
+        if not self.audio_service:
+            return "", None
+        chunk = self.audio_service.pop_transcript()
+        if not chunk:
+            return "", None
+        return chunk.text, (datetime.fromtimestamp(chunk.start), datetime.fromtimestamp(chunk.end))
+
+    def _start_pipeline(self):
+        self.pipeline = CapturePipeline(
+            self.use_case,
+            interval=self.interval,
+            queue_size=self.pipeline_queue_size,
+            audio_source=self._pop_transcript,
+            audio_pending=self.audio_service.has_pending_transcript if self.audio_service else None
+        )
+        self.pipeline.on_log_entry = self._handle_log_entry
+        self.pipeline.on_error = self._notify_error
+        self.pipeline.start()
+        self._notify_status("Running")
+
     def _monitoring_loop(self):
         self._notify_status("Running")
         while not self.should_stop:
             start_time = time.time()
             try:
-                transcript = ""
-                if self.audio_service:
-                    transcript = self.audio_service.get_transcript_chunk()
+                transcript, audio_span = self._pop_transcript()
                 
-                entry = self.use_case.execute_step(audio_transcript=transcript)
+                entry = self.use_case.execute_step(audio_transcript=transcript, audio_span=audio_span)
                 
-                if entry and self.on_log_entry:
-                    self.on_log_entry(entry)
+                if entry:
+                    self._handle_log_entry(entry)
                     
             except Exception as e:
                 self._notify_error(f"Error in monitoring loop: {e}")
@@ -142,39 +311,135 @@ class ActivityLoggerController:
         
         self.should_stop = False
         self.is_running = True
-        
-        # 1. Preload & Start Audio
+        self._start_background_services()
+
+        # 7. Start Monitoring Loop in Background Thread (or the staged pipeline)
+        if self.capture_pipeline:
+            self._start_pipeline()
+            return
+        self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
+        self.monitor_thread.start()
+
+    def _start_background_services(self, start_ingestor: bool = True):
+        """
+        監視ループ以外 (録音・要約・ロールアップ・ログ保持・モデルの手放し) をそれぞれのスレッドで動かす。
+        start_ingestor=False なら要約の読み込み役は呼び出し側が動かす (AsyncActivityLoggerController)。
+        """
+        # 1. Start Audio (Whisper is loaded on the first voiced chunk)
         if self.audio_service:
-            self.audio_service.preload_model()
             try:
                 self.audio_service.start_recording()
             except Exception as e:
                 self._notify_error(f"Failed to start audio service: {e}")
 
-        # 2. Start Summarization
-        if self.visual_summarizer:
-            threading.Thread(
-                target=self.visual_summarizer.start_monitoring,
-                args=(self.summary_chunk_size,),
-                daemon=True
-            ).start()
-        
-        if self.audio_summarizer:
-            threading.Thread(
-                target=self.audio_summarizer.start_monitoring,
-                args=(self.summary_chunk_size,),
-                daemon=True
-            ).start()
-
-        # 3. Start Monitoring Loop in Background Thread
-        self.monitor_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
-        self.monitor_thread.start()
+        # 2. Start Summarization (single shared log reader for all summarizers)
+        if self.log_ingestor:
+            self.log_ingestor.should_stop = False
+            if start_ingestor:
+                threading.Thread(target=self.log_ingestor.start_monitoring, daemon=True).start()
+
+        # 3. Start Rollup Summaries (hourly / daily)
+        if self.rollup_summarizer:
+            self.rollup_summarizer.should_stop = False
+            threading.Thread(target=self.rollup_summarizer.start_monitoring, daemon=True).start()
+
+        # 4. Start Log Retention (compaction of old days)
+        if self.retention_job:
+            self.retention_job.should_stop = False
+            # 要約が動いていれば、処理済み位置の読み替えは要約側のスレッドで行わせる
+            self.retention_job.state_translator = self.log_ingestor.request_reload if self.log_ingestor else None
+            self.retention_job.state_forgetter = self.log_ingestor.request_forget if self.log_ingestor else None
+            threading.Thread(target=self.retention_job.start_monitoring, daemon=True).start()
+
+        # 5. Unload idle models (Gemma / Whisper)
+        for residency in self._model_residencies().values():
+            if residency.idle_unload_seconds is not None:
+                threading.Thread(target=residency.start_monitoring, daemon=True).start()
+
+        # 6. Dump hot-path metrics periodically
+        if self.metrics_dumper:
+            threading.Thread(target=self.metrics_dumper.start_monitoring, daemon=True).start()
 
     def stop(self):
         self.should_stop = True
+        if self.pipeline:
+            # キューに残っているフレームは保存してから止める
+            self.pipeline.stop()
+            self._notify_status("Stopped")
+            self.is_running = False
+        self._stop_background_services()
+
+    def _stop_background_services(self, stop_ingestor: bool = True):
         if self.audio_service:
             self.audio_service.stop_recording()
-        if self.visual_summarizer:
-            self.visual_summarizer.stop()
-        if self.audio_summarizer:
-            self.audio_summarizer.stop()
+        if self.log_ingestor and stop_ingestor:
+            self.log_ingestor.stop()
+        if self.rollup_summarizer:
+            self.rollup_summarizer.stop()
+        if self.retention_job:
+            self.retention_job.stop()
+        for residency in self._model_residencies().values():
+            residency.stop()
+        if self.metrics_dumper:
+            self.metrics_dumper.stop()
+
+    def _model_residencies(self) -> dict:
+        residencies = {}
+        if getattr(self, "llm", None):
+            residencies["gemma"] = self.llm.residency
+        if getattr(self, "audio_service", None):
+            residencies["whisper"] = self.audio_service.residency
+        return residencies
+
+    def get_model_residency_metrics(self) -> dict:
+        """
+        Gemma / Whisper ごとの、常駐状況・読み込み回数・再読み込みにかかった時間・常駐メモリ。
+        """
+        return {name: residency.get_metrics() for name, residency in self._model_residencies().items()}
+
+    def get_vad_stats(self) -> dict:
+        """
+        録音した音声の秒数と、VAD を通って Whisper に送った秒数。
+        """
+        if getattr(self, "audio_service", None):
+            return self.audio_service.get_vad_stats()
+        return {}
+
+    def get_hallucination_filter_stats(self) -> dict:
+        """
+        ハルシネーションとして捨てた文字起こしの数 (ルールごと)。
+        """
+        if getattr(self, "audio_service", None):
+            return self.audio_service.get_filter_stats()
+        return {}
+
+    def get_audio_buffer_stats(self) -> dict:
+        """
+        録音リングバッファのオーバーラン回数・未処理の音声の秒数 (キューの深さ)・捨てた秒数・
+        音声から文字起こしまでの遅れ・遅れた時の方針 (捨てる・まとめる・無音を飛ばす) の集計など。
+        """
+        if getattr(self, "audio_service", None):
+            return self.audio_service.get_buffer_stats()
+        return {}
+
+    def get_pipeline_stats(self) -> dict:
+        """
+        CapturePipeline のステージごとのスループット・稼働率・遅れ・キューの深さ (パイプラインを使っていなければ空)。
+        """
+        if self.pipeline:
+            return self.pipeline.get_stats()
+        return {}
+
+    def get_hot_path_metrics(self) -> dict:
+        """
+        監視ループ (monitor.*)・パイプライン (pipeline.*)・推論ロック (inference.*)・要約 (summary.*)・
+        文字起こし (whisper.*) の所要時間 (直近の p50/p95/p99・最大、秒) と、件数・書き込みバイト数のカウンタ。
+        GUI のダッシュボード用。
+        """
+        return hot_path_metrics.snapshot()
+
+    def get_inference_metrics(self) -> dict:
+        """
+        OCR / 文字起こし / 要約 ごとの、推論の順番待ち時間と実行時間。
+        """
+        return inference_arbiter.get_metrics()
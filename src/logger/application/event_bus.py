@@ -0,0 +1,177 @@
+import asyncio
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+# AsyncBroadcast を閉じたことを購読者に知らせる目印
+_CLOSED = object()
+
+
+class Subscription:
+    """
+    EventBus の購読者ごとのキュー。
+    publish 側 (監視ループ) をブロックしないよう、満杯のときはイベントを捨てて overflowed を立てる。
+    購読者は overflowed を見て、ファイルからの読み直しで取りこぼしを補う。
+    """
+    def __init__(self, maxsize: int = 1000):
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=maxsize)
+        self.overflowed = False
+        self.dropped = 0
+
+    def put(self, event: Any):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+            self.dropped += 1
+
+    def get_batch(self, timeout: float) -> List[Any]:
+        """
+        イベントが届くまで最大 timeout 秒待ち、届いている分をまとめて返す。
+        """
+        try:
+            events = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+class EventBus:
+    """
+    プロセス内の publish/subscribe チャネル。
+    監視ループが保存した LogEntry を、要約などの購読者へメモリ経由で直接渡す。
+    """
+    def __init__(self):
+        self._subscriptions: List[Subscription] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize: int = 1000) -> Subscription:
+        subscription = Subscription(maxsize=maxsize)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Optional[Subscription]):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, event: Any):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.put(event)
+
+
+def call_in_loop(loop: Optional[asyncio.AbstractEventLoop], fn: Callable[..., Any], *args):
+    """
+    fn をイベントループ上で呼ぶ。ループのスレッドからならその場で、他のスレッドからなら
+    call_soon_threadsafe で予約する。ループがなければ (動いていなければ) その場で呼ぶ。
+    """
+    if loop is None or loop.is_closed():
+        fn(*args)
+        return
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        fn(*args)
+    else:
+        loop.call_soon_threadsafe(fn, *args)
+
+
+class AsyncSubscription:
+    """
+    AsyncBroadcast の購読者ごとのキュー。async for で受け取り、AsyncBroadcast が閉じられたら終わる。
+    満杯のときは古いものから捨てる (画面には最新のものが見えればよい)。
+    """
+    def __init__(self, broadcast: "AsyncBroadcast", maxsize: int = 100):
+        self._broadcast = broadcast
+        self._queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=maxsize)
+        self._closed = False
+        self.dropped = 0
+
+    def _put(self, item: Any):
+        # イベントループ上でのみ呼ばれる
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> Any:
+        if self._closed:
+            raise StopAsyncIteration
+        item = await self._queue.get()
+        if item is _CLOSED:
+            self._closed = True
+            raise StopAsyncIteration
+        return item
+
+    def close(self):
+        self._closed = True
+        self._broadcast.unsubscribe(self)
+
+
+class AsyncBroadcast:
+    """
+    スレッド (監視ループ・要約など) から asyncio のイベントループ (GUI など) へ値を配る。
+    publish はどのスレッドからでも呼べ、購読者のキューへはバインドしたループ上で、呼ばれた順に入る。
+    """
+    def __init__(self, maxsize: int = 100):
+        self.maxsize = maxsize
+        self._subscriptions: List[AsyncSubscription] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+
+    def subscribe(self) -> AsyncSubscription:
+        """
+        購読を始める。返した時点から publish された値を受け取る (async for で読む前に呼んでおく)。
+        """
+        subscription = AsyncSubscription(self, maxsize=self.maxsize)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AsyncSubscription):
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    def publish(self, item: Any):
+        self._schedule(self._deliver, item)
+
+    def close(self):
+        """
+        今の購読者の async for を (届いている分を読み終えたところで) 終わらせる。以後の subscribe() は新しい購読になる。
+        """
+        self._schedule(self._deliver_close)
+
+    def _schedule(self, fn: Callable[..., Any], *args):
+        # ループのスレッドからも予約する (他のスレッドから先に publish された値を追い越さない)
+        if self._loop is None or self._loop.is_closed():
+            return # 受け取るループがない
+        self._loop.call_soon_threadsafe(fn, *args)
+
+    def _deliver(self, item: Any):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription._put(item)
+
+    def _deliver_close(self):
+        with self._lock:
+            subscriptions = self._subscriptions
+            self._subscriptions = []
+        for subscription in subscriptions:
+            subscription._put(_CLOSED)
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Tuple
 import numpy as np
 from ..domain.entities import LogEntry, ScreenData
-from Quartz import CGImageRef
+
+# 画面キャプチャは macOS 専用。Linux などではオフライン処理 (ファイルの文字起こし・要約) とテストだけ動かす
+try:
+    from Quartz import CGImageRef
+except ImportError:
+    CGImageRef = None
 
 class ScreenCaptureInterface(ABC):
     @abstractmethod
@@ -25,5 +30,24 @@ class WindowInfoInterface(ABC):
 
 class PersistenceInterface(ABC):
     @abstractmethod
-    def save(self, entry: LogEntry):
+    def save(self, entry: LogEntry) -> Optional[Tuple[int, int]]:
+        """
+        保存し、書き込んだ位置 (先頭, 末尾のバイトオフセット) が分かれば返す。
+        """
+        pass
+
+class AudioFileReaderInterface(ABC):
+    @abstractmethod
+    def duration(self, path: str) -> float:
+        """
+        録音の長さ (秒)。
+        """
+        pass
+
+    @abstractmethod
+    def read_chunks(self, path: str, chunk_samples: int) -> Iterator[np.ndarray]:
+        """
+        モノラル float32 に変換した音声を chunk_samples ずつ返す (最後は短くてよい)。
+        ファイル全体をメモリに読み込まない。
+        """
         pass
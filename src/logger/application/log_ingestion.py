@@ -0,0 +1,445 @@
+import os
+import json
+import time
+import logging
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from ..infrastructure.persistence.log_files import resolve_log_path, stat_identity, read_appended_entries, write_json_atomic
+from ..infrastructure.persistence.log_scanner import LogDirectoryScanner
+from ..infrastructure.persistence.log_watcher import LogDirectoryWatcher
+from ..domain.events import LogEntrySaved
+from .event_bus import EventBus, Subscription
+
+sys_logger = logging.getLogger("system_summarizer")
+
+# 別のプロセス (transcribe_cli など) が activity.jsonl に追記した日の一覧。動いている LogIngestionService が読んで消す
+APPENDED_DAYS_FILE = "appended_days.json"
+
+
+def notify_appended_days(logs_root_dir: str, dates: List[str]):
+    """
+    アプリの外から追記した日を、動いている LogIngestionService に知らせる。
+    次のスキャンで consumer がその日の封印を外し、追記分を読み直す (アプリが止まっていれば次回の起動時)。
+    動いている要約の状態はメモリ上にあるので、状態ファイルを直接書き換えても上書きされてしまう。
+    """
+    if not dates:
+        return
+    path = os.path.join(logs_root_dir, APPENDED_DAYS_FILE)
+    pending: Set[str] = set(dates)
+    try:
+        with open(path, "r") as f:
+            pending.update(json.load(f))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        sys_logger.error(f"Failed to read {path}: {e}")
+    write_json_atomic(path, sorted(pending))
+
+
+@dataclass
+class DayBatch:
+    """1回の読み込みで activity.jsonl から得られた、ある日の新しいエントリ"""
+    date_str: str
+    log_file: str
+    inode: int
+    size: int
+    entries: List[Tuple[Dict[str, Any], int]] # (entry, 行末のバイトオフセット)
+    read_offset: int # 読み終えた位置
+
+
+class LogConsumer(ABC):
+    """
+    LogIngestionService から新しいエントリを受け取る側 (要約ユースケースなど)。
+    チェックポイント (どこまで処理したか) とチャンクのバッファは consumer ごとに持つ。
+    """
+    @abstractmethod
+    def open_day(self, date_str: str, log_file: str, inode: int, size: int) -> Optional[int]:
+        """
+        その日を読み始める位置 (バイトオフセット) を返す。もう読む必要がなければ None。
+        """
+        pass
+
+    @abstractmethod
+    def consume(self, batch: DayBatch):
+        """
+        新しく読めたエントリを受け取る。既に処理済みの位置のエントリは consumer 側で読み飛ばす。
+        """
+        pass
+
+    @abstractmethod
+    def reset_day(self, date_str: str):
+        """
+        ファイルが差し替え/切り詰められたので、その日のチェックポイントを捨てる。
+        """
+        pass
+
+    @abstractmethod
+    def is_sealed(self, date_str: str) -> bool:
+        pass
+
+    @abstractmethod
+    def sealed_days(self) -> set:
+        pass
+
+    @abstractmethod
+    def flush_state(self):
+        """
+        溜まっているチェックポイントを永続化する。
+        """
+        pass
+
+    @abstractmethod
+    def reload_state(self):
+        pass
+
+    def translate_day(self, date_str: str, line_map: Dict[str, Any]):
+        """
+        コンパクションで差し替えられた日の処理済み位置を、新しいファイルの位置に読み替える
+        (line_map は LogRetentionUseCase._compact_activity() の対応表)。
+        読み替えられない consumer は、その日を先頭から読み直す。
+        """
+        self.reset_day(date_str)
+
+    def tick(self):
+        """
+        新しいエントリの有無に関わらず、読み込みの1周ごとに呼ばれる (時間経過で進める処理用)。
+        """
+        pass
+
+    def unseal_day(self, date_str: str):
+        """
+        アプリの外からその日に追記されたので、封印していれば外す (notify_appended_days)。
+        """
+        pass
+
+
+class LogIngestionService:
+    """
+    日別の activity.jsonl を1回だけ読み、登録された全ての consumer に配る。
+    複数の要約 (visual / audio / combined ...) がそれぞれファイルを開いてパースするのを避ける。
+
+    EventBus を繋いだ場合は、起動時にファイルから追いついた後、監視ループが publish した
+    エントリをメモリから直接配る。ファイルを読み直すのは、取りこぼし (キューあふれ・位置の飛び) を
+    検出したときと、状態の読み直しを要求されたときだけ。
+    """
+    def __init__(self, logs_root_dir: str = "logs"):
+        self.logs_root_dir = logs_root_dir
+        self.consumers: List[LogConsumer] = []
+        self.scanner = LogDirectoryScanner(logs_root_dir)
+        # 日付ごとの読み込み位置 {"YYYY-MM-DD": {"read_offset": int, "inode": int, "size": int}}
+        self._cursors: Dict[str, Dict[str, int]] = {}
+        self._reload_requested = False
+        # コンパクション中の日の対応表 {"YYYY-MM-DD": line_map}。差し替わったのを確認してから読み替える
+        self._translations: Dict[str, Dict[str, Any]] = {}
+        # 容量制限で削除された日。次のスキャン開始時に consumer のチェックポイントから消す
+        self._forgotten: Set[str] = set()
+        self._translations_lock = threading.Lock()
+        self._subscription: Optional[Subscription] = None
+        self._event_bus: Optional[EventBus] = None
+        self.should_stop = False
+
+    def attach_event_bus(self, event_bus: EventBus):
+        """
+        監視ループからの LogEntrySaved を購読する。
+        起動時の追いつき (ファイル読み込み) より前に購読しておけば、その間のイベントも取りこぼさない。
+        """
+        self._event_bus = event_bus
+        self._subscription = event_bus.subscribe()
+
+    @property
+    def is_subscribed(self) -> bool:
+        """EventBus から直接受け取っているか (False ならファイルを読みに行く)"""
+        return self._subscription is not None
+
+    def add_consumer(self, consumer: LogConsumer):
+        self.consumers.append(consumer)
+        # 新しい consumer は過去の日を読み直す必要があるかもしれない
+        self._cursors = {}
+        self.scanner.forget()
+
+    def start_monitoring(self, check_interval: float = 10.0, use_watcher: bool = True):
+        names = ", ".join(getattr(c, "summary_type", type(c).__name__) for c in self.consumers)
+        sys_logger.info(f"Starting log ingestion (consumers: {names})...")
+        watcher = None
+        if use_watcher and os.path.exists(self.logs_root_dir):
+            watcher = LogDirectoryWatcher(self.logs_root_dir)
+            if watcher.start():
+                self.scanner.watcher = watcher
+                sys_logger.info(f"Watching {self.logs_root_dir} for changes.")
+            else:
+                watcher = None # stat ポーリングにフォールバック
+
+        try:
+            if self._subscription is not None:
+                self._run_event_loop(check_interval)
+                return
+
+            while not self.should_stop:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    sys_logger.error(f"Error in log ingestion loop: {e}", exc_info=True)
+
+                if watcher:
+                    watcher.wait(check_interval)
+                else:
+                    time.sleep(check_interval)
+        finally:
+            if watcher:
+                watcher.stop()
+                self.scanner.watcher = None
+
+    def run_once(self):
+        """
+        変化のあった日を1回分読み、consumer に配る。
+        """
+        if not os.path.exists(self.logs_root_dir):
+            return
+
+        if self._reload_requested:
+            self._reload_requested = False
+            for consumer in self.consumers:
+                consumer.reload_state()
+            self._cursors = {}
+            self.scanner.forget()
+        self._apply_pending_changes()
+
+        # 全ての consumer が封印した日だけを対象外にする
+        sealed = None
+        for consumer in self.consumers:
+            days = consumer.sealed_days()
+            sealed = days if sealed is None else sealed & days
+
+        for date_str in self.scanner.changed_days(sealed=sealed or set()):
+            if self.should_stop:
+                break
+            try:
+                self._ingest_day(date_str)
+            except Exception as e:
+                sys_logger.error(f"Error ingesting logs for {date_str}: {e}", exc_info=True)
+                self.scanner.forget(date_str) # 次回のスキャンで再試行する
+
+        for consumer in self.consumers:
+            consumer.tick()
+            consumer.flush_state()
+
+    def _run_event_loop(self, check_interval: float):
+        self.catch_up()
+        while not self.should_stop:
+            self.poll(check_interval)
+
+    def catch_up(self):
+        """
+        起動時: 前回のチェックポイントからファイルを読み、クラッシュ等で取りこぼした分に追いつく。
+        """
+        try:
+            self.run_once()
+        except Exception as e:
+            sys_logger.error(f"Error in log ingestion catch-up: {e}", exc_info=True)
+
+    def poll(self, timeout: float):
+        """
+        監視ループが publish したエントリを最大 timeout 秒待ってメモリから受け取り、consumer に配る (1回分)。
+        EventBus を繋いでいなければファイルを1回読む。
+        """
+        if self._subscription is None:
+            try:
+                self.run_once()
+            except Exception as e:
+                sys_logger.error(f"Error in log ingestion loop: {e}", exc_info=True)
+            return
+
+        events = self._subscription.get_batch(timeout=timeout)
+        try:
+            self._apply_pending_changes()
+            if self._reload_requested or self._subscription.overflowed:
+                # 状態の読み直し要求、またはキューあふれ -> ファイルから追いつく
+                self._subscription.overflowed = False
+                self.run_once()
+                return
+            for event in events:
+                if self.should_stop:
+                    break
+                if isinstance(event, LogEntrySaved):
+                    self._deliver_event(event)
+            for consumer in self.consumers:
+                consumer.tick()
+                consumer.flush_state()
+        except Exception as e:
+            sys_logger.error(f"Error in log ingestion loop: {e}", exc_info=True)
+
+    def _deliver_event(self, event: LogEntrySaved):
+        cursor = self._cursors.get(event.date_str)
+        if cursor is not None and event.end_offset <= cursor["read_offset"]:
+            return # ファイルからの追いつきで既に配った
+
+        if cursor is None or event.start_offset != cursor["read_offset"]:
+            # その日を初めて見る、または間に取りこぼしがある -> ファイルから読む (このイベントの行も含まれる)
+            self._ingest_day(event.date_str)
+            return
+
+        log_file = os.path.join(self.logs_root_dir, event.date_str, "activity.jsonl")
+        cursor["read_offset"] = event.end_offset
+        cursor["size"] = max(cursor["size"], event.end_offset)
+        batch = DayBatch(
+            date_str=event.date_str,
+            log_file=log_file,
+            inode=cursor["inode"],
+            size=cursor["size"],
+            entries=[(event.entry, event.end_offset)],
+            read_offset=event.end_offset
+        )
+        for consumer in self.consumers:
+            consumer.consume(batch)
+
+    def request_reload(self, date_str: Optional[str] = None, line_map: Optional[Dict[str, Any]] = None):
+        """
+        状態ファイルが外部で書き換えられたので、次回のスキャン開始時に読み直す。
+        date_str と line_map (コンパクションの対応表) を渡した場合は、その日のファイルが差し替わった後に
+        consumer ごとの処理済み位置を読み替える (別スレッドから呼ばれても、読み替えはこのサービスのスレッドで行う)。
+        """
+        if date_str is None or line_map is None:
+            self._reload_requested = True
+            return
+        with self._translations_lock:
+            self._translations[date_str] = line_map
+
+    def request_forget(self, date_str: str):
+        """
+        その日のディレクトリが削除されたので、consumer のチェックポイントから消す。
+        request_reload() と同じく、別スレッドから呼ばれても消すのはこのサービスのスレッドで行う
+        (要約側がメモリ上の状態で書き戻して、消した日が復活しないように)。
+        """
+        with self._translations_lock:
+            self._forgotten.add(date_str)
+            self._translations.pop(date_str, None)
+
+    def _apply_pending_changes(self):
+        self._apply_appended_days()
+        with self._translations_lock:
+            if not self._translations and not self._forgotten:
+                return
+            forgotten = sorted(self._forgotten)
+            self._forgotten.clear()
+            pending = list(self._translations.items())
+        for date_str in forgotten:
+            self._forget_day(date_str)
+        for date_str, line_map in pending:
+            log_file = resolve_log_path(os.path.join(self.logs_root_dir, date_str, "activity.jsonl"))
+            if log_file is None:
+                with self._translations_lock:
+                    self._translations.pop(date_str, None) # 日ごと削除された
+                continue
+            if stat_identity(log_file)[0] == line_map["inode"]:
+                self._translate_day(date_str, line_map)
+            # まだ差し替わっていなければ次回に回す
+
+    def _apply_appended_days(self):
+        """
+        notify_appended_days() で知らされた日の封印を外し、追記分を読む。
+        EventBus から受け取っている間はファイルをスキャンしないので、ここで直接読む。
+        """
+        path = os.path.join(self.logs_root_dir, APPENDED_DAYS_FILE)
+        if not os.path.exists(path):
+            return
+        taken = f"{path}.taken"
+        try:
+            # 読んでいる間に追記された通知は新しいファイルに書かれ、次回に読む
+            os.replace(path, taken)
+            with open(taken, "r") as f:
+                dates = sorted(set(json.load(f)))
+            os.remove(taken)
+        except Exception as e:
+            sys_logger.error(f"Failed to read {path}: {e}")
+            return
+
+        for date_str in dates:
+            sys_logger.info(f"Re-reading {date_str} appended from outside the app.")
+            for consumer in self.consumers:
+                consumer.unseal_day(date_str)
+                consumer.flush_state()
+            self._cursors.pop(date_str, None)
+            self.scanner.forget(date_str)
+            try:
+                self._ingest_day(date_str)
+            except Exception as e:
+                sys_logger.error(f"Error ingesting logs for {date_str}: {e}", exc_info=True)
+
+    def _translate_day(self, date_str: str, line_map: Dict[str, Any]):
+        with self._translations_lock:
+            self._translations.pop(date_str, None)
+        sys_logger.info(f"Translating checkpoints for compacted {date_str}.")
+        for consumer in self.consumers:
+            consumer.translate_day(date_str, line_map)
+            consumer.flush_state()
+        self._cursors.pop(date_str, None)
+        self.scanner.forget(date_str)
+
+    def _forget_day(self, date_str: str):
+        sys_logger.info(f"Forgetting checkpoints for deleted {date_str}.")
+        for consumer in self.consumers:
+            consumer.reset_day(date_str)
+            consumer.flush_state()
+        self._cursors.pop(date_str, None)
+        self.scanner.forget(date_str)
+
+    def stop(self):
+        self.should_stop = True
+        if self._event_bus is not None:
+            self._event_bus.unsubscribe(self._subscription)
+            self._subscription = None
+        for consumer in self.consumers:
+            consumer.flush_state()
+
+    def _ingest_day(self, date_str: str):
+        log_file = resolve_log_path(os.path.join(self.logs_root_dir, date_str, "activity.jsonl"))
+        if log_file is None:
+            return
+
+        inode, size = stat_identity(log_file)
+        with self._translations_lock:
+            translation = self._translations.get(date_str)
+        if translation is not None and translation["inode"] == inode:
+            # このスキャンの間にコンパクションで差し替わった -> 読み直さずに位置を読み替える
+            self._translate_day(date_str, translation)
+        cursor = self._cursors.get(date_str)
+
+        if cursor is not None:
+            if cursor["inode"] == inode and cursor["size"] == size:
+                return # 前回から変化なし
+            if cursor["inode"] != inode or size < cursor["size"]:
+                sys_logger.warning(f"{log_file} was replaced or truncated. Re-reading from the start.")
+                for consumer in self.consumers:
+                    consumer.reset_day(date_str)
+                cursor = None
+
+        if cursor is None:
+            starts = [c.open_day(date_str, log_file, inode, size) for c in self.consumers]
+            starts = [s for s in starts if s is not None]
+            if not starts:
+                return # 全ての consumer が読み終えている
+            cursor = {"read_offset": min(starts), "inode": inode, "size": size}
+            self._cursors[date_str] = cursor
+
+        cursor["inode"], cursor["size"] = inode, size
+
+        # 前回読んだ位置から、追記された分だけを1回だけ読む
+        entries, read_offset = read_appended_entries(log_file, cursor["read_offset"])
+        cursor["read_offset"] = read_offset
+
+        batch = DayBatch(
+            date_str=date_str,
+            log_file=log_file,
+            inode=inode,
+            size=size,
+            entries=entries,
+            read_offset=read_offset
+        )
+        for consumer in self.consumers:
+            consumer.consume(batch)
+
+        if all(c.is_sealed(date_str) for c in self.consumers):
+            self._cursors.pop(date_str, None)
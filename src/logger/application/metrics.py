@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+sys_logger = logging.getLogger("system_summarizer")
+
+
+class RollingHistogram:
+    """
+    直近 window 回の所要時間 (秒) を保持し、p50 / p95 / p99 を求める。
+    記録はリングバッファへの書き込みだけ (パーセンタイルは snapshot() の時に計算する)。
+    """
+    def __init__(self, window: int = 1024):
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._index = 0
+        self._filled = 0
+        self.count = 0 # 起動からの累計
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples[self._index] = seconds
+            self._index = (self._index + 1) % len(self._samples)
+            if self._filled < len(self._samples):
+                self._filled += 1
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            recent = self._samples[:self._filled].copy()
+            count, total = self.count, self.total
+        if not len(recent):
+            return {"count": count, "total": total, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+        return {
+            "count": count,
+            "total": total,
+            # 以下は直近 window 回分
+            "mean": float(recent.mean()),
+            "p50": float(p50),
+            "p95": float(p95),
+            "p99": float(p99),
+            "max": float(recent.max())
+        }
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: RollingHistogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """
+    ホットパス (監視ループの各処理・要約・文字起こし) の所要時間のヒストグラムと、件数・バイト数のカウンタ。
+
+        with hot_path_metrics.timer("monitor.ocr"):
+            text = ocr.extract_text(image_ref)
+        hot_path_metrics.increment("monitor.ocr_runs")
+
+    enabled=False なら何も記録しない。
+    """
+    def __init__(self, window: int = 1024, enabled: bool = True):
+        self.window = window
+        self.enabled = enabled
+        self._histograms: Dict[str, RollingHistogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str) -> RollingHistogram:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(name, RollingHistogram(self.window))
+        return histogram
+
+    def timer(self, name: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self.histogram(name))
+
+    def observe(self, name: str, seconds: float):
+        if self.enabled:
+            self.histogram(name).observe(seconds)
+
+    def increment(self, name: str, value: float = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        {"timers": {名前: {count, total, mean, p50, p95, p99, max}}, "counters": {名前: 累計}}。時間は秒。
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            counters = dict(self._counters)
+        return {
+            "timers": {name: h.snapshot() for name, h in sorted(histograms.items())},
+            "counters": dict(sorted(counters.items()))
+        }
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+
+class MetricsDumper:
+    """
+    interval 秒ごとに MetricsRegistry のスナップショットを JSONL に1行追記する。
+    各行には前回からのカウンタの増分 (counter_deltas) も入れる。
+    ファイルが max_bytes を超えたら .1 に退避して新しく書き始める。
+    """
+    def __init__(
+        self,
+        registry: "MetricsRegistry",
+        path: str,
+        interval: float = 60.0,
+        max_bytes: int = 10 * 1024 * 1024
+    ):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._last_counters: Dict[str, float] = {}
+        self._last_dump: Optional[float] = None
+        self._dump_lock = threading.Lock()
+        self.should_stop = False
+
+    def start_monitoring(self):
+        """
+        stop() まで interval 秒ごとに書き出す。
+        """
+        self.should_stop = False
+        self._last_dump = time.monotonic()
+        while True:
+            # stop() に素早く反応できるよう細かく待つ
+            waited = 0.0
+            while waited < self.interval and not self.should_stop:
+                time.sleep(1.0)
+                waited += 1.0
+            if self.should_stop:
+                break
+            self.dump()
+
+    def stop(self):
+        """
+        止める時の分を書き出す (プロセスがすぐ終わっても残るよう、呼んだスレッドで書く)。
+        """
+        if self.should_stop:
+            return
+        self.should_stop = True
+        self.dump()
+
+    def dump(self) -> Dict[str, Any]:
+        with self._dump_lock:
+            return self._dump()
+
+    def _dump(self) -> Dict[str, Any]:
+        snapshot = self.registry.snapshot()
+        now = time.monotonic()
+        counters = snapshot["counters"]
+        row = {
+            "timestamp": datetime.now().isoformat(),
+            "interval": now - self._last_dump if self._last_dump is not None else None,
+            "timers": snapshot["timers"],
+            "counters": counters,
+            "counter_deltas": {name: value - self._last_counters.get(name, 0) for name, value in counters.items()}
+        }
+        self._last_counters = counters
+        self._last_dump = now
+        try:
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        except Exception as e:
+            sys_logger.error(f"Failed to write metrics to {self.path}: {e}")
+        return row
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        os.replace(self.path, self.path + ".1")
+
+
+# 監視ループ・要約・文字起こしで共有する (GUI のダッシュボードは controller.get_hot_path_metrics() で読む)
+hot_path_metrics = MetricsRegistry()
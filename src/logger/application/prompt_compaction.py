@@ -0,0 +1,165 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..domain.services import SimilarityChecker
+
+OCR_CHARS = 150
+AUDIO_CHARS = 150
+
+
+@dataclass
+class ActivitySpan:
+    """同じアプリ/ウィンドウで連続したエントリをまとめた時間帯"""
+    start: str
+    end: str
+    app: str
+    title: str
+    count: int = 1
+    ocr: List[str] = field(default_factory=list)
+    audio: List[str] = field(default_factory=list)
+
+
+class PromptCompactor:
+    """
+    要約プロンプトに載せる前に、チャンクのエントリを圧縮する。
+
+    1. 連続する同じアプリ/タイトルのエントリを1つの時間帯にまとめる (run-length)
+    2. 時間帯の中で、直前に残した OCR とほぼ同じ OCR を省く
+    3. それでも max_log_tokens を超える場合は、互いに似ていない OCR 行を優先して予算内に収める
+       (各時間帯の最初の OCR を先に選び、残りは既に選んだ行との類似度が低い順に選ぶ)
+    ウィンドウの見出しと音声は常に残す。
+    """
+    def __init__(
+        self,
+        similarity_checker: Optional[SimilarityChecker] = None,
+        ocr_similarity: float = 0.8,
+        max_log_tokens: Optional[int] = 1200,
+        recent_window: int = 5
+    ):
+        self.similarity = similarity_checker or SimilarityChecker()
+        self.ocr_similarity = ocr_similarity
+        self.max_log_tokens = max_log_tokens
+        self.recent_window = recent_window
+
+    def compact(self, entries: List[Dict[str, Any]], count_tokens: Callable[[str], int]) -> Tuple[str, Dict[str, int]]:
+        """
+        Returns:
+            (プロンプトに載せるログテキスト, 統計 {"entries", "spans", "ocr_suppressed", "ocr_dropped"})
+        """
+        spans = self._merge_runs(entries)
+        suppressed = sum(self._suppress_duplicates(span) for span in spans)
+        selected = [list(range(len(span.ocr))) for span in spans]
+
+        dropped = 0
+        if self.max_log_tokens is not None:
+            text = self._render(spans, selected)
+            if count_tokens(text) > self.max_log_tokens:
+                selected = self._select_diverse(spans, count_tokens)
+                dropped = sum(len(span.ocr) for span in spans) - sum(len(s) for s in selected)
+
+        stats = {
+            "entries": len(entries),
+            "spans": len(spans),
+            "ocr_suppressed": suppressed,
+            "ocr_dropped": dropped
+        }
+        return self._render(spans, selected), stats
+
+    def _merge_runs(self, entries: List[Dict[str, Any]]) -> List[ActivitySpan]:
+        spans: List[ActivitySpan] = []
+        for e in entries:
+            screen = e.get('screen', {})
+            app = screen.get('app_name', 'Unknown')
+            title = screen.get('window_title', '')
+            ts = e.get('timestamp', '')
+            ocr = screen.get('ocr_text', '')[:OCR_CHARS].replace('\n', ' ').strip()
+            audio = e.get('audio', {}).get('transcript', '')[:AUDIO_CHARS].strip()
+
+            if spans and spans[-1].app == app and spans[-1].title == title:
+                span = spans[-1]
+                span.end = ts
+                span.count += 1
+            else:
+                span = ActivitySpan(start=ts, end=ts, app=app, title=title)
+                spans.append(span)
+            if ocr:
+                span.ocr.append(ocr)
+            if audio and (not span.audio or span.audio[-1] != audio):
+                span.audio.append(audio)
+        return spans
+
+    def _suppress_duplicates(self, span: ActivitySpan) -> int:
+        """
+        直近に残した OCR とほぼ同じ OCR を省く。省いた数を返す。
+        """
+        kept: List[str] = []
+        for text in span.ocr:
+            recent = kept[-self.recent_window:]
+            if any(self.similarity.is_text_similar(text, prev, self.ocr_similarity) for prev in recent):
+                continue
+            kept.append(text)
+        removed = len(span.ocr) - len(kept)
+        span.ocr = kept
+        return removed
+
+    def _select_diverse(self, spans: List[ActivitySpan], count_tokens: Callable[[str], int]) -> List[List[int]]:
+        selected: List[List[int]] = [[] for _ in spans]
+        remaining = self.max_log_tokens - count_tokens(self._render(spans, selected))
+        if remaining <= 0:
+            return selected
+
+        candidates = [
+            (si, li, text, count_tokens(f"OCR: {text}\n"))
+            for si, span in enumerate(spans)
+            for li, text in enumerate(span.ocr)
+        ]
+        chosen_texts: List[str] = []
+
+        def take(candidate) -> bool:
+            nonlocal remaining
+            si, li, text, tokens = candidate
+            if tokens > remaining:
+                return False
+            selected[si].append(li)
+            chosen_texts.append(text)
+            remaining -= tokens
+            return True
+
+        # 1. どの時間帯にも1行は残す (長く滞在した時間帯から)
+        firsts = [c for c in candidates if c[1] == 0]
+        firsts.sort(key=lambda c: -spans[c[0]].count)
+        rest = [c for c in candidates if c[1] != 0]
+        for c in firsts:
+            if not take(c):
+                rest.append(c)
+
+        # 2. 残りは、既に選んだ行と最も似ていないものから選ぶ
+        while rest and remaining > 0:
+            best_index, best_novelty = None, -1.0
+            for i, c in enumerate(rest):
+                if c[3] > remaining:
+                    continue
+                novelty = 1.0 - max((self.similarity.text_similarity(c[2], t) for t in chosen_texts), default=0.0)
+                if novelty > best_novelty:
+                    best_index, best_novelty = i, novelty
+            if best_index is None:
+                break
+            take(rest.pop(best_index))
+
+        return [sorted(s) for s in selected]
+
+    @staticmethod
+    def _render(spans: List[ActivitySpan], selected: List[List[int]]) -> str:
+        log_text = ""
+        for span, indices in zip(spans, selected):
+            start, end = span.start[11:19], span.end[11:19] # Extract HH:MM:SS
+            if span.count > 1:
+                log_text += f"[{start}-{end}] App: {span.app}, Title: {span.title} ({span.count} entries)\n"
+            else:
+                log_text += f"[{start}] App: {span.app}, Title: {span.title}\n"
+            for i in indices:
+                log_text += f"OCR: {span.ocr[i]}\n"
+            for audio in span.audio:
+                log_text += f"Audio: {audio}\n"
+            log_text += "---\n"
+        return log_text
@@ -0,0 +1,331 @@
+import os
+import gzip
+import glob
+import json
+import time
+import shutil
+import logging
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Any, Optional, Callable
+
+from ..infrastructure.persistence.log_files import ARCHIVE_SUFFIX, open_log, write_json_atomic
+
+sys_logger = logging.getLogger("system_summarizer")
+
+STATIC_POLICIES = ("keep", "thin", "drop")
+
+
+class LogRetentionUseCase:
+    """
+    古い日別ログのコンパクションと保存容量の管理。
+
+    - retention_days より古い日の *.jsonl を gzip 圧縮する (読み出し側は log_files 経由で透過的に読める)
+    - activity.jsonl の静止画面エントリ (is_screen_change=false) を static_policy に従って間引く
+        - "keep": そのまま残す
+        - "thin": 同じアプリ/ウィンドウで連続する静止エントリを1件にまとめる (音声は連結)
+        - "drop": 静止エントリを削除する
+    - disk_budget_mb を超えている場合、古い日から順にディレクトリごと削除する (今日は消さない)
+    """
+    def __init__(
+        self,
+        logs_root_dir: str = "logs",
+        retention_days: int = 7,
+        static_policy: str = "keep",
+        disk_budget_mb: Optional[float] = None
+    ):
+        if static_policy not in STATIC_POLICIES:
+            raise ValueError(f"Unknown static policy: {static_policy} (expected one of {STATIC_POLICIES})")
+        self.logs_root_dir = logs_root_dir
+        self.retention_days = retention_days
+        self.static_policy = static_policy
+        self.disk_budget_mb = disk_budget_mb
+        self.should_stop = False
+        self.on_day_compacted: Optional[Callable[[str], None]] = None # Callback: date_str
+        # 同じプロセスで要約が動いている場合の処理済み位置の受け渡し先 (LogIngestionService.request_reload)。
+        # 指定すると状態ファイルは書き換えず、圧縮したファイルに差し替える直前に対応表を渡す
+        # (要約は自分のスレッドで読み替えるので、メモリ上の古い位置で上書きされない)
+        self.state_translator: Optional[Callable[[str, Dict[str, Any]], None]] = None
+        # 同様に、容量制限で日を削除したことの通知先 (LogIngestionService.request_forget)。
+        # 指定すると状態ファイルからは消さず、要約が自分のスレッドでその日のチェックポイントを捨てる
+        self.state_forgetter: Optional[Callable[[str], None]] = None
+
+    def start_monitoring(self, check_interval: float = 3600.0):
+        sys_logger.info(f"Starting log retention job (retention_days={self.retention_days}, policy={self.static_policy})...")
+        while not self.should_stop:
+            try:
+                self.run_once()
+            except Exception as e:
+                sys_logger.error(f"Error in log retention loop: {e}", exc_info=True)
+
+            # stop() に素早く反応できるよう細かく待つ
+            waited = 0.0
+            while waited < check_interval and not self.should_stop:
+                time.sleep(1.0)
+                waited += 1.0
+
+    def stop(self):
+        self.should_stop = True
+
+    def run_once(self, today: Optional[date] = None) -> Dict[str, Any]:
+        """
+        コンパクションと容量制限を1回実行し、結果のレポートを返す。
+        """
+        today = today or datetime.now().date()
+        report = {"compacted_days": [], "deleted_days": [], "bytes_before": 0, "bytes_after": 0}
+        if not os.path.exists(self.logs_root_dir):
+            return report
+
+        report["bytes_before"] = self._total_size()
+        cutoff = today - timedelta(days=self.retention_days)
+
+        for date_str in self._list_days():
+            day = datetime.strptime(date_str, '%Y-%m-%d').date()
+            if day >= cutoff:
+                continue
+            if self._compact_day(date_str):
+                report["compacted_days"].append(date_str)
+                if self.on_day_compacted:
+                    self.on_day_compacted(date_str)
+
+        if self.disk_budget_mb is not None:
+            report["deleted_days"] = self._enforce_budget(today)
+
+        report["bytes_after"] = self._total_size()
+        sys_logger.info(
+            f"Log retention finished: compacted={len(report['compacted_days'])}, "
+            f"deleted={len(report['deleted_days'])}, "
+            f"{report['bytes_before']} -> {report['bytes_after']} bytes"
+        )
+        return report
+
+    def _list_days(self) -> List[str]:
+        days = []
+        for d in sorted(os.listdir(self.logs_root_dir)):
+            if not os.path.isdir(os.path.join(self.logs_root_dir, d)):
+                continue
+            try:
+                datetime.strptime(d, '%Y-%m-%d')
+            except ValueError:
+                continue
+            days.append(d)
+        return days
+
+    def _total_size(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.logs_root_dir):
+            for name in files:
+                try:
+                    total += os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return total
+
+    def _compact_day(self, date_str: str) -> bool:
+        """
+        1日分のディレクトリを圧縮する。何か処理した場合 True。
+        """
+        dir_path = os.path.join(self.logs_root_dir, date_str)
+        compacted = False
+        for path in sorted(glob.glob(os.path.join(dir_path, "*.jsonl"))):
+            if os.path.basename(path) == "activity.jsonl":
+                if self.state_translator:
+                    self._compact_activity(path, before_replace=lambda line_map: self.state_translator(date_str, line_map))
+                else:
+                    line_map = self._compact_activity(path)
+                    self._translate_summarizer_states(date_str, line_map)
+            else:
+                self._gzip_file(path)
+            compacted = True
+        return compacted
+
+    def _gzip_file(self, path: str):
+        archived = path + ARCHIVE_SUFFIX
+        tmp_path = archived + ".tmp"
+        with open(path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+            # 既に圧縮済みのファイルがある場合 (圧縮後に追記された分) は先頭に連結する
+            if os.path.exists(archived):
+                with open_log(archived, "rb") as old:
+                    shutil.copyfileobj(old, dst)
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, archived)
+        os.remove(path)
+
+    def _compact_activity(
+        self,
+        path: str,
+        before_replace: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        activity.jsonl を静止エントリのポリシーに従って書き換えつつ圧縮する。
+        before_replace は圧縮したファイルに差し替える直前に対応表を受け取る。
+
+        Returns:
+            要約の処理済み位置を新しいファイルに読み替えるための対応表。
+            "lines": 出力した各行の (元の最後の行番号, 元の行末オフセット, 新しい行末オフセット)。オフセットは展開後のバイト位置
+            "bases": 元ファイルの inode -> 連結したときの先頭オフセット
+            "inode", "size": 圧縮後ファイルの inode とディスク上のサイズ (.gz のサイズ。差し替えの検出用で、オフセットとは単位が違う)
+        """
+        archived = path + ARCHIVE_SUFFIX
+        tmp_path = archived + ".tmp"
+        lines: List[tuple] = []
+        bases: Dict[int, int] = {}
+        pending: Optional[Dict[str, Any]] = None # thin でまとめている途中の静止エントリ
+        pending_pos = (0, 0)
+        written = 0
+
+        sources = [p for p in (archived, path) if os.path.exists(p)]
+        with gzip.open(tmp_path, "wb") as dst:
+            def emit(entry: Dict[str, Any], last_pos: tuple):
+                nonlocal written
+                data = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+                dst.write(data)
+                written += len(data)
+                lines.append((last_pos[0], last_pos[1], written))
+
+            raw_index = 0
+            raw_offset = 0
+            for src_path in sources:
+                bases[os.stat(src_path).st_ino] = raw_offset
+                with open_log(src_path, "rb") as src:
+                    for line in src:
+                        raw_index += 1
+                        raw_offset += len(line)
+                        pos = (raw_index, raw_offset)
+                        try:
+                            entry = json.loads(line)
+                        except (json.JSONDecodeError, UnicodeDecodeError):
+                            continue
+
+                        is_static = not entry.get("metadata", {}).get("is_screen_change", False)
+                        if not is_static or self.static_policy == "keep":
+                            if pending is not None:
+                                emit(pending, pending_pos)
+                                pending = None
+                            emit(entry, pos)
+                            continue
+
+                        if self.static_policy == "drop":
+                            continue
+
+                        # thin: 同じウィンドウで連続する静止エントリをまとめる
+                        if pending is not None and self._same_window(pending, entry):
+                            self._merge_static(pending, entry)
+                            pending_pos = pos
+                            continue
+                        if pending is not None:
+                            emit(pending, pending_pos)
+                        pending = entry
+                        pending_pos = pos
+
+            if pending is not None:
+                emit(pending, pending_pos)
+
+        # rename では inode は変わらないので、差し替え前に求めておける
+        st = os.stat(tmp_path)
+        line_map = {"lines": lines, "bases": bases, "inode": st.st_ino, "size": st.st_size}
+        if before_replace:
+            before_replace(line_map)
+        os.replace(tmp_path, archived)
+        if os.path.exists(path):
+            os.remove(path)
+        return line_map
+
+    @staticmethod
+    def _same_window(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+        sa, sb = a.get("screen", {}), b.get("screen", {})
+        return sa.get("app_name") == sb.get("app_name") and sa.get("window_title") == sb.get("window_title")
+
+    @staticmethod
+    def _merge_static(target: Dict[str, Any], entry: Dict[str, Any]):
+        transcript = entry.get("audio", {}).get("transcript", "").strip()
+        if transcript:
+            audio = target.setdefault("audio", {})
+            audio["transcript"] = " ".join(t for t in (audio.get("transcript", "").strip(), transcript) if t)
+        metadata = target.setdefault("metadata", {})
+        metadata["merged_entries"] = metadata.get("merged_entries", 1) + entry.get("metadata", {}).get("merged_entries", 1)
+        metadata["timestamp_end"] = entry.get("timestamp", "")
+
+    def _translate_summarizer_states(self, date_str: str, line_map: Dict[str, Any]):
+        """
+        要約の状態ファイル (処理済み位置) を、コンパクション後のファイルの位置に読み替える。
+        要約が動いていない時 (compact_cli など) だけ使う。動いている場合は state_translator に渡す。
+        """
+        for state_file in glob.glob(os.path.join(self.logs_root_dir, "summarizer_state_*.json")):
+            try:
+                with open(state_file, 'r') as f:
+                    state = json.load(f)
+            except Exception as e:
+                sys_logger.error(f"Failed to load summarizer state {state_file}: {e}")
+                continue
+            saved = state.get(date_str)
+            if saved is None:
+                continue
+            translated = translate_checkpoint(saved, line_map)
+            if translated is None:
+                continue # 別のファイルを指している (要約側で読み直しになる)
+            state[date_str] = translated
+            write_json_atomic(state_file, state)
+
+    def _enforce_budget(self, today: date) -> List[str]:
+        budget_bytes = int(self.disk_budget_mb * 1024 * 1024)
+        deleted = []
+        total = self._total_size()
+        today_str = today.strftime('%Y-%m-%d')
+        for date_str in self._list_days():
+            if total <= budget_bytes:
+                break
+            if date_str >= today_str:
+                break
+            dir_path = os.path.join(self.logs_root_dir, date_str)
+            shutil.rmtree(dir_path, ignore_errors=True)
+            deleted.append(date_str)
+            if self.state_forgetter:
+                self.state_forgetter(date_str)
+            else:
+                self._forget_day_in_states(date_str)
+            total = self._total_size()
+            sys_logger.info(f"Deleted {date_str} to stay within disk budget ({self.disk_budget_mb} MB)")
+        if total > budget_bytes:
+            sys_logger.warning(f"Logs still exceed disk budget after cleanup: {total} bytes")
+        return deleted
+
+    def _forget_day_in_states(self, date_str: str):
+        """
+        削除した日を要約の状態ファイルから消す。要約が動いていない時だけ使う (動いている場合は state_forgetter に渡す)。
+        """
+        for state_file in glob.glob(os.path.join(self.logs_root_dir, "summarizer_state_*.json")):
+            try:
+                with open(state_file, 'r') as f:
+                    state = json.load(f)
+                if state.pop(date_str, None) is not None:
+                    write_json_atomic(state_file, state)
+            except Exception as e:
+                sys_logger.error(f"Failed to update summarizer state {state_file}: {e}")
+
+
+def translate_checkpoint(saved: Any, line_map: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    ある日の処理済み位置 (状態ファイルの1日分) を、_compact_activity() の対応表で圧縮後のファイルの位置に読み替える。
+    "size" は圧縮後ファイルのディスク上のサイズで、"offset" (展開後のバイト位置) とは比べない (差し替え・切り詰めの検出用)。
+    元のファイルと対応が取れなければ None。
+    """
+    if isinstance(saved, int):
+        # 旧形式: 処理済み行数
+        done = [new_end for last_index, _, new_end in line_map["lines"] if last_index <= saved]
+    elif isinstance(saved, dict):
+        base = line_map["bases"].get(saved.get("inode"))
+        if base is None:
+            return None
+        processed = base + saved.get("offset", 0)
+        done = [new_end for _, last_offset, new_end in line_map["lines"] if last_offset <= processed]
+    else:
+        return None
+
+    translated = {
+        "offset": done[-1] if done else 0,
+        "inode": line_map["inode"],
+        "size": line_map["size"]
+    }
+    if isinstance(saved, dict) and saved.get("sealed"):
+        translated["sealed"] = True
+    return translated
@@ -0,0 +1,283 @@
+import os
+import json
+import time
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from ..domain.interfaces import LlmProvider
+from ..infrastructure.persistence.log_files import resolve_log_path, iter_jsonl, write_json_atomic, write_jsonl_atomic
+from ..infrastructure.persistence.prompt_templates import PromptTemplateCache
+from .summarization_use_case import FAILED_SUMMARY_TEXT
+
+sys_logger = logging.getLogger("system_summarizer")
+
+# 入力にするチャンク要約のファイル -> 要約の種類
+CHUNK_SUMMARY_FILES = {
+    "visual_summary.jsonl": "visual",
+    "audio_summary.jsonl": "audio",
+    "summary.jsonl": "combined",
+}
+HOURLY_FILE = "hourly_summary.jsonl"
+DAILY_FILE = "daily_summary.jsonl"
+HOURLY_TEMPLATE = "summarize_hourly_rollup.txt"
+DAILY_TEMPLATE = "summarize_daily_rollup.txt"
+
+
+def _hash_inputs(items: List[Any]) -> str:
+    data = json.dumps(items, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+class RollupSummarizationUseCase:
+    """
+    チャンク要約 (visual_summary.jsonl / audio_summary.jsonl) から1時間ごとの要約を、
+    1時間ごとの要約から1日の概要を作る (map-reduce)。
+
+    - 各階層は入力のハッシュを rollup_state.json に覚えておき、入力が変わった時間/日だけを作り直す
+    - 日のチャンク要約ファイルの (サイズ, mtime) が前回と同じなら、ファイルも読まない
+    - 1日の概要のコストは時間数 (最大24件の1時間要約) に比例し、生のエントリ数には依存しない
+
+    出力: logs/YYYY-MM-DD/hourly_summary.jsonl (1時間1行), daily_summary.jsonl (1行)。どちらも毎回アトミックに書き直す。
+    """
+    def __init__(self, llm_provider: LlmProvider, logs_root_dir: str = "logs"):
+        self.llm = llm_provider
+        self.logs_root_dir = logs_root_dir
+        self.state_file = os.path.join(logs_root_dir, "rollup_state.json")
+        self.state = self._load_state()
+        self.templates = PromptTemplateCache()
+        self.should_stop = False
+        self.on_rollup_generated: Optional[Callable[[str, Dict[str, Any]], None]] = None # Callback: level ("hourly"/"daily"), summary
+
+    def _load_state(self) -> Dict[str, Any]:
+        """
+        形式: {"YYYY-MM-DD": {"sources": 入力ファイルの指紋, "hours": {"HH": 入力ハッシュ}, "daily": 入力ハッシュ}}
+        """
+        if os.path.exists(self.state_file):
+            try:
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+            except Exception as e:
+                sys_logger.error(f"Failed to load rollup state: {e}")
+        return {}
+
+    def _save_state(self):
+        try:
+            write_json_atomic(self.state_file, self.state)
+        except Exception as e:
+            sys_logger.error(f"Failed to save rollup state: {e}")
+
+    def start_monitoring(self, check_interval: float = 600.0):
+        sys_logger.info("Starting rollup summarization (hourly / daily)...")
+        while not self.should_stop:
+            try:
+                self.run_once()
+            except Exception as e:
+                sys_logger.error(f"Error in rollup loop: {e}", exc_info=True)
+
+            # stop() に素早く反応できるよう細かく待つ
+            waited = 0.0
+            while waited < check_interval and not self.should_stop:
+                time.sleep(1.0)
+                waited += 1.0
+
+    def stop(self):
+        self.should_stop = True
+
+    def run_once(self) -> Dict[str, int]:
+        """
+        入力が変わった日の1時間要約と1日の概要を作り直す。
+
+        Returns:
+            {"hourly": 作り直した1時間要約の数, "daily": 作り直した日の数}
+        """
+        report = {"hourly": 0, "daily": 0}
+        if not os.path.exists(self.logs_root_dir):
+            return report
+
+        days = self._list_days()
+        dirty = False
+        for date_str in days:
+            if self.should_stop:
+                break
+            try:
+                hourly, daily, changed = self._rollup_day(date_str)
+                report["hourly"] += hourly
+                report["daily"] += daily
+                dirty = dirty or changed
+            except Exception as e:
+                sys_logger.error(f"Error building rollups for {date_str}: {e}", exc_info=True)
+
+        # 削除された日 (容量制限など) の状態は捨てる
+        for date_str in [d for d in self.state if d not in days]:
+            del self.state[date_str]
+            dirty = True
+
+        if dirty:
+            self._save_state()
+        return report
+
+    def _list_days(self) -> List[str]:
+        days = []
+        for d in sorted(os.listdir(self.logs_root_dir)):
+            if not os.path.isdir(os.path.join(self.logs_root_dir, d)):
+                continue
+            try:
+                datetime.strptime(d, '%Y-%m-%d')
+            except ValueError:
+                continue
+            days.append(d)
+        return days
+
+    def _source_fingerprint(self, date_str: str) -> List[Any]:
+        fingerprint = []
+        for name in sorted(CHUNK_SUMMARY_FILES):
+            path = resolve_log_path(os.path.join(self.logs_root_dir, date_str, name))
+            if path is None:
+                continue
+            st = os.stat(path)
+            fingerprint.append([os.path.basename(path), st.st_size, st.st_mtime_ns])
+        return fingerprint
+
+    def _rollup_day(self, date_str: str) -> Tuple[int, int, bool]:
+        """
+        Returns:
+            (作り直した1時間要約の数, 作り直した1日の概要の数, 状態が変わったか)
+        """
+        day_state = self.state.setdefault(date_str, {})
+        fingerprint = self._source_fingerprint(date_str)
+        if not fingerprint or day_state.get("sources") == fingerprint:
+            return 0, 0, False
+
+        day_dir = os.path.join(self.logs_root_dir, date_str)
+        chunks_by_hour = self._load_chunk_summaries(date_str)
+
+        # 1. map: 入力 (チャンク要約) が変わった時間だけ作り直す
+        existing = {row.get("hour"): row for row in iter_jsonl(os.path.join(day_dir, HOURLY_FILE))}
+        hour_hashes: Dict[str, str] = day_state.get("hours", {})
+        hourly_rows = []
+        rebuilt_hours = 0
+        complete = True
+        for hour in sorted(chunks_by_hour):
+            chunks = chunks_by_hour[hour]
+            input_hash = _hash_inputs(chunks)
+            row = existing.get(hour)
+            if row is None or hour_hashes.get(hour) != input_hash:
+                row = self._summarize_hour(date_str, hour, chunks, input_hash)
+                if row is None:
+                    complete = False
+                    row = existing.get(hour) # 失敗したら前回の結果を残し、次回に再試行する
+                else:
+                    hour_hashes[hour] = input_hash
+                    rebuilt_hours += 1
+                    if self.on_rollup_generated:
+                        self.on_rollup_generated("hourly", row)
+            if row is not None:
+                hourly_rows.append(row)
+        day_state["hours"] = {h: v for h, v in hour_hashes.items() if h in chunks_by_hour}
+        if rebuilt_hours:
+            write_jsonl_atomic(os.path.join(day_dir, HOURLY_FILE), hourly_rows)
+
+        # 2. reduce: 1時間要約が変わった場合だけ、1日の概要を作り直す
+        rebuilt_daily = 0
+        if hourly_rows:
+            daily_hash = _hash_inputs([[row["hour"], row["summary"]] for row in hourly_rows])
+            daily_file = os.path.join(day_dir, DAILY_FILE)
+            if day_state.get("daily") != daily_hash or resolve_log_path(daily_file) is None:
+                daily = self._summarize_day(date_str, hourly_rows, daily_hash)
+                if daily is None:
+                    complete = False
+                else:
+                    write_jsonl_atomic(daily_file, [daily])
+                    day_state["daily"] = daily_hash
+                    rebuilt_daily = 1
+                    if self.on_rollup_generated:
+                        self.on_rollup_generated("daily", daily)
+
+        if complete:
+            # 全て作り終えたときだけ指紋を記録する (失敗した分は次回、ファイルを読み直して再試行)
+            day_state["sources"] = fingerprint
+        if rebuilt_hours or rebuilt_daily:
+            sys_logger.info(f"Rollups for {date_str}: {rebuilt_hours} hourly, {rebuilt_daily} daily rebuilt.")
+        return rebuilt_hours, rebuilt_daily, True
+
+    def _load_chunk_summaries(self, date_str: str) -> Dict[str, List[Dict[str, str]]]:
+        by_hour: Dict[str, List[Dict[str, str]]] = {}
+        for name, summary_type in CHUNK_SUMMARY_FILES.items():
+            for row in iter_jsonl(os.path.join(self.logs_root_dir, date_str, name)):
+                start = row.get("timestamp_start", "")
+                summary = row.get("summary", "")
+                if len(start) < 13 or not isinstance(summary, str) or not summary.strip():
+                    continue
+                if summary == FAILED_SUMMARY_TEXT:
+                    continue # 生成に失敗したチャンクは入力にしない
+                by_hour.setdefault(start[11:13], []).append({
+                    "type": summary_type,
+                    "timestamp_start": start,
+                    "timestamp_end": row.get("timestamp_end", start),
+                    "summary": summary.strip()
+                })
+        for chunks in by_hour.values():
+            chunks.sort(key=lambda c: (c["timestamp_start"], c["type"]))
+        return by_hour
+
+    def _summarize_hour(self, date_str: str, hour: str, chunks: List[Dict[str, str]], input_hash: str) -> Optional[Dict[str, Any]]:
+        start_time = chunks[0]["timestamp_start"]
+        end_time = max(c["timestamp_end"] for c in chunks)
+        lines = "".join(
+            f"[{c['timestamp_start'][11:16]}-{c['timestamp_end'][11:16]}] ({c['type']}) {c['summary']}\n"
+            for c in chunks
+        )
+        sys_logger.info(f"Generating hourly rollup for {date_str} {hour}:00 ({len(chunks)} chunks)...")
+        summary = self._generate(HOURLY_TEMPLATE, start_time, end_time, lines)
+        if summary is None:
+            return None
+        return {
+            "hour": hour,
+            "timestamp_start": start_time,
+            "timestamp_end": end_time,
+            "summary": summary,
+            "chunks": len(chunks),
+            "input_hash": input_hash
+        }
+
+    def _summarize_day(self, date_str: str, hourly_rows: List[Dict[str, Any]], input_hash: str) -> Optional[Dict[str, Any]]:
+        start_time = hourly_rows[0]["timestamp_start"]
+        end_time = hourly_rows[-1]["timestamp_end"]
+        lines = "".join(f"[{row['hour']}:00] {row['summary']}\n" for row in hourly_rows)
+        sys_logger.info(f"Generating daily rollup for {date_str} ({len(hourly_rows)} hours)...")
+        summary = self._generate(DAILY_TEMPLATE, start_time, end_time, lines)
+        if summary is None:
+            return None
+        return {
+            "date": date_str,
+            "timestamp_start": start_time,
+            "timestamp_end": end_time,
+            "summary": summary,
+            "hours": len(hourly_rows),
+            "input_hash": input_hash
+        }
+
+    def _generate(self, template_name: str, start_time: str, end_time: str, text: str) -> Optional[str]:
+        try:
+            template = self.templates.get(template_name)
+            prompt = template.render(start_time=start_time, end_time=end_time, log_text=text)
+            static_prefix = template.static_prefix or None
+        except Exception as e:
+            sys_logger.error(f"Failed to load prompt template {template_name}: {e}")
+            prompt = f"Summarize the following summaries from {start_time} to {end_time}:\n{text}\nJSON Summary:"
+            static_prefix = None
+
+        for attempt in range(2):
+            response = self.llm.process_content(prompt, static_prefix=static_prefix)
+            if isinstance(response, dict):
+                summary = response.get("summary", str(response))
+            elif isinstance(response, str):
+                summary = response
+            else:
+                continue
+            if summary:
+                return summary
+        sys_logger.warning(f"Failed to generate rollup summary ({template_name}) after retries.")
+        return None
@@ -1,11 +1,20 @@
 import os
+import glob
 import json
 import time
 import logging
 import threading
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Set, Tuple
 from ..domain.interfaces import LlmProvider
+from ..infrastructure.persistence.log_files import append_jsonl, iter_jsonl, write_json_atomic, offset_after_lines, stat_identity
+from ..infrastructure.persistence.prompt_templates import PromptTemplateCache
+from ..infrastructure.persistence.summary_cache import SummaryCache, make_cache_key
+from .log_ingestion import LogIngestionService, LogConsumer, DayBatch
+from .chunking import ChunkPolicy, CountChunkPolicy
+from .prompt_compaction import PromptCompactor
+from .retention_use_case import translate_checkpoint
+from .metrics import hot_path_metrics
 
 # Setup specific logger for summarization system
 sys_logger = logging.getLogger("system_summarizer")
@@ -19,17 +28,94 @@ formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 file_handler.setFormatter(formatter)
 sys_logger.addHandler(file_handler)
 
-class LogSummarizationUseCase:
-    def __init__(self, llm_provider: LlmProvider, summary_type: str = "combined", logs_root_dir: str = "logs"):
+PROMPT_TEMPLATES = {
+    "visual": "summarize_visual_activity.txt",
+    "audio": "summarize_audio_activity.txt",
+    "visual_audio": "summarize_visual_audio_activity.txt",
+}
+DEFAULT_PROMPT_TEMPLATE = "summarize_daily_activity.txt"
+FAILED_SUMMARY_TEXT = "Failed to generate summary."
+
+# 全ての要約で共有する (テンプレートは種類ごとに1回だけ読み込む)
+_template_cache = PromptTemplateCache()
+
+
+def unseal_days(logs_root_dir: str, dates: List[str]) -> List[str]:
+    """
+    封印済みの過去の日に後からエントリを追記した場合 (録音ファイルの文字起こしなど) に、
+    要約の状態ファイルからその日の封印を外す。処理済み位置は残すので、次回のスキャンで追記分だけを要約する。
+    動いている要約はメモリ上の状態で上書きしてしまうので、あわせて notify_appended_days() でも知らせること。
+
+    Returns:
+        封印を外した日
+    """
+    unsealed = set()
+    for state_file in glob.glob(os.path.join(logs_root_dir, "summarizer_state_*.json")):
+        try:
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+            changed = False
+            for date_str in dates:
+                saved = state.get(date_str)
+                if isinstance(saved, dict) and saved.pop("sealed", None):
+                    unsealed.add(date_str)
+                    changed = True
+            if changed:
+                write_json_atomic(state_file, state)
+        except Exception as e:
+            sys_logger.error(f"Failed to update summarizer state {state_file}: {e}")
+    return sorted(unsealed)
+
+
+class LogSummarizationUseCase(LogConsumer):
+    def __init__(
+        self,
+        llm_provider: LlmProvider,
+        summary_type: str = "combined",
+        logs_root_dir: str = "logs",
+        chunk_size: int = 5,
+        batch_size: int = 4,
+        chunk_policy: Optional[ChunkPolicy] = None,
+        summary_cache: Optional[SummaryCache] = None,
+        prompt_compactor: Optional[PromptCompactor] = None
+    ):
         self.llm = llm_provider
         self.summary_type = summary_type # "combined", "visual", "audio"
         self.logs_root_dir = logs_root_dir
+        self.chunk_size = chunk_size
+        # チャンクの区切り方 (件数 / トークン予算)。指定がなければ chunk_size 件ごと
+        self.chunk_policy = chunk_policy or CountChunkPolicy(chunk_size)
+        # 生成済み要約のキャッシュ (状態ファイルを失っても同じチャンクを LLM に送り直さない)
+        self.summary_cache = summary_cache
+        # プロンプトに載せる前にエントリを圧縮する (None なら1エントリ1ブロックのまま)
+        self.prompt_compactor = prompt_compactor
+        self.compaction_stats = {"chunks": 0, "tokens_before": 0, "tokens_after": 0}
+        # 溜まったチャンクを LlmProvider.process_batch() にまとめて渡す最大数
+        self.batch_size = batch_size
         self.state_file = os.path.join(logs_root_dir, f"summarizer_state_{summary_type}.json")
         self.state = self._load_state()
+        self._state_dirty = False
+        # 日付ごとの処理位置 (メモリ上のみ)。要約待ちのエントリもここに保持する
+        # {"YYYY-MM-DD": {"log_file": str, "read_offset": int, "inode": int, "size": int, "pending": [(entry, end_offset), ...],
+        #                 "pending_since": 要約待ちが溜まり始めた時刻 (monotonic), "costs": {end_offset: トークン数}}}
+        self._cursors: Dict[str, Dict[str, Any]] = {}
+        # 要約ファイルごとの書き込み済みの時間帯 (timestamp_start, timestamp_end)。最初の追記時に読み込む
+        self._written_spans: Dict[str, Set[Tuple[str, str]]] = {}
+        # 過去の日は、最終更新からこの秒数が経ち、全て要約し終えたら封印 (以後スキャンしない)
+        self.seal_grace_seconds = 300.0
+        # 単独で動かす場合 (start_monitoring / run_once) に使う読み込み役
+        self._ingestor: Optional[LogIngestionService] = None
         self.should_stop = False
         self.on_summary_generated = None # Callback: Callable[[Dict[str, Any]], None]
 
-    def _load_state(self) -> Dict[str, int]:
+    def _load_state(self) -> Dict[str, Dict[str, int]]:
+        """
+        日付ごとの処理済み位置を読み込む。
+        形式: {"YYYY-MM-DD": {"offset": バイト位置, "inode": ..., "size": ..., "sealed": bool}}
+        offset は展開後のバイト位置、size はディスク上のファイルサイズ (.gz ならそのサイズ) で、
+        size は差し替え・切り詰めの検出にだけ使う。
+        (旧形式の「処理済み行数 (int)」は、読み込み時にバイト位置へ移行する)
+        """
         if os.path.exists(self.state_file):
             try:
                 with open(self.state_file, 'r') as f:
@@ -38,49 +124,74 @@ class LogSummarizationUseCase:
                 sys_logger.error(f"Failed to load state for {self.summary_type}: {e}")
         return {}
 
+    def reload_state(self):
+        """
+        状態ファイルを読み直す (ログのコンパクション等で外部から書き換えられた場合)。
+        LogIngestionService.request_reload() 経由で、監視スレッド上から呼ばれる。
+        """
+        self.state = self._load_state()
+        self._state_dirty = False
+        self._cursors = {}
+
+    def _mark_state_dirty(self):
+        self._state_dirty = True
+
     def _save_state(self):
+        """
+        状態をアトミックに書き出す。チャンクごとではなく、スキャン1回分をまとめて書く。
+        """
+        if not self._state_dirty:
+            return
         try:
-            with open(self.state_file, 'w') as f:
-                json.dump(self.state, f, indent=2)
+            write_json_atomic(self.state_file, self.state)
+            self._state_dirty = False
         except Exception as e:
             sys_logger.error(f"Failed to save state for {self.summary_type}: {e}")
 
-    def start_monitoring(self, chunk_size: int = 5, check_interval: float = 10.0):
+    def flush_state(self):
+        self._save_state()
+
+    def start_monitoring(self, chunk_size: int = 5, check_interval: float = 10.0, use_watcher: bool = True):
+        """
+        この要約だけを単独で監視する。複数の要約を動かす場合は LogIngestionService に
+        consumer として登録し、activity.jsonl の読み込みを共有すること。
+        """
         sys_logger.info(f"Starting {self.summary_type} summarization monitoring (chunk_size={chunk_size})...")
-        while not self.should_stop:
-            try:
-                self._scan_and_process(chunk_size)
-            except Exception as e:
-                sys_logger.error(f"Error in {self.summary_type} monitoring loop: {e}", exc_info=True)
-            
-            time.sleep(check_interval)
+        self._set_chunk_size(chunk_size)
+        self._ingestor = LogIngestionService(self.logs_root_dir)
+        self._ingestor.add_consumer(self)
+        self._ingestor.start_monitoring(check_interval=check_interval, use_watcher=use_watcher)
 
     def run_once(self, chunk_size: int = 5):
         """
         Runs the summarization process once for all available logs.
         """
         sys_logger.info(f"Running one-time {self.summary_type} summarization (chunk_size={chunk_size})...")
+        self._set_chunk_size(chunk_size)
         try:
-            self._scan_and_process(chunk_size)
+            ingestor = LogIngestionService(self.logs_root_dir)
+            ingestor.add_consumer(self)
+            ingestor.run_once()
         except Exception as e:
             sys_logger.error(f"Error in {self.summary_type} run_once: {e}", exc_info=True)
 
+    def _set_chunk_size(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        if isinstance(self.chunk_policy, CountChunkPolicy):
+            self.chunk_policy.chunk_size = max(1, chunk_size)
+
     def stop(self):
         self.should_stop = True
+        if self._ingestor:
+            self._ingestor.stop()
+        self._save_state()
 
-    def _scan_and_process(self, chunk_size: int):
-        if not os.path.exists(self.logs_root_dir):
-            return
-
-        dirs = sorted([d for d in os.listdir(self.logs_root_dir) if os.path.isdir(os.path.join(self.logs_root_dir, d))])
-
-        for date_str in dirs:
-            try:
-                datetime.strptime(date_str, '%Y-%m-%d')
-            except ValueError:
-                continue
+    def sealed_days(self) -> set:
+        return {d for d, v in self.state.items() if isinstance(v, dict) and v.get("sealed")}
 
-            self._process_directory(date_str, chunk_size)
+    def is_sealed(self, date_str: str) -> bool:
+        saved = self.state.get(date_str)
+        return isinstance(saved, dict) and bool(saved.get("sealed"))
 
     def _is_entry_relevant(self, entry: Dict[str, Any]) -> bool:
         if self.summary_type == "visual":
@@ -90,132 +201,402 @@ class LogSummarizationUseCase:
             return bool(transcript)
         return True # combined
 
-    def _process_directory(self, date_str: str, chunk_size: int):
-        dir_path = os.path.join(self.logs_root_dir, date_str)
-        log_file = os.path.join(dir_path, "activity.jsonl")
-        
+    def _summary_file(self, date_str: str) -> str:
         # Output filename depends on type
         output_name = "summary.jsonl" if self.summary_type == "combined" else f"{self.summary_type}_summary.jsonl"
-        summary_file = os.path.join(dir_path, output_name)
+        return os.path.join(self.logs_root_dir, date_str, output_name)
+
+    def open_day(self, date_str: str, log_file: str, inode: int, size: int) -> Optional[int]:
+        """
+        保存済みのチェックポイントから、その日を読み始める位置を決める。
+        inode の変化 (差し替え) や サイズの縮小 (切り詰め) を検出した場合は先頭から読み直す。
+        """
+        if self.is_sealed(date_str):
+            return None
+
+        saved = self.state.get(date_str)
+        if isinstance(saved, int):
+            # 旧形式 (処理済み行数) からの移行
+            offset = offset_after_lines(log_file, saved)
+        elif isinstance(saved, dict) and saved.get("inode") == inode and size >= saved.get("size", 0):
+            offset = saved.get("offset", 0)
+        else:
+            if saved is not None:
+                sys_logger.warning(f"{log_file} was replaced since the last run. Re-reading from the start.")
+            offset = 0
+
+        self._cursors[date_str] = {"log_file": log_file, "read_offset": offset, "inode": inode, "size": size, "pending": [], "pending_since": None, "costs": {}}
+        return offset
 
-        if not os.path.exists(log_file):
+    def reset_day(self, date_str: str):
+        self._cursors.pop(date_str, None)
+        self._forget_written_spans(date_str)
+        if self.state.pop(date_str, None) is not None:
+            self._mark_state_dirty()
+
+    def unseal_day(self, date_str: str):
+        saved = self.state.get(date_str)
+        if isinstance(saved, dict) and saved.pop("sealed", None):
+            self._mark_state_dirty()
+            sys_logger.info(f"Unsealed {date_str} for {self.summary_type} summarization.")
+
+    def translate_day(self, date_str: str, line_map: Dict[str, Any]):
+        """
+        コンパクションで差し替えられた日の処理済み位置を読み替える。
+        要約待ちのエントリは捨て、読み替えた位置から新しいファイルを読み直す。
+        """
+        self._cursors.pop(date_str, None)
+        saved = self.state.get(date_str)
+        if saved is None:
             return
+        translated = translate_checkpoint(saved, line_map)
+        if translated is None:
+            return # 別のファイルを指している (open_day() で読み直しになる)
+        self.state[date_str] = translated
+        self._mark_state_dirty()
 
-        # processed_count represents the number of RAW lines read from activity.jsonl
-        processed_count = self.state.get(date_str, 0)
-        
-        relevant_entries = []
-        raw_line_count = 0
-        
+    def consume(self, batch: DayBatch):
+        cursor = self._cursors.get(batch.date_str)
+        if cursor is None:
+            return # 封印済みなど、この要約では読まない日
+
+        for entry, end_offset in batch.entries:
+            if end_offset <= cursor["read_offset"]:
+                continue # 他の consumer のために読み直された、処理済みの範囲
+            if self._is_entry_relevant(entry):
+                # Keep the byte offset of the line end to update state correctly
+                cursor["pending"].append((entry, end_offset))
+                if cursor["pending_since"] is None:
+                    cursor["pending_since"] = time.monotonic()
+        cursor["read_offset"] = max(cursor["read_offset"], batch.read_offset)
+        cursor["inode"], cursor["size"] = batch.inode, batch.size
+        cursor["log_file"] = batch.log_file
+
+        self._process_pending(batch.date_str, cursor)
+
+        if self._is_day_finished(batch.date_str, batch.log_file):
+            self._seal_day(batch.date_str, cursor)
+
+    def tick(self):
+        """
+        新しいエントリがなくても、max_wait を過ぎた要約待ちを要約する。
+        追記のないまま猶予を過ぎた過去の日もここで封印する (ファイルが変わらなければ consume() は呼ばれないため)。
+        """
+        for date_str, cursor in list(self._cursors.items()):
+            if self.should_stop:
+                break
+            if cursor["pending"]:
+                self._process_pending(date_str, cursor)
+            if self._is_day_finished(date_str, cursor["log_file"]) and self._is_fully_read(cursor):
+                self._seal_day(date_str, cursor)
+
+    @staticmethod
+    def _is_fully_read(cursor: Dict[str, Any]) -> bool:
+        # 最後に読んだ時からファイルが変わっていない (読み残しがない)
         try:
-            with open(log_file, 'r', encoding='utf-8') as f:
-                for line in f:
-                    raw_line_count += 1
-                    if raw_line_count > processed_count:
-                        try:
-                            entry = json.loads(line)
-                            if self._is_entry_relevant(entry):
-                                # Tag entry with its raw line index to update state correctly
-                                entry["_raw_index"] = raw_line_count
-                                relevant_entries.append(entry)
-                        except json.JSONDecodeError:
-                            continue
-        except Exception as e:
-            sys_logger.error(f"Error reading log file {log_file}: {e}")
+            return stat_identity(cursor["log_file"]) == (cursor["inode"], cursor["size"])
+        except OSError:
+            return False
+
+    def _entry_cost(self, cursor: Dict[str, Any], item: Tuple[Dict[str, Any], int]) -> int:
+        # 同じエントリを何度も数えないよう、行末オフセットごとに覚えておく
+        entry, end_offset = item
+        costs = cursor["costs"]
+        if end_offset not in costs:
+            costs[end_offset] = self.llm.count_tokens(self._format_entry(entry))
+        return costs[end_offset]
+
+    def _process_pending(self, date_str: str, cursor: Dict[str, Any], force: bool = False):
+        # Split pending entries into chunks according to the policy
+        pending = cursor["pending"]
+        if pending and cursor["pending_since"] is not None:
+            force = force or self.chunk_policy.is_expired(time.monotonic() - cursor["pending_since"])
+        chunks, rest = self.chunk_policy.split(pending, lambda item: self._entry_cost(cursor, item), force=force)
+        cursor["pending"] = rest
+        if rest:
+            done_offset = rest[0][1]
+            cursor["costs"] = {k: v for k, v in cursor["costs"].items() if k >= done_offset}
+            if chunks:
+                cursor["pending_since"] = time.monotonic() # 残りは今から待ち始める
+        else:
+            cursor["costs"] = {}
+            cursor["pending_since"] = None
+
+        # 追いつき時などで複数チャンクが溜まっていれば、batch_size 件ずつまとめて生成する
+        for i in range(0, len(chunks), self.batch_size):
+            group = chunks[i:i + self.batch_size]
+            entries_list = [[entry for entry, _ in chunk] for chunk in group]
+            if len(group) == 1:
+                summaries = [self._generate_summary(entries_list[0])]
+            else:
+                summaries = self._generate_summaries(entries_list)
+
+            for chunk, entries, summary in zip(group, entries_list, summaries):
+                if summary:
+                    self._emit_summary(date_str, entries, summary)
+                    # update state to the end offset of the last entry in this chunk
+                    self._commit(date_str, cursor, chunk[-1][1])
+
+        if not rest:
+            # 読んだ範囲に要約待ちが残っていなければ、無関係な行も含めて処理済みとしてよい
+            self._commit(date_str, cursor, cursor["read_offset"])
+
+    def _emit_summary(self, date_str: str, entries: List[Dict[str, Any]], summary: Dict[str, Any]):
+        """
+        生成した要約を要約ファイルに書き、コールバックに渡す。
+        """
+        self._append_summary(self._summary_file(date_str), summary)
+        if self.on_summary_generated:
+            self.on_summary_generated(summary)
+
+    def _is_day_finished(self, date_str: str, log_file: str) -> bool:
+        """
+        過去の日で、しばらく追記がなければ、もう増えないものとみなす。
+        """
+        if date_str >= datetime.now().strftime('%Y-%m-%d'):
+            return False
+        try:
+            return time.time() - os.path.getmtime(log_file) >= self.seal_grace_seconds
+        except OSError:
+            return False
+
+    def _seal_day(self, date_str: str, cursor: Dict[str, Any]):
+        """
+        チャンクに満たず残っているエントリを最後のチャンクとして要約し、その日を封印する。
+        """
+        if cursor["pending"]:
+            self._process_pending(date_str, cursor, force=True)
+        self._commit(date_str, cursor, cursor["read_offset"])
+        self.state[date_str]["sealed"] = True
+        self._mark_state_dirty()
+        self._cursors.pop(date_str, None)
+        self._forget_written_spans(date_str)
+        sys_logger.info(f"Sealed {date_str} for {self.summary_type} summarization.")
+
+    def _commit(self, date_str: str, cursor: Dict[str, Any], offset: int):
+        saved = self.state.get(date_str)
+        if isinstance(saved, dict) and saved.get("offset") == offset and saved.get("inode") == cursor["inode"]:
             return
+        self.state[date_str] = {"offset": offset, "inode": cursor["inode"], "size": cursor["size"]}
+        self._mark_state_dirty()
 
-        # Process chunks from relevant_entries
-        while len(relevant_entries) >= chunk_size:
-            chunk = relevant_entries[:chunk_size]
-            relevant_entries = relevant_entries[chunk_size:]
-            
-            summary = self._generate_summary(chunk)
-            if summary:
-                self._append_summary(summary_file, summary)
-                if self.on_summary_generated:
-                    self.on_summary_generated(summary)
-                # update state to the raw index of the last entry in this chunk
-                new_processed_count = chunk[-1]["_raw_index"]
-                self.state[date_str] = new_processed_count
-                self._save_state()
-
-    def _generate_summary(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_summary(self, entries: List[Dict[str, Any]], lookup_cache: bool = True) -> Dict[str, Any]:
         if not entries:
             return None
 
+        metrics = hot_path_metrics
+        with metrics.timer(f"summary.{self.summary_type}.prompt"):
+            prompt, static_prefix, start_time, end_time = self._build_prompt(entries)
+        cache_key = self._cache_key(prompt)
+        if lookup_cache:
+            cached = self._cached_summary(cache_key)
+            if cached:
+                return cached
+
+        sys_logger.info(f"Generating {self.summary_type} summary ({start_time} - {end_time})...")
+        
+        for attempt in range(2): 
+            # 推論ロックの待ちを含む
+            with metrics.timer(f"summary.{self.summary_type}.llm"):
+                response = self.llm.process_content(prompt, static_prefix=static_prefix)
+            metrics.increment(f"summary.{self.summary_type}.llm_calls")
+            summary = self._to_summary(response, start_time, end_time)
+            if summary:
+                self._store_summary(cache_key, summary)
+                return summary
+            
+        metrics.increment(f"summary.{self.summary_type}.failed")
+        return self._failed_summary(start_time, end_time)
+
+    def _generate_summaries(self, chunks: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        複数チャンクのプロンプトを LlmProvider.process_batch() でまとめて生成する。
+        キャッシュにあるチャンクは生成せず、失敗したチャンクだけ通常の1件ずつの生成でやり直す。
+        """
+        with hot_path_metrics.timer(f"summary.{self.summary_type}.prompt"):
+            built = [self._build_prompt(entries) for entries in chunks]
+        keys = [self._cache_key(prompt) for prompt, _, _, _ in built]
+        summaries: List[Optional[Dict[str, Any]]] = [self._cached_summary(key) for key in keys]
+        todo = [i for i, summary in enumerate(summaries) if not summary]
+        if not todo:
+            return summaries
+
+        sys_logger.info(
+            f"Generating {len(todo)} {self.summary_type} summaries in a batch "
+            f"({built[todo[0]][2]} - {built[todo[-1]][3]})..."
+        )
+        # 同じ種類の要約はテンプレートが共通なので、静的な先頭部分も共通
+        with hot_path_metrics.timer(f"summary.{self.summary_type}.llm_batch"):
+            responses = self.llm.process_batch([built[i][0] for i in todo], static_prefix=built[todo[0]][1])
+        hot_path_metrics.increment(f"summary.{self.summary_type}.llm_calls")
+        if responses is None or len(responses) != len(todo):
+            # 対応の取れない応答は使わず、全て1件ずつ生成し直す
+            sys_logger.warning(
+                f"process_batch returned {len(responses) if responses is not None else 'no'} responses "
+                f"for {len(todo)} prompts. Generating them one by one."
+            )
+            responses = [None] * len(todo)
+
+        for i, response in zip(todo, responses):
+            _, _, start_time, end_time = built[i]
+            summary = self._to_summary(response, start_time, end_time)
+            if summary is None:
+                summary = self._generate_summary(chunks[i], lookup_cache=False) # retry individually
+            else:
+                self._store_summary(keys[i], summary)
+            summaries[i] = summary
+        return summaries
+
+    def _cache_key(self, prompt: str) -> Optional[str]:
+        if self.summary_cache is None:
+            return None
+        try:
+            template_version = _template_cache.get(PROMPT_TEMPLATES.get(self.summary_type, DEFAULT_PROMPT_TEMPLATE)).version
+        except Exception:
+            template_version = "fallback"
+        model_id = getattr(self.llm, "model_id", type(self.llm).__name__)
+        return make_cache_key(self.summary_type, template_version, model_id, prompt)
+
+    def _cached_summary(self, cache_key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if cache_key is None:
+            return None
+        try:
+            cached = self.summary_cache.get(cache_key)
+        except Exception as e:
+            sys_logger.error(f"Failed to read summary cache: {e}")
+            return None
+        if cached:
+            hot_path_metrics.increment(f"summary.{self.summary_type}.cache_hits")
+            sys_logger.info(
+                f"Reused cached {self.summary_type} summary "
+                f"({cached.get('timestamp_start')} - {cached.get('timestamp_end')})."
+            )
+        return cached
+
+    def _store_summary(self, cache_key: Optional[str], summary: Dict[str, Any]):
+        if cache_key is None:
+            return
+        try:
+            self.summary_cache.put(cache_key, summary)
+        except Exception as e:
+            sys_logger.error(f"Failed to write summary cache: {e}")
+
+    def _format_entry(self, e: Dict[str, Any]) -> str:
+        """
+        プロンプトに載せる1エントリ分のテキスト。トークン予算の計算にも使う。
+        """
+        ts = e.get('timestamp', '')[11:19] # Extract HH:MM:SS
+        app = e.get('screen', {}).get('app_name', 'Unknown')
+        title = e.get('screen', {}).get('window_title', '')
+        ocr = e.get('screen', {}).get('ocr_text', '')[:150].replace('\n', ' ') 
+        audio = e.get('audio', {}).get('transcript', '')[:150] 
+        
+        text = f"[{ts}] App: {app}, Title: {title}\n"
+        if ocr:
+            text += f"OCR: {ocr}\n"
+        if audio:
+            text += f"Audio: {audio}\n"
+        text += "---\n"
+        return text
+
+    def _compact_log_text(self, entries: List[Dict[str, Any]], log_text: str) -> str:
+        try:
+            compacted, stats = self.prompt_compactor.compact(entries, self.llm.count_tokens)
+        except Exception as e:
+            sys_logger.error(f"Prompt compaction failed, using raw entries: {e}")
+            return log_text
+
+        before = self.llm.count_tokens(log_text)
+        after = self.llm.count_tokens(compacted)
+        self.compaction_stats["chunks"] += 1
+        self.compaction_stats["tokens_before"] += before
+        self.compaction_stats["tokens_after"] += after
+        reduction = 100.0 * (before - after) / before if before else 0.0
+        sys_logger.info(
+            f"Prompt compaction ({self.summary_type}): {before} -> {after} tokens (-{reduction:.0f}%), "
+            f"{stats['entries']} entries -> {stats['spans']} spans, "
+            f"{stats['ocr_suppressed']} near-duplicate OCR suppressed, {stats['ocr_dropped']} OCR dropped for budget"
+        )
+        return compacted
+
+    def _log_text(self, entries: List[Dict[str, Any]]) -> str:
+        """
+        プロンプトの {log_text} に入れるテキスト。圧縮が有効なら圧縮する。
+        """
+        log_text = "".join(self._format_entry(e) for e in entries)
+        if self.prompt_compactor is not None:
+            log_text = self._compact_log_text(entries, log_text)
+        return log_text
+
+    def _build_prompt(self, entries: List[Dict[str, Any]]) -> Tuple[str, Optional[str], str, str]:
+        """
+        Returns:
+            (prompt, static_prefix, start_time, end_time)
+            static_prefix はテンプレートの変わらない先頭部分 (prompt はこれで始まる)。LLM 側のプレフィックスキャッシュ用。
+        """
         # Create a prompt
-        log_text = ""
         start_time = entries[0]['timestamp']
         end_time = entries[-1]['timestamp']
+        log_text = self._log_text(entries)
 
-        for e in entries:
-            ts = e.get('timestamp', '')[11:19] # Extract HH:MM:SS
-            app = e.get('screen', {}).get('app_name', 'Unknown')
-            title = e.get('screen', {}).get('window_title', '')
-            ocr = e.get('screen', {}).get('ocr_text', '')[:150].replace('\n', ' ') 
-            audio = e.get('audio', {}).get('transcript', '')[:150] 
-            
-            log_text += f"[{ts}] App: {app}, Title: {title}\n"
-            if ocr:
-                log_text += f"OCR: {ocr}\n"
-            if audio:
-                log_text += f"Audio: {audio}\n"
-            log_text += "---\n"
-
-        # Load prompt from file based on type
+        # Load prompt template based on type (cached, reloaded when the file changes)
         try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) 
-            
-            if self.summary_type == "visual":
-                p_name = "summarize_visual_activity.txt"
-            elif self.summary_type == "audio":
-                p_name = "summarize_audio_activity.txt"
-            else:
-                p_name = "summarize_daily_activity.txt"
-                
-            prompt_path = os.path.join(base_dir, "resources", "prompts", p_name)
-            
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                prompt_content = f.read()
-
-            prompt = prompt_content.replace("{start_time}", start_time) \
-                                   .replace("{end_time}", end_time) \
-                                   .replace("{log_text}", log_text)
+            template = _template_cache.get(PROMPT_TEMPLATES.get(self.summary_type, DEFAULT_PROMPT_TEMPLATE))
+            prompt = template.render(start_time=start_time, end_time=end_time, log_text=log_text)
+            static_prefix = template.static_prefix or None
         except Exception as e:
             sys_logger.error(f"Failed to load prompt template for {self.summary_type}: {e}")
             prompt = f"Summarize {self.summary_type} logs from {start_time} to {end_time}. Logs:\n{log_text}\nJSON Summary:"
+            static_prefix = None
 
-        sys_logger.info(f"Generating {self.summary_type} summary ({start_time} - {end_time})...")
-        
-        for attempt in range(2): 
-            response = self.llm.process_content(prompt)
-            if response:
-                sys_logger.info(f"{self.summary_type.capitalize()} summary generated.")
-                if isinstance(response, dict):
-                    res_summary = response.get("summary", str(response))
-                    return {
-                        "timestamp_start": start_time,
-                        "timestamp_end": end_time,
-                        "summary": res_summary
-                    }
-                elif isinstance(response, str):
-                    return {
-                        "timestamp_start": start_time,
-                        "timestamp_end": end_time,
-                        "summary": response
-                    }
-            
+        return prompt, static_prefix, start_time, end_time
+
+    def _to_summary(self, response: Optional[Any], start_time: str, end_time: str) -> Optional[Dict[str, Any]]:
+        if not response:
+            return None
+        sys_logger.info(f"{self.summary_type.capitalize()} summary generated.")
+        if isinstance(response, dict):
+            res_summary = response.get("summary", str(response))
+        elif isinstance(response, str):
+            res_summary = response
+        else:
+            return None
+        return {
+            "timestamp_start": start_time,
+            "timestamp_end": end_time,
+            "summary": res_summary
+        }
+
+    def _failed_summary(self, start_time: str, end_time: str) -> Dict[str, Any]:
         sys_logger.warning(f"Failed to generate {self.summary_type} summary after retries.")
         return {
             "timestamp_start": start_time,
             "timestamp_end": end_time,
-            "summary": "Failed to generate summary."
+            "summary": FAILED_SUMMARY_TEXT
         }
 
     def _append_summary(self, filepath: str, data: Dict[str, Any]):
+        """
+        同じ時間帯の要約が既にファイルにあれば書かない。
+        状態ファイルを失った後 (キャッシュから同じ要約を返す) や、状態の保存前に止まった後の読み直しで
+        同じチャンクを2回書くと、ロールアップで2重に数えられるため。
+        """
+        span = (data.get("timestamp_start"), data.get("timestamp_end"))
         try:
-            with open(filepath, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            written = self._written_spans.get(filepath)
+            if written is None:
+                written = {(row.get("timestamp_start"), row.get("timestamp_end")) for row in iter_jsonl(filepath)}
+                self._written_spans[filepath] = written
+            if span in written:
+                sys_logger.info(f"Summary for {span[0]} - {span[1]} is already in {filepath}. Skipped.")
+                return
+            append_jsonl(filepath, data)
+            written.add(span)
             sys_logger.info(f"Appended summary to {filepath}")
         except Exception as e:
             sys_logger.error(f"Failed to write summary: {e}")
+
+    def _forget_written_spans(self, date_str: str):
+        day_dir = os.path.join(self.logs_root_dir, date_str)
+        for path in [p for p in self._written_spans if os.path.dirname(p) == day_dir]:
+            del self._written_spans[path]
@@ -1,11 +1,14 @@
 import time
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
 import numpy as np
 
 from ..domain.entities import LogEntry, ScreenData
+from ..domain.events import LogEntrySaved
 from ..domain.services import SimilarityChecker
 from .interfaces import ScreenCaptureInterface, OcrInterface, WindowInfoInterface, PersistenceInterface
+from .event_bus import EventBus
+from .metrics import hot_path_metrics
 
 class ScreenMonitoringUseCase:
     """
@@ -19,74 +22,141 @@ class ScreenMonitoringUseCase:
         ocr_service: OcrInterface,
         window_service: WindowInfoInterface,
         persistence_service: PersistenceInterface,
-        similarity_service: SimilarityChecker
+        similarity_service: SimilarityChecker,
+        event_bus: Optional[EventBus] = None
     ):
         self.screen = screen_service
         self.ocr = ocr_service
         self.window = window_service
         self.persistence = persistence_service
         self.similarity = similarity_service
+        # 保存したエントリを要約などへメモリ経由で渡す (None なら publish しない)
+        self.event_bus = event_bus
         
         # 前回フレームの状態保持
         self.last_img_feature: Optional[np.ndarray] = None
         self.last_ocr_text: Optional[str] = None
         
-    def execute_step(self, audio_transcript: str = "") -> Optional[LogEntry]:
+    def execute_step(
+        self,
+        audio_transcript: str = "",
+        audio_span: Optional[Tuple[datetime, datetime]] = None
+    ) -> Optional[LogEntry]:
         """
         1ステップ実行する。
         変化があればLogEntryを返し、かつ保存する。
         変化がなければNoneを返す。
+        audio_span: audio_transcript の元になった音声の (開始, 終了) 時刻。metadata に記録する
+        各処理の所要時間と件数は hot_path_metrics に記録する ("monitor.*")
         """
+        hot_path_metrics.increment("monitor.frames")
+        with hot_path_metrics.timer("monitor.step"):
+            return self._execute_step(audio_transcript, audio_span)
+
+    def _execute_step(
+        self,
+        audio_transcript: str,
+        audio_span: Optional[Tuple[datetime, datetime]]
+    ) -> Optional[LogEntry]:
+        metrics = hot_path_metrics
         now = datetime.now()
         
         # 1. Capture
-        image_ref = self.screen.capture_screen()
+        with metrics.timer("monitor.capture"):
+            image_ref = self.screen.capture_screen()
         if image_ref is None:
+            metrics.increment("monitor.capture_failed")
             return None
 
         # 2. Similarity Check
         # 比較用画像を作成 (インフラ層の責務でnumpy化)
-        current_feature = self.screen.resize_for_comparison(image_ref)
+        with metrics.timer("monitor.resize"):
+            current_feature = self.screen.resize_for_comparison(image_ref)
         
-        if self.similarity.is_similar(current_feature, self.last_img_feature):
-            # 変化なし -> スキップ
-            # ただし、音声がある場合はログに残す。
-            if not audio_transcript:
-                return None
-            
-            # 音声がある場合は、画面変化がなくても通過させる。
-            # ただし、OCRを毎回やるのは重いので、前回のOCR結果を使い回す手もあるが、
-            # ここではシンプルに「通過」させて、この後のロジックに委ねる。
-            # もしOCR負荷が気になるなら、OCR処理の手前で分岐が必要。
+        with metrics.timer("monitor.similarity"):
+            visual_similar, skip = self.check_visual_change(current_feature, self.last_img_feature, bool(audio_transcript))
+        if skip:
+            # 変化なし、音声もなし -> スキップ
+            metrics.increment("monitor.frames_skipped")
+            return None
 
         # 3. 変化あり OR 音声あり -> 詳細処理 (OCR & Window Info)
         # ここで初めて重い処理（OCR）を走らせる
-        text = self.ocr.extract_text(image_ref)
+        with metrics.timer("monitor.ocr"):
+            text = self.ocr.extract_text(image_ref)
+        metrics.increment("monitor.ocr_runs")
 
         # 類似度判定
-        visual_similar = self.similarity.is_similar(current_feature, self.last_img_feature)
-        text_similar = self.similarity.is_text_similar(text, self.last_ocr_text)
-        
-        # 画面としての変化があったか
-        is_screen_change = not visual_similar or not text_similar
+        with metrics.timer("monitor.text_similarity"):
+            is_screen_change, log_text = self.check_text_change(text, self.last_ocr_text, visual_similar, bool(audio_transcript))
 
-        # 3.1 変化なしの場合
-        if not is_screen_change:
-            # 音声がない場合はスキップ
-            if not audio_transcript:
-                self.last_img_feature = current_feature
-                self.last_ocr_text = text
-                return None
-            
-            # 音声がある場合は保存するが、OCRテキストは空にして冗長さを排除する
-            log_text = ""
-        else:
-            # 変化ありの場合はOCRテキストを保持
-            log_text = text
+        # 3.1 変化なし、音声もなし -> スキップ
+        if log_text is None:
+            self.last_img_feature = current_feature
+            self.last_ocr_text = text
+            metrics.increment("monitor.frames_unchanged") # OCR したが文字も変わらず
+            return None
 
-        window_info = self.window.get_active_window_title()
+        with metrics.timer("monitor.window"):
+            window_info = self.window.get_active_window_title()
+        
+        # 4. Entity作成 & 5. Save
+        entry = self.build_entry(now, log_text, window_info, is_screen_change, audio_transcript, audio_span)
+        self.save_entry(entry)
         
-        # 4. Entity作成
+        # 6. Update State
+        # 状態更新には「本来のOCRテキスト(text)」を使い、次回の比較に備える
+        self.last_img_feature = current_feature
+        self.last_ocr_text = text
+        
+        return entry
+
+    def check_visual_change(
+        self,
+        feature: Optional[np.ndarray],
+        last_feature: Optional[np.ndarray],
+        has_audio: bool
+    ) -> Tuple[bool, bool]:
+        """
+        縮小画像を前回のフレームと比べる (execute_step / 非同期版 / CapturePipeline で共通の判定)。
+
+        Returns:
+            (見た目が似ているか, OCR せずに打ち切るか)。打ち切るのは、見た目が変わらず音声もない場合
+        """
+        visual_similar = self.similarity.is_similar(feature, last_feature)
+        return visual_similar, visual_similar and not has_audio
+
+    def check_text_change(
+        self,
+        text: str,
+        last_text: Optional[str],
+        visual_similar: bool,
+        has_audio: bool
+    ) -> Tuple[bool, Optional[str]]:
+        """
+        OCR テキストを前回のフレームと比べる (check_visual_change() と同じく3つの監視ループで共通)。
+
+        Returns:
+            (画面が変わったか, エントリに残す OCR テキスト)。
+            画面が変わらず音声もなければテキストは None (保存しない)。音声だけなら "" (冗長なテキストを残さない)
+        """
+        text_similar = self.similarity.is_text_similar(text, last_text)
+        if visual_similar and text_similar:
+            return False, ("" if has_audio else None)
+        return True, text
+
+    def build_entry(
+        self,
+        now: datetime,
+        log_text: str,
+        window_info: dict,
+        is_screen_change: bool,
+        audio_transcript: str = "",
+        audio_span: Optional[Tuple[datetime, datetime]] = None
+    ) -> LogEntry:
+        """
+        1フレーム分の結果から LogEntry を作る (CapturePipeline と共通)。
+        """
         screen_data = ScreenData(
             timestamp=now,
             ocr_text=log_text, # 変化なしなら空
@@ -101,13 +171,23 @@ class ScreenMonitoringUseCase:
             audio_transcript=audio_transcript,
             metadata={"is_screen_change": is_screen_change}
         )
-        
-        # 5. Save
-        self.persistence.save(entry)
-        
-        # 6. Update State
-        # 状態更新には「本来のOCRテキスト(text)」を使い、次回の比較に備える
-        self.last_img_feature = current_feature
-        self.last_ocr_text = text
-        
+        if audio_transcript and audio_span:
+            entry.metadata["audio_start"] = audio_span[0].isoformat()
+            entry.metadata["audio_end"] = audio_span[1].isoformat()
         return entry
+
+    def save_entry(self, entry: LogEntry):
+        """
+        保存し、要約などへ LogEntrySaved を publish する (CapturePipeline と共通)。
+        """
+        with hot_path_metrics.timer("monitor.persist"):
+            location = self.persistence.save(entry)
+        hot_path_metrics.increment("monitor.entries_saved")
+        if self.event_bus and location:
+            start_offset, end_offset = location
+            self.event_bus.publish(LogEntrySaved(
+                date_str=entry.timestamp.strftime('%Y-%m-%d'),
+                entry=entry.to_dict(),
+                start_offset=start_offset,
+                end_offset=end_offset
+            ))
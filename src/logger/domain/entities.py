@@ -41,3 +41,10 @@ class LogEntry:
             },
             "metadata": self.metadata
         }
+
+@dataclass
+class TranscriptSegment:
+    """文字起こしの1区間 (単語または文)。start / end は秒"""
+    start: float
+    end: float
+    text: str
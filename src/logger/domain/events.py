@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from typing import Dict, Any
+
+
+@dataclass
+class LogEntrySaved:
+    """LogEntry が activity.jsonl に書き込まれたことを表すイベント"""
+    date_str: str # "YYYY-MM-DD"
+    entry: Dict[str, Any] # LogEntry.to_dict() の結果 (ファイルに書いた内容と同じ)
+    start_offset: int # 書き込んだ行の先頭のバイトオフセット
+    end_offset: int # 書き込んだ行の末尾 (改行の直後) のバイトオフセット
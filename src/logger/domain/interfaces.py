@@ -1,13 +1,48 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Any
+from typing import Optional, Any, List
+from .entities import TranscriptSegment
 
 class LlmProvider(ABC):
     """
     Interface for LLM services (e.g. Gemma, OpenAI).
     """
     @abstractmethod
-    def process_content(self, prompt: str) -> Optional[Any]:
+    def process_content(self, prompt: str, static_prefix: Optional[str] = None) -> Optional[Any]:
         """
         Sends a prompt to the LLM and returns the response.
+        static_prefix is an optional hint: the unchanging leading part of the prompt
+        (e.g. the instructions of a template), which providers may precompute and reuse.
+        """
+        pass
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Returns the number of tokens the text takes in this provider's prompts.
+        The default is a cheap estimate (about 4 ASCII characters per token,
+        one token per non-ASCII character such as Japanese); providers with a
+        tokenizer should override this.
+        """
+        ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+        return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+    def process_batch(self, prompts: List[str], static_prefix: Optional[str] = None) -> List[Optional[Any]]:
+        """
+        Sends several prompts at once and returns the responses in the same order.
+        Providers that can generate prompts together should override this;
+        the default simply calls process_content() for each prompt.
+        """
+        return [self.process_content(prompt, static_prefix=static_prefix) for prompt in prompts]
+
+
+class TranscriberInterface(ABC):
+    """
+    Interface for speech-to-text engines (e.g. mlx-whisper).
+    """
+    @abstractmethod
+    def transcribe(self, audio: Any, sample_rate: int) -> List[TranscriptSegment]:
+        """
+        Transcribes a mono float32 numpy array and returns its segments in order,
+        with start / end in seconds relative to the beginning of `audio`.
+        Word-level segments are preferred when the engine can produce them.
         """
         pass
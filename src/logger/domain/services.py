@@ -67,7 +67,16 @@ class SimilarityChecker:
         if not text1 or not text2:
             return False
             
+        return self.text_similarity(text1, text2) >= threshold
+
+    def text_similarity(self, text1: str, text2: str) -> float:
+        """
+        2つのテキストの類似度 (0.0 - 1.0) を返す。
+        """
+        if not text1 and not text2:
+            return 1.0
+        if not text1 or not text2:
+            return 0.0
         # 文字列類似度 (Levenshtein like)
-        similarity = SequenceMatcher(None, text1, text2).ratio()
-        return similarity >= threshold
+        return SequenceMatcher(None, text1, text2).ratio()
 
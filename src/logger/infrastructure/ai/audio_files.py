@@ -0,0 +1,140 @@
+import os
+import re
+import wave
+from datetime import datetime, timedelta
+from typing import Iterator, Optional
+
+import numpy as np
+
+from ...application.interfaces import AudioFileReaderInterface
+
+# FLAC などは soundfile (libsndfile) があれば読む。なければ WAV だけ
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+AUDIO_FILE_EXTENSIONS = {".wav", ".flac"}
+
+# "2025-12-30 14-05-00", "20251230_140500", "meeting_2025-12-30T14.05.00" など
+_TIMESTAMP_IN_NAME = re.compile(
+    r"(\d{4})[-_]?(\d{2})[-_]?(\d{2})[ _T-]?(\d{2})[-_.:]?(\d{2})[-_.:]?(\d{2})"
+)
+
+
+class _LinearResampler:
+    """
+    チャンクごとに線形補間でサンプリングレートを変える。前のチャンクの最後のサンプルを持ち越すので、境界で途切れない。
+    """
+    def __init__(self, source_rate: int, target_rate: int):
+        self.step = source_rate / target_rate
+        self._next = 0.0 # 次に出力する位置 (入力サンプル番号)
+        self._offset = 0 # 今回のチャンク先頭の入力サンプル番号
+        self._carry: Optional[np.ndarray] = None
+
+    def process(self, chunk: np.ndarray) -> np.ndarray:
+        if self._carry is not None:
+            chunk = np.concatenate([self._carry, chunk])
+            base = self._offset - 1
+        else:
+            base = self._offset
+        last = base + len(chunk) - 1 # このチャンクで補間できる最後の位置
+        positions = np.arange(self._next, last + 1e-9, self.step) if last >= self._next else np.zeros(0)
+        out = np.interp(positions - base, np.arange(len(chunk)), chunk).astype(np.float32)
+        if len(positions):
+            self._next = positions[-1] + self.step
+        self._offset = last + 1
+        self._carry = chunk[-1:]
+        return out
+
+
+class AudioFileReader(AudioFileReaderInterface):
+    """
+    録音ファイル (WAV / FLAC) を少しずつ読み、モノラル・sample_rate の float32 にして返す。
+    WAV は標準ライブラリの wave で、それ以外は soundfile で読む。
+    """
+    def __init__(self, sample_rate: int = 16000, block_seconds: float = 5.0):
+        self.sample_rate = sample_rate
+        self.block_seconds = block_seconds
+
+    def duration(self, path: str) -> float:
+        if sf is not None:
+            info = sf.info(path)
+            return info.frames / info.samplerate
+        self._require_wav(path)
+        with wave.open(path, "rb") as w:
+            return w.getnframes() / w.getframerate()
+
+    def read_chunks(self, path: str, chunk_samples: int) -> Iterator[np.ndarray]:
+        pending = []
+        pending_len = 0
+        for block in self._read_blocks(path):
+            pending.append(block)
+            pending_len += len(block)
+            while pending_len >= chunk_samples:
+                data = np.concatenate(pending)
+                yield data[:chunk_samples]
+                rest = data[chunk_samples:]
+                pending, pending_len = [rest], len(rest)
+        if pending_len:
+            yield np.concatenate(pending)
+
+    def _read_blocks(self, path: str) -> Iterator[np.ndarray]:
+        """ファイルのサンプリングレートのまま block_seconds ずつ読み、変換して返す"""
+        if sf is not None:
+            rate = sf.info(path).samplerate
+            resampler = self._resampler(rate)
+            for block in sf.blocks(path, blocksize=int(rate * self.block_seconds), dtype="float32", always_2d=True):
+                yield self._convert(block.mean(axis=1), resampler)
+            return
+
+        self._require_wav(path)
+        with wave.open(path, "rb") as w:
+            rate, channels, width = w.getframerate(), w.getnchannels(), w.getsampwidth()
+            resampler = self._resampler(rate)
+            frames_per_block = int(rate * self.block_seconds)
+            while True:
+                raw = w.readframes(frames_per_block)
+                if not raw:
+                    break
+                samples = _pcm_to_float(raw, width).reshape(-1, channels).mean(axis=1)
+                yield self._convert(samples, resampler)
+
+    def _resampler(self, rate: int) -> Optional[_LinearResampler]:
+        return _LinearResampler(rate, self.sample_rate) if rate != self.sample_rate else None
+
+    def _convert(self, samples: np.ndarray, resampler: Optional[_LinearResampler]) -> np.ndarray:
+        samples = samples.astype(np.float32, copy=False)
+        return resampler.process(samples) if resampler else samples
+
+    def _require_wav(self, path: str):
+        if os.path.splitext(path)[1].lower() != ".wav":
+            raise RuntimeError(f"Reading {os.path.basename(path)} requires the soundfile package (only WAV is supported without it)")
+
+
+def _pcm_to_float(raw: bytes, width: int) -> np.ndarray:
+    if width == 1:
+        return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if width == 2:
+        return np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    if width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        return ints.astype(np.float32) / float(1 << 23)
+    if width == 4:
+        return np.frombuffer(raw, dtype="<i4").astype(np.float32) / float(1 << 31)
+    raise RuntimeError(f"Unsupported WAV sample width: {width} bytes")
+
+
+def guess_recording_start(path: str, duration_seconds: float) -> datetime:
+    """
+    録音の開始時刻。ファイル名に日時があればそれを、なければ更新時刻 (録音の終了) から長さを引いた時刻。
+    """
+    match = _TIMESTAMP_IN_NAME.search(os.path.basename(path))
+    if match:
+        try:
+            return datetime(*(int(g) for g in match.groups()))
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(os.path.getmtime(path)) - timedelta(seconds=duration_seconds)
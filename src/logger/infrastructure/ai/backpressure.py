@@ -0,0 +1,88 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from .ring_buffer import AudioRingBuffer
+from .vad import FrameVad
+
+BACKPRESSURE_POLICIES = ("drop_oldest", "merge", "skip_silent")
+
+
+@dataclass
+class BackpressureStats:
+    """文字起こしが録音に追いつかなかった時に、方針に従って捨てた・まとめた音声"""
+    lagging_chunks: int = 0 # 未処理の音声が max_lag_seconds を超えていたチャンク
+    dropped_seconds: float = 0.0 # 古い側から捨てた秒数
+    skipped_silent_seconds: float = 0.0 # 発話がないので読み飛ばした秒数
+    merged_chunks: int = 0 # 複数チャンクを1回の文字起こしにまとめた回数
+    merged_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "lagging_chunks": self.lagging_chunks,
+            "dropped_seconds": self.dropped_seconds,
+            "skipped_silent_seconds": self.skipped_silent_seconds,
+            "merged_chunks": self.merged_chunks,
+            "merged_seconds": self.merged_seconds
+        }
+
+
+class AudioBackpressure:
+    """
+    文字起こしスレッド (読み手) が遅れている時に、リングバッファの未処理の音声をどう減らすか。
+
+    未処理の音声が、次に処理するチャンクの後にまだ max_lag_seconds を超えて残っていれば遅れているとみなし:
+    - drop_oldest: 古い側の音声を捨て、遅れを max_lag_seconds に戻す (文字起こしは常に新しい音声)
+    - merge: 最大 max_merge_seconds 分をまとめて1回で文字起こしする (捨てずに呼び出し回数を減らして追いつく)
+    - skip_silent: 先頭から発話のないチャンクを読み飛ばす。それでも遅れていれば古い側を捨てる
+    リングバッファが一杯になった時は、どの方針でも新しい側が捨てられる (AudioRingBuffer のオーバーラン)。
+    """
+    def __init__(
+        self,
+        policy: str = "merge",
+        sample_rate: int = 16000,
+        max_lag_seconds: float = 30.0,
+        max_merge_seconds: float = 30.0,
+        vad: Optional[FrameVad] = None
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy} (expected one of {BACKPRESSURE_POLICIES})")
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.max_lag_samples = int(max_lag_seconds * sample_rate)
+        self.max_merge_samples = int(max_merge_seconds * sample_rate)
+        self.vad = vad or FrameVad(sample_rate=sample_rate)
+        self.stats = BackpressureStats()
+
+    def next_chunk(self, ring: AudioRingBuffer, chunk_samples: int, allow_merge: bool = True) -> int:
+        """
+        読み手がチャンクを peek() する直前に呼ぶ。方針に従って先頭を consume() し、
+        今回処理するサンプル数 (通常は chunk_samples、merge では多め) を返す。
+        """
+        if ring.available() - chunk_samples <= self.max_lag_samples:
+            return chunk_samples
+        self.stats.lagging_chunks += 1
+
+        if self.policy == "merge" and allow_merge:
+            n = max(chunk_samples, min(ring.available(), self.max_merge_samples))
+            self.stats.merged_chunks += 1
+            self.stats.merged_seconds += n / self.sample_rate
+            return n
+
+        if self.policy == "skip_silent":
+            while ring.available() - chunk_samples > self.max_lag_samples:
+                if self.vad.detect(ring.peek(chunk_samples)):
+                    break
+                ring.consume(chunk_samples)
+                self.stats.skipped_silent_seconds += chunk_samples / self.sample_rate
+
+        # drop_oldest (skip_silent で追いつけなかった分、ストリーミングでの merge も同じ)
+        excess = ring.available() - chunk_samples - self.max_lag_samples
+        if excess > 0:
+            ring.consume(excess)
+            self.stats.dropped_seconds += excess / self.sample_rate
+        return chunk_samples
+
+    def get_stats(self) -> dict:
+        stats = self.stats.to_dict()
+        stats["policy"] = self.policy
+        return stats
@@ -0,0 +1,39 @@
+import time
+import threading
+from typing import Any, List, Optional, Sequence
+
+from ...domain.entities import TranscriptSegment
+from ...domain.interfaces import TranscriberInterface
+
+
+class FakeTranscriber(TranscriberInterface):
+    """
+    モデルを読み込まずに文字起こしの流れを動かすための TranscriberInterface。
+    音声の長さに比例した時間を sleep で模擬し、呼び出し回数と受け取った秒数を数える。
+    Linux でのテスト・ベンチマーク (オフライン文字起こし) で使う。
+    """
+    def __init__(self, seconds_per_audio_second: float = 0.0, responses: Optional[Sequence[str]] = None):
+        """
+        Args:
+            seconds_per_audio_second: 音声1秒あたりの処理時間 (0.1 なら 10 倍速)
+            responses: 呼び出しごとに順に返すテキスト (最後まで使ったら先頭に戻る)。省略時は音声の長さを書いた文
+        """
+        self.seconds_per_audio_second = seconds_per_audio_second
+        self.responses = list(responses) if responses else None
+        self.calls = 0
+        self.audio_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio: Any, sample_rate: int) -> List[TranscriptSegment]:
+        seconds = len(audio) / sample_rate
+        if self.seconds_per_audio_second:
+            time.sleep(seconds * self.seconds_per_audio_second)
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+            self.audio_seconds += seconds
+        if self.responses:
+            text = self.responses[index % len(self.responses)]
+        else:
+            text = f"(fake transcript of {seconds:.1f}s)"
+        return [TranscriptSegment(0.0, seconds, text)] if text else []
@@ -0,0 +1,199 @@
+import os
+import logging
+from collections import Counter, deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+sys_logger = logging.getLogger("system_summarizer")
+
+# src/logger/resources/filters/hallucination_phrases.txt
+DEFAULT_PHRASES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "resources", "filters", "hallucination_phrases.txt"
+)
+
+
+@dataclass
+class FilterMatch:
+    """どのルールで弾いたか"""
+    rule: str # "known_phrase" / "tandem_repeat" / "repeated_ngram" / "dominant_char"
+    detail: str
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick 法で、複数のフレーズをテキストの1回の走査で探す (テキスト長に線形)。
+    """
+    def __init__(self, phrases: Iterable[str]):
+        self.phrases: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Optional[int]] = [None] # そのノードで終わる (または fail 先で終わる) フレーズ
+        for phrase in phrases:
+            self._add(phrase.casefold())
+        self._build()
+
+    def _add(self, phrase: str):
+        if not phrase or phrase in self.phrases:
+            return
+        node = 0
+        for ch in phrase:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(None)
+            node = nxt
+        if self._out[node] is None:
+            self._out[node] = len(self.phrases)
+        self.phrases.append(phrase)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                if self._out[child] is None:
+                    self._out[child] = self._out[self._fail[child]]
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        最初に見つかったフレーズを返す。なければ None。
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text.casefold():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node] is not None:
+                return self.phrases[out[node]]
+        return None
+
+
+class HallucinationFilter:
+    """
+    Whisper のハルシネーション (無音・雑音から出る定型句や、同じ音の繰り返し) を判定する。
+    どのルールで弾いたかを FilterMatch で返す。各ルールはテキスト長にほぼ線形。
+
+    1. tandem_repeat: 同じ 1〜max_period 文字が min_repeats 回以上連続する ("DoDoDoDoDoDo", "そうまりそうまり...")。
+       記号だけの繰り返し ("......") は対象外
+    2. repeated_ngram: 2〜max_ngram 文字の並びが max_ngram_count 回を超えて現れ、テキストの min_coverage 以上を占める
+    3. dominant_char: 1文字がテキストの dominant_ratio 以上を占める
+    4. known_phrase: 既知の定型句を含む (phrases_file から読み込む)
+    1〜3 は min_length 文字を超えるテキストだけに適用する。
+    """
+    def __init__(
+        self,
+        phrases: Optional[Iterable[str]] = None,
+        min_length: int = 10,
+        max_period: int = 8,
+        min_repeats: int = 6,
+        max_ngram: int = 4,
+        max_ngram_count: int = 5,
+        min_coverage: float = 0.3,
+        dominant_ratio: float = 0.6
+    ):
+        self.matcher = PhraseMatcher(phrases if phrases is not None else load_phrases())
+        self.min_length = min_length
+        self.max_period = max_period
+        self.min_repeats = min_repeats
+        self.max_ngram = max_ngram
+        self.max_ngram_count = max_ngram_count
+        self.min_coverage = min_coverage
+        self.dominant_ratio = dominant_ratio
+        self.rule_counts: Counter = Counter() # ルールごとに弾いた回数
+
+    @classmethod
+    def from_file(cls, path: str = DEFAULT_PHRASES_FILE, **kwargs) -> "HallucinationFilter":
+        return cls(phrases=load_phrases(path), **kwargs)
+
+    def check(self, text: str) -> Optional[FilterMatch]:
+        text = text.strip()
+        if not text:
+            return None
+
+        match = None
+        if len(text) > self.min_length:
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+            match = self._tandem_repeat(text, codes) or self._repeated_ngram(text, codes) or self._dominant_char(text, codes)
+        if match is None:
+            phrase = self.matcher.find(text)
+            if phrase is not None:
+                match = FilterMatch("known_phrase", phrase)
+
+        if match is not None:
+            self.rule_counts[match.rule] += 1
+        return match
+
+    def is_hallucination(self, text: str) -> bool:
+        return self.check(text) is not None
+
+    def _tandem_repeat(self, text: str, codes: np.ndarray) -> Optional[FilterMatch]:
+        # 周期 p で繰り返している区間では codes[i] == codes[i + p] が続く
+        for p in range(1, min(self.max_period, len(codes) // self.min_repeats) + 1):
+            same = codes[p:] == codes[:-p]
+            needed = p * (self.min_repeats - 1)
+            start, length = _longest_true_run(same)
+            unit = text[start:start + p]
+            if length >= needed and any(ch.isalnum() for ch in unit):
+                return FilterMatch("tandem_repeat", f"{unit!r} x{length // p + 1}")
+        return None
+
+    def _repeated_ngram(self, text: str, codes: np.ndarray) -> Optional[FilterMatch]:
+        # n 文字の並びごとにローリングハッシュを1回で計算し、出現回数を数える
+        n_chars = len(codes)
+        values = codes.astype(np.uint64)
+        for n in range(2, self.max_ngram + 1):
+            if n_chars < n:
+                break
+            hashes = np.zeros(n_chars - n + 1, dtype=np.uint64)
+            for k in range(n):
+                # 多項式ハッシュ (uint64 のオーバーフローは mod 2^64 として扱う)
+                hashes = hashes * np.uint64(1_000_003) + values[k:n_chars - n + 1 + k]
+            uniq, counts = np.unique(hashes, return_counts=True)
+            best = int(np.argmax(counts))
+            count = int(counts[best])
+            if count > self.max_ngram_count and count * n / n_chars >= self.min_coverage:
+                start = int(np.argmax(hashes == uniq[best]))
+                return FilterMatch("repeated_ngram", f"{text[start:start + n]!r} x{count}")
+        return None
+
+    def _dominant_char(self, text: str, codes: np.ndarray) -> Optional[FilterMatch]:
+        uniq, counts = np.unique(codes, return_counts=True)
+        best = int(np.argmax(counts))
+        ratio = int(counts[best]) / len(codes)
+        if ratio > self.dominant_ratio:
+            return FilterMatch("dominant_char", f"{chr(int(uniq[best]))!r} {ratio:.0%}")
+        return None
+
+
+def _longest_true_run(mask: np.ndarray):
+    """(開始位置, 長さ)"""
+    if not mask.any():
+        return (0, 0)
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+    i = int(np.argmax(ends - starts))
+    return (int(starts[i]), int(ends[i] - starts[i]))
+
+
+def load_phrases(path: str = DEFAULT_PHRASES_FILE) -> List[str]:
+    """
+    1行に1フレーズ。空行と # で始まる行は無視する。読めなければ空。
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
+    except OSError as e:
+        sys_logger.error(f"Failed to load hallucination phrases from {path}: {e}")
+        return []
@@ -0,0 +1,235 @@
+import gc
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+
+def mlx_active_memory() -> int:
+    """
+    MLX が確保しているメモリ (バイト)。取れなければ 0。
+    """
+    try:
+        import mlx.core as mx
+    except ImportError:
+        return 0
+    for getter in (getattr(mx, "get_active_memory", None), getattr(getattr(mx, "metal", None), "get_active_memory", None)):
+        if getter is not None:
+            try:
+                return int(getter())
+            except Exception:
+                continue
+    return 0
+
+
+def release_mlx_memory():
+    """
+    参照を外したモデルの重みを解放し、MLX のバッファキャッシュも返す。
+    """
+    gc.collect()
+    try:
+        import mlx.core as mx
+    except ImportError:
+        return
+    for clear in (getattr(mx, "clear_cache", None), getattr(getattr(mx, "metal", None), "clear_cache", None)):
+        if clear is not None:
+            try:
+                clear()
+                return
+            except Exception:
+                continue
+
+
+class ModelResidencyManager:
+    """
+    重いモデルを、使う時だけメモリに置く。
+
+    - 最初に use() / acquire() された時に loader() で読み込む (遅延ロード)
+    - 最後に使ってから idle_unload_seconds 以上使われなければ unloader(model) で手放す
+      (unload_if_idle() を定期的に呼ぶか、start_monitoring() で監視する)
+    - 使用中 (acquire してから release するまで) は手放さない
+    - 読み込み回数・再読み込みにかかった時間・読み込みで増えたメモリを集計する (get_metrics)
+
+    loader / unloader / memory_probe / clock は差し替えられるので、実際のモデルなしで試せる。
+    """
+    def __init__(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        unloader: Optional[Callable[[Any], None]] = None,
+        idle_unload_seconds: Optional[float] = None,
+        memory_probe: Optional[Callable[[], int]] = mlx_active_memory,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            loader: モデルを読み込んで返す。例外はそのまま use() / acquire() の呼び出し元に伝わる
+            unloader: 手放す時に呼ぶ (キャッシュの破棄など)。None なら参照を外すだけ
+            idle_unload_seconds: この秒数使われなければ手放す。None なら手放さない
+            memory_probe: 現在の使用メモリ (バイト)。読み込み前後の差をこのモデルの常駐量とみなす
+        """
+        self.name = name
+        self.loader = loader
+        self.unloader = unloader
+        self.idle_unload_seconds = idle_unload_seconds
+        self.memory_probe = memory_probe
+        self.clock = clock
+
+        # _lock は状態と集計だけを守る (get_metrics() が読み込み中に待たされないよう、loader() / unloader() の間は持たない)。
+        # 読み込みと手放しは _load_lock で1つずつ行う
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._model: Any = None
+        self._loaded = False
+        self._users = 0
+        self._last_used = clock()
+        self.should_stop = False
+        self.metrics = {
+            "loads": 0,
+            "reloads": 0, # 手放した後に読み直した回数
+            "unloads": 0,
+            "load_seconds_total": 0.0,
+            "last_load_seconds": 0.0,
+            "last_reload_seconds": 0.0,
+            "resident_bytes": 0 # 読み込みで増えたメモリ (手放すと 0)
+        }
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded
+
+    def acquire(self) -> Any:
+        """
+        モデルを返す (読み込まれていなければ読み込む)。使い終わったら release() すること。
+        """
+        with self._lock:
+            if self._loaded:
+                return self._enter()
+        with self._load_lock:
+            with self._lock:
+                if self._loaded:
+                    return self._enter() # 待っている間に他のスレッドが読み込んだ
+            self._load()
+            with self._lock:
+                return self._enter()
+
+    def _enter(self) -> Any:
+        self._users += 1
+        self._last_used = self.clock()
+        return self._model
+
+    def release(self):
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            self._last_used = self.clock()
+
+    @contextmanager
+    def use(self):
+        """
+        with residency.use() as model:
+            ...
+        """
+        model = self.acquire()
+        try:
+            yield model
+        finally:
+            self.release()
+
+    def _load(self):
+        before = self._probe()
+        started = time.perf_counter()
+        model = self.loader()
+        elapsed = time.perf_counter() - started
+        resident_bytes = max(0, self._probe() - before)
+
+        with self._lock:
+            self._model = model
+            self._loaded = True
+            m = self.metrics
+            if m["loads"] > 0:
+                m["reloads"] += 1
+                m["last_reload_seconds"] = elapsed
+            m["loads"] += 1
+            m["load_seconds_total"] += elapsed
+            m["last_load_seconds"] = elapsed
+            m["resident_bytes"] = resident_bytes
+        print(f"[Residency] {self.name} loaded in {elapsed:.1f}s ({resident_bytes / (1024 * 1024):.0f} MB).")
+
+    def _probe(self) -> int:
+        if self.memory_probe is None:
+            return 0
+        try:
+            return int(self.memory_probe())
+        except Exception:
+            return 0
+
+    def unload(self) -> bool:
+        """
+        使用中でなければ手放す。手放した場合 True。
+        """
+        return self._unload(min_idle_seconds=None)
+
+    def _can_unload(self, min_idle_seconds: Optional[float]) -> bool:
+        with self._lock:
+            if not self._loaded or self._users > 0:
+                return False
+            return min_idle_seconds is None or self.clock() - self._last_used >= min_idle_seconds
+
+    def _unload(self, min_idle_seconds: Optional[float]) -> bool:
+        if not self._can_unload(min_idle_seconds):
+            return False # 読み込み中も含め、手放すものがなければ待たずに返る
+        with self._load_lock:
+            with self._lock:
+                # 確認から手放すまでの間に使われた場合は手放さない
+                if not self._can_unload(min_idle_seconds):
+                    return False
+                idle = self.clock() - self._last_used
+                model, self._model = self._model, None
+                self._loaded = False
+                self.metrics["unloads"] += 1
+                self.metrics["resident_bytes"] = 0
+            try:
+                if self.unloader is not None:
+                    self.unloader(model)
+            finally:
+                del model
+        print(f"[Residency] {self.name} unloaded after {idle:.0f}s idle.")
+        return True
+
+    def idle_seconds(self) -> float:
+        with self._lock:
+            if self._users > 0:
+                return 0.0
+            return max(0.0, self.clock() - self._last_used)
+
+    def unload_if_idle(self) -> bool:
+        if self.idle_unload_seconds is None:
+            return False
+        return self._unload(min_idle_seconds=self.idle_unload_seconds)
+
+    def start_monitoring(self, check_interval: float = 30.0):
+        """
+        check_interval 秒ごとに、使われていなければ手放す。stop() まで戻らない。
+        """
+        self.should_stop = False
+        while not self.should_stop:
+            try:
+                self.unload_if_idle()
+            except Exception as e:
+                print(f"[Residency] Failed to unload {self.name}: {e}")
+            # stop() に素早く反応できるよう細かく待つ
+            waited = 0.0
+            while waited < check_interval and not self.should_stop:
+                time.sleep(1.0)
+                waited += 1.0
+
+    def stop(self):
+        self.should_stop = True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["resident"] = self._loaded
+            metrics["in_use"] = self._users
+            metrics["idle_seconds"] = self.idle_seconds() if self._loaded else 0.0
+            return metrics
@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    録音コールバック (書き手1つ) と文字起こしスレッド (読み手1つ) の間で音声を渡す、事前確保のリングバッファ。
+
+    - 書き手は write_pos だけを、読み手は read_pos だけを進めるのでロックは要らない
+    - 各サンプルを2箇所 (i と i + capacity) に書いておくので、capacity 以下の範囲はいつでも
+      連続した numpy のビューとして読める (境界をまたいでもコピーしない)
+    - 読み手は peek() で見て、処理し終えてから consume() する。まだ消費されていない範囲は上書きしないため、
+      空きが足りない書き込みは新しい側を捨て、オーバーランとして数える
+    """
+    def __init__(self, capacity: int, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._buf = np.zeros(capacity * 2, dtype=dtype)
+        self._write_pos = 0 # 書き込んだ総サンプル数 (書き手だけが更新)
+        self._read_pos = 0 # 消費した総サンプル数 (読み手だけが更新)
+        self._data_ready = threading.Event()
+
+        self.written_samples = 0
+        self.dropped_samples = 0
+        self.overruns = 0 # 空きが足りず、書き込みの一部または全部を捨てた回数
+        self.high_water = 0 # 最も溜まった時のサンプル数
+        self.last_write_time: Optional[float] = None # 最後に書き込んだ時刻 (time.time())
+
+    def available(self) -> int:
+        return self._write_pos - self._read_pos
+
+    def free(self) -> int:
+        return self.capacity - self.available()
+
+    @property
+    def read_position(self) -> int:
+        """これまでに消費した総サンプル数"""
+        return self._read_pos
+
+    def position_time(self, position: int, sample_rate: int) -> Optional[float]:
+        """
+        総サンプル数で数えた位置 position の音声が録音された時刻 (time.time())。最後の書き込みから逆算する。
+        """
+        if self.last_write_time is None:
+            return None
+        return self.last_write_time - (self._write_pos - position) / sample_rate
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        書き手 (録音コールバック) から呼ぶ。書き込めたサンプル数を返す。メモリは確保しない。
+        """
+        n = len(samples)
+        room = self.free()
+        if n > room:
+            self.overruns += 1
+            self.dropped_samples += n - room
+            n = room
+        if n > 0:
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            # 前半と後半 (ミラー) の両方に書く
+            self._buf[start:start + first] = samples[:first]
+            self._buf[start + self.capacity:start + self.capacity + first] = samples[:first]
+            if first < n:
+                rest = n - first
+                self._buf[:rest] = samples[first:n]
+                self._buf[self.capacity:self.capacity + rest] = samples[first:n]
+            self._write_pos += n # データを書き終えてから公開する
+            self.written_samples += n
+            self.high_water = max(self.high_water, self.available())
+        self.last_write_time = time.time()
+        self._data_ready.set()
+        return n
+
+    def wait_for(self, n_samples: int, timeout: Optional[float] = None) -> bool:
+        """
+        読み手から呼ぶ。n_samples 以上溜まるまで待つ (timeout 秒で諦めて False)。
+        """
+        if self.available() >= n_samples:
+            return True
+        self._data_ready.clear()
+        if self.available() >= n_samples: # clear() の直前に書かれた場合
+            return True
+        self._data_ready.wait(timeout)
+        return self.available() >= n_samples
+
+    def peek(self, n_samples: Optional[int] = None) -> np.ndarray:
+        """
+        まだ消費していない先頭 n_samples (省略時は全部) の読み取り専用ビュー。consume() するまで上書きされない。
+        """
+        available = self.available()
+        n = available if n_samples is None else min(n_samples, available)
+        start = self._read_pos % self.capacity
+        view = self._buf[start:start + n]
+        view.flags.writeable = False
+        return view
+
+    def consume(self, n_samples: int):
+        """
+        peek() した範囲の処理が終わったら呼ぶ。その範囲は書き手が再利用できるようになる。
+        """
+        self._read_pos += min(n_samples, self.available())
+
+    def get_stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "available": self.available(),
+            "written_samples": self.written_samples,
+            "dropped_samples": self.dropped_samples,
+            "overruns": self.overruns,
+            "high_water": self.high_water
+        }
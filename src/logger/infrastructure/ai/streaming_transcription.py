@@ -0,0 +1,145 @@
+import re
+from typing import List, Optional
+
+from ...domain.entities import TranscriptSegment
+from ...domain.interfaces import TranscriberInterface
+
+_NORMALIZE = re.compile(r"[\s、。，．,.!?！？「」『』\"']+")
+
+
+def _normalize(text: str) -> str:
+    return _NORMALIZE.sub("", text).lower()
+
+
+class HypothesisMerger:
+    """
+    重なり合うウィンドウの文字起こし結果 (仮説) をつなぎ、確定した部分だけを返す。
+
+    - 前回のウィンドウと今回のウィンドウで、未確定部分の先頭から一致している区間は確定する
+      (2回続けて同じ結果になった部分はもう変わらないとみなす)
+    - 次のウィンドウに含まれない (final_before より前に終わる) 区間は、一致していなくても確定する
+    - 確定済みの時刻より前の区間は捨てる。確定済みの末尾と時間的に重なる区間は、
+      同じ語の繰り返しや、末尾と先頭が重複した文字列を取り除いてから確定する (継ぎ目の重複除去)
+    """
+    def __init__(self, time_tolerance: float = 0.25, min_overlap_chars: int = 2, tail_chars: int = 40):
+        self.time_tolerance = time_tolerance
+        self.min_overlap_chars = min_overlap_chars
+        self.tail_chars = tail_chars
+        self.committed: List[TranscriptSegment] = []
+        self.committed_until = 0.0
+        self._hypothesis: List[TranscriptSegment] = []
+
+    @property
+    def tentative(self) -> List[TranscriptSegment]:
+        """まだ確定していない直近の仮説 (表示用。後で変わりうる)"""
+        return list(self._hypothesis)
+
+    def update(self, segments: List[TranscriptSegment], final_before: Optional[float] = None) -> List[TranscriptSegment]:
+        """
+        新しいウィンドウの結果 (時刻はストリーム先頭からの秒) を渡し、新たに確定した区間を返す。
+        """
+        hypothesis = [s for s in segments if s.end > self.committed_until + self.time_tolerance and s.text.strip()]
+
+        agreed = 0
+        for prev, cur in zip(self._hypothesis, hypothesis):
+            if _normalize(prev.text) != _normalize(cur.text):
+                break
+            agreed += 1
+
+        final = 0
+        if final_before is not None:
+            for s in hypothesis:
+                if s.end > final_before:
+                    break
+                final += 1
+
+        n = max(agreed, final)
+        emitted = self._commit(hypothesis[:n])
+        self._hypothesis = hypothesis[n:]
+        return emitted
+
+    def flush(self) -> List[TranscriptSegment]:
+        """
+        残っている仮説を全て確定する (無音になった時・停止時)。
+        """
+        emitted = self._commit(self._hypothesis)
+        self._hypothesis = []
+        return emitted
+
+    def _commit(self, segments: List[TranscriptSegment]) -> List[TranscriptSegment]:
+        emitted = []
+        for s in segments:
+            if s.start < self.committed_until + self.time_tolerance:
+                text = self._strip_seam_overlap(s.text)
+                if not _normalize(text):
+                    continue # 確定済みの末尾の繰り返し
+                s = TranscriptSegment(s.start, s.end, text)
+            self.committed.append(s)
+            self.committed_until = max(self.committed_until, s.end)
+            emitted.append(s)
+        return emitted
+
+    def _strip_seam_overlap(self, text: str) -> str:
+        """
+        確定済みテキストの末尾と重なっている先頭部分を取り除く。
+        """
+        tail = "".join(s.text for s in self.committed[-8:])[-self.tail_chars:].rstrip()
+        if not tail:
+            return text
+        stripped = text.lstrip()
+        if _normalize(stripped) and _normalize(tail).endswith(_normalize(stripped)):
+            return "" # 丸ごと繰り返し
+        for k in range(min(len(tail), len(stripped)), self.min_overlap_chars - 1, -1):
+            if tail.endswith(stripped[:k]):
+                return text[len(text) - len(stripped) + k:]
+        return text
+
+
+class StreamingTranscriber:
+    """
+    短いウィンドウを hop_seconds ずつずらしながら文字起こしし、確定した部分から順に返す。
+    ウィンドウの重なり (window_seconds - hop_seconds) があるので、ウィンドウの境界で切れた語も
+    次のウィンドウで完全な形で認識され、HypothesisMerger が重複を除いてつなぐ。
+    """
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        sample_rate: int = 16000,
+        window_seconds: float = 6.0,
+        hop_seconds: float = 2.0,
+        merger: Optional[HypothesisMerger] = None
+    ):
+        if not 0 < hop_seconds <= window_seconds:
+            raise ValueError("hop_seconds must be in (0, window_seconds]")
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.hop_seconds = hop_seconds
+        self.merger = merger or HypothesisMerger()
+
+    @property
+    def window_samples(self) -> int:
+        return int(self.window_seconds * self.sample_rate)
+
+    @property
+    def hop_samples(self) -> int:
+        return int(self.hop_seconds * self.sample_rate)
+
+    def process_window(self, audio, window_start: float) -> List[TranscriptSegment]:
+        """
+        window_start 秒 (ストリーム先頭から) に始まるウィンドウを文字起こしし、新たに確定した区間を返す。
+        次のウィンドウは window_start + hop_seconds から始まる前提。
+        """
+        segments = [
+            TranscriptSegment(window_start + s.start, window_start + s.end, s.text)
+            for s in self.transcriber.transcribe(audio, self.sample_rate)
+        ]
+        return self.merger.update(segments, final_before=window_start + self.hop_seconds)
+
+    def flush(self) -> List[TranscriptSegment]:
+        return self.merger.flush()
+
+    @staticmethod
+    def join(segments: List[TranscriptSegment]) -> str:
+        # Whisper の単語は英語なら先頭に空白を含み、日本語なら含まないので、そのままつなぐ
+        return "".join(s.text for s in segments).strip()
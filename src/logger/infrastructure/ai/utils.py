@@ -1,5 +1,177 @@
+import time
 import threading
+import itertools
+from enum import IntEnum
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
 
-# Global lock to serialize heavy MLX inference (Whisper and LLM)
+from ...application.metrics import hot_path_metrics
+
+
+class InferencePriority(IntEnum):
+    """値が小さいほど優先"""
+    OCR = 0 # 画面監視ループが待っている
+    TRANSCRIPTION = 1 # ライブ音声の文字起こし
+    SUMMARIZATION = 2 # バックグラウンドの要約
+
+
+class _Waiter:
+    __slots__ = ("priority", "seq", "since")
+
+    def __init__(self, priority: InferencePriority, seq: int):
+        self.priority = priority
+        self.seq = seq
+        self.since = time.monotonic()
+
+
+class InferenceArbiter:
+    """
+    重い推論 (Whisper / LLM / Vision OCR) を1つずつ実行させる調停役。
+    Apple Silicon でのメモリ圧迫や Metal コンテキストの競合を避けるため、同時に実行するのは1つだけ。
+
+    空いたときは、待っている中で最も優先度の高いもの (同じ優先度なら先着順) に渡す。
+    実行中の処理を横取りはしない。
+    starvation_seconds を指定すると、それ以上待たされている処理を優先度に関係なく先に通す
+    (OCR が続いても要約が永遠に待たされないように)。
+
+    優先度ごとに、待ち時間と保持時間を集計する (get_metrics)。
+    """
+    def __init__(self, starvation_seconds: Optional[float] = None):
+        self.starvation_seconds = starvation_seconds
+        self._cond = threading.Condition()
+        self._waiters: List[_Waiter] = []
+        self._holder: Optional[_Waiter] = None
+        self._held_since = 0.0
+        self._seq = itertools.count()
+        self._metrics: Dict[InferencePriority, Dict[str, float]] = {
+            p: {"count": 0, "wait_total": 0.0, "wait_max": 0.0, "hold_total": 0.0, "hold_max": 0.0, "starvation_grants": 0, "yields": 0}
+            for p in InferencePriority
+        }
+
+    def configure(self, starvation_seconds: Optional[float] = None):
+        """
+        共有の調停役の設定を変える。None の項目は変えない (別のコントローラーの設定を消さない)。
+        """
+        with self._cond:
+            if starvation_seconds is not None:
+                self.starvation_seconds = starvation_seconds
+            # 待っている処理に新しい設定で判定し直させる
+            self._cond.notify_all()
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        if not self._waiters:
+            return None
+        now = time.monotonic()
+
+        def key(w: _Waiter):
+            starved = self.starvation_seconds is not None and now - w.since >= self.starvation_seconds
+            return (0 if starved else 1, w.priority, w.seq)
+
+        return min(self._waiters, key=key)
+
+    def _is_starved(self, waiter: _Waiter) -> bool:
+        return self.starvation_seconds is not None and time.monotonic() - waiter.since >= self.starvation_seconds
+
+    def acquire(self, priority: InferencePriority, timeout: Optional[float] = None) -> bool:
+        """
+        順番が来るまで待つ。timeout 秒以内に取れなければ False。
+        """
+        waiter = _Waiter(priority, next(self._seq))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._waiters.append(waiter)
+            try:
+                while self._holder is not None or self._next_waiter() is not waiter:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    # 飢餓対策の判定は時間経過で変わるので、指定があれば定期的に見直す
+                    if self.starvation_seconds is not None:
+                        remaining = min(remaining, self.starvation_seconds) if remaining is not None else self.starvation_seconds
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters.remove(waiter)
+                if self._holder is not waiter:
+                    # タイムアウト: 次の順番の人を起こす
+                    self._cond.notify_all()
+
+            waited = time.monotonic() - waiter.since
+            self._holder = waiter
+            self._held_since = time.monotonic()
+            m = self._metrics[priority]
+            m["count"] += 1
+            m["wait_total"] += waited
+            m["wait_max"] = max(m["wait_max"], waited)
+            # 推論ロックの待ち時間 (OCR なら監視ループが待たされた時間)
+            hot_path_metrics.observe(f"inference.{priority.name.lower()}.wait", waited)
+            if self._is_starved(waiter) and any(w.priority < priority for w in self._waiters):
+                m["starvation_grants"] += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            if self._holder is None:
+                raise RuntimeError("InferenceArbiter.release() called without holding it")
+            held = time.monotonic() - self._held_since
+            m = self._metrics[self._holder.priority]
+            m["hold_total"] += held
+            m["hold_max"] = max(m["hold_max"], held)
+            hot_path_metrics.observe(f"inference.{self._holder.priority.name.lower()}.hold", held)
+            self._holder = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def use(self, priority: InferencePriority):
+        """
+        with inference_arbiter.use(InferencePriority.OCR):
+            ...
+        """
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def yield_to_higher(self, priority: InferencePriority) -> bool:
+        """
+        保持中に呼ぶ。より優先度の高い処理が待っていれば一度手放し、それらが終わってから取り直す。
+        長い処理 (LLM の生成) を区切って、待ち時間に上限を設けるために使う。手放した場合 True。
+        """
+        if not self.has_waiters(above=priority):
+            return False
+        self.release()
+        self.acquire(priority)
+        with self._cond:
+            self._metrics[priority]["yields"] += 1
+        return True
+
+    def has_waiters(self, above: Optional[InferencePriority] = None) -> bool:
+        """
+        待っている処理があるか。above を指定すると、それより優先度の高いものだけを数える。
+        """
+        with self._cond:
+            if above is None:
+                return bool(self._waiters)
+            return any(w.priority < above for w in self._waiters)
+
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            metrics = {}
+            for p, m in self._metrics.items():
+                count = m["count"]
+                metrics[p.name.lower()] = {
+                    "count": int(count),
+                    "wait_avg": m["wait_total"] / count if count else 0.0,
+                    "wait_max": m["wait_max"],
+                    "hold_avg": m["hold_total"] / count if count else 0.0,
+                    "hold_max": m["hold_max"],
+                    "starvation_grants": int(m["starvation_grants"]),
+                    "yields": int(m["yields"]),
+                    "waiting": sum(1 for w in self._waiters if w.priority == p)
+                }
+            return metrics
+
+
+# Global arbiter to serialize heavy inference (Whisper, LLM and Vision OCR)
 # to prevent memory pressure or Metal context conflicts on Apple Silicon.
-mlx_lock = threading.Lock()
+inference_arbiter = InferenceArbiter()
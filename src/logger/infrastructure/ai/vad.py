@@ -0,0 +1,125 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class VadStats:
+    """Whisper に送った音声と、録音した音声の合計秒数"""
+    captured_seconds: float = 0.0
+    sent_seconds: float = 0.0
+    chunks: int = 0
+    skipped_chunks: int = 0 # 発話がなく、Whisper に送らなかったチャンク
+
+    def to_dict(self) -> dict:
+        return {
+            "captured_seconds": self.captured_seconds,
+            "sent_seconds": self.sent_seconds,
+            "sent_ratio": self.sent_seconds / self.captured_seconds if self.captured_seconds else 0.0,
+            "chunks": self.chunks,
+            "skipped_chunks": self.skipped_chunks
+        }
+
+
+class FrameVad:
+    """
+    フレーム単位 (既定 30ms) の音声区間検出。numpy でまとめて計算する。
+
+    - フレームごとの RMS (エネルギー) とゼロ交差率 (ZCR) を求める
+    - 雑音レベルは各チャンクの静かなフレーム (下位 noise_percentile %) から推定し、チャンクをまたいで追従させる
+    - 雑音レベルの energy_ratio 倍 (かつ min_energy 以上) のフレームを発話とみなす。
+      ただし ZCR が高くエネルギーがしきい値ぎりぎりのフレーム (ヒスノイズなど) は除く
+    - min_speech_ms より短い発話 (咳・クリック音) は捨て、前後を pad_ms 広げ、merge_gap_ms 以内の区間はつなげる
+    """
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        frame_ms: float = 30.0,
+        min_energy: float = 0.015,
+        energy_ratio: float = 3.0,
+        zcr_noise: float = 0.35,
+        noise_percentile: float = 10.0,
+        noise_adapt: float = 0.2,
+        min_speech_ms: float = 150.0,
+        pad_ms: float = 200.0,
+        merge_gap_ms: float = 400.0
+    ):
+        self.sample_rate = sample_rate
+        self.frame_len = max(1, int(sample_rate * frame_ms / 1000))
+        self.min_energy = min_energy
+        self.energy_ratio = energy_ratio
+        self.zcr_noise = zcr_noise
+        self.noise_percentile = noise_percentile
+        self.noise_adapt = noise_adapt
+        self.min_speech_frames = max(1, int(round(min_speech_ms / frame_ms)))
+        self.pad = int(sample_rate * pad_ms / 1000)
+        self.merge_gap = int(sample_rate * merge_gap_ms / 1000)
+        self.noise_floor: Optional[float] = None
+
+    def frame_features(self, audio: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns:
+            (フレームごとの RMS, フレームごとの ZCR)。末尾の1フレームに満たない部分は含めない。
+        """
+        n_frames = len(audio) // self.frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32)
+        frames = np.asarray(audio[:n_frames * self.frame_len], dtype=np.float32).reshape(n_frames, self.frame_len)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        return rms, zcr
+
+    def _update_noise_floor(self, rms: np.ndarray) -> float:
+        estimate = float(np.percentile(rms, self.noise_percentile))
+        if self.noise_floor is None or estimate < self.noise_floor:
+            # 静かになった時はすぐ下げる
+            self.noise_floor = estimate
+        else:
+            self.noise_floor += self.noise_adapt * (estimate - self.noise_floor)
+        return self.noise_floor
+
+    def detect(self, audio: np.ndarray) -> List[Tuple[int, int]]:
+        """
+        発話区間を (開始サンプル, 終了サンプル) のリストで返す。発話がなければ空。
+        """
+        rms, zcr = self.frame_features(audio)
+        if len(rms) == 0:
+            return []
+        threshold = max(self.min_energy, self._update_noise_floor(rms) * self.energy_ratio)
+        voiced = (rms >= threshold) & ~((zcr >= self.zcr_noise) & (rms < threshold * 1.5))
+
+        # 連続する発話フレームの区間 (フレーム番号)
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+        starts, ends = edges[0::2], edges[1::2]
+        keep = (ends - starts) >= self.min_speech_frames
+        starts, ends = starts[keep], ends[keep]
+        if len(starts) == 0:
+            return []
+
+        # サンプル位置に直し、前後を広げて近い区間をつなげる
+        starts = np.maximum(starts * self.frame_len - self.pad, 0)
+        ends = np.minimum(ends * self.frame_len + self.pad, len(audio))
+        segments: List[Tuple[int, int]] = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if segments and start - segments[-1][1] <= self.merge_gap:
+                segments[-1] = (segments[-1][0], max(segments[-1][1], end))
+            else:
+                segments.append((start, end))
+        return segments
+
+    def voiced_audio(self, audio: np.ndarray, segments: List[Tuple[int, int]], gap_ms: float = 100.0) -> np.ndarray:
+        """
+        発話区間だけをつなげた音声。区間の間には短い無音を挟む (単語がくっつかないように)。
+        """
+        if len(segments) == 1:
+            start, end = segments[0]
+            return audio[start:end]
+        gap = np.zeros(int(self.sample_rate * gap_ms / 1000), dtype=audio.dtype)
+        parts = []
+        for i, (start, end) in enumerate(segments):
+            if i:
+                parts.append(gap)
+            parts.append(audio[start:end])
+        return np.concatenate(parts)
@@ -1,24 +1,130 @@
 import threading
 import time
-import queue
 import numpy as np
 import sounddevice as sd
 import mlx_whisper
+from typing import List, Optional
+from ...domain.entities import TranscriptSegment
+from ...domain.interfaces import TranscriberInterface
+from .streaming_transcription import StreamingTranscriber
+from .residency import ModelResidencyManager, release_mlx_memory
+from .vad import FrameVad, VadStats
+from .ring_buffer import AudioRingBuffer
+from .backpressure import AudioBackpressure
+from .hallucination_filter import HallucinationFilter, DEFAULT_PHRASES_FILE
+from ...application.metrics import hot_path_metrics
+
+# mlx_whisper は読み込んだモデルを ModelHolder に保持し続ける。手放す時はここを空にする
+try:
+    from mlx_whisper.transcribe import ModelHolder
+except ImportError:
+    ModelHolder = None
+
+class WhisperTranscriber(TranscriberInterface):
+    """
+    mlx_whisper による文字起こし。単語ごとの時刻 (word_timestamps) があれば単語単位で返す。
+    arbitrate=False なら、呼び出し側で inference_arbiter を取ってから呼ぶこと
+    (True なら自分で取るので、複数スレッドから呼んでも1つずつ実行される)。
+    """
+    def __init__(self, model_path: str, language: str = "ja", arbitrate: bool = False):
+        self.model_path = model_path
+        self.language = language
+        self.arbitrate = arbitrate
+
+    def _run(self, audio):
+        return mlx_whisper.transcribe(
+            audio,
+            path_or_hf_repo=self.model_path,
+            language=self.language,
+            word_timestamps=True,
+            verbose=False
+        )
+
+    def transcribe(self, audio, sample_rate: int) -> List[TranscriptSegment]:
+        if self.arbitrate:
+            from .utils import inference_arbiter, InferencePriority
+            with inference_arbiter.use(InferencePriority.TRANSCRIPTION):
+                result = self._run(audio)
+        else:
+            result = self._run(audio)
+        segments = []
+        for s in result.get("segments", []):
+            words = s.get("words")
+            if words:
+                segments.extend(TranscriptSegment(w["start"], w["end"], w["word"]) for w in words)
+            elif s.get("text", "").strip():
+                segments.append(TranscriptSegment(s["start"], s["end"], s["text"]))
+        return segments
+
 
 class WhisperAudioService:
-    def __init__(self, model_path="mlx-community/whisper-large-v3-turbo", sample_rate=16000, vad_threshold=0.015):
+    def __init__(
+        self,
+        model_path="mlx-community/whisper-large-v3-turbo",
+        sample_rate=16000,
+        vad_threshold=0.015,
+        idle_unload_seconds=None,
+        buffer_seconds=60.0,
+        streaming=False,
+        stream_window_seconds=6.0,
+        stream_hop_seconds=2.0,
+        hallucination_phrases_file=None,
+        backpressure_policy="merge",
+        max_lag_seconds=30.0,
+        max_pending_transcripts=20
+    ):
         self.sample_rate = sample_rate
         self.model_path = model_path
         self.vad_threshold = vad_threshold
+        # 30ms フレームごとの VAD。発話区間だけを Whisper に送る (vad_threshold はフレームのエネルギーの下限)
+        self.vad = FrameVad(sample_rate=sample_rate, min_energy=vad_threshold)
+        self.vad_stats = VadStats()
+        # 定型句は resources/filters/hallucination_phrases.txt (または指定したファイル) から読み込む
+        self.hallucination_filter = HallucinationFilter.from_file(hallucination_phrases_file or DEFAULT_PHRASES_FILE)
+        # 最初の文字起こしで読み込み、idle_unload_seconds 秒使わなければ手放す (None なら常駐)
+        self.residency = ModelResidencyManager(
+            f"Whisper ({model_path})",
+            loader=self._load_model,
+            unloader=self._unload_model,
+            idle_unload_seconds=idle_unload_seconds
+        )
         
-        # Audio Buffer
-        self.audio_queue = queue.Queue()
+        # Audio Buffer (preallocated; the callback writes into it, the worker reads views of it)
+        self.ring = AudioRingBuffer(int(sample_rate * buffer_seconds))
+        self.device_overflows = 0 # sounddevice reported input overflow
+        # 文字起こしが遅れて未処理の音声が max_lag_seconds を超えたら、方針 (drop_oldest / merge / skip_silent) に従って減らす
+        self.backpressure = AudioBackpressure(
+            backpressure_policy,
+            sample_rate=sample_rate,
+            max_lag_seconds=max_lag_seconds,
+            vad=self.vad
+        )
+
+        # Streaming mode: overlapping short windows, emitting stable text every hop instead of every 10 s
+        self.streaming = streaming
+        self.streamer = StreamingTranscriber(
+            WhisperTranscriber(model_path),
+            sample_rate=sample_rate,
+            window_seconds=stream_window_seconds,
+            hop_seconds=stream_hop_seconds
+        ) if streaming else None
         self.is_recording = False
         self.record_stream = None
         
         # Transcription State
-        self._transcript_buffer = [] # list of strings
+        # TranscriptSegment (start / end are the wall-clock time of the audio, time.time())
+        # Bounded: when the logger stops pulling, the oldest are dropped (drop_oldest) or merged (other policies)
+        self._transcript_buffer = []
+        self.max_pending_transcripts = max_pending_transcripts
+        self.dropped_transcripts = 0
+        self.merged_transcripts = 0
         self._lock = threading.Lock()
+
+        # Audio-to-transcript lag (seconds from the end of the audio to its transcript being accepted)
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self._lag_total = 0.0
+        self._lag_count = 0
         
         # Worker Thread
         self.transcription_thread = None
@@ -26,19 +132,32 @@ class WhisperAudioService:
 
     def preload_model(self):
         """
-        Explicitly load the model (download if necessary) by running a dummy transcription.
+        Explicitly load the model (download if necessary) instead of waiting for the first transcription.
         """
-        print(f"Preloading Whisper model: {self.model_path}...")
         try:
-            # Dummy inference to force model load
-            dummy_audio = np.zeros(16000) # 1 second of silence
-            from .utils import mlx_lock
-            with mlx_lock:
-                mlx_whisper.transcribe(dummy_audio, path_or_hf_repo=self.model_path)
-            print("Model loaded successfully.")
+            with self.residency.use():
+                pass
         except Exception as e:
             print(f"Failed to preload model: {e}")
 
+    def _load_model(self):
+        print(f"Loading Whisper model: {self.model_path}...")
+        # Dummy inference to force model load
+        dummy_audio = np.zeros(16000) # 1 second of silence
+        from .utils import inference_arbiter, InferencePriority
+        with inference_arbiter.use(InferencePriority.TRANSCRIPTION):
+            mlx_whisper.transcribe(dummy_audio, path_or_hf_repo=self.model_path)
+        print("Model loaded successfully.")
+        return ModelHolder.model if ModelHolder is not None else self.model_path
+
+    def _unload_model(self, model):
+        from .utils import inference_arbiter, InferencePriority
+        with inference_arbiter.use(InferencePriority.TRANSCRIPTION):
+            if ModelHolder is not None:
+                ModelHolder.model = None
+                ModelHolder.model_path = None
+            release_mlx_memory()
+
     def start_recording(self):
         if self.is_recording:
             return
@@ -48,10 +167,12 @@ class WhisperAudioService:
         # 1. Start Recording Stream (Callback based)
         def callback(indata, frames, time, status):
             if status:
+                if status.input_overflow:
+                    self.device_overflows += 1
                 print(f"[WARN] SoundDevice Status: {status}")
             # indata is (frames, channels), we want (frames,) mono
-            # copy() is important because indata is reused
-            self.audio_queue.put(indata[:, 0].copy())
+            # indata is reused, so it is copied into the ring buffer (no allocation)
+            self.ring.write(indata[:, 0])
 
         # input_device_index=None uses system default
         self.record_stream = sd.InputStream(
@@ -59,13 +180,15 @@ class WhisperAudioService:
             channels=1,
             dtype="float32",
             callback=callback,
-            blocksize=int(self.sample_rate * 5.0) # 5 seconds chunks for crude VAD/batching
+            # 5 seconds chunks for batching (shorter blocks in streaming mode so each hop arrives on time)
+            blocksize=int(self.sample_rate * (0.5 if self.streaming else 5.0))
         )
         self.record_stream.start()
         
         # 2. Start Transcription Worker
         self._stop_event.clear()
-        self.transcription_thread = threading.Thread(target=self._transcription_loop)
+        loop = self._streaming_loop if self.streaming else self._transcription_loop
+        self.transcription_thread = threading.Thread(target=loop)
         self.transcription_thread.daemon = True
         self.transcription_thread.start()
         
@@ -89,108 +212,152 @@ class WhisperAudioService:
 
     def _transcription_loop(self):
         """
-        Consumes audio chunks from queue and runs mlx-whisper.
+        Reads audio from the ring buffer and runs mlx-whisper.
         """
-        accumulated_audio = []
-        accumulated_samples = 0
         min_seconds_to_transcribe = 10.0 # Changed from 5.0 to 10.0 as requested
+        chunk_samples = int(self.sample_rate * min_seconds_to_transcribe)
         
         while not self._stop_event.is_set():
             try:
                 # Wait for audio data (timeout allows check for stop_event)
-                chunk = self.audio_queue.get(timeout=1.0)
-                accumulated_audio.append(chunk)
-                accumulated_samples += len(chunk)
-                
-                # Check if we have enough to transcribe
-                current_duration = accumulated_samples / self.sample_rate
-                
-                if current_duration >= min_seconds_to_transcribe:
-                    self._process_accumulated_audio(accumulated_audio)
-                    accumulated_audio = []
-                    accumulated_samples = 0
+                if not self.ring.wait_for(chunk_samples, timeout=1.0):
+                    continue
+
+                # Falling behind: drop / merge / skip according to the backpressure policy
+                n_samples = self.backpressure.next_chunk(self.ring, chunk_samples)
+
+                # Contiguous view into the ring buffer; released for reuse only after processing
+                span = self._audio_span(self.ring.read_position, n_samples)
+                audio_data = self.ring.peek(n_samples)
+                try:
+                    self._process_accumulated_audio(audio_data, span)
+                finally:
+                    self.ring.consume(len(audio_data))
                     
-            except queue.Empty:
-                continue
             except Exception as e:
                 print(f"Error in transcription loop: {e}")
 
-    def _calculate_rms(self, audio_data):
-        """Calculate Root Mean Square amplitude."""
-        if len(audio_data) == 0:
-            return 0.0
-        return np.sqrt(np.mean(audio_data**2))
+    def _streaming_loop(self):
+        """
+        Transcribes overlapping windows (window_seconds long, every hop_seconds) and emits the stable part.
+        """
+        window_samples = self.streamer.window_samples
+        hop_samples = self.streamer.hop_samples
+
+        while not self._stop_event.is_set():
+            try:
+                if not self.ring.wait_for(window_samples, timeout=1.0):
+                    continue
+
+                # Falling behind: windows are fixed-size, so "merge" drops the oldest audio here too
+                consumed = self.ring.read_position
+                self.backpressure.next_chunk(self.ring, window_samples, allow_merge=False)
+                if self.ring.read_position != consumed:
+                    # The audio is no longer continuous; commit what was pending before the gap
+                    self._accept_segments(self.streamer.flush())
+
+                # Stream time = samples consumed from the ring buffer
+                window_start = self.ring.read_position / self.sample_rate
+                audio_data = self.ring.peek(window_samples)
+                try:
+                    self._process_stream_window(audio_data, window_start, hop_samples)
+                finally:
+                    self.ring.consume(hop_samples)
+
+            except Exception as e:
+                print(f"Error in streaming transcription loop: {e}")
+
+        # Emit whatever was still tentative
+        self._accept_segments(self.streamer.flush())
+
+    def _process_stream_window(self, audio_data, window_start, hop_samples):
+        self.vad_stats.chunks += 1
+        self.vad_stats.captured_seconds += hop_samples / self.sample_rate
+
+        with hot_path_metrics.timer("whisper.vad"):
+            voiced = self.vad.detect(audio_data)
+        if not voiced:
+            # Silence: nothing more will be added to the pending words, so commit them now
+            self.vad_stats.skipped_chunks += 1
+            hot_path_metrics.increment("whisper.skipped_chunks")
+            self._accept_segments(self.streamer.flush())
+            return
+
+        # Windows overlap, so each window only accounts for the hop it advances (like captured_seconds);
+        # counting the whole window would put sent_ratio above 1
+        self.vad_stats.sent_seconds += hop_samples / self.sample_rate
+        try:
+            from .utils import inference_arbiter, InferencePriority
+            # Timed including the arbiter wait and a model reload (both are also recorded separately)
+            with hot_path_metrics.timer("whisper.transcribe"), self.residency.use(), inference_arbiter.use(InferencePriority.TRANSCRIPTION):
+                emitted = self.streamer.process_window(audio_data, window_start)
+            hot_path_metrics.increment("whisper.transcriptions")
+        except Exception as e:
+            hot_path_metrics.increment("whisper.errors")
+            print(f"Whisper Transcription Failed: {e}")
+            return
+        self._accept_segments(emitted)
+
+    def _accept_segments(self, segments):
+        """
+        Committed streaming segments (stream time) -> one transcript with the wall-clock span they cover
+        """
+        if not segments:
+            return
+        span = self._audio_span(
+            int(segments[0].start * self.sample_rate),
+            int((segments[-1].end - segments[0].start) * self.sample_rate)
+        )
+        self._accept_transcript(StreamingTranscriber.join(segments), span)
+
+    def _audio_span(self, position, n_samples):
+        """
+        (start, end) wall-clock time of n_samples of audio starting at ring position (total samples)
+        """
+        start = self.ring.position_time(position, self.sample_rate)
+        if start is None:
+            return None
+        return (start, start + n_samples / self.sample_rate)
 
     def _is_hallucination(self, text):
         """
-        Simple heuristic logic to filter known Whisper hallucinations.
+        Filter known Whisper hallucinations (see HallucinationFilter for the rules).
         """
-        text = text.strip()
-        if not text:
-            return False
-            
-        # 1. Repetitive patterns check (e.g., "DoDoDoDo...", "そうまりそうまり...")
-        if len(text) > 10:
-            # Check for excessive repetition of 2-4 character segments
-            for n in range(2, 5):
-                segment = text[:n]
-                if text.count(segment) > 5: # Same segment repeated too many times
-                    return True
-
-            # Check for single character repetition dominating the string
-            char_counts = {}
-            for char in text:
-                char_counts[char] = char_counts.get(char, 0) + 1
-            
-            max_count = max(char_counts.values())
-            if max_count / len(text) > 0.6: # 60% same character
-                return True
-
-        # 2. Known hallucination phrases (often generated during silence or noise)
-        known_hallucinations = [
-            "ご視聴ありがとうございました",
-            "チャンネル登録",
-            "字幕",
-            "Subtitles",
-            "Thank you for watching",
-            "視聴ありがとう",
-            "そうまり", "そうな!", # User reported patterns
-            "幾幾幾", "我々我々"
-        ]
-        
-        for phrase in known_hallucinations:
-            if phrase in text:
-                return True
-                
-        return False
+        return self.hallucination_filter.is_hallucination(text)
 
-    def _process_accumulated_audio(self, audio_chunks):
+    def _process_accumulated_audio(self, audio_data, span=None):
         """
-        Merge chunks and run Whisper
+        Run VAD and Whisper on a buffered window of audio
         """
-        if not audio_chunks:
+        if len(audio_data) == 0:
             return
-            
-        # Concatenate numpy arrays
-        audio_data = np.concatenate(audio_chunks)
-        
-        # 1. VAD Check (RMS)
-        rms = self._calculate_rms(audio_data)
-        # print(f"[DEBUG] Audio RMS: {rms:.4f}")
         
-        if rms < self.vad_threshold:
+        # 1. VAD (frame-level): keep only voiced segments, trim leading/trailing silence
+        with hot_path_metrics.timer("whisper.vad"):
+            segments = self.vad.detect(audio_data)
+        self.vad_stats.chunks += 1
+        self.vad_stats.captured_seconds += len(audio_data) / self.sample_rate
+
+        if not segments:
             # Silence detected, skip transcription
+            self.vad_stats.skipped_chunks += 1
+            hot_path_metrics.increment("whisper.skipped_chunks")
             return
 
+        audio_data = self.vad.voiced_audio(audio_data, segments)
+        self.vad_stats.sent_seconds += len(audio_data) / self.sample_rate
+
         # Run Transcription
         # mlx_whisper.transcribe supports numpy array directly
         try:
             # print(f"[DEBUG] Transcribing {len(audio_data)/self.sample_rate:.1f}s of audio...")
             
-            # Use global lock to prevent concurrency with Gemma
-            from .utils import mlx_lock
-            # print("[Whisper] Waiting for mlx_lock...")
-            with mlx_lock:
+            # Use the global arbiter to prevent concurrency with Gemma (OCR goes first, summaries wait)
+            from .utils import inference_arbiter, InferencePriority
+            # print("[Whisper] Waiting for inference arbiter...")
+            # 手放していれば読み込み直す (文字起こし中は手放さない)
+            # Timed including the arbiter wait and a model reload (both are also recorded separately)
+            with hot_path_metrics.timer("whisper.transcribe"), self.residency.use(), inference_arbiter.use(InferencePriority.TRANSCRIPTION):
                 # print("[Whisper] Lock acquired. Transcribing...")
                 result = mlx_whisper.transcribe(
                     audio_data, 
@@ -199,28 +366,108 @@ class WhisperAudioService:
                     verbose=False
                 )
                 # print("[Whisper] Transcription finished. Releasing lock...")
-            text = result["text"].strip()
-            
-            # 2. Post-processing / Hallucination Filter
-            if text and not self._is_hallucination(text):
-                print(f"[Whisper] {text}")
-                with self._lock:
-                    self._transcript_buffer.append(text)
-            elif text:
-                print(f"[Whisper Filtered] Hallucination/Noise detected: {text[:30]}...")
+            hot_path_metrics.increment("whisper.transcriptions")
+            self._accept_transcript(result["text"], span)
                     
         except Exception as e:
+            hot_path_metrics.increment("whisper.errors")
             print(f"Whisper Transcription Failed: {e}")
 
-    def get_transcript_chunk(self) -> str:
+    def _accept_transcript(self, text, span=None):
         """
-        Returns and clears the latest transcribed text.
+        Post-processing / Hallucination Filter, then hand the text to pop_transcript()
+        span: (start, end) wall-clock time of the audio the text was transcribed from
+        """
+        text = text.strip()
+        if not text:
+            return
+        match = self.hallucination_filter.check(text)
+        if match is None:
+            print(f"[Whisper] {text}")
+            now = time.time()
+            start, end = span if span else (now, now)
+            self._record_lag(now - end)
+            with self._lock:
+                self._transcript_buffer.append(TranscriptSegment(start, end, text))
+                if len(self._transcript_buffer) > self.max_pending_transcripts:
+                    self._shrink_transcript_buffer()
+        else:
+            hot_path_metrics.increment("whisper.filtered")
+            print(f"[Whisper Filtered] Hallucination/Noise detected ({match.rule}: {match.detail}): {text[:30]}...")
+
+    def _shrink_transcript_buffer(self):
+        # Called with self._lock held
+        if self.backpressure.policy == "drop_oldest":
+            self._transcript_buffer.pop(0)
+            self.dropped_transcripts += 1
+        else:
+            first, second = self._transcript_buffer[0], self._transcript_buffer[1]
+            self._transcript_buffer[:2] = [TranscriptSegment(first.start, second.end, f"{first.text} {second.text}")]
+            self.merged_transcripts += 1
+
+    def _record_lag(self, lag):
+        lag = max(0.0, lag)
+        hot_path_metrics.observe("whisper.lag", lag)
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self._lag_total += lag
+        self._lag_count += 1
+
+    def get_vad_stats(self) -> dict:
+        """
+        録音した秒数と、そのうち Whisper に送った秒数。
+        """
+        return self.vad_stats.to_dict()
+
+    def get_filter_stats(self) -> dict:
+        """
+        ハルシネーションとして捨てた文字起こしの数 (ルールごと)。
+        """
+        return dict(self.hallucination_filter.rule_counts)
+
+    def get_buffer_stats(self) -> dict:
+        """
+        録音バッファの状態。overruns / dropped_samples が増えていれば、文字起こしが録音に追いついていない。
+        """
+        stats = self.ring.get_stats()
+        backpressure = self.backpressure.get_stats()
+        stats["overrun_dropped_seconds"] = stats["dropped_samples"] / self.sample_rate
+        # Audio lost either way: ring overruns (newest) + the drop_oldest policy
+        stats["dropped_seconds"] = stats["overrun_dropped_seconds"] + backpressure.pop("dropped_seconds")
+        stats["device_overflows"] = self.device_overflows
+        stats["queue_depth_seconds"] = stats["available"] / self.sample_rate
+        stats["backpressure_policy"] = backpressure.pop("policy")
+        stats.update(backpressure)
+        with self._lock:
+            stats["pending_transcripts"] = len(self._transcript_buffer)
+        stats["dropped_transcripts"] = self.dropped_transcripts
+        stats["merged_transcripts"] = self.merged_transcripts
+        stats["lag_last_seconds"] = self.lag_last
+        stats["lag_avg_seconds"] = self._lag_total / self._lag_count if self._lag_count else 0.0
+        stats["lag_max_seconds"] = self.lag_max
+        return stats
+
+    def pop_transcript(self) -> Optional[TranscriptSegment]:
+        """
+        Returns and clears the pending transcripts as one segment
+        (start / end: wall-clock time of the first / last audio, time.time()). None if nothing is pending.
         """
         with self._lock:
             if not self._transcript_buffer:
-                return ""
-            
+                return None
+
             # Join all pending texts
-            full_text = " ".join(self._transcript_buffer)
+            pending = self._transcript_buffer
             self._transcript_buffer = [] # Clear consumed
-            return full_text
+        return TranscriptSegment(pending[0].start, pending[-1].end, " ".join(s.text for s in pending))
+
+    def has_pending_transcript(self) -> bool:
+        with self._lock:
+            return bool(self._transcript_buffer)
+
+    def get_transcript_chunk(self) -> str:
+        """
+        Returns and clears the latest transcribed text.
+        """
+        chunk = self.pop_transcript()
+        return chunk.text if chunk else ""
@@ -0,0 +1,55 @@
+import time
+import threading
+from typing import Optional, Any, List
+from ...domain.interfaces import LlmProvider
+
+
+class FakeLlmProvider(LlmProvider):
+    """
+    モデルを読み込まずに要約パイプラインを動かすための LLM。
+    呼び出しごとの固定コスト (プロンプトのエンコード・ロック取得など) と
+    プロンプトごとのコストを sleep で模擬し、呼び出し回数を数える。
+    ベンチマーク (チャンク/秒) やテストで使う。
+    """
+    def __init__(
+        self,
+        call_overhead_seconds: float = 0.5,
+        seconds_per_prompt: float = 1.0,
+        batch_efficiency: float = 0.5,
+        model_id: str = "fake-llm"
+    ):
+        """
+        Args:
+            call_overhead_seconds: 1回の呼び出し (バッチ含む) ごとにかかる固定時間
+            seconds_per_prompt: 1プロンプトを単独で生成する時間
+            batch_efficiency: バッチ時の1プロンプトあたりの時間の倍率 (0.5 なら半分)
+        """
+        self.call_overhead_seconds = call_overhead_seconds
+        self.seconds_per_prompt = seconds_per_prompt
+        self.batch_efficiency = batch_efficiency
+        self.model_id = model_id
+        self.calls = 0
+        self.prompts_processed = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, prompt: str) -> dict:
+        if '"visual"' in prompt and '"audio"' in prompt:
+            # 視覚・音声をまとめて要約するプロンプト
+            return {"visual": f"(fake visual summary of {len(prompt)} chars)", "audio": f"(fake audio summary of {len(prompt)} chars)"}
+        return {"summary": f"(fake summary of {len(prompt)} chars)"}
+
+    def process_content(self, prompt: str, static_prefix: Optional[str] = None) -> Optional[Any]:
+        with self._lock:
+            time.sleep(self.call_overhead_seconds + self.seconds_per_prompt)
+            self.calls += 1
+            self.prompts_processed += 1
+        return self._respond(prompt)
+
+    def process_batch(self, prompts: List[str], static_prefix: Optional[str] = None) -> List[Optional[Any]]:
+        if not prompts:
+            return []
+        with self._lock:
+            time.sleep(self.call_overhead_seconds + self.seconds_per_prompt * self.batch_efficiency * len(prompts))
+            self.calls += 1
+            self.prompts_processed += len(prompts)
+        return [self._respond(p) for p in prompts]
@@ -1,71 +1,425 @@
 import json
+import copy
+import time
 import logging
-from typing import Optional, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, Any, List, Dict, Tuple
+import mlx.core as mx
 from mlx_lm import load, generate
 from ...domain.interfaces import LlmProvider
+from ..ai.utils import inference_arbiter, InferencePriority
+from ..ai.residency import ModelResidencyManager, release_mlx_memory
+from .json_stream import JsonStopDetector
+
+# batch_generate は新しめの mlx-lm にのみある。なければ1件ずつ生成する
+try:
+    from mlx_lm import batch_generate
+except ImportError:
+    batch_generate = None
+
+# 1ステップずつ進められるバッチ生成 (区切りごとに推論の順番を譲れる)。なければ batch_generate を使う
+try:
+    from mlx_lm.generate import BatchGenerator
+except ImportError:
+    BatchGenerator = None
+
+# ストリーミング生成 (JSON が閉じた時点で打ち切る)。なければ max_tokens まで一括で生成する
+try:
+    from mlx_lm import stream_generate
+except ImportError:
+    stream_generate = None
+
+# プロンプトの先頭部分の KV キャッシュ。古い mlx-lm にはないので、その場合は毎回全体を処理する
+try:
+    from mlx_lm.models.cache import make_prompt_cache
+except ImportError:
+    make_prompt_cache = None
 
 # Set up logging for MLX (it can be chatty)
 logging.getLogger("mlx_lm").setLevel(logging.INFO)
+sys_logger = logging.getLogger("system_summarizer")
 
 class GemmaLlmProvider(LlmProvider):
     # Default model ID matching the download script
     DEFAULT_MODEL = "mlx-community/gemma-2-2b-it-4bit"
+    MAX_TOKENS = 2048 # Lowered from 4096 to prevent runaway
+    MAX_PREFIX_CACHES = 4 # テンプレート (要約の種類) ごとに1つ
+    STOP_JSON_KEYS = ("summary", "visual", "audio") # これらのキーを持つ JSON オブジェクトが閉じたら生成を打ち切る
+    SLICE_TOKENS = 32 # この数のトークンを生成するごとに、優先度の高い推論 (OCR / 文字起こし) に順番を譲る
 
-    def __init__(self, model_id: str = None):
+    def __init__(
+        self,
+        model_id: str = None,
+        slice_tokens: Optional[int] = SLICE_TOKENS,
+        lazy_load: bool = True,
+        idle_unload_seconds: Optional[float] = None
+    ):
+        """
+        Args:
+            slice_tokens: 生成をこのトークン数ごとに区切り、待っている OCR / 文字起こしがあれば
+                          KV キャッシュを保ったまま一度 inference_arbiter を手放す。None なら区切らない。
+            lazy_load: True なら最初の生成まで読み込まない (False ならここで読み込み、失敗すると例外)
+            idle_unload_seconds: この秒数生成しなければモデルを手放す (residency.start_monitoring() で監視)。None なら常駐
+        """
         self.model_id = model_id or self.DEFAULT_MODEL
+        self.slice_tokens = slice_tokens
+        self.model = None
+        self.tokenizer = None # 一度読み込んだら、モデルを手放しても残す (トークン数の計算に使う)
+        self.residency = ModelResidencyManager(
+            f"Gemma ({self.model_id})",
+            loader=self._load_model,
+            unloader=self._unload_model,
+            idle_unload_seconds=idle_unload_seconds
+        )
+
+        # 静的プレフィックスのトークン列 -> (prefill 済みの KV キャッシュ, prefill にかかった秒数)
+        self._prefix_caches: "OrderedDict[Tuple[int, ...], Tuple[Any, float]]" = OrderedDict()
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "prefix_cache_builds": 0,
+            "prefix_cache_hits": 0,
+            "prefix_tokens_reused": 0,
+            "prefill_seconds_saved": 0.0,
+            "streamed_calls": 0,
+            "early_stops": 0,
+            "tokens_generated": 0,
+            "tokens_saved": 0, # 打ち切らなければ max_tokens まで生成し得た残り (上限の見積もり)
+            "time_to_result_seconds": 0.0, # 呼び出しから結果が揃うまでの合計時間
+            "last_time_to_result_seconds": 0.0,
+            "yields": 0, # 生成を中断して順番を譲った回数
+            "yielded_seconds": 0.0 # 譲っている間 (他の推論の実行中) に待った合計時間
+        }
+        if not lazy_load:
+            with self.residency.use():
+                pass
+
+    def _load_model(self) -> Any:
         print(f"Loading local model: {self.model_id}...")
         try:
-            self.model, self.tokenizer = load(self.model_id)
+            # 重みの読み込みも MLX の処理なので、OCR / 文字起こしと同時に走らせない
+            with inference_arbiter.use(InferencePriority.SUMMARIZATION):
+                self.model, self.tokenizer = load(self.model_id)
             print("Model loaded successfully.")
         except Exception as e:
             print(f"Failed to load model {self.model_id}: {e}")
             raise
+        return self.model
 
-    def process_content(self, prompt: str) -> Optional[Any]:
+    def _unload_model(self, model: Any):
+        # プレフィックスの KV キャッシュもモデルと一緒に手放す (監視スレッドから呼ばれるので、MLX のキャッシュ解放も順番を待つ)
+        with inference_arbiter.use(InferencePriority.SUMMARIZATION):
+            self.model = None
+            self._prefix_caches.clear()
+            release_mlx_memory()
+
+    def _format_prompt(self, prompt: str) -> str:
+        messages = [{"role": "user", "content": prompt}]
+        if hasattr(self.tokenizer, "apply_chat_template") and self.tokenizer.chat_template:
+            return self.tokenizer.apply_chat_template(
+                messages,
+                tokenize=False,
+                add_generation_prompt=True
+            )
+        return f"User: {prompt}\n\nModel:"
+
+    def _encode(self, formatted_prompt: str) -> List[int]:
+        # チャットテンプレートが既に BOS を付けている場合は二重に付けない (mlx_lm.generate と同じ扱い)
+        bos = getattr(self.tokenizer, "bos_token", None)
+        add_special_tokens = bos is None or not formatted_prompt.startswith(bos)
+        return self.tokenizer.encode(formatted_prompt, add_special_tokens=add_special_tokens)
+
+    def count_tokens(self, text: str) -> int:
+        if self.tokenizer is None:
+            return super().count_tokens(text) # まだ読み込んでいない (トークン数のためだけには読み込まない)
         try:
-            messages = [{"role": "user", "content": prompt}]
-            if hasattr(self.tokenizer, "apply_chat_template") and self.tokenizer.chat_template:
-                formatted_prompt = self.tokenizer.apply_chat_template(
-                    messages,
-                    tokenize=False,
-                    add_generation_prompt=True
-                )
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        except Exception:
+            return super().count_tokens(text)
+
+    def _prefixed_prompt(self, formatted_prompt: str, static_prefix: Optional[str]) -> Tuple[Any, Optional[Any]]:
+        """
+        静的プレフィックスの KV キャッシュが使えれば (残りのトークン列, キャッシュのコピー) を返す。
+        使えなければ (formatted_prompt, None)。inference_arbiter を保持した状態で呼ぶこと。
+        """
+        if not static_prefix or make_prompt_cache is None:
+            return formatted_prompt, None
+        idx = formatted_prompt.find(static_prefix)
+        if idx == -1:
+            return formatted_prompt, None
+
+        try:
+            tokens = self._encode(formatted_prompt)
+            prefix_tokens = self._encode(formatted_prompt[:idx + len(static_prefix)])
+            # 境界のトークンは後続の文字とまとめてトークン化されることがあるので、一致する部分だけを使い、最後の1つは残す
+            common = 0
+            for a, b in zip(tokens, prefix_tokens):
+                if a != b:
+                    break
+                common += 1
+            common = min(common, len(prefix_tokens) - 1, len(tokens) - 1)
+            if common <= 0:
+                return formatted_prompt, None
+            key = tuple(tokens[:common])
+
+            cached = self._prefix_caches.get(key)
+            if cached is None:
+                started = time.perf_counter()
+                prompt_cache = make_prompt_cache(self.model)
+                self.model(mx.array(key)[None], cache=prompt_cache)
+                mx.eval([c.state for c in prompt_cache])
+                cached = (prompt_cache, time.perf_counter() - started)
+                self._prefix_caches[key] = cached
+                while len(self._prefix_caches) > self.MAX_PREFIX_CACHES:
+                    self._prefix_caches.popitem(last=False)
+                with self._stats_lock:
+                    self.stats["prefix_cache_builds"] += 1
+                sys_logger.debug(f"[LLM] Cached prompt prefix ({common} tokens, prefill {cached[1]:.2f}s)")
             else:
-                formatted_prompt = f"User: {prompt}\n\nModel:"
-
-            # Use global lock to prevent concurrency with Whisper
-            from ..ai.utils import mlx_lock
-            print(f"[LLM] Waiting for lock...")
-            with mlx_lock:
-                print(f"[LLM] Lock acquired. Generating...")
-                response_text = generate(
+                self._prefix_caches.move_to_end(key)
+                with self._stats_lock:
+                    self.stats["prefix_cache_hits"] += 1
+                    self.stats["prefix_tokens_reused"] += common
+                    self.stats["prefill_seconds_saved"] += cached[1]
+                sys_logger.debug(f"[LLM] Reused cached prompt prefix ({common} tokens, saved ~{cached[1]:.2f}s prefill)")
+
+            # 生成でキャッシュが伸びるので、prefill 済みの状態はコピーして使う
+            return tokens[common:], copy.deepcopy(cached[0])
+        except Exception as e:
+            print(f"[LLM] Prompt prefix cache unavailable, processing the full prompt: {e}")
+            return formatted_prompt, None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _generate(self, formatted_prompt: str, static_prefix: Optional[str]) -> str:
+        prompt, prompt_cache = self._prefixed_prompt(formatted_prompt, static_prefix)
+        kwargs = {"prompt_cache": prompt_cache} if prompt_cache is not None else {}
+        if stream_generate is not None:
+            return self._stream_until_json(prompt, kwargs)
+        return generate(
+            self.model,
+            self.tokenizer,
+            prompt=prompt,
+            max_tokens=self.MAX_TOKENS,
+            verbose=False,
+            **kwargs
+        )
+
+    def _stream_until_json(self, prompt: Any, kwargs: Dict[str, Any]) -> str:
+        """
+        1トークンずつ生成し、STOP_JSON_KEYS のどれかを持つ JSON オブジェクトが閉じた時点で打ち切る。
+        閉じた後に続く余計な出力のために inference_arbiter を持ち続けないようにする。
+        """
+        started = time.perf_counter()
+        detector = JsonStopDetector(required_key=self.STOP_JSON_KEYS)
+        tokens = 0
+        for response in stream_generate(
+            self.model,
+            self.tokenizer,
+            prompt,
+            max_tokens=self.MAX_TOKENS,
+            **kwargs
+        ):
+            tokens += 1
+            if detector.feed(response.text):
+                break
+            self._yield_between_slices(tokens)
+        elapsed = time.perf_counter() - started
+
+        with self._stats_lock:
+            self.stats["streamed_calls"] += 1
+            self.stats["tokens_generated"] += tokens
+            self.stats["time_to_result_seconds"] += elapsed
+            self.stats["last_time_to_result_seconds"] = elapsed
+            if detector.done:
+                self.stats["early_stops"] += 1
+                self.stats["tokens_saved"] += max(0, self.MAX_TOKENS - tokens)
+        if detector.done:
+            sys_logger.debug(f"[LLM] JSON complete after {tokens} tokens ({elapsed:.2f}s). Stopped early.")
+            return detector.text[:detector.end_index]
+        return detector.text
+
+    def _yield_between_slices(self, steps: int):
+        """
+        slice_tokens ステップごとに、待っている優先度の高い推論があれば順番を譲る。
+        生成の途中状態 (KV キャッシュ) はジェネレータが保持しているので、取り直した後にそのまま続きを生成できる。
+        inference_arbiter を保持した状態で呼ぶこと。
+        """
+        if not self.slice_tokens or steps % self.slice_tokens:
+            return
+        if not inference_arbiter.has_waiters(above=InferencePriority.SUMMARIZATION):
+            return
+        # 投げてある GPU の計算を終わらせてから手放す
+        synchronize = getattr(mx, "synchronize", None)
+        if synchronize is not None:
+            synchronize()
+        started = time.perf_counter()
+        if inference_arbiter.yield_to_higher(InferencePriority.SUMMARIZATION):
+            with self._stats_lock:
+                self.stats["yields"] += 1
+                self.stats["yielded_seconds"] += time.perf_counter() - started
+
+    def _generate_batch(self, formatted_prompts: List[str], static_prefix: Optional[str]) -> List[str]:
+        """
+        複数のプロンプトを同時に生成する。
+        BatchGenerator があれば1ステップずつ進め、区切りごとに順番を譲り、JSON が閉じたプロンプトから打ち切る。
+        なければ batch_generate (途中で譲れない)、それもなければ1件ずつ生成する。
+        """
+        token_prompts = [self._encode(p) for p in formatted_prompts]
+        if BatchGenerator is not None:
+            try:
+                return self._batch_generate_sliced(token_prompts)
+            except Exception as e:
+                print(f"[LLM] Sliced batch generation failed, falling back: {e}")
+        if batch_generate is not None:
+            try:
+                response = batch_generate(
                     self.model,
                     self.tokenizer,
-                    prompt=formatted_prompt,
-                    max_tokens=2048, # Lowered from 4096 to prevent runaway
+                    token_prompts,
+                    max_tokens=self.MAX_TOKENS,
                     verbose=False
                 )
-                print(f"[LLM] Generation finished. Releasing lock...")
-
-            # Clean up response (Markdown code blocks)
-            cleaned_text = response_text.strip()
-            
-            # Try to find a JSON block within the response
-            # Some models wrap JSON in code blocks, others add commentary
-            json_start = cleaned_text.find('{')
-            json_end = cleaned_text.rfind('}')
-            
-            if json_start != -1 and json_end != -1 and json_end > json_start:
-                potential_json = cleaned_text[json_start:json_end+1]
-                try:
-                    return json.loads(potential_json)
-                except json.JSONDecodeError:
-                    # If extraction failed, fall back to literal or whole text
-                    pass
-            
-            # If no JSON object found, return as string
-            return cleaned_text
+                return list(response.texts)
+            except Exception as e:
+                print(f"[LLM] batch_generate failed, generating one by one: {e}")
+        texts = []
+        for p in formatted_prompts:
+            texts.append(self._generate(p, static_prefix))
+            # プロンプトの合間にも順番を譲る
+            self._yield_between_slices(self.slice_tokens or 1)
+        return texts
+
+    def _batch_generate_sliced(self, token_prompts: List[List[int]]) -> List[str]:
+        started = time.perf_counter()
+        gen = BatchGenerator(self.model, stop_tokens=set(self.tokenizer.eos_token_ids), max_tokens=self.MAX_TOKENS)
+        uids = gen.insert(token_prompts)
+        tokens: Dict[int, List[int]] = {uid: [] for uid in uids}
+        detectors = {uid: JsonStopDetector(required_key=self.STOP_JSON_KEYS) for uid in uids}
+        fed = {uid: 0 for uid in uids} # detector に渡し済みの文字数
+        finished = set()
+        steps = 0
+        check_every = self.slice_tokens or 32
+
+        while len(finished) < len(uids):
+            responses = gen.next()
+            if not responses:
+                break
+            for r in responses:
+                if r.uid in finished:
+                    continue
+                if r.finish_reason != "stop":
+                    tokens[r.uid].append(r.token)
+                if r.finish_reason is not None:
+                    finished.add(r.uid)
+            steps += 1
+
+            if steps % check_every == 0:
+                # JSON が閉じたプロンプトは打ち切る
+                done = []
+                for uid in uids:
+                    if uid in finished:
+                        continue
+                    text = self.tokenizer.decode(tokens[uid])
+                    if text.endswith("\ufffd"):
+                        continue # マルチバイト文字の途中
+                    if detectors[uid].feed(text[fed[uid]:]):
+                        done.append(uid)
+                    fed[uid] = len(text)
+                if done:
+                    finished.update(done)
+                    remove = getattr(gen, "remove", None)
+                    if remove is not None:
+                        remove(done)
+                self._yield_between_slices(steps)
+
+        close = getattr(gen, "close", None)
+        if close is not None:
+            close()
+
+        texts = []
+        early_stops = 0
+        for uid in uids:
+            detector = detectors[uid]
+            if detector.done:
+                early_stops += 1
+                texts.append(detector.text[:detector.end_index])
+            else:
+                texts.append(self.tokenizer.decode(tokens[uid]))
+        elapsed = time.perf_counter() - started
+        generated = sum(len(t) for t in tokens.values())
+        with self._stats_lock:
+            self.stats["streamed_calls"] += len(uids)
+            self.stats["early_stops"] += early_stops
+            self.stats["tokens_generated"] += generated
+            self.stats["tokens_saved"] += sum(
+                max(0, self.MAX_TOKENS - len(tokens[uid])) for uid in uids if detectors[uid].done
+            )
+            self.stats["time_to_result_seconds"] += elapsed * len(uids)
+            self.stats["last_time_to_result_seconds"] = elapsed
+        return texts
+
+    def _parse_response(self, response_text: str) -> Any:
+        # Clean up response (Markdown code blocks)
+        cleaned_text = response_text.strip()
+
+        # Try to find a JSON block within the response
+        # Some models wrap JSON in code blocks, others add commentary
+        json_start = cleaned_text.find('{')
+        json_end = cleaned_text.rfind('}')
+
+        if json_start != -1 and json_end != -1 and json_end > json_start:
+            potential_json = cleaned_text[json_start:json_end+1]
+            try:
+                return json.loads(potential_json)
+            except json.JSONDecodeError:
+                # If extraction failed, fall back to literal or whole text
+                pass
+
+        # If no JSON object found, return as string
+        return cleaned_text
+
+    def process_content(self, prompt: str, static_prefix: Optional[str] = None) -> Optional[Any]:
+        try:
+            # 読み込まれていなければここで読み込む (生成中は手放さない)
+            with self.residency.use():
+                formatted_prompt = self._format_prompt(prompt)
+
+                # Use the global arbiter to prevent concurrency with Whisper / OCR (summaries have the lowest priority)
+                print(f"[LLM] Waiting for lock...")
+                with inference_arbiter.use(InferencePriority.SUMMARIZATION):
+                    print(f"[LLM] Lock acquired. Generating...")
+                    response_text = self._generate(formatted_prompt, static_prefix)
+                    print(f"[LLM] Generation finished. Releasing lock...")
+
+            return self._parse_response(response_text)
 
         except Exception as e:
             print(f"Gemma inference error: {e}")
             return None
+
+    def process_batch(self, prompts: List[str], static_prefix: Optional[str] = None) -> List[Optional[Any]]:
+        """
+        複数のプロンプトを1回のロック取得でまとめて生成する (生成の区切りごとに優先度の高い推論には順番を譲る)。
+        mlx-lm に BatchGenerator / batch_generate があれば1つのバッチとして同時に生成し、なければ順番に生成する
+        (順番に生成する場合は静的プレフィックスの KV キャッシュを使い回す)。
+        """
+        if not prompts:
+            return []
+        try:
+            with self.residency.use():
+                formatted_prompts = [self._format_prompt(p) for p in prompts]
+
+                print(f"[LLM] Waiting for lock (batch of {len(prompts)})...")
+                with inference_arbiter.use(InferencePriority.SUMMARIZATION):
+                    print(f"[LLM] Lock acquired. Generating batch...")
+                    texts = self._generate_batch(formatted_prompts, static_prefix)
+                    print(f"[LLM] Batch generation finished. Releasing lock...")
+
+            return [self._parse_response(text) for text in texts]
+
+        except Exception as e:
+            print(f"Gemma batch inference error: {e}")
+            return [None] * len(prompts)
@@ -0,0 +1,82 @@
+import json
+from typing import Any, Dict, Optional, Tuple, Union
+
+
+class JsonStopDetector:
+    """
+    ストリーミング生成の出力を少しずつ受け取り、必要なキーを持つ JSON オブジェクトが
+    閉じた時点を検出する。検出したら生成を打ち切ってよい。
+
+    文字列リテラル内の括弧やエスケープは数えない。括弧が釣り合っても JSON として読めない、
+    または required_key を含まない場合は、その次の '{' から探し直す。
+    required_key にタプルを渡すと、そのどれかを含めばよい。
+    """
+    def __init__(self, required_key: Union[str, Tuple[str, ...], None] = "summary"):
+        self.required_key = (required_key,) if isinstance(required_key, str) else required_key
+        self.text = ""
+        self.result: Optional[Dict[str, Any]] = None
+        self.end_index: Optional[int] = None # 検出したオブジェクトの '}' の直後の位置
+        self._pos = 0 # 次に調べる文字の位置
+        self._start: Optional[int] = None # 調べているオブジェクトの '{' の位置
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, piece: str) -> bool:
+        """
+        生成されたテキストの続きを渡す。条件を満たす JSON オブジェクトが完成したら True。
+        """
+        if self.done:
+            return True
+        self.text += piece
+        while self._pos < len(self.text):
+            ch = self.text[self._pos]
+            self._pos += 1
+
+            if self._start is None:
+                if ch == "{":
+                    self._start = self._pos - 1
+                    self._depth = 1
+                    self._in_string = False
+                    self._escape = False
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    if self._accept(self.text[self._start:self._pos]):
+                        self.end_index = self._pos
+                        return True
+                    # 条件を満たさないので、このオブジェクトの中の次の '{' から探し直す
+                    self._pos = self._start + 1
+                    self._start = None
+        return False
+
+    def _accept(self, candidate: str) -> bool:
+        try:
+            obj = json.loads(candidate)
+        except json.JSONDecodeError:
+            return False
+        if not isinstance(obj, dict):
+            return False
+        if self.required_key is not None and not any(key in obj for key in self.required_key):
+            return False
+        self.result = obj
+        return True
@@ -0,0 +1,59 @@
+import time
+import threading
+from typing import Dict
+
+import numpy as np
+
+from ...application.interfaces import ScreenCaptureInterface, OcrInterface, WindowInfoInterface
+
+
+class FakeScreenCapturer(ScreenCaptureInterface):
+    """
+    Quartz を使わずに画面キャプチャを模擬する。change_every フレームごとに画面が変わる。
+    capture_seconds / resize_seconds の処理時間を sleep で模擬する (ベンチマーク・テスト用)。
+    """
+    def __init__(self, capture_seconds: float = 0.0, resize_seconds: float = 0.0, change_every: int = 1):
+        self.capture_seconds = capture_seconds
+        self.resize_seconds = resize_seconds
+        self.change_every = max(1, change_every)
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def capture_screen(self):
+        if self.capture_seconds:
+            time.sleep(self.capture_seconds)
+        with self._lock:
+            frame = self.frames
+            self.frames += 1
+        # 画像の代わりに「何番目の画面か」を返す
+        return frame // self.change_every
+
+    def resize_for_comparison(self, image_ref, target_size=(100, 100)) -> np.ndarray:
+        if self.resize_seconds:
+            time.sleep(self.resize_seconds)
+        # 画面ごとに大きく異なる値で塗りつぶした画像
+        return np.full((target_size[1], target_size[0], 4), (image_ref * 97) % 256, dtype=np.uint8)
+
+
+class FakeOcrService(OcrInterface):
+    """Vision を使わずに OCR を模擬する。画面ごとに異なるテキストを返す"""
+    def __init__(self, ocr_seconds: float = 0.0):
+        self.ocr_seconds = ocr_seconds
+        self.calls = 0
+
+    def extract_text(self, image_ref) -> str:
+        if self.ocr_seconds:
+            time.sleep(self.ocr_seconds)
+        self.calls += 1
+        return f"screen {image_ref}: " + " ".join(f"word{image_ref * 7 + i}" for i in range(20))
+
+
+class FakeWindowInfoService(WindowInfoInterface):
+    """Accessibility API を使わずにアクティブウィンドウを模擬する"""
+    def __init__(self, lookup_seconds: float = 0.0):
+        self.lookup_seconds = lookup_seconds
+
+    def get_active_window_title(self) -> Dict[str, str]:
+        if self.lookup_seconds:
+            time.sleep(self.lookup_seconds)
+        return {"app": "FakeApp", "title": "Fake Window"}
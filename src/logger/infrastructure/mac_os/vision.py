@@ -32,10 +32,10 @@ class OcrService:
         )
         
         # リクエスト実行 (同期処理)
-        # MLX(GPU)との競合を避けるため、一応ロックを取る
+        # MLX(GPU)との競合を避けるため、一応ロックを取る (OCR は最優先で順番が回ってくる)
         try:
-            from ..ai.utils import mlx_lock
-            with mlx_lock:
+            from ..ai.utils import inference_arbiter, InferencePriority
+            with inference_arbiter.use(InferencePriority.OCR):
                 success, error = handler.performRequests_error_([self.request], None)
         except ImportError:
             # Fallback if utils not available in this context
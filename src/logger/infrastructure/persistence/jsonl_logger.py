@@ -1,8 +1,11 @@
 import json
 import os
 from datetime import datetime
+from typing import Optional, Tuple
 from ...application.interfaces import PersistenceInterface
+from ...application.metrics import hot_path_metrics
 from ...domain.entities import LogEntry
+from .log_files import ARCHIVE_SUFFIX, append_jsonl
 
 class JsonlLogger(PersistenceInterface):
     """JSONL形式でローカルファイルに追記するロガー"""
@@ -18,12 +21,27 @@ class JsonlLogger(PersistenceInterface):
         os.makedirs(date_dir, exist_ok=True)
         return os.path.join(date_dir, "activity.jsonl")
 
-    def save(self, entry: LogEntry):
+    def save(self, entry: LogEntry) -> Optional[Tuple[int, int]]:
+        """
+        1行追記し、書き込んだ行の (先頭, 末尾) のバイトオフセットを返す。
+        圧縮済みの過去の日 (録音ファイルの文字起こしなど) は .gz に追記し、位置は返さない。
+        """
         filepath = self._get_log_filepath(entry.timestamp)
         data = entry.to_dict()
+
+        if not os.path.exists(filepath) and os.path.exists(filepath + ARCHIVE_SUFFIX):
+            # 非圧縮ファイルを新しく作ると .gz が隠れてしまうので、gzip のメンバーとして追記する
+            append_jsonl(filepath, data)
+            return None
         
         # datetime needs serialization helper if not isoformatted in to_dict
         # LogEntry.to_dict() already does isoformat() for timestamp
+        line = (json.dumps(data, ensure_ascii=False) + "\n").encode("utf-8")
         
-        with open(filepath, "a", encoding="utf-8") as f:
-            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        # 追記モードのバイナリで開くと tell() が書き込み位置 (ファイル末尾) を指す
+        with open(filepath, "ab") as f:
+            start = f.tell()
+            f.write(line)
+            end = f.tell()
+        hot_path_metrics.increment("persist.bytes_written", end - start)
+        return start, end
@@ -0,0 +1,137 @@
+import gzip
+import json
+import os
+from typing import Any, Dict, IO, Iterator, List, Optional, Tuple
+
+# 圧縮済み (コンパクション後) の日別ファイルに付く拡張子
+ARCHIVE_SUFFIX = ".gz"
+
+
+def resolve_log_path(path: str) -> Optional[str]:
+    """
+    ログファイルの実体パスを返す。
+    非圧縮ファイルがあればそれを、なければ圧縮済み (.gz) を返す。どちらもなければ None。
+    """
+    if os.path.exists(path):
+        return path
+    archived = path + ARCHIVE_SUFFIX
+    if os.path.exists(archived):
+        return archived
+    return None
+
+
+def open_log(path: str, mode: str = "rt") -> IO:
+    """
+    resolve_log_path() で解決済みのパスを開く。.gz なら gzip として透過的に開く。
+    """
+    if path.endswith(ARCHIVE_SUFFIX):
+        if "t" in mode:
+            return gzip.open(path, mode, encoding="utf-8")
+        return gzip.open(path, mode)
+    if "b" in mode:
+        return open(path, mode)
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    JSONL ファイル (圧縮/非圧縮どちらでも可) を1行ずつ辞書として返す。壊れた行は読み飛ばす。
+    """
+    resolved = resolve_log_path(path)
+    if resolved is None:
+        return
+    with open_log(resolved, "rt") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def append_jsonl(path: str, data: Dict[str, Any]):
+    """
+    JSONL に1行追記する。
+    既に圧縮済みの日であれば、gzip のメンバーとして追記する (読み出し時は連結される)。
+    """
+    line = json.dumps(data, ensure_ascii=False) + "\n"
+    archived = path + ARCHIVE_SUFFIX
+    if not os.path.exists(path) and os.path.exists(archived):
+        with gzip.open(archived, "at", encoding="utf-8") as f:
+            f.write(line)
+    else:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def write_json_atomic(path: str, data: Any):
+    """
+    一時ファイルに書き出してから os.replace で差し替える。書き込み途中でクラッシュしても壊れない。
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_jsonl_atomic(path: str, rows: List[Dict[str, Any]]):
+    """
+    JSONL ファイル全体をアトミックに書き直す (追記ではなく毎回作り直す集計結果用)。
+    圧縮済みの古いファイル (.gz) があれば、内容が二重にならないよう削除する。
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    archived = path + ARCHIVE_SUFFIX
+    if os.path.exists(archived):
+        os.remove(archived)
+
+
+def stat_identity(path: str) -> Tuple[int, int]:
+    """
+    ファイルの (inode, サイズ) を返す。追記・差し替え・切り詰めの検出に使う。
+    """
+    st = os.stat(path)
+    return st.st_ino, st.st_size
+
+
+def read_appended_entries(path: str, offset: int) -> Tuple[List[Tuple[Dict[str, Any], int]], int]:
+    """
+    offset (非圧縮時のバイト位置) 以降に追記された完結済みの行だけを読む。
+
+    書き込み途中 (改行で終わっていない) の末尾行は読まずに残し、次回に回す。
+
+    Returns:
+        ([(entry, 行末のバイトオフセット), ...], 読み終えた位置のバイトオフセット)
+    """
+    entries: List[Tuple[Dict[str, Any], int]] = []
+    position = offset
+    with open_log(path, "rb") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break # 書き込み途中
+            position += len(line)
+            try:
+                entries.append((json.loads(line), position))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+    return entries, position
+
+
+def offset_after_lines(path: str, line_count: int) -> int:
+    """
+    先頭から line_count 行を読み飛ばした位置のバイトオフセットを返す (行数ベースの旧状態の移行用)。
+    """
+    position = 0
+    with open_log(path, "rb") as f:
+        for i, line in enumerate(f):
+            if i >= line_count or not line.endswith(b"\n"):
+                break
+            position += len(line)
+    return position
@@ -0,0 +1,85 @@
+import os
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from .log_files import resolve_log_path
+from .log_watcher import LogDirectoryWatcher
+
+
+class LogDirectoryScanner:
+    """
+    日付ディレクトリの activity.jsonl の (サイズ, mtime) を覚えておき、
+    前回のスキャンから変化した日だけを返す。
+
+    watcher が動いていれば、変更通知のあった日だけを stat する。
+    動いていなければ (watchdog 未導入など)、封印されていない全ての日を stat してポーリングする。
+    """
+    def __init__(self, logs_root_dir: str, watcher: Optional[LogDirectoryWatcher] = None):
+        self.logs_root_dir = logs_root_dir
+        self.watcher = watcher
+        self._fingerprints: Dict[str, Tuple[str, int, int]] = {}
+        self._root_mtime: Optional[int] = None
+        self._days: List[str] = []
+
+    def list_days(self) -> List[str]:
+        """
+        日付ディレクトリの一覧。logs ルートの mtime が変わったときだけ listdir し直す。
+        """
+        try:
+            root_mtime = os.stat(self.logs_root_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if root_mtime != self._root_mtime:
+            days = []
+            for d in sorted(os.listdir(self.logs_root_dir)):
+                if not os.path.isdir(os.path.join(self.logs_root_dir, d)):
+                    continue
+                try:
+                    datetime.strptime(d, '%Y-%m-%d')
+                except ValueError:
+                    continue
+                days.append(d)
+            self._days = days
+            self._root_mtime = root_mtime
+        return self._days
+
+    def fingerprint(self, date_str: str) -> Optional[Tuple[str, int, int]]:
+        path = resolve_log_path(os.path.join(self.logs_root_dir, date_str, "activity.jsonl"))
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return path, st.st_size, st.st_mtime_ns
+
+    def changed_days(self, sealed: Set[str] = frozenset()) -> List[str]:
+        """
+        前回から activity.jsonl が変化した (または初めて見る) 日付を返す。封印済みの日は対象外。
+        """
+        days = self.list_days()
+        candidates = [d for d in days if d not in sealed]
+
+        if self.watcher is not None and self.watcher.is_running:
+            notified = self.watcher.drain_changed_days()
+            # 通知があった日と、まだ一度も見ていない日だけを stat する
+            candidates = [d for d in candidates if d in notified or d not in self._fingerprints]
+
+        changed = []
+        for date_str in candidates:
+            fp = self.fingerprint(date_str)
+            if fp is None:
+                continue
+            if self._fingerprints.get(date_str) != fp:
+                self._fingerprints[date_str] = fp
+                changed.append(date_str)
+        return changed
+
+    def forget(self, date_str: Optional[str] = None):
+        """
+        記憶している指紋を捨て、次回のスキャンで再度変化ありとして扱わせる。
+        """
+        if date_str is None:
+            self._fingerprints.clear()
+        else:
+            self._fingerprints.pop(date_str, None)
@@ -0,0 +1,95 @@
+import os
+import logging
+import threading
+from datetime import datetime
+from typing import Set
+
+# watchdog があれば inotify/FSEvents で変更を受け取る。なければ stat ポーリングにフォールバックする
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+sys_logger = logging.getLogger("system_summarizer")
+
+
+class _DayChangeHandler(FileSystemEventHandler):
+    def __init__(self, watcher: "LogDirectoryWatcher"):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        for path in paths:
+            if path:
+                self.watcher._record(path)
+
+
+class LogDirectoryWatcher:
+    """
+    logs ディレクトリ配下の変更を監視し、変更のあった日付ディレクトリ名を記録する。
+    watchdog がインストールされていない環境では available が False になり、何もしない。
+    """
+    def __init__(self, logs_root_dir: str):
+        self.logs_root_dir = os.path.abspath(logs_root_dir)
+        self._changed: Set[str] = set()
+        self._lock = threading.Lock()
+        self._event = threading.Event()
+        self._observer = None
+
+    @property
+    def available(self) -> bool:
+        return Observer is not None
+
+    @property
+    def is_running(self) -> bool:
+        return self._observer is not None
+
+    def start(self) -> bool:
+        """
+        監視を開始する。開始できた場合 True。
+        """
+        if not self.available or self._observer is not None:
+            return self._observer is not None
+        try:
+            observer = Observer()
+            observer.schedule(_DayChangeHandler(self), self.logs_root_dir, recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+        except Exception as e:
+            sys_logger.warning(f"Failed to start log directory watcher, falling back to stat polling: {e}")
+            self._observer = None
+        return self._observer is not None
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        self._event.set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        変更があるか timeout 秒経過するまで待つ。変更があった場合 True。
+        """
+        changed = self._event.wait(timeout)
+        self._event.clear()
+        return changed
+
+    def drain_changed_days(self) -> Set[str]:
+        with self._lock:
+            changed, self._changed = self._changed, set()
+        return changed
+
+    def _record(self, path: str):
+        rel = os.path.relpath(os.path.abspath(path), self.logs_root_dir)
+        day = rel.split(os.sep, 1)[0]
+        try:
+            datetime.strptime(day, '%Y-%m-%d')
+        except ValueError:
+            return
+        with self._lock:
+            self._changed.add(day)
+        self._event.set()
@@ -0,0 +1,87 @@
+import os
+import re
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# src/logger/resources/prompts
+DEFAULT_PROMPTS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "resources", "prompts"
+)
+
+_PLACEHOLDER = re.compile(r"\{(start_time|end_time|log_text)\}")
+
+
+@dataclass
+class PromptTemplate:
+    """
+    読み込み済みのプロンプトテンプレート。
+    最初のプレースホルダより前の部分 (static_prefix) は呼び出しごとに変わらないので、
+    LLM 側でその部分の KV キャッシュを使い回せる。
+    """
+    name: str
+    mtime_ns: int
+    version: str # 内容のハッシュ。テンプレートを書き換えると変わる (要約キャッシュのキーに使う)
+    static_prefix: str
+    segments: List[Tuple[bool, str]] # (プレースホルダか, 文字列 or 変数名)
+
+    def render(self, **values: str) -> str:
+        parts = [self.static_prefix]
+        for is_field, text in self.segments:
+            parts.append(values.get(text, "") if is_field else text)
+        return "".join(parts)
+
+
+def compile_template(name: str, content: str, mtime_ns: int = 0) -> PromptTemplate:
+    segments: List[Tuple[bool, str]] = []
+    pos = 0
+    for match in _PLACEHOLDER.finditer(content):
+        if match.start() > pos:
+            segments.append((False, content[pos:match.start()]))
+        segments.append((True, match.group(1)))
+        pos = match.end()
+    if pos < len(content):
+        segments.append((False, content[pos:]))
+
+    static_prefix = ""
+    if segments and not segments[0][0]:
+        static_prefix = segments.pop(0)[1]
+    version = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    return PromptTemplate(name=name, mtime_ns=mtime_ns, version=version, static_prefix=static_prefix, segments=segments)
+
+
+class PromptTemplateCache:
+    """
+    resources/prompts/*.txt を1回だけ読み込んでコンパイルしておく。
+    ファイルの mtime が変わっていれば次の get() で読み直す (ホットリロード)。
+    """
+    def __init__(self, prompts_dir: str = DEFAULT_PROMPTS_DIR):
+        self.prompts_dir = prompts_dir
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> PromptTemplate:
+        """
+        Raises:
+            OSError: テンプレートファイルが読めない場合
+        """
+        path = os.path.join(self.prompts_dir, name)
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._templates.get(name)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                return cached
+
+        with open(path, "r", encoding="utf-8") as f:
+            template = compile_template(name, f.read(), mtime_ns)
+        with self._lock:
+            self._templates[name] = template
+        return template
+
+    def invalidate(self, name: Optional[str] = None):
+        with self._lock:
+            if name is None:
+                self._templates.clear()
+            else:
+                self._templates.pop(name, None)
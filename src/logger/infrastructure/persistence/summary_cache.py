@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+
+def make_cache_key(summary_type: str, template_version: str, model_id: str, content: str) -> str:
+    """
+    要約の種類・テンプレートの版・モデル・チャンク内容から、キャッシュのキーを作る。
+    どれか1つでも変われば別のキーになる。
+    """
+    h = hashlib.sha256()
+    for part in (summary_type, template_version, model_id, content):
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "big")) # 区切りの曖昧さをなくす
+        h.update(data)
+    return h.hexdigest()
+
+
+class SummaryCache:
+    """
+    生成済みの要約を SQLite に保存し、同じチャンクをもう一度 LLM に送らずに済ませる。
+    状態ファイルが失われた・リセットされた場合の再要約で効く。
+
+    max_entries を超えたら、最後に使われたのが古いものから削除する (LRU)。
+    """
+    def __init__(self, path: str, max_entries: int = 50000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        # 要約スレッドと制御スレッドの両方から使うので、接続はロックで守って共有する
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_summaries_last_used ON summaries(last_used)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE summaries SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.stats["hits"] += 1
+        try:
+            return json.loads(row[0])
+        except json.JSONDecodeError:
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            self.stats["stores"] += 1
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+        self._conn.execute(
+            "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY last_used LIMIT ?)",
+            (excess,)
+        )
+        self.stats["evictions"] += excess
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self)
+        return stats
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
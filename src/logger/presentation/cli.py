@@ -20,7 +20,27 @@ class ActivityLoggerApp:
             logs_dir=args.logs_dir,
             no_audio=args.no_audio,
             no_summarize=args.no_summarize,
-            summary_chunk_size=args.summary_chunk_size
+            summary_chunk_size=args.summary_chunk_size,
+            summary_policy=args.summary_policy,
+            summary_token_budget=args.summary_token_budget,
+            summary_max_wait=args.summary_max_wait,
+            summary_rollup=args.summary_rollup,
+            summary_combined=args.combined_summary,
+            summary_cache_size=args.summary_cache_size,
+            prompt_compaction=not args.no_prompt_compaction,
+            inference_starvation_guard=args.inference_starvation_guard,
+            llm_slice_tokens=args.llm_slice_tokens or None,
+            model_idle_unload=args.model_idle_unload or None,
+            streaming_transcription=args.streaming_transcription,
+            hallucination_phrases_file=args.hallucination_phrases,
+            audio_backpressure=args.audio_backpressure,
+            audio_max_lag=args.audio_max_lag,
+            retention_days=args.retention_days,
+            static_policy=args.static_policy,
+            disk_budget_mb=args.disk_budget_mb,
+            capture_pipeline=args.pipeline,
+            pipeline_queue_size=args.pipeline_queue_size,
+            metrics_interval=args.metrics_interval or None
         )
         # GUIとは異なり、CLIでは標準出力への出力をコールバックで繋ぐ
         self.controller.on_log_entry = self._handle_log_entry
@@ -49,6 +69,84 @@ class ActivityLoggerApp:
         finally:
             print("\nStopping logger...")
             self.controller.stop()
+            self._print_inference_metrics()
+            self._print_model_residency_metrics()
+            self._print_vad_stats()
+            self._print_pipeline_stats()
+            self._print_hot_path_metrics()
+
+    def _print_inference_metrics(self):
+        for name, m in self.controller.get_inference_metrics().items():
+            if m["count"]:
+                print(
+                    f"[Inference] {name}: {m['count']} runs, "
+                    f"wait avg {m['wait_avg']:.2f}s / max {m['wait_max']:.2f}s, "
+                    f"hold avg {m['hold_avg']:.2f}s / max {m['hold_max']:.2f}s, "
+                    f"yields {m['yields']}"
+                )
+
+    def _print_model_residency_metrics(self):
+        for name, m in self.controller.get_model_residency_metrics().items():
+            if m["loads"]:
+                print(
+                    f"[Residency] {name}: {m['loads']} loads ({m['reloads']} reloads, last reload {m['last_reload_seconds']:.1f}s), "
+                    f"{m['unloads']} unloads, resident {m['resident_bytes'] / (1024 * 1024):.0f} MB"
+                )
+
+    def _print_vad_stats(self):
+        stats = self.controller.get_vad_stats()
+        if stats.get("chunks"):
+            print(
+                f"[VAD] Sent {stats['sent_seconds']:.1f}s of {stats['captured_seconds']:.1f}s captured audio to Whisper "
+                f"({stats['sent_ratio']:.0%}), {stats['skipped_chunks']}/{stats['chunks']} chunks skipped as silence"
+            )
+        filtered = self.controller.get_hallucination_filter_stats()
+        if filtered:
+            print("[Whisper] Filtered as hallucination: " + ", ".join(f"{rule} {n}" for rule, n in sorted(filtered.items())))
+        buffer_stats = self.controller.get_audio_buffer_stats()
+        if buffer_stats.get("overruns") or buffer_stats.get("device_overflows"):
+            print(
+                f"[Audio] Buffer overruns: {buffer_stats['overruns']} "
+                f"({buffer_stats['overrun_dropped_seconds']:.1f}s dropped), "
+                f"device overflows: {buffer_stats['device_overflows']}"
+            )
+        if buffer_stats.get("lagging_chunks"):
+            print(
+                f"[Audio] Transcription fell behind {buffer_stats['lagging_chunks']} times "
+                f"(policy {buffer_stats['backpressure_policy']}): "
+                f"{buffer_stats['dropped_seconds']:.1f}s dropped, "
+                f"{buffer_stats['skipped_silent_seconds']:.1f}s silence skipped, "
+                f"{buffer_stats['merged_chunks']} merged chunks"
+            )
+        if buffer_stats.get("lag_max_seconds"):
+            print(
+                f"[Audio] Audio-to-transcript lag avg {buffer_stats['lag_avg_seconds']:.1f}s / "
+                f"max {buffer_stats['lag_max_seconds']:.1f}s"
+            )
+
+    def _print_hot_path_metrics(self):
+        metrics = self.controller.get_hot_path_metrics()
+        for name, t in metrics["timers"].items():
+            if t["count"]:
+                print(
+                    f"[Timing] {name}: {t['count']} runs, p50 {t['p50'] * 1000:.1f} ms / "
+                    f"p95 {t['p95'] * 1000:.1f} ms / p99 {t['p99'] * 1000:.1f} ms / max {t['max'] * 1000:.1f} ms"
+                )
+        if metrics["counters"]:
+            print("[Counters] " + ", ".join(f"{name} {value:g}" for name, value in metrics["counters"].items()))
+
+    def _print_pipeline_stats(self):
+        stats = self.controller.get_pipeline_stats()
+        if not stats:
+            return
+        for name, s in stats["stages"].items():
+            print(
+                f"[Pipeline] {name}: {s['processed']} frames ({s['throughput']:.2f}/s), "
+                f"{s['skipped']} skipped, {s['dropped']} dropped, "
+                f"utilization {s['utilization']:.0%}, latency avg {s['latency_avg'] * 1000:.0f} ms / max {s['latency_max'] * 1000:.0f} ms"
+            )
+        e2e = stats["end_to_end"]
+        print(f"[Pipeline] capture -> persist: {e2e['saved']} saved, latency avg {e2e['latency_avg'] * 1000:.0f} ms")
 
 def main():
     parser = argparse.ArgumentParser(description="macOS Activity Logger")
@@ -58,7 +156,28 @@ def main():
     parser.add_argument("--no-audio", action="store_true", help="Disable audio recording")
     # For background summarization if needed
     parser.add_argument("--summarize", action="store_true", help="Enable background summarization (Visual & Audio)")
-    parser.add_argument("--summary-chunk-size", type=int, default=10, help="Number of items per summary chunk")
+    parser.add_argument("--summary-chunk-size", type=int, default=10, help="Number of items per summary chunk (count policy)")
+    parser.add_argument("--summary-policy", type=str, default="count", choices=["count", "tokens"], help="How to split logs into summary chunks")
+    parser.add_argument("--summary-token-budget", type=int, default=1500, help="Max log tokens per summary chunk (tokens policy)")
+    parser.add_argument("--summary-max-wait", type=float, default=None, help="Summarize a partial chunk after waiting this many seconds")
+    parser.add_argument("--combined-summary", action="store_true", help="Summarize visual and audio logs together in one LLM call per chunk")
+    parser.add_argument("--summary-rollup", action="store_true", help="Also build hourly and daily summaries from chunk summaries")
+    parser.add_argument("--summary-cache-size", type=int, default=50000, help="Max cached summaries reused for identical chunks (0 to disable)")
+    parser.add_argument("--inference-starvation-guard", type=float, default=None, help="Let summaries run after waiting this many seconds even if OCR/transcription keeps arriving")
+    parser.add_argument("--streaming-transcription", action="store_true", help="Transcribe short overlapping windows and emit stable text every 2s instead of every 10s")
+    parser.add_argument("--hallucination-phrases", type=str, default=None, help="File of phrases (one per line) to drop as Whisper hallucinations (default: bundled list)")
+    parser.add_argument("--audio-backpressure", type=str, default="merge", choices=["drop_oldest", "merge", "skip_silent"], help="What to do with untranscribed audio when Whisper falls behind")
+    parser.add_argument("--audio-max-lag", type=float, default=30.0, help="Untranscribed audio (seconds) allowed before the backpressure policy applies")
+    parser.add_argument("--model-idle-unload", type=float, default=600.0, help="Unload Gemma/Whisper after this many idle seconds (0 to keep them resident)")
+    parser.add_argument("--llm-slice-tokens", type=int, default=32, help="Pause summary generation every N tokens to let waiting OCR/transcription run (0 to disable)")
+    parser.add_argument("--pipeline", action="store_true", help="Run capture, similarity, OCR, enrichment and persistence as overlapping stages on separate threads")
+    parser.add_argument("--pipeline-queue-size", type=int, default=4, help="Frames buffered between pipeline stages")
+    parser.add_argument("--metrics-interval", type=float, default=60.0, help="Append hot-path timings (p50/p95/p99) and counters to logs/metrics.jsonl every N seconds (0 to disable)")
+    parser.add_argument("--no-prompt-compaction", action="store_true", help="Send every log entry to the summarizer as-is")
+    # Log retention (background compaction of old days)
+    parser.add_argument("--retention-days", type=int, default=None, help="Compress days older than N days in the background (disabled if omitted)")
+    parser.add_argument("--static-policy", type=str, default="keep", choices=["keep", "thin", "drop"], help="How to treat static-screen entries when compacting")
+    parser.add_argument("--disk-budget-mb", type=float, default=None, help="Delete oldest days when logs exceed this size (MB)")
     
     args = parser.parse_args()
 
@@ -0,0 +1,39 @@
+import sys
+import os
+import argparse
+
+# srcをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../.."))
+
+from src.logger.application.retention_use_case import LogRetentionUseCase, STATIC_POLICIES
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact old activity logs (gzip, static-entry thinning, disk budget)")
+    parser.add_argument("--logs-dir", type=str, default="logs", help="Directory containing logs")
+    parser.add_argument("--retention-days", type=int, default=7, help="Compress days older than N days")
+    parser.add_argument("--static-policy", type=str, default="keep", choices=STATIC_POLICIES, help="How to treat static-screen entries when compacting")
+    parser.add_argument("--disk-budget-mb", type=float, default=None, help="Delete oldest days when logs exceed this size (MB)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.logs_dir):
+        print(f"Error: Logs directory does not exist: {args.logs_dir}")
+        sys.exit(1)
+
+    job = LogRetentionUseCase(
+        logs_root_dir=args.logs_dir,
+        retention_days=args.retention_days,
+        static_policy=args.static_policy,
+        disk_budget_mb=args.disk_budget_mb
+    )
+    report = job.run_once()
+
+    for date_str in report["compacted_days"]:
+        print(f"Compacted: {date_str}")
+    for date_str in report["deleted_days"]:
+        print(f"Deleted (disk budget): {date_str}")
+    before_mb = report["bytes_before"] / (1024 * 1024)
+    after_mb = report["bytes_after"] / (1024 * 1024)
+    print(f"Logs size: {before_mb:.2f} MB -> {after_mb:.2f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "../../../"))
 
 from src.logger.infrastructure.llm.gemma_provider import GemmaLlmProvider
 from src.logger.application.summarization_use_case import LogSummarizationUseCase
+from src.logger.application.combined_summarization_use_case import CombinedSummarizationUseCase
+from src.logger.application.log_ingestion import LogIngestionService
+from src.logger.application.chunking import build_chunk_policy, CHUNK_POLICIES
+from src.logger.application.rollup_use_case import RollupSummarizationUseCase
+from src.logger.infrastructure.persistence.summary_cache import SummaryCache
+from src.logger.application.prompt_compaction import PromptCompactor
 
 def main():
     parser = argparse.ArgumentParser(description="Gemma Chat & Summarization CLI")
@@ -14,24 +20,70 @@ def main():
     parser.add_argument("--interactive", "-i", action="store_true", help="Interactive mode")
     parser.add_argument("--summarize", "-s", action="store_true", help="Run log summarization for existing logs")
     parser.add_argument("--logs-dir", type=str, default="logs", help="Directory containing logs")
-    parser.add_argument("--chunk-size", type=int, default=10, help="Chunk size for summarization")
+    parser.add_argument("--chunk-size", type=int, default=10, help="Chunk size for summarization (count policy)")
+    parser.add_argument("--policy", type=str, default="count", choices=CHUNK_POLICIES, help="How to split logs into summary chunks")
+    parser.add_argument("--token-budget", type=int, default=1500, help="Max log tokens per summary chunk (tokens policy)")
+    parser.add_argument("--rollup", action="store_true", help="Also build hourly and daily summaries after summarizing")
+    parser.add_argument("--cache-size", type=int, default=50000, help="Max cached summaries reused for identical chunks (0 to disable)")
+    parser.add_argument("--no-compaction", action="store_true", help="Send every log entry to the summarizer as-is")
+    parser.add_argument("--combined", action="store_true", help="Summarize visual and audio logs together in one LLM call per chunk")
+    parser.add_argument("--batch-size", type=int, default=4, help="Number of chunks generated together while catching up")
     args = parser.parse_args()
 
     try:
         print("Loading Gemma model...")
-        llm = GemmaLlmProvider()
+        llm = GemmaLlmProvider(lazy_load=False)
         print("Model loaded.")
 
         if args.summarize:
             print(f"Starting one-time summarization for logs in {args.logs_dir}...")
-            # Visual Summarizer
-            vis = LogSummarizationUseCase(llm, summary_type="visual", logs_root_dir=args.logs_dir)
-            vis.run_once(chunk_size=args.chunk_size)
-            
-            # Audio Summarizer
-            aud = LogSummarizationUseCase(llm, summary_type="audio", logs_root_dir=args.logs_dir)
-            aud.run_once(chunk_size=args.chunk_size)
-            print("Summarization complete.")
+            # Visual & Audio Summarizers share a single pass over activity.jsonl
+            summary_cache = None
+            if args.cache_size > 0:
+                summary_cache = SummaryCache(os.path.join(args.logs_dir, "summary_cache.sqlite3"), max_entries=args.cache_size)
+            ingestor = LogIngestionService(logs_root_dir=args.logs_dir)
+            summarizers = []
+            options = dict(
+                logs_root_dir=args.logs_dir, chunk_size=args.chunk_size, batch_size=args.batch_size,
+                chunk_policy=build_chunk_policy(args.policy, chunk_size=args.chunk_size, token_budget=args.token_budget),
+                summary_cache=summary_cache,
+                prompt_compactor=None if args.no_compaction else PromptCompactor()
+            )
+            if args.combined:
+                summarizers.append(CombinedSummarizationUseCase(llm, **options))
+                ingestor.add_consumer(summarizers[-1])
+            else:
+                for summary_type in ("visual", "audio"):
+                    summarizers.append(LogSummarizationUseCase(llm, summary_type=summary_type, **options))
+                    ingestor.add_consumer(summarizers[-1])
+            ingestor.run_once()
+            for summarizer in summarizers:
+                c = summarizer.compaction_stats
+                if c["chunks"]:
+                    print(
+                        f"Prompt compaction ({summarizer.summary_type}): {c['tokens_before']} -> {c['tokens_after']} tokens "
+                        f"over {c['chunks']} chunks."
+                    )
+            if summary_cache:
+                cache_stats = summary_cache.get_stats()
+                print(
+                    f"Summary cache: {cache_stats['hits']} hits / {cache_stats['hits'] + cache_stats['misses']} lookups "
+                    f"({cache_stats['hit_rate']:.0%}), {cache_stats['entries']} entries."
+                )
+            if args.rollup:
+                report = RollupSummarizationUseCase(llm, logs_root_dir=args.logs_dir).run_once()
+                print(f"Rollups rebuilt: {report['hourly']} hourly, {report['daily']} daily.")
+            stats = llm.get_stats()
+            print(
+                f"Summarization complete. Prompt prefix cache: {stats['prefix_cache_hits']} hits, "
+                f"~{stats['prefill_seconds_saved']:.1f}s prefill saved."
+            )
+            if stats["streamed_calls"]:
+                print(
+                    f"Streaming: {stats['early_stops']}/{stats['streamed_calls']} calls stopped at complete JSON, "
+                    f"{stats['tokens_saved']} tokens saved, "
+                    f"avg time-to-result {stats['time_to_result_seconds'] / stats['streamed_calls']:.2f}s."
+                )
             return
 
         if args.interactive:
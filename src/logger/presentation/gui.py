@@ -1,4 +1,5 @@
 import flet as ft
+import asyncio
 import sys
 import os
 import threading
@@ -9,7 +10,8 @@ from datetime import datetime
 # srcをパスに追加
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../.."))
 
-from src.logger.application.controller import ActivityLoggerController
+from src.logger.application.async_controller import AsyncActivityLoggerController
+from src.logger.infrastructure.persistence.log_files import resolve_log_path, open_log
 
 class ActivityLoggerGUI:
     def __init__(self, page: ft.Page):
@@ -54,14 +56,13 @@ class ActivityLoggerGUI:
             f.write(json.dumps({"sessionId":"debug-session","runId":"post-fix","hypothesisId":"C","location":"gui.py:51","message":"page.add called","data":{"control_count":len(self.page.controls)},"timestamp":int(time.time()*1000)}) + "\n")
         # #endregion
 
-        # Instantiate Controller (Empty)
-        self.controller = ActivityLoggerController(lazy_init=True)
+        # Instantiate Controller (Empty). サービスの初期化は最初の start() で行う
+        self.controller = AsyncActivityLoggerController(lazy_init=True)
         
-        # Wire callbacks
-        self.controller.on_log_entry = self._handle_log_entry
+        # Wire callbacks (コントローラーがイベントループ上で呼ぶ)
+        # エントリと要約は entries() / summaries() を async for で受け取る
         self.controller.on_status_change = self._handle_status_change
         self.controller.on_error = self._handle_error
-        self.controller.on_summary = self._handle_summary
 
         self.init_ui()
         
@@ -459,6 +460,17 @@ class ActivityLoggerGUI:
             )
         )
 
+        self.timing_text = ft.Text("No timings yet", size=12, font_family="monospace")
+        self.timing_card = ft.Card(
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Text("Step Timings (p50 / p95 / p99)", size=16, weight="bold"),
+                    self.timing_text,
+                ]),
+                padding=10
+            )
+        )
+
         return ft.Column([
             ft.Row([self.status_text, self.start_stop_btn], alignment="spaceBetween"),
             ft.Divider(),
@@ -466,7 +478,8 @@ class ActivityLoggerGUI:
             self.latest_log_card,
             ft.Text("Recent Highlights", size=18, weight="w500"),
             self.summary_card,
-        ], expand=True, spacing=20)
+            self.timing_card,
+        ], expand=True, spacing=20, scroll="auto")
 
     def _create_history_view(self):
         self.history_list = ft.ListView(expand=True, spacing=10, padding=10)
@@ -527,7 +540,13 @@ class ActivityLoggerGUI:
         self.page.show_snack_bar(ft.SnackBar(ft.Text(f"Error: {error}"), open=True))
 
     def _handle_summary(self, summary_type, summary_text):
-        prefix = "🎨 Visual Summary: " if summary_type == "visual" else "🎙️ Audio Summary: "
+        prefixes = {
+            "visual": "🎨 Visual Summary: ",
+            "audio": "🎙️ Audio Summary: ",
+            "hourly": "🕐 Hourly Summary: ",
+            "daily": "📅 Daily Summary: ",
+        }
+        prefix = prefixes.get(summary_type, "🎙️ Audio Summary: ")
         self.summary_text.value = prefix + summary_text
         self.page.update()
 
@@ -543,26 +562,55 @@ class ActivityLoggerGUI:
             self.content_container.content = self.settings_view
         self.page.update()
 
-    def _toggle_monitoring(self, e):
+    async def _toggle_monitoring(self, e):
         if self.controller.is_running:
-            self.controller.stop()
-        else:
-            self.controller.start()
+            await self.controller.stop()
+            return
+        # start() より前に購読しておき、最初のエントリから受け取る
+        entries = self.controller.entries()
+        summaries = self.controller.summaries()
+        await self.controller.start()
+        self.page.run_task(self._consume_entries, entries)
+        self.page.run_task(self._consume_summaries, summaries)
+        self.page.run_task(self._refresh_timings)
+
+    async def _consume_entries(self, entries):
+        async for entry in entries:
+            self._handle_log_entry(entry)
+
+    async def _refresh_timings(self):
+        # 監視中は数秒ごとに、監視ループ・文字起こし・要約の所要時間と件数を表示し直す
+        while self.controller.is_running:
+            metrics = self.controller.get_hot_path_metrics()
+            lines = [
+                f"{name:<28} {t['p50'] * 1000:7.1f} {t['p95'] * 1000:7.1f} {t['p99'] * 1000:7.1f} ms  ({t['count']})"
+                for name, t in metrics["timers"].items() if t["count"]
+            ]
+            counters = metrics["counters"]
+            if counters:
+                lines.append(", ".join(f"{name} {value:g}" for name, value in counters.items()))
+            self.timing_text.value = "\n".join(lines) or "No timings yet"
+            self.page.update()
+            await asyncio.sleep(5)
+
+    async def _consume_summaries(self, summaries):
+        async for summary_type, summary_text in summaries:
+            self._handle_summary(summary_type, summary_text)
 
     def _refresh_history(self, e=None):
         self.history_list.controls.clear()
         
         today = datetime.now().strftime("%Y-%m-%d")
-        log_file = os.path.join(self.controller.logs_dir, today, "activity.jsonl")
+        log_file = resolve_log_path(os.path.join(self.controller.logs_dir, today, "activity.jsonl"))
         
-        if not os.path.exists(log_file):
+        if log_file is None:
             self.history_list.controls.append(ft.Text("No logs for today."))
             self.page.update()
             return
 
         try:
             import json
-            with open(log_file, "r") as f:
+            with open_log(log_file, "rt") as f:
                 lines = f.readlines()
                 # 最新のログを上に表示するため逆順にする
                 for line in reversed(lines):
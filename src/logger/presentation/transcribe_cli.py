@@ -0,0 +1,119 @@
+import sys
+import os
+import time
+import argparse
+from datetime import datetime
+from pathlib import Path
+
+# srcをパスに追加
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../.."))
+
+from src.logger.application.batch_transcription_use_case import BatchTranscriptionUseCase
+from src.logger.application.log_ingestion import notify_appended_days
+from src.logger.application.summarization_use_case import unseal_days
+from src.logger.infrastructure.ai.audio_files import AudioFileReader, AUDIO_FILE_EXTENSIONS, guess_recording_start
+from src.logger.infrastructure.ai.hallucination_filter import HallucinationFilter, DEFAULT_PHRASES_FILE
+from src.logger.infrastructure.persistence.jsonl_logger import JsonlLogger
+
+
+def collect_files(inputs):
+    files = []
+    for name in inputs:
+        path = Path(name)
+        if path.is_dir():
+            files.extend(sorted(f for f in path.iterdir() if f.is_file() and f.suffix.lower() in AUDIO_FILE_EXTENSIONS))
+        elif path.is_file():
+            files.append(path)
+        else:
+            print(f"Warning: Not found: {path}")
+    return files
+
+
+def build_transcriber(args):
+    if args.backend == "fake":
+        from src.logger.infrastructure.ai.fake_transcriber import FakeTranscriber
+        return FakeTranscriber(seconds_per_audio_second=args.fake_speed)
+    # mlx は Apple Silicon のみ。複数ファイルを並行しても Whisper は1つずつ実行する
+    from src.logger.infrastructure.ai.whisper_service import WhisperTranscriber
+    return WhisperTranscriber(args.model, language=args.language, arbitrate=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Transcribe recorded audio files (WAV/FLAC) into the activity log timeline",
+        epilog=(
+            "Entries are appended to the activity.jsonl of the day they were recorded, so they come after any "
+            "entries already in that file (e.g. today's live entries recorded later than the audio). "
+            "Days that were already summarized and sealed are reopened; if the app is running, "
+            "its summarizer picks them up on its next scan, otherwise on its next start."
+        )
+    )
+    parser.add_argument("inputs", nargs="+", help="Audio files or directories containing them")
+    parser.add_argument("--logs-dir", type=str, default="logs", help="Directory to save logs")
+    parser.add_argument("--start", type=str, default=None, help="Recording start time (ISO 8601) when a single file is given (default: from the file name, else its mtime minus duration)")
+    parser.add_argument("--max-concurrent", type=int, default=2, help="Number of files processed at the same time")
+    parser.add_argument("--chunk-seconds", type=float, default=30.0, help="Seconds of audio read and transcribed at a time")
+    parser.add_argument("--backend", type=str, default="whisper", choices=["whisper", "fake"], help="Transcription backend (fake: no model, for testing)")
+    parser.add_argument("--model", type=str, default="mlx-community/whisper-large-v3-turbo", help="Whisper model")
+    parser.add_argument("--language", type=str, default="ja", help="Spoken language")
+    parser.add_argument("--fake-speed", type=float, default=0.0, help="Fake backend: processing seconds per audio second")
+    parser.add_argument("--hallucination-phrases", type=str, default=None, help="File of phrases (one per line) to drop as hallucinations (default: bundled list)")
+    args = parser.parse_args()
+
+    files = collect_files(args.inputs)
+    if not files:
+        print("No supported audio files found.")
+        sys.exit(1)
+    if args.start and len(files) > 1:
+        print("Error: --start can only be used with a single file")
+        sys.exit(1)
+
+    reader = AudioFileReader()
+    jobs = []
+    for path in files:
+        try:
+            duration = reader.duration(str(path))
+        except Exception as e:
+            print(f"Skipping {path.name}: {e}")
+            continue
+        recorded_at = datetime.fromisoformat(args.start) if args.start else guess_recording_start(str(path), duration)
+        print(f"{path.name}: {duration / 60:.1f} min, recorded at {recorded_at.isoformat(timespec='seconds')}")
+        jobs.append((str(path), recorded_at))
+
+    use_case = BatchTranscriptionUseCase(
+        transcriber=build_transcriber(args),
+        persistence=JsonlLogger(output_dir=args.logs_dir),
+        reader=reader,
+        hallucination_filter=HallucinationFilter.from_file(args.hallucination_phrases or DEFAULT_PHRASES_FILE),
+        chunk_seconds=args.chunk_seconds,
+        max_concurrent_files=args.max_concurrent
+    )
+    use_case.on_entry = lambda entry: print(
+        f"[{entry.timestamp.strftime('%Y-%m-%d %H:%M:%S')}] {entry.metadata['audio_file']}: {entry.audio_transcript[:60]}"
+    )
+
+    started = time.perf_counter()
+    results = use_case.run(jobs)
+    elapsed = time.perf_counter() - started
+
+    total_audio = 0.0
+    for r in results:
+        total_audio += r.duration_seconds
+        status = f"error: {r.error}" if r.error else "ok"
+        print(
+            f"{os.path.basename(r.path)}: {r.entries} entries ({', '.join(r.entry_dates) or '-'}), "
+            f"{r.filtered} filtered, {r.voiced_seconds:.0f}s of {r.duration_seconds:.0f}s voiced, {status}"
+        )
+    # 要約済みで封印した過去の日に書き込んだ場合は、追記分を要約させる。
+    # アプリが動いていれば状態ファイルはメモリ上の状態で上書きされるので、動いている要約にも知らせる
+    written_dates = sorted({d for r in results for d in r.entry_dates})
+    reopened = unseal_days(args.logs_dir, written_dates)
+    notify_appended_days(args.logs_dir, written_dates)
+    if reopened:
+        print(f"Reopened for summarization: {', '.join(reopened)}")
+    if elapsed > 0:
+        print(f"Transcribed {total_audio / 60:.1f} min of audio in {elapsed:.1f}s ({total_audio / elapsed:.1f}x realtime)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.log_ingestion import LogIngestionService
+from src.logger.application.summarization_use_case import LogSummarizationUseCase
+from src.logger.infrastructure.llm.fake_provider import FakeLlmProvider
+
+
+@pytest.fixture
+def fake_llm():
+    """待ち時間なしの FakeLlmProvider を作る関数"""
+    def make():
+        return FakeLlmProvider(call_overhead_seconds=0, seconds_per_prompt=0)
+    return make
+
+
+@pytest.fixture
+def today_log(tmp_path):
+    """tmp_path の今日の activity.jsonl (ディレクトリだけ作る)"""
+    day_dir = tmp_path / datetime.now().strftime("%Y-%m-%d")
+    day_dir.mkdir(exist_ok=True)
+    return day_dir / "activity.jsonl"
+
+
+@pytest.fixture
+def summarizer_pipeline(tmp_path, fake_llm):
+    """
+    FakeLlmProvider で要約する consumer を1つ繋いだ LogIngestionService を作る関数。
+    make(root=None, use_case=LogSummarizationUseCase, llm=None, **kwargs) -> (llm, summarizer, ingestor)
+    kwargs (summary_type, chunk_size など) は use_case にそのまま渡す。root の既定は tmp_path、llm の既定は fake_llm()。
+    """
+    def make(root=None, use_case=LogSummarizationUseCase, llm=None, **kwargs):
+        root = str(root or tmp_path)
+        llm = llm or fake_llm()
+        summarizer = use_case(llm, logs_root_dir=root, **kwargs)
+        ingestor = LogIngestionService(root)
+        ingestor.add_consumer(summarizer)
+        return llm, summarizer, ingestor
+    return make
@@ -0,0 +1,142 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.async_use_cases import AsyncScreenMonitoringUseCase
+from src.logger.application.event_bus import AsyncBroadcast
+from src.logger.application.interfaces import PersistenceInterface
+from src.logger.application.use_cases import ScreenMonitoringUseCase
+from src.logger.domain.services import SimilarityChecker
+from src.logger.infrastructure.mac_os.fake_services import FakeScreenCapturer, FakeOcrService, FakeWindowInfoService
+
+
+class MemoryPersistence(PersistenceInterface):
+    def __init__(self, save_seconds=0.0):
+        self.entries = []
+        self.save_seconds = save_seconds
+
+    def save(self, entry):
+        if self.save_seconds:
+            time.sleep(self.save_seconds)
+        self.entries.append(entry)
+        return None
+
+
+def build_use_case(change_every, ocr_seconds=0.0, save_seconds=0.0):
+    persistence = MemoryPersistence(save_seconds)
+    use_case = ScreenMonitoringUseCase(
+        screen_service=FakeScreenCapturer(change_every=change_every),
+        ocr_service=FakeOcrService(ocr_seconds),
+        window_service=FakeWindowInfoService(),
+        persistence_service=persistence,
+        similarity_service=SimilarityChecker()
+    )
+    return use_case, persistence
+
+
+def summary(entries):
+    return [(e.screen.ocr_text, e.audio_transcript, e.metadata["is_screen_change"]) for e in entries]
+
+
+def test_async_step_saves_the_same_entries_as_execute_step():
+    serial, serial_saved = build_use_case(change_every=3)
+    for i in range(12):
+        serial.execute_step(audio_transcript="hello" if i == 4 else "")
+
+    use_case, saved = build_use_case(change_every=3)
+    async_use_case = AsyncScreenMonitoringUseCase(use_case)
+
+    async def run():
+        returned = []
+        for i in range(12):
+            entry = await async_use_case.execute_step(audio_transcript="hello" if i == 4 else "")
+            if entry:
+                returned.append(entry)
+        return returned
+
+    returned = asyncio.run(run())
+    async_use_case.close()
+
+    assert summary(saved.entries) == summary(serial_saved.entries)
+    assert returned == saved.entries
+    assert ("", "hello", False) in summary(saved.entries) # 画面は変わらず音声だけ
+
+
+def test_step_timeout_discards_the_step_without_updating_state():
+    use_case, saved = build_use_case(change_every=1, ocr_seconds=0.3)
+    async_use_case = AsyncScreenMonitoringUseCase(use_case, step_timeout=0.05)
+
+    async def run():
+        with pytest.raises(TimeoutError):
+            await async_use_case.execute_step()
+        # ステップごとに制限時間を変えられる
+        return await async_use_case.execute_step(timeout=5.0)
+
+    entry = asyncio.run(run())
+    async_use_case.close()
+
+    assert async_use_case.timed_out_steps == 1
+    assert entry is not None
+    assert saved.entries == [entry]
+
+
+def test_step_timeout_does_not_cut_off_a_started_save():
+    use_case, saved = build_use_case(change_every=100, save_seconds=0.3)
+    async_use_case = AsyncScreenMonitoringUseCase(use_case, step_timeout=0.1)
+
+    async def run():
+        entry = await async_use_case.execute_step(audio_transcript="hello")
+        # 書いたエントリの状態で次のフレームを判定する (同じ画面・音声なしならスキップ)
+        return entry, await async_use_case.execute_step()
+
+    entry, skipped = asyncio.run(run())
+    async_use_case.close()
+
+    assert async_use_case.timed_out_steps == 0
+    assert saved.entries == [entry] # 制限時間を過ぎても1回だけ書き、呼び出し側に返す
+    assert entry.audio_transcript == "hello"
+    assert skipped is None
+    assert use_case.last_ocr_text is not None
+
+
+def test_cancelled_step_is_counted_and_not_saved():
+    use_case, saved = build_use_case(change_every=1, ocr_seconds=0.3)
+    async_use_case = AsyncScreenMonitoringUseCase(use_case)
+
+    async def run():
+        task = asyncio.create_task(async_use_case.execute_step())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    async_use_case.close()
+
+    assert async_use_case.cancelled_steps == 1
+    assert saved.entries == []
+    assert use_case.last_ocr_text is None
+
+
+def test_broadcast_delivers_from_threads_and_ends_on_close():
+    broadcast = AsyncBroadcast(maxsize=3)
+
+    async def run():
+        broadcast.bind(asyncio.get_running_loop())
+        subscription = broadcast.subscribe()
+        thread = threading.Thread(target=lambda: [broadcast.publish(i) for i in range(5)])
+        thread.start()
+        thread.join()
+        broadcast.close()
+        return [item async for item in subscription], subscription
+
+    received, subscription = asyncio.run(run())
+    # 満杯になったら古いものから捨てる (閉じる目印の分も含む)
+    assert received == [3, 4]
+    assert subscription.dropped == 3
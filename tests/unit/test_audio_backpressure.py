@@ -0,0 +1,63 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.ai.backpressure import AudioBackpressure
+from src.logger.infrastructure.ai.ring_buffer import AudioRingBuffer
+
+SR = 100
+
+
+def backlog(silent_seconds, speech_seconds):
+    """先頭が無音、後半が発話の音声を書き込んだリングバッファ"""
+    ring = AudioRingBuffer(60 * SR)
+    speech = 0.3 * np.sin(np.arange(speech_seconds * SR) * 0.7)
+    ring.write(np.concatenate([np.zeros(silent_seconds * SR), speech]).astype(np.float32))
+    return ring
+
+
+def test_keeps_up_without_touching_the_buffer():
+    ring = backlog(0, 25)
+    bp = AudioBackpressure("drop_oldest", sample_rate=SR, max_lag_seconds=20)
+    assert bp.next_chunk(ring, 10 * SR) == 10 * SR
+    assert ring.available() == 25 * SR
+    assert bp.stats.lagging_chunks == 0
+
+
+def test_drop_oldest_trims_lag_to_the_limit():
+    ring = backlog(30, 20)
+    bp = AudioBackpressure("drop_oldest", sample_rate=SR, max_lag_seconds=20)
+    assert bp.next_chunk(ring, 10 * SR) == 10 * SR
+    assert ring.available() == 30 * SR
+    assert bp.get_stats()["dropped_seconds"] == 20.0
+
+
+def test_merge_transcribes_a_larger_chunk_without_dropping():
+    ring = backlog(30, 20)
+    bp = AudioBackpressure("merge", sample_rate=SR, max_lag_seconds=20, max_merge_seconds=30)
+    assert bp.next_chunk(ring, 10 * SR) == 30 * SR
+    assert ring.available() == 50 * SR
+    assert bp.stats.merged_chunks == 1 and bp.stats.dropped_seconds == 0.0
+    # ストリーミング (固定長ウィンドウ) では古い側を捨てる
+    assert bp.next_chunk(ring, 10 * SR, allow_merge=False) == 10 * SR
+    assert bp.stats.dropped_seconds == 20.0
+
+
+def test_skip_silent_only_skips_chunks_without_speech():
+    ring = backlog(20, 30)
+    bp = AudioBackpressure("skip_silent", sample_rate=SR, max_lag_seconds=5)
+    bp.next_chunk(ring, 10 * SR)
+    stats = bp.get_stats()
+    # 無音の 20 秒を飛ばし、まだ遅れている分は古い側 (発話) を捨てる
+    assert stats["skipped_silent_seconds"] == 20.0
+    assert stats["dropped_seconds"] == 15.0
+    assert ring.available() == 15 * SR
+
+
+def test_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        AudioBackpressure("block")
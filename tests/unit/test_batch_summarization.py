@@ -0,0 +1,108 @@
+import json
+import os
+import re
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.llm.fake_provider import FakeLlmProvider
+from src.logger.infrastructure.persistence.log_files import iter_jsonl
+from src.logger.infrastructure.persistence.summary_cache import SummaryCache
+
+
+class EchoLlmProvider(FakeLlmProvider):
+    """
+    プロンプトの OCR 行をそのまま要約として返す (どのチャンクの応答かを確かめられる)。
+    batch_failures に入れた位置 (バッチ内の番号) は None を返し、short_by 件だけ短いリストを返す。
+    """
+    def __init__(self, batch_failures=(), short_by=0):
+        super().__init__(call_overhead_seconds=0, seconds_per_prompt=0)
+        self.batch_failures = set(batch_failures)
+        self.short_by = short_by
+        self.batches = [] # process_batch に渡されたプロンプト数
+        self.singles = 0 # process_content の呼び出し回数
+
+    def _respond(self, prompt):
+        return {"summary": ", ".join(re.findall(r"OCR: (.+)", prompt))}
+
+    def process_content(self, prompt, static_prefix=None):
+        self.singles += 1
+        return super().process_content(prompt, static_prefix)
+
+    def process_batch(self, prompts, static_prefix=None):
+        self.batches.append(len(prompts))
+        responses = super().process_batch(prompts, static_prefix)
+        responses = [None if i in self.batch_failures else r for i, r in enumerate(responses)]
+        return responses[:len(responses) - self.short_by]
+
+
+def write_lines(path, start, count):
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            entry = {
+                "timestamp": f"2025-01-06T10:00:{i:02d}",
+                "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": f"edit {i}"},
+                "audio": {"transcript": ""},
+                "metadata": {"is_screen_change": True}
+            }
+            f.write(json.dumps(entry) + "\n")
+
+
+def summaries(today_log):
+    return [row["summary"] for row in iter_jsonl(str(today_log.parent / "visual_summary.jsonl"))]
+
+
+def run(summarizer_pipeline, llm, **kwargs):
+    _, summarizer, ingestor = summarizer_pipeline(llm=llm, summary_type="visual", chunk_size=1, **kwargs)
+    ingestor.run_once()
+    return summarizer
+
+
+def test_catch_up_makes_one_batch_call_per_batch_in_order(today_log, summarizer_pipeline):
+    write_lines(today_log, 0, 10)
+    llm = EchoLlmProvider()
+    run(summarizer_pipeline, llm, batch_size=4)
+
+    assert llm.batches == [4, 4, 2]
+    assert llm.singles == 0
+    assert summaries(today_log) == [f"edit {i}" for i in range(10)]
+
+
+def test_failed_batch_item_is_retried_on_its_own(today_log, summarizer_pipeline):
+    write_lines(today_log, 0, 4)
+    llm = EchoLlmProvider(batch_failures={1})
+    run(summarizer_pipeline, llm, batch_size=4)
+
+    assert llm.batches == [4]
+    assert llm.singles == 1
+    assert summaries(today_log) == [f"edit {i}" for i in range(4)]
+
+
+def test_short_batch_response_falls_back_to_single_generation(tmp_path, today_log, summarizer_pipeline):
+    write_lines(today_log, 0, 4)
+    llm = EchoLlmProvider(short_by=1)
+    run(summarizer_pipeline, llm, batch_size=4)
+
+    # 応答と対応が取れないので、全て1件ずつ生成し直す (要約の抜けがない)
+    assert llm.singles == 4
+    assert summaries(today_log) == [f"edit {i}" for i in range(4)]
+    with open(tmp_path / "summarizer_state_visual.json") as f:
+        assert json.load(f)[today_log.parent.name]["offset"] == os.path.getsize(today_log)
+
+
+def test_cached_chunks_are_left_out_of_the_batch(tmp_path, today_log, summarizer_pipeline):
+    write_lines(today_log, 0, 2)
+    cache = SummaryCache(str(tmp_path / "cache.sqlite3"))
+    run(summarizer_pipeline, EchoLlmProvider(), batch_size=4, summary_cache=cache)
+
+    # 状態を失った後、キャッシュにある2チャンクと新しい2チャンクを1回で追いつく
+    os.remove(tmp_path / "summarizer_state_visual.json")
+    os.remove(today_log.parent / "visual_summary.jsonl")
+    write_lines(today_log, 2, 2)
+    llm = EchoLlmProvider()
+    run(summarizer_pipeline, llm, batch_size=4, summary_cache=cache)
+
+    assert llm.batches == [2]
+    assert cache.stats["hits"] == 2
+    assert summaries(today_log) == [f"edit {i}" for i in range(4)]
+    cache.close()
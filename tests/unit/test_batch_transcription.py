@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import wave
+from datetime import datetime
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.batch_transcription_use_case import BatchTranscriptionUseCase
+from src.logger.application.event_bus import EventBus
+from src.logger.application.log_ingestion import APPENDED_DAYS_FILE, notify_appended_days
+from src.logger.application.retention_use_case import LogRetentionUseCase
+from src.logger.application.summarization_use_case import unseal_days
+from src.logger.infrastructure.ai.audio_files import AudioFileReader, guess_recording_start
+from src.logger.infrastructure.ai.fake_transcriber import FakeTranscriber
+from src.logger.infrastructure.ai.hallucination_filter import HallucinationFilter
+from src.logger.infrastructure.persistence.jsonl_logger import JsonlLogger
+from src.logger.infrastructure.persistence.log_files import iter_jsonl
+
+
+def write_wav(path, speech, seconds, sample_rate=16000, channels=1):
+    """speech: 発話 (正弦波) を入れる [(開始秒, 終了秒)]。それ以外は無音"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    audio = np.zeros_like(t)
+    for start, end in speech:
+        mask = (t >= start) & (t < end)
+        audio[mask] = 0.3 * np.sin(2 * np.pi * 220 * t[mask])
+    pcm = (np.repeat(audio[:, None], channels, axis=1) * 32767).astype("<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(pcm.tobytes())
+
+
+def read_entries(logs_dir, date_str):
+    with open(os.path.join(logs_dir, date_str, "activity.jsonl"), encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def make_use_case(logs_dir, transcriber, **kwargs):
+    return BatchTranscriptionUseCase(
+        transcriber=transcriber,
+        persistence=JsonlLogger(output_dir=str(logs_dir)),
+        reader=AudioFileReader(),
+        hallucination_filter=HallucinationFilter(["ご視聴ありがとうございました"]),
+        chunk_seconds=10.0,
+        **kwargs
+    )
+
+
+def test_writes_timestamped_entries_into_the_right_day(tmp_path):
+    audio = tmp_path / "meeting.wav"
+    write_wav(audio, speech=[(2, 5), (25, 28)], seconds=30)
+    logs = tmp_path / "logs"
+    use_case = make_use_case(logs, FakeTranscriber(responses=["前半の議題です", "後半の議題です"]))
+
+    [result] = use_case.run([(str(audio), datetime(2025, 12, 30, 23, 59, 50))])
+
+    assert result.error is None
+    assert result.entries == 2 and result.chunks == 3
+    assert result.entry_dates == ["2025-12-30", "2025-12-31"]
+    [first] = read_entries(logs, "2025-12-30")
+    [second] = read_entries(logs, "2025-12-31")
+    assert first["audio"]["transcript"] == "前半の議題です"
+    assert second["audio"]["transcript"] == "後半の議題です"
+    # 発話の開始時刻 (VAD の前後の余白込み) がタイムスタンプになる
+    start = datetime.fromisoformat(first["timestamp"])
+    assert datetime(2025, 12, 30, 23, 59, 51) <= start <= datetime(2025, 12, 30, 23, 59, 52)
+    assert first["metadata"]["source"] == "audio_file"
+    assert first["metadata"]["audio_file"] == "meeting.wav"
+    assert datetime.fromisoformat(first["metadata"]["audio_end"]) > start
+
+
+def test_silence_is_not_transcribed_and_hallucinations_are_dropped(tmp_path):
+    audio = tmp_path / "quiet.wav"
+    write_wav(audio, speech=[(12, 15)], seconds=30)
+    transcriber = FakeTranscriber(responses=["ご視聴ありがとうございました"])
+    use_case = make_use_case(tmp_path / "logs", transcriber)
+
+    [result] = use_case.run([(str(audio), datetime(2025, 1, 6, 10, 0, 0))])
+
+    assert transcriber.calls == 1 # 無音のチャンクは送らない
+    assert result.entries == 0 and result.filtered == 1
+    assert not os.path.exists(tmp_path / "logs" / "2025-01-06" / "activity.jsonl")
+
+
+def test_processes_several_files_concurrently(tmp_path):
+    jobs = []
+    for i in range(3):
+        path = tmp_path / f"rec{i}.wav"
+        write_wav(path, speech=[(1, 4)], seconds=10, sample_rate=44100, channels=2)
+        jobs.append((str(path), datetime(2025, 1, 6, 9, i, 0)))
+    use_case = make_use_case(tmp_path / "logs", FakeTranscriber(), max_concurrent_files=3)
+
+    results = use_case.run(jobs)
+
+    assert [os.path.basename(r.path) for r in results] == ["rec0.wav", "rec1.wav", "rec2.wav"]
+    assert all(r.entries == 1 and abs(r.duration_seconds - 10.0) < 0.01 for r in results)
+    timestamps = sorted(e["timestamp"][:16] for e in read_entries(tmp_path / "logs", "2025-01-06"))
+    assert timestamps == ["2025-01-06T09:00", "2025-01-06T09:01", "2025-01-06T09:02"]
+
+
+def test_entries_for_a_compacted_sealed_day_are_appended_to_the_archive_and_summarized(tmp_path, summarizer_pipeline, monkeypatch):
+    logs = tmp_path / "logs"
+    audio = tmp_path / "morning.wav"
+    write_wav(audio, speech=[(1, 4)], seconds=10)
+    use_case = make_use_case(logs, FakeTranscriber(responses=["朝の打ち合わせ", "午後の打ち合わせ"]))
+    use_case.run([(str(audio), datetime(2025, 1, 6, 9, 0, 0))])
+
+    # 要約して圧縮し、猶予を過ぎて封印された日
+    llm, summarizer, ingestor = summarizer_pipeline(logs, summary_type="audio", chunk_size=1)
+    ingestor.run_once()
+    assert LogRetentionUseCase(str(logs), retention_days=7).run_once()["compacted_days"] == ["2025-01-06"]
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + summarizer.seal_grace_seconds + 1)
+    ingestor.request_reload()
+    ingestor.run_once()
+    assert summarizer.is_sealed("2025-01-06") and llm.prompts_processed == 1
+    monkeypatch.undo()
+
+    [result] = use_case.run([(str(audio), datetime(2025, 1, 6, 14, 0, 0))])
+    assert result.entries == 1
+    # 非圧縮ファイルを作って .gz を隠さない
+    assert not os.path.exists(logs / "2025-01-06" / "activity.jsonl")
+    transcripts = [e["audio"]["transcript"] for e in iter_jsonl(str(logs / "2025-01-06" / "activity.jsonl"))]
+    assert transcripts == ["朝の打ち合わせ", "午後の打ち合わせ"]
+
+    assert unseal_days(str(logs), result.entry_dates) == ["2025-01-06"]
+    llm, summarizer, ingestor = summarizer_pipeline(logs, summary_type="audio", chunk_size=1)
+    ingestor.run_once()
+    assert llm.prompts_processed == 1 # 追記分だけ
+    summaries = list(iter_jsonl(str(logs / "2025-01-06" / "audio_summary.jsonl")))
+    assert [s["timestamp_start"][11:13] for s in summaries] == ["09", "14"]
+
+
+def test_running_summarizer_reopens_a_sealed_day_appended_from_outside(tmp_path, summarizer_pipeline, monkeypatch):
+    logs = tmp_path / "logs"
+    audio = tmp_path / "morning.wav"
+    write_wav(audio, speech=[(1, 4)], seconds=10)
+    use_case = make_use_case(logs, FakeTranscriber(responses=["朝の打ち合わせ", "午後の打ち合わせ"]))
+    use_case.run([(str(audio), datetime(2025, 1, 6, 9, 0, 0))])
+
+    # アプリと同じく EventBus から受け取る要約が、猶予を過ぎてその日を封印する
+    llm, summarizer, ingestor = summarizer_pipeline(logs, summary_type="audio", chunk_size=1)
+    ingestor.attach_event_bus(EventBus())
+    ingestor.catch_up()
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + summarizer.seal_grace_seconds + 1)
+    ingestor.request_reload()
+    ingestor.poll(0)
+    assert summarizer.is_sealed("2025-01-06") and llm.prompts_processed == 1
+    monkeypatch.undo()
+
+    # 動いている間に CLI と同じ手順で追記する (状態ファイルの封印はメモリ上の状態で上書きされる)
+    [result] = use_case.run([(str(audio), datetime(2025, 1, 6, 14, 0, 0))])
+    unseal_days(str(logs), result.entry_dates)
+    notify_appended_days(str(logs), result.entry_dates)
+    ingestor.poll(0)
+
+    assert not summarizer.is_sealed("2025-01-06")
+    assert llm.prompts_processed == 2 # 追記分だけ
+    assert not os.path.exists(logs / APPENDED_DAYS_FILE)
+    summaries = list(iter_jsonl(str(logs / "2025-01-06" / "audio_summary.jsonl")))
+    assert [s["timestamp_start"][11:13] for s in summaries] == ["09", "14"]
+    with open(logs / "summarizer_state_audio.json") as f:
+        assert "sealed" not in json.load(f)["2025-01-06"]
+
+
+def test_reader_streams_mono_16k_chunks(tmp_path):
+    path = tmp_path / "stereo.wav"
+    write_wav(path, speech=[(0, 3)], seconds=3, sample_rate=48000, channels=2)
+    reader = AudioFileReader(block_seconds=0.7)
+    chunks = list(reader.read_chunks(str(path), 16000))
+    assert [len(c) for c in chunks] == [16000, 16000, 16000]
+    assert all(c.dtype == np.float32 for c in chunks)
+    # 変換後も 220Hz の正弦波のまま (ブロックの境界で途切れない)
+    audio = np.concatenate(chunks)
+    expected = 0.3 * np.sin(2 * np.pi * 220 * np.arange(len(audio)) / 16000)
+    assert np.max(np.abs(audio - expected)) < 0.01
+
+
+def test_recording_start_from_file_name(tmp_path):
+    path = tmp_path / "meeting_2025-12-30_14-05-00.wav"
+    write_wav(path, speech=[], seconds=1)
+    assert guess_recording_start(str(path), 1.0) == datetime(2025, 12, 30, 14, 5, 0)
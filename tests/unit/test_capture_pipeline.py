@@ -0,0 +1,122 @@
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.capture_pipeline import CapturePipeline
+from src.logger.application.interfaces import PersistenceInterface
+from src.logger.application.use_cases import ScreenMonitoringUseCase
+from src.logger.domain.services import SimilarityChecker
+from src.logger.infrastructure.mac_os.fake_services import FakeScreenCapturer, FakeOcrService, FakeWindowInfoService
+
+
+class MemoryPersistence(PersistenceInterface):
+    def __init__(self):
+        self.entries = []
+
+    def save(self, entry):
+        self.entries.append(entry)
+        return None
+
+
+def build_use_case(change_every, ocr_seconds=0.0):
+    persistence = MemoryPersistence()
+    use_case = ScreenMonitoringUseCase(
+        screen_service=FakeScreenCapturer(change_every=change_every),
+        ocr_service=FakeOcrService(ocr_seconds),
+        window_service=FakeWindowInfoService(),
+        persistence_service=persistence,
+        similarity_service=SimilarityChecker()
+    )
+    return use_case, persistence
+
+
+class FlakyOcrService(FakeOcrService):
+    """fail_screens の画面を最初に OCR した時だけ失敗する"""
+    def __init__(self, fail_screens):
+        super().__init__()
+        self.fail_screens = set(fail_screens)
+
+    def extract_text(self, image_ref):
+        if image_ref in self.fail_screens:
+            self.fail_screens.discard(image_ref)
+            raise RuntimeError("OCR failed")
+        return super().extract_text(image_ref)
+
+
+def run_pipeline(use_case, frames, **kwargs):
+    pipeline = CapturePipeline(use_case, interval=0.0, block_when_full=True, max_frames=frames, **kwargs)
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    return pipeline
+
+
+def summary(entries):
+    return [(e.screen.ocr_text, e.audio_transcript, e.metadata["is_screen_change"]) for e in entries]
+
+
+def test_saves_the_same_entries_as_the_serial_loop():
+    serial, serial_saved = build_use_case(change_every=3)
+    for _ in range(20):
+        serial.execute_step()
+
+    use_case, saved = build_use_case(change_every=3)
+    pipeline = run_pipeline(use_case, 20)
+
+    assert summary(saved.entries) == summary(serial_saved.entries)
+    stats = pipeline.get_stats()
+    assert stats["stages"]["capture"]["processed"] == 20
+    assert stats["stages"]["feature"]["skipped"] == 13 # 変化のない画面は OCR まで進めない
+    assert stats["stages"]["ocr"]["processed"] == 7
+    assert stats["end_to_end"]["saved"] == 7
+
+
+def test_audio_keeps_unchanged_frames_and_is_attached_in_order():
+    use_case, saved = build_use_case(change_every=100)
+    span = (datetime(2025, 1, 6, 10, 0, 0), datetime(2025, 1, 6, 10, 0, 5))
+    pending = ["", "", "こんにちは", "", ""]
+
+    def audio_source():
+        text = pending.pop(0)
+        return text, span if text else None
+
+    # 文字起こしが溜まっている間は、画面が変わらなくても OCR・付加情報まで進める
+    pipeline = run_pipeline(use_case, 5, audio_source=audio_source, audio_pending=lambda: True)
+
+    assert pipeline.get_stats()["stages"]["enrich"]["processed"] == 5
+    assert summary(saved.entries) == [
+        (saved.entries[0].screen.ocr_text, "", True),
+        ("", "こんにちは", False)
+    ]
+    assert saved.entries[1].metadata["audio_start"] == "2025-01-06T10:00:00"
+
+
+def test_drops_frames_when_downstream_is_full():
+    use_case, saved = build_use_case(change_every=1, ocr_seconds=0.05)
+    pipeline = CapturePipeline(use_case, interval=0.0, queue_size=1, max_frames=30)
+    pipeline.start()
+    assert pipeline.wait(timeout=10)
+    capture = pipeline.get_stats()["stages"]["capture"]
+    assert capture["dropped"] > 0
+    assert capture["passed"] + capture["dropped"] == 30
+    assert len(saved.entries) == capture["passed"]
+
+
+def test_failed_frame_is_not_the_baseline_like_the_serial_loop():
+    serial, serial_saved = build_use_case(change_every=3)
+    serial.ocr = FlakyOcrService(fail_screens={1})
+    for _ in range(9):
+        try:
+            serial.execute_step()
+        except RuntimeError:
+            pass
+
+    use_case, saved = build_use_case(change_every=3)
+    use_case.ocr = FlakyOcrService(fail_screens={1})
+    pipeline = run_pipeline(use_case, 9)
+
+    # OCR に失敗した画面も、次のフレームで判定し直して保存する
+    assert summary(saved.entries) == summary(serial_saved.entries)
+    assert len(saved.entries) == 3
+    assert pipeline.get_stats()["stages"]["ocr"]["errors"] == 1
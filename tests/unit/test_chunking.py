@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.chunking import CountChunkPolicy, TokenBudgetChunkPolicy, build_chunk_policy
+
+
+def pending(costs):
+    """トークン数をエントリに埋め込んだ要約待ち (cost はそれを読むだけ)"""
+    return [({"tokens": tokens}, (i + 1) * 100) for i, tokens in enumerate(costs)]
+
+
+def cost(item):
+    return item[0]["tokens"]
+
+
+def sizes(chunks):
+    return [[cost(item) for item in chunk] for chunk in chunks]
+
+
+def test_count_policy_keeps_the_remainder_until_forced():
+    policy = CountChunkPolicy(chunk_size=3)
+    chunks, rest = policy.split(pending([1] * 7), cost)
+    assert [len(c) for c in chunks] == [3, 3]
+    assert len(rest) == 1
+
+    chunks, rest = policy.split(pending([1] * 7), cost, force=True)
+    assert [len(c) for c in chunks] == [3, 3, 1]
+    assert rest == []
+
+
+def test_token_policy_closes_a_chunk_before_it_exceeds_the_budget():
+    policy = TokenBudgetChunkPolicy(token_budget=10)
+    chunks, rest = policy.split(pending([4, 4, 4, 6, 15, 3]), cost)
+    # 1件で予算を超えるエントリは単独のチャンクになる
+    assert sizes(chunks) == [[4, 4], [4, 6], [15]]
+    assert sizes([rest]) == [[3]]
+
+    # 予算ちょうどに達した最後のチャンクはそれ以上増やせないので確定する
+    chunks, rest = policy.split(pending([4, 6]), cost)
+    assert sizes(chunks) == [[4, 6]] and rest == []
+
+    chunks, rest = policy.split(pending([3]), cost, force=True)
+    assert sizes(chunks) == [[3]] and rest == []
+
+
+def test_token_policy_respects_max_entries():
+    policy = TokenBudgetChunkPolicy(token_budget=100, max_entries=2)
+    chunks, rest = policy.split(pending([1, 1, 1, 1, 1]), cost)
+    assert sizes(chunks) == [[1, 1], [1, 1]]
+    assert sizes([rest]) == [[1]]
+
+
+def test_build_chunk_policy():
+    assert isinstance(build_chunk_policy("count", chunk_size=4), CountChunkPolicy)
+    policy = build_chunk_policy("tokens", token_budget=500, max_wait_seconds=30)
+    assert isinstance(policy, TokenBudgetChunkPolicy)
+    assert policy.is_expired(30) and not policy.is_expired(29.9)
+    assert not CountChunkPolicy(3).is_expired(10 ** 6)
+    with pytest.raises(ValueError):
+        build_chunk_policy("lines")
+
+
+def test_max_wait_flushes_a_partial_chunk_without_new_entries(tmp_path, today_log, summarizer_pipeline, monkeypatch):
+    with open(today_log, "w", encoding="utf-8") as f:
+        for i in range(2):
+            entry = {
+                "timestamp": datetime.now().isoformat(),
+                "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": f"edit {i}"},
+                "audio": {"transcript": ""},
+                "metadata": {"is_screen_change": True}
+            }
+            f.write(json.dumps(entry) + "\n")
+    llm, _, ingestor = summarizer_pipeline(
+        summary_type="visual", chunk_policy=CountChunkPolicy(chunk_size=5, max_wait_seconds=60)
+    )
+
+    ingestor.run_once()
+    assert llm.prompts_processed == 0 # 5件に満たない
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 61)
+    ingestor.run_once() # ファイルは変わっていないが、待ちすぎた分を要約する
+    assert llm.prompts_processed == 1
+    with open(tmp_path / "summarizer_state_visual.json") as f:
+        saved = json.load(f)[today_log.parent.name]
+    assert saved["offset"] == os.path.getsize(today_log)
@@ -0,0 +1,106 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.combined_summarization_use_case import CombinedSummarizationUseCase
+from src.logger.infrastructure.persistence.log_files import iter_jsonl
+
+
+def line(i, change, transcript=""):
+    entry = {
+        "timestamp": f"2025-01-06T10:00:{i:02d}",
+        "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": f"edit {i}" if change else ""},
+        "audio": {"transcript": transcript},
+        "metadata": {"is_screen_change": change}
+    }
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+@pytest.fixture
+def build(summarizer_pipeline):
+    return lambda chunk_size: summarizer_pipeline(use_case=CombinedSummarizationUseCase, chunk_size=chunk_size)
+
+
+def write_state(root, kind, state):
+    with open(root / f"summarizer_state_{kind}.json", "w") as f:
+        json.dump(state, f)
+
+
+def test_one_call_is_written_to_both_summary_files(tmp_path, today_log, build):
+    path = today_log
+    # 1チャンク目は画面と音声、2チャンク目は画面だけ
+    path.write_bytes(line(0, True) + line(1, False, "let's ship it") + line(2, True) + line(3, True))
+    llm, summarizer, ingestor = build(chunk_size=2)
+    written = []
+    summarizer.on_summary_generated = lambda kind, row: written.append(kind)
+    ingestor.run_once()
+
+    assert llm.prompts_processed == 2
+    assert written == ["visual", "audio", "visual"]
+    visual = list(iter_jsonl(str(path.parent / "visual_summary.jsonl")))
+    audio = list(iter_jsonl(str(path.parent / "audio_summary.jsonl")))
+    assert len(visual) == 2 and len(audio) == 1
+    assert audio[0]["summary"].startswith("(fake audio summary")
+    assert audio[0]["timestamp_start"] == visual[0]["timestamp_start"]
+    assert os.path.exists(tmp_path / "summarizer_state_visual_audio.json")
+
+
+def test_response_without_both_kinds_is_a_failure(build):
+    _, summarizer, _ = build(chunk_size=1)
+    assert summarizer._to_summary("plain text", "s", "e") is None
+    assert summarizer._to_summary({"summary": "x"}, "s", "e") is None
+    summary = summarizer._to_summary({"visual": "coding", "audio": {"topic": "release"}}, "s", "e")
+    assert summary["visual"] == "coding"
+    assert json.loads(summary["audio"]) == {"topic": "release"}
+
+
+def test_first_run_continues_from_the_separate_states(tmp_path, today_log, build):
+    path = today_log
+    path.write_bytes(line(0, True) + line(1, True) + line(2, False, "hello"))
+    date_str = path.parent.name
+    inode = os.stat(path).st_ino
+    two_lines = len(line(0, True) + line(1, True))
+    size = os.path.getsize(path)
+    # visual は最後まで、audio は2行目まで処理済み
+    write_state(tmp_path, "visual", {date_str: {"offset": size, "inode": inode, "size": size}})
+    write_state(tmp_path, "audio", {date_str: {"offset": two_lines, "inode": inode, "size": two_lines}})
+
+    llm, summarizer, ingestor = build(chunk_size=1)
+    assert summarizer.state[date_str]["offset"] == two_lines
+    ingestor.run_once()
+    assert llm.prompts_processed == 1 # 遅れていた側の3行目だけ
+    with open(tmp_path / "summarizer_state_visual_audio.json") as f:
+        assert json.load(f)[date_str]["offset"] == size
+
+    # 2回目以降は自分の状態ファイルを使う
+    llm, _, ingestor = build(chunk_size=1)
+    ingestor.run_once()
+    assert llm.prompts_processed == 0
+
+
+def test_migration_skips_days_the_two_states_disagree_on(tmp_path, build):
+    write_state(tmp_path, "visual", {
+        "2025-01-05": {"offset": 10, "inode": 1, "size": 10, "sealed": True},
+        "2025-01-06": {"offset": 30, "inode": 2, "size": 30, "sealed": True},
+        "2025-01-07": {"offset": 5, "inode": 3, "size": 5}
+    })
+    write_state(tmp_path, "audio", {
+        "2025-01-05": {"offset": 8, "inode": 1, "size": 10, "sealed": True},
+        "2025-01-06": {"offset": 30, "inode": 2, "size": 30},
+        "2025-01-07": {"offset": 5, "inode": 4, "size": 5} # 別のファイル
+    })
+    _, summarizer, _ = build(chunk_size=1)
+    assert summarizer.state == {
+        "2025-01-05": {"offset": 8, "inode": 1, "size": 10, "sealed": True},
+        "2025-01-06": {"offset": 30, "inode": 2, "size": 30} # 片方しか閉じていない
+    }
+
+
+def test_missing_separate_state_starts_from_scratch(tmp_path, build):
+    write_state(tmp_path, "visual", {"2025-01-05": {"offset": 10, "inode": 1, "size": 10}})
+    _, summarizer, _ = build(chunk_size=1)
+    assert summarizer.state == {}
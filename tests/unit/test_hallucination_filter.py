@@ -0,0 +1,45 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.ai.hallucination_filter import HallucinationFilter, PhraseMatcher, load_phrases
+
+
+def test_phrase_matcher_finds_overlapping_phrases_in_one_pass():
+    matcher = PhraseMatcher(["he", "she", "his", "hers"])
+    assert matcher.find("ushers") == "she"
+    assert matcher.find("ahishe") == "his"
+    assert matcher.find("xyz") is None
+
+
+def test_known_phrase_is_case_insensitive_and_reports_the_phrase():
+    hallucination_filter = HallucinationFilter(["Thank you for watching", "チャンネル登録"])
+    match = hallucination_filter.check("THANK YOU FOR WATCHING!")
+    assert (match.rule, match.detail) == ("known_phrase", "thank you for watching")
+    # 短いテキストにも適用する
+    assert hallucination_filter.check("チャンネル登録").rule == "known_phrase"
+
+
+def test_repetition_rules():
+    hallucination_filter = HallucinationFilter([])
+    assert hallucination_filter.check("DoDoDoDoDoDoDoDo").rule == "tandem_repeat"
+    assert hallucination_filter.check("ありがとう、ありがとう。ありがとう!ありがとう、ありがとう。ありがとう").rule == "repeated_ngram"
+    assert hallucination_filter.check("あいあああうああえあああおあ").rule == "dominant_char"
+    assert hallucination_filter.rule_counts == {"tandem_repeat": 1, "repeated_ngram": 1, "dominant_char": 1}
+
+
+def test_keeps_normal_speech():
+    hallucination_filter = HallucinationFilter([])
+    assert hallucination_filter.check("会議の資料を共有します。次に予算です") is None
+    assert hallucination_filter.check("そうですね......わかりました") is None
+    # 10文字以下には繰り返しのルールを適用しない
+    assert hallucination_filter.check("はいはいはい") is None
+    assert hallucination_filter.check("  ") is None
+
+
+def test_bundled_phrases_file_loads():
+    phrases = load_phrases()
+    assert "ご視聴ありがとうございました" in phrases
+    assert not any(p.startswith("#") for p in phrases)
+    assert HallucinationFilter.from_file().is_hallucination("ご視聴ありがとうございました")
@@ -0,0 +1,94 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.ai.utils import InferenceArbiter, InferencePriority
+
+
+def wait_for_waiters(arbiter, count, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while sum(m["waiting"] for m in arbiter.get_metrics().values()) < count:
+        assert time.monotonic() < deadline, "waiters did not queue up"
+        time.sleep(0.005)
+
+
+def start_waiter(arbiter, priority, order, hold_seconds=0.0):
+    def run():
+        with arbiter.use(priority):
+            order.append(priority)
+            time.sleep(hold_seconds)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_highest_priority_waiter_goes_first():
+    arbiter = InferenceArbiter()
+    order = []
+    arbiter.acquire(InferencePriority.SUMMARIZATION)
+    threads = []
+    for i, priority in enumerate([InferencePriority.SUMMARIZATION, InferencePriority.TRANSCRIPTION, InferencePriority.OCR]):
+        threads.append(start_waiter(arbiter, priority, order))
+        wait_for_waiters(arbiter, i + 1)
+    arbiter.release()
+    for thread in threads:
+        thread.join()
+
+    assert order == [InferencePriority.OCR, InferencePriority.TRANSCRIPTION, InferencePriority.SUMMARIZATION]
+    assert arbiter.get_metrics()["summarization"]["count"] == 2
+
+
+def test_starvation_guard_lets_a_long_waiting_summary_through():
+    arbiter = InferenceArbiter(starvation_seconds=0.05)
+    order = []
+    arbiter.acquire(InferencePriority.OCR)
+    summary = start_waiter(arbiter, InferencePriority.SUMMARIZATION, order)
+    wait_for_waiters(arbiter, 1)
+    time.sleep(0.1)
+    ocr = start_waiter(arbiter, InferencePriority.OCR, order)
+    wait_for_waiters(arbiter, 2)
+    arbiter.release()
+    summary.join()
+    ocr.join()
+
+    assert order == [InferencePriority.SUMMARIZATION, InferencePriority.OCR]
+    assert arbiter.get_metrics()["summarization"]["starvation_grants"] == 1
+
+
+def test_yield_to_higher_hands_over_between_slices():
+    arbiter = InferenceArbiter()
+    order = []
+    arbiter.acquire(InferencePriority.SUMMARIZATION)
+    # 誰も待っていなければ手放さない
+    assert arbiter.yield_to_higher(InferencePriority.SUMMARIZATION) is False
+
+    ocr = start_waiter(arbiter, InferencePriority.OCR, order)
+    wait_for_waiters(arbiter, 1)
+    # 同じ優先度以下しか待っていない場合も手放さない
+    assert arbiter.has_waiters(above=InferencePriority.OCR) is False
+    assert arbiter.yield_to_higher(InferencePriority.SUMMARIZATION) is True
+    order.append(InferencePriority.SUMMARIZATION) # 取り直した後の続き
+    arbiter.release()
+    ocr.join()
+
+    assert order == [InferencePriority.OCR, InferencePriority.SUMMARIZATION]
+    assert arbiter.get_metrics()["summarization"]["yields"] == 1
+
+
+def test_acquire_times_out_and_wakes_the_next_waiter():
+    arbiter = InferenceArbiter()
+    arbiter.acquire(InferencePriority.OCR)
+    assert arbiter.acquire(InferencePriority.SUMMARIZATION, timeout=0.05) is False
+    assert not arbiter.has_waiters()
+    arbiter.release()
+
+
+def test_configure_leaves_unset_values_alone():
+    arbiter = InferenceArbiter(starvation_seconds=5.0)
+    arbiter.configure(starvation_seconds=None)
+    assert arbiter.starvation_seconds == 5.0
+    arbiter.configure(starvation_seconds=1.5)
+    assert arbiter.starvation_seconds == 1.5
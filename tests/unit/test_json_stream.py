@@ -0,0 +1,71 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.llm.json_stream import JsonStopDetector
+
+
+def feed_tokens(detector, tokens):
+    """偽のトークン列を1つずつ流し、打ち切った位置 (何トークン目まで消費したか) を返す"""
+    for i, token in enumerate(tokens, start=1):
+        if detector.feed(token):
+            return i
+    return None
+
+
+def test_stops_right_after_closing_brace():
+    tokens = ['{"', 'summary', '":', ' "', '作業', 'した', '"', '}', '\n\n', 'Note', ':', ' this', ' is', ' extra']
+    detector = JsonStopDetector()
+    assert feed_tokens(detector, tokens) == 8
+    assert detector.result == {"summary": "作業した"}
+    assert detector.text[:detector.end_index] == '{"summary": "作業した"}'
+
+
+def test_ignores_braces_inside_strings_and_escapes():
+    tokens = ['{"summary": "a } b', ' \\" { c', '"', ', "n": {"x": 1}', '}', ' trailing']
+    detector = JsonStopDetector()
+    assert feed_tokens(detector, tokens) == 5
+    assert detector.result == {"summary": 'a } b " { c', "n": {"x": 1}}
+
+
+def test_skips_objects_without_required_key():
+    tokens = ['Example: {"foo": 1}', ' then ', '{"summary": "ok"}', ' more']
+    detector = JsonStopDetector()
+    assert feed_tokens(detector, tokens) == 3
+    assert detector.result == {"summary": "ok"}
+
+
+def test_skips_unparseable_balanced_braces():
+    tokens = ['{not json}', ' ```json\n', '{"summary": "x"}']
+    detector = JsonStopDetector()
+    assert feed_tokens(detector, tokens) == 3
+    assert detector.result == {"summary": "x"}
+
+
+def test_finds_nested_object_with_required_key():
+    tokens = ['{"data": ', '{"summary": "inner"}', '}']
+    detector = JsonStopDetector()
+    assert feed_tokens(detector, tokens) == 3
+    assert detector.result == {"summary": "inner"}
+
+
+def test_never_stops_on_incomplete_output():
+    tokens = ['{"summary": "cut', ' off']
+    detector = JsonStopDetector()
+    assert feed_tokens(detector, tokens) is None
+    assert not detector.done
+    assert detector.text == '{"summary": "cut off'
+
+
+def test_any_object_when_no_required_key():
+    detector = JsonStopDetector(required_key=None)
+    assert feed_tokens(detector, ['{"a": 1}', 'rest']) == 1
+    assert detector.result == {"a": 1}
+
+
+def test_any_of_several_required_keys():
+    tokens = ['{"other": 1}', ' ', '{"visual": "画面", ', '"audio": ""}', ' rest']
+    detector = JsonStopDetector(required_key=("summary", "visual", "audio"))
+    assert feed_tokens(detector, tokens) == 4
+    assert detector.result == {"visual": "画面", "audio": ""}
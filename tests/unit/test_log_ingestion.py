@@ -0,0 +1,155 @@
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application import log_ingestion
+from src.logger.application.event_bus import EventBus
+from src.logger.application.log_ingestion import LogIngestionService
+from src.logger.application.summarization_use_case import LogSummarizationUseCase
+from src.logger.domain.entities import LogEntry, ScreenData
+from src.logger.domain.events import LogEntrySaved
+from src.logger.infrastructure.persistence.jsonl_logger import JsonlLogger
+
+
+def write_entries(path, rows):
+    """rows: [(is_screen_change, transcript)]"""
+    with open(path, "a", encoding="utf-8") as f:
+        for change, transcript in rows:
+            entry = {
+                "timestamp": datetime.now().isoformat(),
+                "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": "text" if change else ""},
+                "audio": {"transcript": transcript},
+                "metadata": {"is_screen_change": change}
+            }
+            f.write(json.dumps(entry) + "\n")
+
+
+def count_reads(monkeypatch):
+    reads = []
+    original = log_ingestion.read_appended_entries
+
+    def counting(path, offset):
+        reads.append(offset)
+        return original(path, offset)
+
+    monkeypatch.setattr(log_ingestion, "read_appended_entries", counting)
+    return reads
+
+
+def summarizer(llm, root, summary_type):
+    return LogSummarizationUseCase(llm, summary_type=summary_type, logs_root_dir=str(root), chunk_size=1)
+
+
+def test_one_read_feeds_every_summarizer(tmp_path, today_log, fake_llm, monkeypatch):
+    path = today_log
+    write_entries(path, [(True, ""), (False, "hello"), (True, "bye")])
+    reads = count_reads(monkeypatch)
+    visual_llm = fake_llm()
+    audio_llm = fake_llm()
+    ingestor = LogIngestionService(str(tmp_path))
+    ingestor.add_consumer(summarizer(visual_llm, tmp_path, "visual"))
+    ingestor.add_consumer(summarizer(audio_llm, tmp_path, "audio"))
+
+    ingestor.run_once()
+    assert reads == [0]
+    assert (visual_llm.prompts_processed, audio_llm.prompts_processed) == (2, 2)
+
+    ingestor.run_once() # 変化がなければ開かない
+    write_entries(path, [(False, "again")])
+    ingestor.run_once()
+    assert len(reads) == 2
+    assert (visual_llm.prompts_processed, audio_llm.prompts_processed) == (2, 3)
+
+
+def test_consumer_behind_the_others_reads_from_its_own_checkpoint(tmp_path, today_log, fake_llm, monkeypatch):
+    path = today_log
+    write_entries(path, [(True, "one"), (True, "two")])
+    visual_llm = fake_llm()
+    visual = summarizer(visual_llm, tmp_path, "visual")
+    ingestor = LogIngestionService(str(tmp_path))
+    ingestor.add_consumer(visual)
+    ingestor.run_once()
+    assert visual_llm.prompts_processed == 2
+
+    # 後から加わった要約のために先頭から読み直しても、先に進んでいる要約は処理済みの行を読み飛ばす
+    reads = count_reads(monkeypatch)
+    audio_llm = fake_llm()
+    ingestor.add_consumer(summarizer(audio_llm, tmp_path, "audio"))
+    ingestor.run_once()
+    assert reads == [0]
+    assert visual_llm.prompts_processed == 2
+    assert audio_llm.prompts_processed == 2
+
+
+class SmallQueueBus(EventBus):
+    def subscribe(self, maxsize=1000):
+        return super().subscribe(maxsize=1)
+
+
+def save(logger, bus, text, publish=True):
+    now = datetime.now()
+    entry = LogEntry(timestamp=now, screen=ScreenData(timestamp=now, ocr_text=text), metadata={"is_screen_change": True})
+    start, end = logger.save(entry)
+    if publish:
+        bus.publish(LogEntrySaved(date_str=now.strftime("%Y-%m-%d"), entry=entry.to_dict(), start_offset=start, end_offset=end))
+
+
+def subscribed_summarizer(summarizer_pipeline, bus):
+    llm, _, ingestor = summarizer_pipeline(summary_type="visual", chunk_size=1)
+    ingestor.attach_event_bus(bus)
+    return llm, ingestor
+
+
+def test_published_entries_are_delivered_without_reading_the_file(tmp_path, summarizer_pipeline, monkeypatch):
+    bus = EventBus()
+    logger = JsonlLogger(output_dir=str(tmp_path))
+    save(logger, bus, "before start", publish=False) # 起動前に書かれた分
+    llm, ingestor = subscribed_summarizer(summarizer_pipeline, bus)
+    reads = count_reads(monkeypatch)
+
+    ingestor.catch_up()
+    assert reads == [0] and llm.prompts_processed == 1
+
+    save(logger, bus, "live 1")
+    save(logger, bus, "live 2")
+    ingestor.poll(timeout=0.1)
+    assert reads == [0] # メモリから受け取った
+    assert llm.prompts_processed == 3
+
+
+def test_gap_in_published_offsets_falls_back_to_the_file(tmp_path, summarizer_pipeline, monkeypatch):
+    bus = EventBus()
+    logger = JsonlLogger(output_dir=str(tmp_path))
+    llm, ingestor = subscribed_summarizer(summarizer_pipeline, bus)
+    save(logger, bus, "first")
+    ingestor.catch_up()
+    ingestor.poll(timeout=0.1) # catch_up で読んだ行のイベントは読み飛ばす
+    assert llm.prompts_processed == 1
+
+    reads = count_reads(monkeypatch)
+    save(logger, bus, "written by another process", publish=False)
+    save(logger, bus, "after the gap")
+    ingestor.poll(timeout=0.1)
+    assert len(reads) == 1 # 位置が飛んだのでファイルから読み直した
+    assert llm.prompts_processed == 3
+
+
+def test_queue_overflow_falls_back_to_the_file(tmp_path, summarizer_pipeline, monkeypatch):
+    bus = SmallQueueBus()
+    logger = JsonlLogger(output_dir=str(tmp_path))
+    llm, ingestor = subscribed_summarizer(summarizer_pipeline, bus)
+    save(logger, bus, "first")
+    ingestor.catch_up()
+    ingestor.poll(timeout=0.1)
+
+    reads = count_reads(monkeypatch)
+    for i in range(3):
+        save(logger, bus, f"burst {i}") # キューは1件しか持てない
+    ingestor.poll(timeout=0.1)
+    assert len(reads) == 1
+    assert llm.prompts_processed == 4
+    ingestor.poll(timeout=0.1)
+    assert llm.prompts_processed == 4
@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.retention_use_case import LogRetentionUseCase
+from src.logger.application.summarization_use_case import LogSummarizationUseCase
+from src.logger.infrastructure.persistence.log_files import open_log
+
+# (is_screen_change, app_name, transcript)
+ROWS = [
+    (True, "Editor", ""),
+    (False, "Editor", "hi"),
+    (False, "Editor", "there"),
+    (True, "Browser", ""),
+    (False, "Browser", ""),
+    (False, "Browser", "ok"),
+    (True, "Terminal", ""),
+    (True, "Terminal", "bye"),
+]
+
+
+def write_old_day(root):
+    date_str = (datetime.now() - timedelta(days=10)).strftime("%Y-%m-%d")
+    day_dir = root / date_str
+    day_dir.mkdir(parents=True)
+    with open(day_dir / "activity.jsonl", "w", encoding="utf-8") as f:
+        for i, (change, app, transcript) in enumerate(ROWS):
+            entry = {
+                "timestamp": f"{date_str}T10:00:{i:02d}",
+                "screen": {"app_name": app, "window_title": app, "ocr_text": f"{app} {i}" if change else ""},
+                "audio": {"transcript": transcript},
+                "metadata": {"is_screen_change": change}
+            }
+            f.write(json.dumps(entry) + "\n")
+    return date_str, day_dir
+
+
+@pytest.fixture
+def build_summarizers(tmp_path, summarizer_pipeline):
+    """visual / audio の2つの要約を、同じ LLM と LogIngestionService に繋ぐ"""
+    def build():
+        llm, visual, ingestor = summarizer_pipeline(summary_type="visual", chunk_size=2)
+        audio = LogSummarizationUseCase(llm, summary_type="audio", logs_root_dir=str(tmp_path), chunk_size=2)
+        ingestor.add_consumer(audio)
+        return llm, ingestor, [visual, audio]
+    return build
+
+
+def assert_checkpoints_point_at_the_end(root, date_str, day_dir):
+    with open_log(str(day_dir / "activity.jsonl.gz"), "rb") as f:
+        length = len(f.read())
+    for summary_type in ("visual", "audio"):
+        with open(root / f"summarizer_state_{summary_type}.json", encoding="utf-8") as f:
+            saved = json.load(f)[date_str]
+        assert saved["offset"] == length
+        assert saved["size"] == os.path.getsize(day_dir / "activity.jsonl.gz")
+
+
+@pytest.mark.parametrize("policy", ["thin", "drop"])
+def test_compacted_day_is_not_summarized_again_after_reload(tmp_path, build_summarizers, policy):
+    date_str, day_dir = write_old_day(tmp_path)
+    llm, ingestor, _ = build_summarizers()
+    ingestor.run_once()
+    assert llm.prompts_processed == 4 # visual 2 チャンク + audio 2 チャンク
+
+    report = LogRetentionUseCase(str(tmp_path), retention_days=7, static_policy=policy).run_once()
+    assert report["compacted_days"] == [date_str]
+    assert not (day_dir / "activity.jsonl").exists()
+    with open_log(str(day_dir / "activity.jsonl.gz"), "rt") as f:
+        compacted = [json.loads(line) for line in f]
+    if policy == "drop":
+        assert all(e["metadata"]["is_screen_change"] for e in compacted)
+    else:
+        assert [e["audio"]["transcript"] for e in compacted if not e["metadata"]["is_screen_change"]] == ["hi there", "ok"]
+    assert_checkpoints_point_at_the_end(tmp_path, date_str, day_dir)
+
+    # 状態ファイルから読み直した要約は、圧縮後のファイルから何も要約し直さない
+    llm, ingestor, _ = build_summarizers()
+    ingestor.run_once()
+    ingestor.run_once()
+    assert llm.prompts_processed == 0
+
+
+@pytest.mark.parametrize("policy", ["thin", "drop"])
+def test_running_summarizers_translate_checkpoints_on_their_own_thread(tmp_path, build_summarizers, policy):
+    date_str, day_dir = write_old_day(tmp_path)
+    llm, ingestor, summarizers = build_summarizers()
+    ingestor.run_once()
+    calls = llm.prompts_processed
+
+    job = LogRetentionUseCase(str(tmp_path), retention_days=7, static_policy=policy)
+
+    def hand_over(day, line_map):
+        ingestor.request_reload(day, line_map)
+        # 差し替え前に読み込みが回っても、まだ読み替えない (先頭から読み直したりもしない)
+        ingestor.run_once()
+        # 要約側が古い位置をメモリから書き出しても、読み替えは後で要約側が行う
+        for summarizer in summarizers:
+            summarizer._mark_state_dirty()
+            summarizer.flush_state()
+
+    job.state_translator = hand_over
+    job.run_once()
+    ingestor.run_once()
+    ingestor.run_once()
+    assert llm.prompts_processed == calls
+    assert_checkpoints_point_at_the_end(tmp_path, date_str, day_dir)
+
+    llm, ingestor, _ = build_summarizers()
+    ingestor.run_once()
+    assert llm.prompts_processed == 0
+
+
+def test_running_summarizers_forget_days_deleted_for_the_disk_budget(tmp_path, build_summarizers):
+    date_str, day_dir = write_old_day(tmp_path)
+    llm, ingestor, summarizers = build_summarizers()
+    ingestor.run_once()
+
+    job = LogRetentionUseCase(str(tmp_path), retention_days=30, disk_budget_mb=0)
+    job.state_forgetter = ingestor.request_forget
+    assert job.run_once()["deleted_days"] == [date_str]
+    assert not day_dir.exists()
+
+    # 消す前に要約側がメモリ上の状態を書き出しても、消した日は復活しない
+    for summarizer in summarizers:
+        summarizer._mark_state_dirty()
+        summarizer.flush_state()
+    ingestor.run_once()
+    for summary_type in ("visual", "audio"):
+        with open(tmp_path / f"summarizer_state_{summary_type}.json", encoding="utf-8") as f:
+            assert date_str not in json.load(f)
+    assert all(date_str not in s.state for s in summarizers)
@@ -0,0 +1,128 @@
+import gzip
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.persistence.log_files import read_appended_entries, offset_after_lines
+
+
+def line(i, text="edit"):
+    entry = {
+        "timestamp": f"2025-01-06T10:00:{i:02d}",
+        "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": f"{text} {i}"},
+        "audio": {"transcript": ""},
+        "metadata": {"is_screen_change": True}
+    }
+    return (json.dumps(entry) + "\n").encode("utf-8")
+
+
+def test_partial_trailing_line_is_left_for_the_next_read(tmp_path):
+    path = tmp_path / "activity.jsonl"
+    first, second, third = line(0), line(1), line(2)
+    path.write_bytes(first + second + third[:10])
+
+    entries, position = read_appended_entries(str(path), 0)
+    assert [e["screen"]["ocr_text"] for e, _ in entries] == ["edit 0", "edit 1"]
+    assert [end for _, end in entries] == [len(first), len(first) + len(second)]
+    assert position == len(first) + len(second)
+
+    # 書き込みが終わったら、その行だけを読む
+    with open(path, "ab") as f:
+        f.write(third[10:])
+    entries, position = read_appended_entries(str(path), position)
+    assert [e["screen"]["ocr_text"] for e, _ in entries] == ["edit 2"]
+    assert position == os.path.getsize(path)
+
+
+def test_reads_appended_lines_from_a_compressed_file(tmp_path):
+    path = tmp_path / "activity.jsonl.gz"
+    with gzip.open(path, "wb") as f:
+        f.write(line(0) + line(1))
+    with gzip.open(path, "ab") as f: # 圧縮後に追記されたメンバー
+        f.write(line(2))
+
+    entries, position = read_appended_entries(str(path), len(line(0)))
+    assert [e["screen"]["ocr_text"] for e, _ in entries] == ["edit 1", "edit 2"]
+    assert position == len(line(0) + line(1) + line(2))
+
+
+def test_offset_after_lines_skips_complete_lines_only(tmp_path):
+    path = tmp_path / "activity.jsonl"
+    path.write_bytes(line(0) + line(1) + line(2)[:5])
+    assert offset_after_lines(str(path), 1) == len(line(0))
+    assert offset_after_lines(str(path), 5) == len(line(0) + line(1))
+
+
+@pytest.fixture
+def build(summarizer_pipeline):
+    return lambda: summarizer_pipeline(summary_type="visual", chunk_size=1)
+
+
+def test_only_appended_lines_are_summarized(today_log, build):
+    path = today_log
+    path.write_bytes(line(0) + line(1))
+    llm, _, ingestor = build()
+    ingestor.run_once()
+    assert llm.prompts_processed == 2
+
+    ingestor.run_once() # 変化なし
+    assert llm.prompts_processed == 2
+    with open(path, "ab") as f:
+        f.write(line(2))
+    ingestor.run_once()
+    assert llm.prompts_processed == 3
+
+    # 再起動しても、状態ファイルの位置から続ける
+    llm, _, ingestor = build()
+    ingestor.run_once()
+    assert llm.prompts_processed == 0
+
+
+def test_replaced_or_truncated_file_is_read_from_the_start(tmp_path, today_log, build):
+    path = today_log
+    path.write_bytes(line(0) + line(1) + line(2))
+    llm, _, ingestor = build()
+    ingestor.run_once()
+    assert llm.prompts_processed == 3
+
+    # 別のファイルに差し替え (inode が変わる)
+    replacement = tmp_path / "replacement.jsonl"
+    replacement.write_bytes(line(0, "new") + line(1, "new") + line(2, "new") + line(3, "new"))
+    os.replace(replacement, path)
+    ingestor.run_once()
+    assert llm.prompts_processed == 7
+
+    # 同じファイルを切り詰めて書き直す (サイズが縮む)
+    with open(path, "wb") as f:
+        f.write(line(0, "short"))
+    ingestor.run_once()
+    assert llm.prompts_processed == 8
+
+    # 起動し直した時も、保存した inode / サイズと違えば先頭から
+    llm, _, ingestor = build()
+    os.link(path, tmp_path / "old.jsonl") # 古い inode を残し、新しいファイルで使い回させない
+    replacement.write_bytes(line(0, "again") + line(1, "again"))
+    os.replace(replacement, path)
+    ingestor.run_once()
+    assert llm.prompts_processed == 2
+
+
+def test_legacy_line_count_state_is_migrated_to_a_byte_offset(tmp_path, today_log, build):
+    path = today_log
+    path.write_bytes(line(0) + line(1) + line(2))
+    date_str = path.parent.name
+    with open(tmp_path / "summarizer_state_visual.json", "w") as f:
+        json.dump({date_str: 2}, f) # 旧形式: 処理済み行数
+
+    llm, _, ingestor = build()
+    ingestor.run_once()
+    assert llm.prompts_processed == 1 # 3行目だけ
+
+    with open(tmp_path / "summarizer_state_visual.json") as f:
+        saved = json.load(f)[date_str]
+    assert saved["offset"] == os.path.getsize(path)
+    assert (saved["inode"], saved["size"]) == (os.stat(path).st_ino, os.path.getsize(path))
@@ -0,0 +1,94 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.metrics import MetricsRegistry, MetricsDumper, RollingHistogram, hot_path_metrics
+from src.logger.application.use_cases import ScreenMonitoringUseCase
+from src.logger.domain.services import SimilarityChecker
+from src.logger.infrastructure.mac_os.fake_services import FakeScreenCapturer, FakeOcrService, FakeWindowInfoService
+from src.logger.infrastructure.persistence.jsonl_logger import JsonlLogger
+
+
+def test_histogram_percentiles_cover_the_recent_window():
+    histogram = RollingHistogram(window=100)
+    for value in range(1, 101):
+        histogram.observe(value / 1000)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 100
+    assert abs(snapshot["p50"] - 0.0505) < 1e-9
+    assert abs(snapshot["p99"] - 0.09901) < 1e-9
+    assert snapshot["max"] == 0.1
+
+    # 古い値は押し出され、累計だけが残る
+    for _ in range(100):
+        histogram.observe(1.0)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 200
+    assert snapshot["p50"] == snapshot["max"] == 1.0
+    assert abs(snapshot["total"] - (5.05 + 100)) < 1e-9
+
+
+def test_execute_step_records_stage_timings_and_counters(tmp_path):
+    hot_path_metrics.reset()
+    use_case = ScreenMonitoringUseCase(
+        screen_service=FakeScreenCapturer(change_every=3),
+        ocr_service=FakeOcrService(),
+        window_service=FakeWindowInfoService(),
+        persistence_service=JsonlLogger(output_dir=str(tmp_path)),
+        similarity_service=SimilarityChecker()
+    )
+    for _ in range(9):
+        use_case.execute_step()
+
+    metrics = hot_path_metrics.snapshot()
+    counters = metrics["counters"]
+    assert counters["monitor.frames"] == 9
+    assert counters["monitor.frames_skipped"] == 6
+    assert counters["monitor.ocr_runs"] == 3
+    assert counters["monitor.entries_saved"] == 3
+    written = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(tmp_path) for f in files)
+    assert counters["persist.bytes_written"] == written
+
+    timers = metrics["timers"]
+    assert timers["monitor.step"]["count"] == 9
+    assert timers["monitor.capture"]["count"] == 9
+    assert timers["monitor.ocr"]["count"] == 3
+    assert timers["monitor.persist"]["count"] == 3
+    assert "monitor.window" in timers
+
+
+def test_dumper_appends_snapshots_with_counter_deltas(tmp_path):
+    registry = MetricsRegistry()
+    path = str(tmp_path / "metrics.jsonl")
+    dumper = MetricsDumper(registry, path, interval=60.0)
+
+    registry.increment("monitor.frames", 5)
+    registry.observe("monitor.ocr", 0.2)
+    dumper.dump()
+    registry.increment("monitor.frames", 2)
+    dumper.stop() # 止める時にも書き出す
+
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [row["counters"]["monitor.frames"] for row in rows] == [5, 7]
+    assert [row["counter_deltas"]["monitor.frames"] for row in rows] == [5, 2]
+    assert rows[0]["timers"]["monitor.ocr"]["p95"] == 0.2
+
+
+def test_dumper_rotates_and_disabled_registry_records_nothing(tmp_path):
+    registry = MetricsRegistry()
+    path = str(tmp_path / "metrics.jsonl")
+    dumper = MetricsDumper(registry, path, max_bytes=1)
+    dumper.dump()
+    dumper.dump()
+    assert os.path.exists(path + ".1")
+    with open(path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+    disabled = MetricsRegistry(enabled=False)
+    with disabled.timer("monitor.ocr"):
+        pass
+    disabled.increment("monitor.frames")
+    assert disabled.snapshot() == {"timers": {}, "counters": {}}
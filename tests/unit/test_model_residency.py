@@ -0,0 +1,163 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.ai.residency import ModelResidencyManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeModels:
+    """読み込むたびに使用メモリが 100 増え、手放すと戻る偽のモデル"""
+    def __init__(self):
+        self.memory = 0
+        self.loaded = []
+        self.unloaded = []
+
+    def load(self):
+        self.memory += 100
+        model = f"model-{len(self.loaded)}"
+        self.loaded.append(model)
+        return model
+
+    def unload(self, model):
+        self.memory -= 100
+        self.unloaded.append(model)
+
+
+def make_manager(idle_unload_seconds=60.0):
+    clock, models = FakeClock(), FakeModels()
+    manager = ModelResidencyManager(
+        "fake",
+        loader=models.load,
+        unloader=models.unload,
+        idle_unload_seconds=idle_unload_seconds,
+        memory_probe=lambda: models.memory,
+        clock=clock
+    )
+    return manager, clock, models
+
+
+def test_loads_lazily_on_first_use_only():
+    manager, _, models = make_manager()
+    assert not manager.is_loaded
+    assert models.loaded == []
+
+    with manager.use() as model:
+        assert model == "model-0"
+    with manager.use() as model:
+        assert model == "model-0"
+
+    assert models.loaded == ["model-0"]
+    metrics = manager.get_metrics()
+    assert metrics["loads"] == 1
+    assert metrics["reloads"] == 0
+    assert metrics["resident"]
+    assert metrics["resident_bytes"] == 100
+
+
+def test_unloads_after_idle_period_and_reloads():
+    manager, clock, models = make_manager(idle_unload_seconds=60.0)
+    with manager.use():
+        pass
+
+    clock.now += 59
+    assert not manager.unload_if_idle()
+    clock.now += 1
+    assert manager.unload_if_idle()
+    assert models.unloaded == ["model-0"]
+    assert not manager.is_loaded
+    assert manager.get_metrics()["resident_bytes"] == 0
+
+    with manager.use() as model:
+        assert model == "model-1"
+    metrics = manager.get_metrics()
+    assert metrics["loads"] == 2
+    assert metrics["reloads"] == 1
+    assert metrics["unloads"] == 1
+    assert metrics["last_reload_seconds"] >= 0.0
+
+
+def test_never_unloads_while_in_use():
+    manager, clock, models = make_manager(idle_unload_seconds=10.0)
+    manager.acquire()
+    clock.now += 3600
+    assert not manager.unload_if_idle()
+    assert not manager.unload()
+    manager.release()
+
+    # release() からの経過時間で判定する
+    assert not manager.unload_if_idle()
+    clock.now += 10
+    assert manager.unload_if_idle()
+    assert models.unloaded == ["model-0"]
+
+
+def test_stays_resident_without_idle_limit():
+    manager, clock, models = make_manager(idle_unload_seconds=None)
+    with manager.use():
+        pass
+    clock.now += 10 ** 6
+    assert not manager.unload_if_idle()
+    assert manager.is_loaded
+    assert models.unloaded == []
+
+
+def test_loader_failure_propagates_and_retries_next_time():
+    attempts = []
+
+    def flaky_loader():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("download failed")
+        return "model"
+
+    manager = ModelResidencyManager("flaky", loader=flaky_loader, memory_probe=None)
+    with pytest.raises(RuntimeError):
+        with manager.use():
+            pass
+    assert not manager.is_loaded
+    assert manager.get_metrics()["in_use"] == 0
+
+    with manager.use() as model:
+        assert model == "model"
+    assert manager.get_metrics()["loads"] == 1
+
+
+def test_metrics_do_not_wait_for_a_slow_load():
+    started, finish = threading.Event(), threading.Event()
+
+    def slow_loader():
+        started.set()
+        finish.wait(5)
+        return "model"
+
+    manager = ModelResidencyManager("slow", loader=slow_loader, memory_probe=None)
+    users = [threading.Thread(target=manager.acquire) for _ in range(2)]
+    for t in users:
+        t.start()
+    assert started.wait(5)
+
+    # 読み込み中でも集計はすぐ返る
+    metrics_thread = threading.Thread(target=manager.get_metrics)
+    metrics_thread.start()
+    metrics_thread.join(1)
+    assert not metrics_thread.is_alive()
+    assert not manager.unload() # 読み込みが終わるまで手放せない
+
+    finish.set()
+    for t in users:
+        t.join(5)
+    metrics = manager.get_metrics()
+    assert metrics["loads"] == 1 # 同時に使い始めても読み込みは1回
+    assert metrics["in_use"] == 2
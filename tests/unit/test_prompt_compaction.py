@@ -0,0 +1,108 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.prompt_compaction import PromptCompactor
+
+
+def entry(second, app, title, ocr="", transcript=""):
+    return {
+        "timestamp": f"2025-01-06T10:00:{second:02d}",
+        "screen": {"app_name": app, "window_title": title, "ocr_text": ocr},
+        "audio": {"transcript": transcript},
+        "metadata": {"is_screen_change": True}
+    }
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def count_ocr_lines(text):
+    # 見出しや音声は数えず、OCR 行1つを1トークンとする
+    return text.count("OCR:")
+
+
+def test_consecutive_entries_of_one_window_become_a_span():
+    entries = [
+        entry(0, "Editor", "main.py", ocr="def main(): print('hello world')"),
+        entry(5, "Editor", "main.py", ocr="def main(): print('hello world!')"), # ほぼ同じ
+        entry(9, "Editor", "main.py", ocr="SELECT * FROM users WHERE id = 42"),
+        entry(12, "Browser", "docs", transcript="let's read the docs"),
+        entry(15, "Browser", "docs", transcript="let's read the docs"), # 同じ発話の続き
+    ]
+    text, stats = PromptCompactor(max_log_tokens=None).compact(entries, count_words)
+
+    assert stats == {"entries": 5, "spans": 2, "ocr_suppressed": 1, "ocr_dropped": 0}
+    assert text == (
+        "[10:00:00-10:00:09] App: Editor, Title: main.py (3 entries)\n"
+        "OCR: def main(): print('hello world')\n"
+        "OCR: SELECT * FROM users WHERE id = 42\n"
+        "---\n"
+        "[10:00:12-10:00:15] App: Browser, Title: docs (2 entries)\n"
+        "Audio: let's read the docs\n"
+        "---\n"
+    )
+
+
+def test_returning_to_a_window_starts_a_new_span():
+    entries = [
+        entry(0, "Editor", "main.py", ocr="code"),
+        entry(1, "Slack", "general", ocr="chat"),
+        entry(2, "Editor", "main.py", ocr="code"),
+    ]
+    text, stats = PromptCompactor(max_log_tokens=None).compact(entries, count_words)
+    assert stats["spans"] == 3 and stats["ocr_suppressed"] == 0
+    assert text.startswith("[10:00:00] App: Editor, Title: main.py\nOCR: code\n---\n")
+
+
+def test_over_budget_keeps_one_ocr_per_span_and_all_audio():
+    entries = [
+        entry(0, "Editor", "report.md", ocr="quarterly sales report"),
+        entry(1, "Editor", "report.md", ocr="invoice 2024-03 total 1,200 USD"),
+        entry(2, "Editor", "report.md", ocr="quarterly sales report draft notes"),
+        entry(3, "Editor", "report.md", ocr="tests passed: 42, failed: 0"),
+        entry(4, "Slack", "general", ocr="lunch at noon?", transcript="sure"),
+        entry(5, "Mail", "inbox", ocr="meeting moved to 3pm", transcript="ok"),
+    ]
+    text, stats = PromptCompactor(max_log_tokens=3).compact(entries, count_ocr_lines)
+
+    assert stats["ocr_dropped"] == 3
+    assert count_ocr_lines(text) == 3
+    for kept in ["OCR: quarterly sales report\n", "OCR: lunch at noon?\n", "OCR: meeting moved to 3pm\n"]:
+        assert kept in text
+    assert "Audio: sure\n" in text and "Audio: ok\n" in text
+    assert "(4 entries)" in text
+
+
+def test_spare_budget_goes_to_the_least_similar_ocr():
+    entries = [
+        entry(0, "Editor", "report.md", ocr="quarterly sales report"),
+        entry(1, "Editor", "report.md", ocr="quarterly sales report draft notes"),
+        entry(2, "Editor", "report.md", ocr="invoice 2024-03 total 1,200 USD"),
+    ]
+    text, stats = PromptCompactor(max_log_tokens=2).compact(entries, count_ocr_lines)
+
+    assert stats["ocr_suppressed"] == 0 and stats["ocr_dropped"] == 1
+    assert "draft notes" not in text # 既に選んだ行に似ている方を落とす
+    # 元の順番で並ぶ
+    assert text.index("quarterly sales report") < text.index("invoice")
+
+
+def test_summarizer_records_compaction_stats(tmp_path, summarizer_pipeline):
+    day_dir = tmp_path / "2025-01-06"
+    day_dir.mkdir()
+    with open(day_dir / "activity.jsonl", "w", encoding="utf-8") as f:
+        for i in range(4):
+            f.write(json.dumps(entry(i, "Editor", "main.py", ocr="def main(): pass")) + "\n")
+    llm, summarizer, ingestor = summarizer_pipeline(
+        summary_type="visual", chunk_size=4, prompt_compactor=PromptCompactor()
+    )
+    ingestor.run_once()
+
+    assert llm.prompts_processed == 1
+    stats = summarizer.compaction_stats
+    assert stats["chunks"] == 1
+    assert 0 < stats["tokens_after"] < stats["tokens_before"]
@@ -0,0 +1,85 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.persistence.prompt_templates import (
+    DEFAULT_PROMPTS_DIR,
+    PromptTemplateCache,
+    compile_template,
+)
+
+VALUES = {
+    "start_time": "2025-01-06T10:00:00",
+    "end_time": "2025-01-06T10:05:00",
+    "log_text": "[10:00:00] App: Editor, Title: main.py\nOCR: {log_text} edit\n---\n",
+}
+
+
+def naive_render(content):
+    """テンプレートを毎回 replace で埋めていた頃と同じ結果"""
+    return content.replace("{start_time}", VALUES["start_time"]) \
+                  .replace("{end_time}", VALUES["end_time"]) \
+                  .replace("{log_text}", VALUES["log_text"])
+
+
+def write_template(path, content, mtime_ns):
+    path.write_text(content, encoding="utf-8")
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_render_fills_placeholders_like_replace():
+    content = 'Summarize.\n{{"summary": "..."}}\nFrom {start_time} to {end_time}:\n{log_text}\nJSON:'
+    template = compile_template("t.txt", content)
+
+    assert template.static_prefix == 'Summarize.\n{{"summary": "..."}}\nFrom '
+    # ログ本文に "{log_text}" が含まれていても2重に置き換えない
+    assert template.render(**VALUES) == naive_render(content)
+
+
+def test_template_without_leading_text_has_no_static_prefix():
+    template = compile_template("t.txt", "{log_text}\nSummarize.")
+
+    assert template.static_prefix == ""
+    assert template.render(**VALUES) == VALUES["log_text"] + "\nSummarize."
+
+
+def test_cache_reloads_only_when_mtime_changes(tmp_path):
+    path = tmp_path / "t.txt"
+    write_template(path, "Old {log_text}", 1_000_000_000)
+    cache = PromptTemplateCache(str(tmp_path))
+
+    first = cache.get("t.txt")
+    assert cache.get("t.txt") is first
+
+    # mtime が同じなら内容を書き換えても読み直さない
+    write_template(path, "New {log_text}", 1_000_000_000)
+    assert cache.get("t.txt") is first
+
+    write_template(path, "New {log_text}", 2_000_000_000)
+    reloaded = cache.get("t.txt")
+    assert reloaded.static_prefix == "New "
+    assert reloaded.version != first.version
+
+    cache.invalidate("t.txt")
+    assert cache.get("t.txt") is not reloaded
+
+
+def test_missing_template_raises_os_error(tmp_path):
+    with pytest.raises(OSError):
+        PromptTemplateCache(str(tmp_path)).get("missing.txt")
+
+
+@pytest.mark.parametrize("name", sorted(n for n in os.listdir(DEFAULT_PROMPTS_DIR) if n.endswith(".txt")))
+def test_shipped_templates_start_with_their_static_prefix(name):
+    with open(os.path.join(DEFAULT_PROMPTS_DIR, name), "r", encoding="utf-8") as f:
+        content = f.read()
+    template = PromptTemplateCache().get(name)
+    prompt = template.render(**VALUES)
+
+    # GemmaLlmProvider はこの先頭部分の KV キャッシュを使い回すので、空でなく本当に先頭である必要がある
+    assert template.static_prefix
+    assert prompt.startswith(template.static_prefix)
+    assert prompt == naive_render(content)
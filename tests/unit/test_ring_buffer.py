@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.ai.ring_buffer import AudioRingBuffer
+
+
+def samples(start, n):
+    return np.arange(start, start + n, dtype=np.float32)
+
+
+def test_wrapped_range_is_read_as_one_contiguous_view():
+    ring = AudioRingBuffer(8)
+    ring.write(samples(0, 6))
+    ring.consume(5)
+    assert ring.write(samples(6, 6)) == 6 # 末尾を越えて先頭に折り返す
+
+    view = ring.peek()
+    assert view.tolist() == list(range(5, 12))
+    assert view.flags.c_contiguous and np.shares_memory(view, ring._buf) # コピーしない
+    assert not view.flags.writeable
+    assert ring.peek(3).tolist() == [5, 6, 7]
+
+    ring.consume(7)
+    assert ring.available() == 0 and ring.free() == 8
+    ring.write(samples(12, 8))
+    assert ring.peek().tolist() == list(range(12, 20))
+
+
+def test_overrun_drops_the_newest_samples_and_keeps_unread_ones():
+    ring = AudioRingBuffer(8)
+    ring.write(samples(0, 6))
+    view = ring.peek()
+    assert ring.write(samples(6, 5)) == 2 # 空きは2つだけ
+    assert view.tolist() == list(range(6)) # 読んでいる範囲は上書きされない
+    assert ring.write(samples(11, 1)) == 0
+
+    assert ring.peek().tolist() == list(range(8))
+    assert ring.get_stats() == {
+        "capacity": 8,
+        "available": 8,
+        "written_samples": 8,
+        "dropped_samples": 4,
+        "overruns": 2,
+        "high_water": 8
+    }
+
+
+def test_consume_never_passes_the_writer():
+    ring = AudioRingBuffer(4)
+    ring.write(samples(0, 2))
+    ring.consume(10)
+    assert ring.read_position == 2 and ring.available() == 0
+
+
+def test_wait_for_wakes_up_on_write():
+    ring = AudioRingBuffer(16)
+    assert ring.wait_for(4, timeout=0.01) is False
+
+    writer = threading.Timer(0.05, lambda: ring.write(samples(0, 4)))
+    writer.start()
+    assert ring.wait_for(4, timeout=2.0) is True
+    writer.join()
+
+
+def test_position_time_counts_back_from_the_last_write(monkeypatch):
+    ring = AudioRingBuffer(1000)
+    assert ring.position_time(0, sample_rate=100) is None
+    monkeypatch.setattr(time, "time", lambda: 50.0)
+    ring.write(samples(0, 300))
+    assert ring.position_time(0, sample_rate=100) == 47.0
+    assert ring.position_time(300, sample_rate=100) == 50.0
+
+
+def test_capacity_must_be_positive():
+    with pytest.raises(ValueError):
+        AudioRingBuffer(0)
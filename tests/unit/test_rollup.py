@@ -0,0 +1,100 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.application.rollup_use_case import RollupSummarizationUseCase, FAILED_SUMMARY_TEXT
+from src.logger.infrastructure.llm.fake_provider import FakeLlmProvider
+from src.logger.infrastructure.persistence.log_files import iter_jsonl
+
+DAY = "2025-01-06"
+
+
+class FlakyLlmProvider(FakeLlmProvider):
+    """最初の failures 回は何も返さない"""
+    def __init__(self, failures):
+        super().__init__(call_overhead_seconds=0, seconds_per_prompt=0)
+        self.failures = failures
+
+    def process_content(self, prompt, static_prefix=None):
+        response = super().process_content(prompt, static_prefix)
+        if self.failures > 0:
+            self.failures -= 1
+            return None
+        return response
+
+
+def add_chunks(root, name, rows):
+    """rows: [(開始時刻 "HH:MM", 要約)]"""
+    day_dir = root / DAY
+    day_dir.mkdir(exist_ok=True)
+    with open(day_dir / name, "a", encoding="utf-8") as f:
+        for start, summary in rows:
+            f.write(json.dumps({
+                "timestamp_start": f"{DAY}T{start}:00",
+                "timestamp_end": f"{DAY}T{start}:59",
+                "summary": summary
+            }) + "\n")
+
+
+def test_only_changed_hours_and_the_day_are_rebuilt(tmp_path, fake_llm):
+    add_chunks(tmp_path, "visual_summary.jsonl", [("09:10", "wrote code"), ("10:05", "reviewed a PR")])
+    add_chunks(tmp_path, "audio_summary.jsonl", [("09:30", "stand-up meeting")])
+    llm = fake_llm()
+    rollup = RollupSummarizationUseCase(llm, logs_root_dir=str(tmp_path))
+
+    assert rollup.run_once() == {"hourly": 2, "daily": 1}
+    hourly = list(iter_jsonl(str(tmp_path / DAY / "hourly_summary.jsonl")))
+    assert [(row["hour"], row["chunks"]) for row in hourly] == [("09", 2), ("10", 1)]
+    [daily] = list(iter_jsonl(str(tmp_path / DAY / "daily_summary.jsonl")))
+    assert daily["date"] == DAY and daily["hours"] == 2
+
+    # 入力が変わらなければ LLM を呼ばない (再起動後も)
+    assert rollup.run_once() == {"hourly": 0, "daily": 0}
+    assert RollupSummarizationUseCase(llm, logs_root_dir=str(tmp_path)).run_once() == {"hourly": 0, "daily": 0}
+    assert llm.calls == 3
+
+    # 10時台にチャンクが増えたら、10時台と1日の概要だけ作り直す
+    add_chunks(tmp_path, "visual_summary.jsonl", [("10:40", "fixed a bug")])
+    assert rollup.run_once() == {"hourly": 1, "daily": 1}
+    assert llm.calls == 5
+    hourly = list(iter_jsonl(str(tmp_path / DAY / "hourly_summary.jsonl")))
+    assert [(row["hour"], row["chunks"]) for row in hourly] == [("09", 2), ("10", 2)]
+
+
+def test_failed_chunk_summaries_are_not_rolled_up(tmp_path, fake_llm):
+    add_chunks(tmp_path, "visual_summary.jsonl", [("09:10", "wrote code")])
+    llm = fake_llm()
+    rollup = RollupSummarizationUseCase(llm, logs_root_dir=str(tmp_path))
+    rollup.run_once()
+
+    add_chunks(tmp_path, "visual_summary.jsonl", [("09:20", FAILED_SUMMARY_TEXT), ("11:00", "  ")])
+    assert rollup.run_once() == {"hourly": 0, "daily": 0}
+    assert llm.calls == 2
+
+
+def test_failed_rollup_is_retried_on_the_next_run(tmp_path):
+    add_chunks(tmp_path, "visual_summary.jsonl", [("09:10", "wrote code")])
+    llm = FlakyLlmProvider(failures=2) # 1時間要約の2回の試行が失敗する
+    rollup = RollupSummarizationUseCase(llm, logs_root_dir=str(tmp_path))
+
+    assert rollup.run_once() == {"hourly": 0, "daily": 0}
+    assert not os.path.exists(tmp_path / DAY / "hourly_summary.jsonl")
+    # 入力ファイルは変わっていないが、作り終えていないので読み直して再試行する
+    assert rollup.run_once() == {"hourly": 1, "daily": 1}
+    assert rollup.run_once() == {"hourly": 0, "daily": 0}
+
+
+def test_state_of_deleted_days_is_dropped(tmp_path, fake_llm):
+    add_chunks(tmp_path, "visual_summary.jsonl", [("09:10", "wrote code")])
+    rollup = RollupSummarizationUseCase(fake_llm(), logs_root_dir=str(tmp_path))
+    rollup.run_once()
+    assert DAY in rollup.state
+
+    for name in os.listdir(tmp_path / DAY):
+        os.remove(tmp_path / DAY / name)
+    os.rmdir(tmp_path / DAY)
+    rollup.run_once()
+    with open(tmp_path / "rollup_state.json") as f:
+        assert json.load(f) == {}
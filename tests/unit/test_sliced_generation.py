@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+pytest.importorskip("mlx_lm") # Apple Silicon 環境でのみ動く
+
+from src.logger.infrastructure.ai.utils import InferenceArbiter, InferencePriority
+from src.logger.infrastructure.llm import gemma_provider
+from src.logger.infrastructure.llm.gemma_provider import GemmaLlmProvider
+
+PIECES = ['{"summary": ', '"wrote', ' code', '"}', ' trailing text']
+
+
+@pytest.fixture
+def arbiter(monkeypatch):
+    arbiter = InferenceArbiter()
+    monkeypatch.setattr(gemma_provider, "inference_arbiter", arbiter)
+    return arbiter
+
+
+def fake_stream(generated, on_token=None):
+    """モデルを読み込まず、決まった断片を1トークンずつ返す stream_generate"""
+    def stream_generate(model, tokenizer, prompt, max_tokens, **kwargs):
+        for i, text in enumerate(PIECES):
+            generated.append(text)
+            if on_token is not None:
+                on_token(i + 1)
+            yield SimpleNamespace(text=text)
+    return stream_generate
+
+
+def test_generation_yields_to_waiting_ocr_between_slices(monkeypatch, arbiter):
+    order = []
+    ocr_done = threading.Event()
+
+    def run_ocr():
+        with arbiter.use(InferencePriority.OCR):
+            order.append("ocr")
+        ocr_done.set()
+
+    def on_token(count):
+        order.append(count)
+        if count == 1: # 生成中に OCR が来る
+            threading.Thread(target=run_ocr).start()
+            deadline = time.monotonic() + 2.0
+            while not arbiter.has_waiters(above=InferencePriority.SUMMARIZATION):
+                assert time.monotonic() < deadline
+                time.sleep(0.005)
+
+    generated = []
+    monkeypatch.setattr(gemma_provider, "stream_generate", fake_stream(generated, on_token))
+    provider = GemmaLlmProvider(slice_tokens=2)
+
+    with arbiter.use(InferencePriority.SUMMARIZATION):
+        text = provider._stream_until_json("prompt", {})
+    ocr_done.wait(2.0)
+
+    assert text == '{"summary": "wrote code"}'
+    # 区切り (2トークン目の後) で OCR に譲り、同じ生成の続きから再開する
+    assert order == [1, 2, "ocr", 3, 4]
+    assert generated == PIECES[:4] # JSON が閉じたら打ち切る
+    assert provider.stats["yields"] == 1
+    assert arbiter.get_metrics()["summarization"]["yields"] == 1
+
+
+def test_generation_keeps_the_arbiter_when_nothing_waits(monkeypatch, arbiter):
+    monkeypatch.setattr(gemma_provider, "stream_generate", fake_stream([]))
+    provider = GemmaLlmProvider(slice_tokens=1)
+    with arbiter.use(InferencePriority.SUMMARIZATION):
+        assert provider._stream_until_json("prompt", {}) == '{"summary": "wrote code"}'
+    assert provider.stats["yields"] == 0
+
+
+def test_slicing_can_be_disabled(monkeypatch, arbiter):
+    monkeypatch.setattr(gemma_provider, "stream_generate", fake_stream([]))
+    monkeypatch.setattr(arbiter, "has_waiters", lambda above=None: True)
+    provider = GemmaLlmProvider(slice_tokens=None)
+    with arbiter.use(InferencePriority.SUMMARIZATION):
+        provider._stream_until_json("prompt", {})
+    assert provider.stats["yields"] == 0
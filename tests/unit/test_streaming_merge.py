@@ -0,0 +1,98 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.domain.entities import TranscriptSegment
+from src.logger.domain.interfaces import TranscriberInterface
+from src.logger.infrastructure.ai.streaming_transcription import HypothesisMerger, StreamingTranscriber
+
+
+def seg(start, end, text):
+    return TranscriptSegment(start, end, text)
+
+
+class FakeTranscriber(TranscriberInterface):
+    """呼ばれるたびに、台本の次の結果 (ウィンドウ先頭からの時刻) を返す"""
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = []
+
+    def transcribe(self, audio, sample_rate):
+        self.calls.append((len(audio), sample_rate))
+        return self.script.pop(0)
+
+
+def texts(segments):
+    return [s.text for s in segments]
+
+
+def test_emits_stable_prefix_before_the_stream_ends():
+    transcriber = FakeTranscriber([
+        # 0-6s: 最後の語がウィンドウの端で切れている
+        [seg(0.0, 1.0, " one"), seg(1.0, 1.8, " two"), seg(2.5, 3.0, " three"), seg(5.6, 6.0, " fo")],
+        # 2-8s: 重なり部分をもう一度認識し、切れていた語も完全に聞こえる
+        [seg(0.5, 1.0, " three"), seg(3.6, 4.3, " four"), seg(4.5, 5.0, " five")],
+    ])
+    stream = StreamingTranscriber(transcriber, sample_rate=10, window_seconds=6.0, hop_seconds=2.0)
+
+    first = stream.process_window(np.zeros(60, dtype=np.float32), window_start=0.0)
+    # 次のウィンドウに含まれない区間は、すぐ確定する
+    assert texts(first) == [" one", " two"]
+    assert texts(stream.merger.tentative) == [" three", " fo"]
+
+    second = stream.process_window(np.zeros(60, dtype=np.float32), window_start=2.0)
+    # 2回続けて同じだった " three" は確定し、ウィンドウの端で切れていた " fo" は " four" に置き換わる
+    assert texts(second) == [" three"]
+    assert texts(stream.merger.tentative) == [" four", " five"]
+
+    assert texts(stream.flush()) == [" four", " five"]
+    assert StreamingTranscriber.join(stream.merger.committed) == "one two three four five"
+    assert transcriber.calls == [(60, 10), (60, 10)]
+
+
+def test_window_times_are_shifted_to_stream_time():
+    transcriber = FakeTranscriber([[seg(0.2, 0.9, "こんにちは")]])
+    stream = StreamingTranscriber(transcriber, sample_rate=10, window_seconds=4.0, hop_seconds=2.0)
+    emitted = stream.process_window(np.zeros(40, dtype=np.float32), window_start=10.0)
+    assert emitted == [seg(10.2, 10.9, "こんにちは")]
+
+
+def test_drops_repeated_word_at_the_seam():
+    merger = HypothesisMerger()
+    merger.update([seg(0.0, 1.0, "今日は"), seg(1.0, 2.0, "いい天気")], final_before=2.0)
+    # 次のウィンドウが、確定済みの最後の語を少しずれた時刻でもう一度認識した
+    emitted = merger.update([seg(1.9, 2.1, "いい天気"), seg(2.2, 3.0, "ですね")], final_before=4.0)
+    assert texts(emitted) == ["ですね"]
+    assert "".join(texts(merger.committed)) == "今日はいい天気ですね"
+
+
+def test_strips_text_overlap_at_the_seam():
+    merger = HypothesisMerger()
+    merger.update([seg(0.0, 3.0, "会議の資料を共有します")], final_before=3.0)
+    emitted = merger.update([seg(2.9, 5.0, "共有します。次に予算です")], final_before=5.0)
+    assert texts(emitted) == ["。次に予算です"]
+
+
+def test_keeps_legitimate_repeats_outside_the_overlap():
+    merger = HypothesisMerger()
+    merger.update([seg(0.0, 1.0, " yes")], final_before=1.0)
+    emitted = merger.update([seg(3.0, 3.5, " yes")], final_before=4.0)
+    assert texts(emitted) == [" yes"]
+
+
+def test_ignores_segments_already_committed():
+    merger = HypothesisMerger()
+    merger.update([seg(0.0, 1.0, "a"), seg(1.0, 2.0, "b")], final_before=2.0)
+    emitted = merger.update([seg(0.0, 1.0, "a"), seg(1.0, 2.0, "b"), seg(2.5, 3.0, "c")], final_before=3.0)
+    assert texts(emitted) == ["c"]
+    assert texts(merger.committed) == ["a", "b", "c"]
+
+
+def test_unstable_tail_is_not_emitted_until_it_agrees():
+    merger = HypothesisMerger()
+    assert merger.update([seg(0.0, 1.0, "x"), seg(1.0, 2.0, "y")], final_before=0.5) == []
+    assert merger.update([seg(0.0, 1.0, "x"), seg(1.0, 2.0, "z")], final_before=0.5) == [seg(0.0, 1.0, "x")]
+    assert texts(merger.tentative) == ["z"]
@@ -0,0 +1,67 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+
+def write_day(root, date_str, count):
+    day_dir = root / date_str
+    day_dir.mkdir(parents=True, exist_ok=True)
+    with open(day_dir / "activity.jsonl", "a", encoding="utf-8") as f:
+        for i in range(count):
+            entry = {
+                "timestamp": f"{date_str}T10:00:{i:02d}",
+                "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": f"line {i}"},
+                "audio": {"transcript": ""},
+                "metadata": {"is_screen_change": True}
+            }
+            f.write(json.dumps(entry) + "\n")
+    return day_dir
+
+
+def test_unchanged_past_day_with_a_partial_chunk_is_sealed_after_the_grace_period(tmp_path, summarizer_pipeline, monkeypatch):
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    day_dir = write_day(tmp_path, yesterday, 1) # チャンク (5件) に満たない
+    llm, summarizer, ingestor = summarizer_pipeline(summary_type="visual", chunk_size=5)
+
+    # 猶予の間はチャンクが溜まるのを待つ
+    ingestor.run_once()
+    ingestor.run_once()
+    assert not summarizer.is_sealed(yesterday)
+    assert llm.calls == 0
+
+    # ファイルは変えずに時計だけ進める (2回目以降のスキャンでは consume() が呼ばれない)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + summarizer.seal_grace_seconds + 1)
+    ingestor.run_once()
+
+    assert summarizer.is_sealed(yesterday)
+    assert llm.calls == 1
+    with open(day_dir / "visual_summary.jsonl", encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+    with open(tmp_path / "summarizer_state_visual.json", encoding="utf-8") as f:
+        state = json.load(f)
+    assert state[yesterday]["sealed"] is True
+    assert state[yesterday]["offset"] == os.path.getsize(day_dir / "activity.jsonl")
+
+    # 封印した日はもう読まない
+    ingestor.run_once()
+    assert llm.calls == 1
+    assert yesterday not in ingestor.scanner.changed_days(sealed=summarizer.sealed_days())
+
+
+def test_past_day_is_not_sealed_while_the_file_has_unread_lines(tmp_path, summarizer_pipeline, monkeypatch):
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    write_day(tmp_path, yesterday, 1)
+    llm, summarizer, ingestor = summarizer_pipeline(summary_type="visual", chunk_size=5)
+    ingestor.run_once()
+
+    # 読んだ後に追記された (まだ consume していない) 日は封印しない
+    write_day(tmp_path, yesterday, 1)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + summarizer.seal_grace_seconds + 1)
+    summarizer.tick()
+    assert not summarizer.is_sealed(yesterday)
@@ -0,0 +1,85 @@
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.persistence.summary_cache import SummaryCache, make_cache_key
+
+
+def tick_clock(monkeypatch):
+    # 同じ時刻にならないよう、呼ぶたびに1秒進む時計
+    clock = itertools.count(1000)
+    monkeypatch.setattr(time, "time", lambda: float(next(clock)))
+
+
+def test_cache_key_changes_with_every_part():
+    base = make_cache_key("visual", "v1", "gemma", "log")
+    assert base == make_cache_key("visual", "v1", "gemma", "log")
+    assert len({
+        base,
+        make_cache_key("audio", "v1", "gemma", "log"),
+        make_cache_key("visual", "v2", "gemma", "log"),
+        make_cache_key("visual", "v1", "other", "log"),
+        make_cache_key("visual", "v1", "gemma", "log!"),
+        make_cache_key("visual", "v1g", "emma", "log"), # 区切りの位置だけ違う
+    }) == 6
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path, monkeypatch):
+    tick_clock(monkeypatch)
+    cache = SummaryCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    cache.put("a", {"summary": "A"})
+    cache.put("b", {"summary": "B"})
+    assert cache.get("a") == {"summary": "A"} # a を使ったので b の方が古い
+    cache.put("c", {"summary": "C"})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"summary": "A"}
+    assert cache.get("c") == {"summary": "C"}
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (3, 1)
+    cache.close()
+
+    # ファイルに残る
+    reopened = SummaryCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    assert reopened.get("c") == {"summary": "C"}
+    reopened.close()
+
+
+def test_lost_state_is_resummarized_from_the_cache(tmp_path, today_log, summarizer_pipeline):
+    with open(today_log, "w", encoding="utf-8") as f:
+        for i in range(4):
+            entry = {
+                "timestamp": f"2025-01-06T10:00:{i:02d}",
+                "screen": {"app_name": "Editor", "window_title": "main.py", "ocr_text": f"edit {i}"},
+                "audio": {"transcript": ""},
+                "metadata": {"is_screen_change": True}
+            }
+            f.write(json.dumps(entry) + "\n")
+
+    def run():
+        cache = SummaryCache(str(tmp_path / "cache.sqlite3"))
+        llm, _, ingestor = summarizer_pipeline(summary_type="visual", chunk_size=2, summary_cache=cache)
+        ingestor.run_once()
+        cache.close()
+        return llm, cache
+
+    llm, cache = run()
+    assert llm.prompts_processed == 2 and cache.stats["stores"] == 2
+
+    os.remove(tmp_path / "summarizer_state_visual.json")
+    llm, cache = run()
+    assert llm.prompts_processed == 0
+    assert cache.stats["hits"] == 2
+    with open(today_log.parent / "visual_summary.jsonl", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    # 既にファイルにある時間帯の要約は書き直さない (ロールアップで2重に数えない)
+    assert [(r["timestamp_start"], r["timestamp_end"]) for r in rows] == [
+        ("2025-01-06T10:00:00", "2025-01-06T10:00:01"),
+        ("2025-01-06T10:00:02", "2025-01-06T10:00:03"),
+    ]
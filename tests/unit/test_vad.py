@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../.."))
+
+from src.logger.infrastructure.ai.vad import FrameVad, VadStats
+
+RATE = 16000
+
+
+def room(seconds, bursts=(), seed=0):
+    """静かな雑音の中に、bursts [(開始秒, 長さ秒)] の間だけ声 (220Hz) を入れる"""
+    rng = np.random.default_rng(seed)
+    audio = rng.normal(0, 0.002, int(RATE * seconds)).astype(np.float32)
+    for start, length in bursts:
+        s, e = int(RATE * start), int(RATE * (start + length))
+        t = np.arange(e - s) / RATE
+        audio[s:e] += (0.3 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+    return audio
+
+
+def test_silence_has_no_speech():
+    vad = FrameVad(sample_rate=RATE)
+    assert vad.detect(room(3)) == []
+    assert vad.detect(np.zeros(100, dtype=np.float32)) == [] # 1フレームに満たない
+
+
+def test_speech_is_padded_on_both_sides():
+    vad = FrameVad(sample_rate=RATE)
+    [(start, end)] = vad.detect(room(3, [(1.0, 1.0)]))
+    # 前後 200ms 広げる (フレーム境界の分だけずれる)
+    assert abs(start - int(RATE * 0.8)) <= vad.frame_len
+    assert abs(end - int(RATE * 2.2)) <= vad.frame_len
+
+
+def test_short_clicks_are_dropped():
+    vad = FrameVad(sample_rate=RATE)
+    assert vad.detect(room(3, [(1.0, 0.05)])) == []
+
+
+def test_close_segments_are_merged():
+    vad = FrameVad(sample_rate=RATE)
+    assert len(vad.detect(room(4, [(0.5, 0.5), (1.3, 0.5)]))) == 1 # 間は 300ms
+    assert len(vad.detect(room(4, [(0.5, 0.5), (2.5, 0.5)]))) == 2
+
+
+def test_loud_background_raises_the_noise_floor():
+    vad = FrameVad(sample_rate=RATE)
+    rng = np.random.default_rng(1)
+    hum = rng.normal(0, 0.02, RATE * 3).astype(np.float32) # min_energy を超える一定の雑音
+    assert vad.detect(hum) == []
+    assert vad.noise_floor > vad.min_energy
+
+
+def test_voiced_audio_joins_segments_with_a_gap():
+    vad = FrameVad(sample_rate=RATE)
+    audio = room(4, [(0.5, 0.5), (2.5, 0.5)])
+    segments = vad.detect(audio)
+    joined = vad.voiced_audio(audio, segments, gap_ms=100)
+    gap = int(RATE * 0.1)
+    assert len(joined) == sum(e - s for s, e in segments) + gap
+    first = segments[0][1] - segments[0][0]
+    assert not joined[first:first + gap].any()
+    assert len(vad.voiced_audio(audio, segments[:1])) == first
+
+
+def test_stats_ratio():
+    stats = VadStats(captured_seconds=10.0, sent_seconds=2.5, chunks=2, skipped_chunks=1)
+    assert stats.to_dict()["sent_ratio"] == 0.25
+    assert VadStats().to_dict()["sent_ratio"] == 0.0